@@ -0,0 +1 @@
+"""Benchmarks for mdivicomtools (not installed with the package; run from a source checkout)."""
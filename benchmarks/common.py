@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+RESULTS_SCHEMA = "mdivicomtools-bench/0.1"
+
+
+def default_workdir() -> Path:
+    """Scratch directory for generated trees: tmpfs (`/dev/shm`) when available, so disk speed does not dominate."""
+    shm = Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK):
+        return shm
+    return Path(tempfile.gettempdir())
+
+
+def make_workdir(prefix: str, workdir: Optional[Path] = None, default: Optional[Path] = None) -> Path:
+    """Create a fresh temp directory for one benchmark run inside `workdir` (created if missing), else `default`."""
+    if workdir:
+        workdir.mkdir(parents=True, exist_ok=True)
+    parent = workdir or default
+    return Path(tempfile.mkdtemp(prefix=prefix, dir=str(parent) if parent else None))
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def environment_info() -> Dict[str, Any]:
+    from mdivicomtools.provenance import core_version
+
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "core_version": core_version(),
+        "git_commit": _git_commit(),
+    }
+
+
+def timed(fn: Callable[[], Any], repeats: int = 1, setup: Optional[Callable[[], Any]] = None) -> Tuple[float, List[float], Any]:
+    """Run `fn` `repeats` times (calling `setup` untimed before each run); return (best, all timings, last result)."""
+    timings: List[float] = []
+    result = None
+    for _ in range(max(1, repeats)):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - t0)
+    return min(timings), timings, result
+
+
+def result_entry(name: str, size: int, best: float, timings: List[float], unit: str = "files", **extra: Any) -> Dict[str, Any]:
+    entry: Dict[str, Any] = {
+        "name": name,
+        "size": size,
+        "unit": unit,
+        "seconds": best,
+        "timings": timings,
+        "per_item_us": (best / size * 1e6) if size else None,
+    }
+    entry.update(extra)
+    return entry
+
+
+def write_results(path: Optional[Path], suite: str, params: Dict[str, Any], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    payload = {
+        "schema": RESULTS_SCHEMA,
+        "suite": suite,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": environment_info(),
+        "params": params,
+        "results": results,
+    }
+    if path is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return payload
+
+
+def load_results(path: Path) -> Dict[str, Any]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if data.get("schema") != RESULTS_SCHEMA:
+        raise SystemExit(f"{path}: not a benchmark results file (schema {data.get('schema')!r})")
+    return data
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 1.2) -> List[Dict[str, Any]]:
+    """Pair results by (name, size); `ratio` is current/baseline seconds, `regression` marks ratio > threshold."""
+    base = {(r["name"], r["size"]): r for r in baseline.get("results", [])}
+    rows = []
+    for r in current.get("results", []):
+        b = base.get((r["name"], r["size"]))
+        if b is None or not b.get("seconds"):
+            rows.append({"name": r["name"], "size": r["size"], "baseline": None, "current": r["seconds"], "ratio": None, "regression": False})
+            continue
+        ratio = r["seconds"] / b["seconds"]
+        rows.append(
+            {
+                "name": r["name"],
+                "size": r["size"],
+                "baseline": b["seconds"],
+                "current": r["seconds"],
+                "ratio": ratio,
+                "regression": ratio > threshold,
+            }
+        )
+    return rows
+
+
+def format_table(rows: List[Dict[str, Any]]) -> str:
+    lines = [f"{'benchmark':<36} {'size':>9} {'baseline s':>11} {'current s':>11} {'ratio':>7}"]
+    for row in rows:
+        baseline = f"{row['baseline']:.4f}" if row["baseline"] is not None else "-"
+        ratio = f"{row['ratio']:.2f}" if row["ratio"] is not None else "-"
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(f"{row['name']:<36} {row['size']:>9} {baseline:>11} {row['current']:>11.4f} {ratio:>7}{flag}")
+    return "\n".join(lines)
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    lines = [f"{'benchmark':<36} {'size':>9} {'seconds':>10} {'us/item':>9}"]
+    for r in results:
+        per_item = f"{r['per_item_us']:.2f}" if r.get("per_item_us") is not None else "-"
+        lines.append(f"{r['name']:<36} {r['size']:>9} {r['seconds']:>10.4f} {per_item:>9}")
+    return "\n".join(lines)
+
+
+def report_comparison(baseline_path: Path, current: Dict[str, Any], threshold: float) -> int:
+    """Print a comparison table; returns the number of regressions."""
+    rows = compare_results(load_results(baseline_path), current, threshold=threshold)
+    print(format_table(rows))
+    regressions = sum(1 for row in rows if row["regression"])
+    if regressions:
+        print(f"{regressions} regression(s) above {threshold:.2f}x", file=sys.stderr)
+    return regressions
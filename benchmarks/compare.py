@@ -0,0 +1,28 @@
+"""
+Compare two benchmark result files (any suite):
+
+    python -m benchmarks.compare baseline.json current.json [--threshold 1.2] [--fail-on-regression]
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import List, Optional
+
+from .common import load_results, report_comparison
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(prog="python -m benchmarks.compare", description="Compare benchmark results between commits or versions.")
+    p.add_argument("baseline", type=Path)
+    p.add_argument("current", type=Path)
+    p.add_argument("--threshold", type=float, default=1.2, help="Slowdown ratio reported as a regression.")
+    p.add_argument("--fail-on-regression", action="store_true", help="Exit 1 if any benchmark regressed.")
+    args = p.parse_args(argv)
+
+    regressions = report_comparison(args.baseline, load_results(args.current), args.threshold)
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
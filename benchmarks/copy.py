@@ -0,0 +1,122 @@
+"""
+Large-file copy throughput: `shutil.copy2` (the previous `copy_item` path) against
+`mdivicomtools.utils.copyengine.copy_file` and each of its strategies.
+
+    python -m benchmarks.copy --sizes-mib 256,1024 --workdir /data/scratch --out bench/copy.json
+
+Use a `--workdir` on the filesystem you care about: tmpfs numbers say little about disks or NFS.
+Each measurement copies from a freshly written source; `--drop-caches` (root only) flushes the
+page cache first so reads hit the device.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from mdivicomtools.utils import copyengine
+
+from .common import format_results, make_workdir, report_comparison, result_entry, timed, write_results
+
+MIB = 1024 * 1024
+
+
+def _write_source(path: Path, size: int, seed: int) -> None:
+    block = (seed.to_bytes(8, "little") * (MIB // 8))
+    with open(path, "wb") as fh:
+        remaining = size
+        while remaining > 0:
+            n = min(remaining, len(block))
+            fh.write(block[:n])
+            remaining -= n
+
+
+def _drop_caches() -> None:
+    os.sync()
+    try:
+        with open("/proc/sys/vm/drop_caches", "w") as fh:
+            fh.write("3\n")
+    except OSError:
+        print("warning: cannot drop page cache (needs root); reads may be served from memory", file=sys.stderr)
+
+
+def _strategy(name: str) -> Callable[[Path, Path], Any]:
+    if name == "shutil.copy2":
+        return lambda src, dst: shutil.copy2(src, dst)
+    if name == "copy_file":
+        return lambda src, dst: copyengine.copy_file(src, dst)
+
+    def forced(src: Path, dst: Path) -> Any:
+        saved = (copyengine._HAVE_COPY_FILE_RANGE, copyengine._HAVE_SENDFILE)
+        copyengine._HAVE_COPY_FILE_RANGE = name == "copy_file[copy_file_range]" and saved[0]
+        copyengine._HAVE_SENDFILE = name == "copy_file[sendfile]" and saved[1]
+        try:
+            return copyengine.copy_file(src, dst)
+        finally:
+            copyengine._HAVE_COPY_FILE_RANGE, copyengine._HAVE_SENDFILE = saved
+
+    return forced
+
+
+STRATEGIES = ("shutil.copy2", "copy_file", "copy_file[copy_file_range]", "copy_file[sendfile]", "copy_file[chunked]")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(prog="python -m benchmarks.copy", description="Large-file copy throughput.")
+    p.add_argument("--sizes-mib", default="256,1024", help="Comma-separated file sizes in MiB.")
+    p.add_argument("--strategies", default=",".join(STRATEGIES), help=f"Comma-separated subset of: {', '.join(STRATEGIES)}")
+    p.add_argument("--repeats", type=int, default=3)
+    p.add_argument("--workdir", type=Path, default=None, help="Directory on the filesystem to measure (default: system temp dir).")
+    p.add_argument("--drop-caches", action="store_true", help="Drop the page cache before every copy (root only).")
+    p.add_argument("--out", type=Path, default=None)
+    p.add_argument("--compare", type=Path, default=None)
+    p.add_argument("--threshold", type=float, default=1.2)
+    p.add_argument("--fail-on-regression", action="store_true")
+    args = p.parse_args(argv)
+
+    sizes = [int(s) * MIB for s in args.sizes_mib.split(",") if s.strip()]
+    strategies = [s for s in args.strategies.split(",") if s]
+    unknown = set(strategies) - set(STRATEGIES)
+    if unknown:
+        raise SystemExit(f"Unknown strategies: {', '.join(sorted(unknown))}")
+
+    workdir = make_workdir("mdivicom-copy-bench-", args.workdir)
+    results: List[Dict[str, Any]] = []
+    try:
+        for size in sizes:
+            src = workdir / f"source-{size // MIB}MiB.bin"
+            _write_source(src, size, seed=size)
+            dst = workdir / "copy.bin"
+            for name in strategies:
+                copy = _strategy(name)
+
+                def setup() -> None:
+                    if dst.exists():
+                        dst.unlink()
+                    if args.drop_caches:
+                        _drop_caches()
+
+                best, timings, _ = timed(lambda: copy(src, dst), repeats=args.repeats, setup=setup)
+                if dst.stat().st_size != size:
+                    raise SystemExit(f"{name}: wrong destination size")
+                results.append(result_entry(name, size // MIB, best, timings, unit="MiB", mib_per_second=(size / MIB) / best))
+                print(f"  {name:<28} {size // MIB:>6} MiB {best:8.3f}s {(size / MIB) / best:9.1f} MiB/s", file=sys.stderr)
+            src.unlink()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    params = {"sizes_mib": [s // MIB for s in sizes], "strategies": strategies, "repeats": args.repeats, "drop_caches": args.drop_caches}
+    payload = write_results(args.out, "copy", params, results)
+    print(format_results(results))
+    if args.compare:
+        regressions = report_comparison(args.compare, payload, args.threshold)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
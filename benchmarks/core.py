@@ -0,0 +1,192 @@
+"""
+Scaling benchmarks for the file-reorganisation core (planners, conflict checks, apply).
+
+    python -m benchmarks.core --sizes 10000,100000,1000000 --out bench/core.json
+    python -m benchmarks.core --sizes 10000 --compare bench/core.json
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import shutil
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from mdivicomtools.utils.conflicts import analyze_conflicts
+from mdivicomtools.utils.plan import TransformationPlan
+from mdivicomtools.utils.rename import (
+    apply_transformations,
+    build_transformation_map_from_df,
+    check_for_conflicts,
+    get_file_list,
+    plan_complex_file_reorder,
+    plan_prepend_foldernames_to_filename,
+    plan_transformations,
+)
+from mdivicomtools.utils.reporting import summarize_plan
+
+from .common import default_workdir, format_results, report_comparison, result_entry, timed, write_results
+from .synthetic import STREAM_TYPES, TreeSpec, generate_tree, session_table
+
+BENCHMARKS = (
+    "generate_tree",
+    "get_file_list",
+    "plan_transformations",
+    "plan_prepend_foldernames_to_filename",
+    "build_transformation_map_from_df",
+    "plan_complex_file_reorder",
+    "check_for_conflicts",
+    "analyze_conflicts",
+    "summarize_plan",
+    "plan_save_load",
+    "apply_transformations",
+)
+
+
+@contextlib.contextmanager
+def _quiet():
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def run_size(spec: TreeSpec, workdir: Path, *, repeats: int, apply_max: int, only: Optional[List[str]], keep: bool) -> List[Dict[str, Any]]:
+    root = workdir / f"mdivicom-bench-{spec.data_files}"
+    if root.exists():
+        shutil.rmtree(root)
+    sessions_dir = root / "sessions"
+    out_root = root / "securecopy"
+    results: List[Dict[str, Any]] = []
+    size = spec.data_files
+
+    def bench(name: str, fn: Callable[[], Any], setup: Optional[Callable[[], Any]] = None, n: Optional[int] = None) -> Any:
+        if only and name not in only:
+            return None
+        best, timings, value = timed(fn, repeats=1 if name == "generate_tree" else repeats, setup=setup)
+        produced = len(value) if isinstance(value, (list, dict, TransformationPlan)) else None
+        results.append(result_entry(name, size, best, timings, items=n, produced=produced))
+        print(f"  {name:<36} {best:9.4f}s", file=sys.stderr)
+        return value
+
+    try:
+        print(f"[{size} files, {spec.sessions} sessions]", file=sys.stderr)
+        best, timings, stats = timed(lambda: generate_tree(root, spec))
+        if not only or "generate_tree" in only:
+            results.append(result_entry("generate_tree", size, best, timings, items=stats["data_files"] + stats["sidecars"]))
+            print(f"  {'generate_tree':<36} {best:9.4f}s", file=sys.stderr)
+
+        files = get_file_list(str(sessions_dir))
+        bench("get_file_list", lambda: get_file_list(str(sessions_dir)), n=len(files))
+
+        with _quiet():
+            plan = plan_transformations(str(root), files, ["raw"], ["sourcedata"], securecopy_folder="securecopy")
+            bench(
+                "plan_transformations",
+                lambda: plan_transformations(str(root), files, ["raw"], ["sourcedata"], securecopy_folder="securecopy"),
+                n=len(files),
+            )
+        bench(
+            "plan_prepend_foldernames_to_filename",
+            lambda: plan_prepend_foldernames_to_filename([str(f) for f in files], ["raw"], True, str(root), "securecopy"),
+            n=len(files),
+        )
+
+        table = pd.DataFrame(session_table(spec))
+        with _quiet():
+            bench(
+                "build_transformation_map_from_df",
+                lambda: build_transformation_map_from_df(
+                    table, str(sessions_dir), rename_format="sub-{subject}_{recording_id}", target_directory=str(out_root)
+                ),
+                n=len(files),
+            )
+        bench(
+            "plan_complex_file_reorder",
+            lambda: plan_complex_file_reorder(str(sessions_dir), ["ses-.*", "raw", "<stream>"], [3, 1], target_dir=str(out_root)),
+            n=len(files),
+        )
+
+        bench("check_for_conflicts", lambda: check_for_conflicts(plan), n=len(plan))
+        bench("analyze_conflicts", lambda: analyze_conflicts(plan), n=len(plan))
+        bench("summarize_plan", lambda: summarize_plan(plan), n=len(plan))
+
+        plan_file = root / "plan.mdiplan"
+
+        def save_load() -> int:
+            plan.save(plan_file)
+            return sum(1 for _ in TransformationPlan.load(plan_file).iter_rows())
+
+        bench("plan_save_load", save_load, n=len(plan))
+
+        if size <= apply_max:
+            def reset() -> None:
+                if out_root.exists():
+                    shutil.rmtree(out_root)
+
+            with _quiet():
+                bench("apply_transformations", lambda: apply_transformations(plan, dryrun=False, verbose=False), setup=reset, n=len(plan))
+        else:
+            print(f"  {'apply_transformations':<36} skipped (> --apply-max {apply_max})", file=sys.stderr)
+    finally:
+        if not keep and root.exists():
+            shutil.rmtree(root)
+    return results
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="python -m benchmarks.core", description="Scaling benchmarks for planners, conflict checks and apply.")
+    p.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated data file counts (default: 10k,100k,1M).")
+    p.add_argument("--stream-types", default=",".join(STREAM_TYPES[:3]), help="Comma-separated stream types per session.")
+    p.add_argument("--streams-per-type", type=int, default=2)
+    p.add_argument("--files-per-stream", type=int, default=10)
+    p.add_argument("--depth", type=int, default=0, help="Extra directory levels below each stream directory.")
+    p.add_argument("--file-size", type=int, default=64, help="Bytes per data file.")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--repeats", type=int, default=3, help="Timed repetitions per benchmark (best is reported).")
+    p.add_argument("--apply-max", type=int, default=100000, help="Largest size for which files are actually copied.")
+    p.add_argument("--only", action="append", choices=BENCHMARKS, help="Only run these benchmarks (repeatable).")
+    p.add_argument("--workdir", type=Path, default=None, help="Scratch directory (default: /dev/shm if writable, else the temp dir).")
+    p.add_argument("--keep", action="store_true", help="Keep generated trees.")
+    p.add_argument("--out", type=Path, default=None, help="Write JSON results here.")
+    p.add_argument("--compare", type=Path, default=None, help="Baseline results JSON to compare against.")
+    p.add_argument("--threshold", type=float, default=1.2, help="Slowdown ratio reported as a regression.")
+    p.add_argument("--fail-on-regression", action="store_true", help="Exit 1 if any benchmark regressed.")
+    return p
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    workdir = args.workdir or default_workdir()
+    stream_types = [s for s in args.stream_types.split(",") if s]
+
+    results: List[Dict[str, Any]] = []
+    specs = []
+    for size in sizes:
+        spec = TreeSpec.for_file_count(
+            size,
+            stream_types=stream_types,
+            streams_per_type=args.streams_per_type,
+            files_per_stream=args.files_per_stream,
+            depth=args.depth,
+            file_size=args.file_size,
+            seed=args.seed,
+        )
+        specs.append(spec.to_dict())
+        results.extend(run_size(spec, workdir, repeats=args.repeats, apply_max=args.apply_max, only=args.only, keep=args.keep))
+
+    params = {"sizes": sizes, "specs": specs, "repeats": args.repeats, "apply_max": args.apply_max, "workdir": str(workdir)}
+    payload = write_results(args.out, "core", params, results)
+    print(format_results(results))
+    if args.compare:
+        regressions = report_comparison(args.compare, payload, args.threshold)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,232 @@
+"""
+Download throughput against a local HTTP server stand-in for a cloud export.
+
+    python -m benchmarks.download --files 200 --size-kib 512 --latency-ms 20 --out bench/download.json
+
+The server (`RangeServer`) serves deterministic in-memory files over HTTP/1.1 keep-alive with
+`Range` support, an optional per-request latency (to mimic round trips to a remote store) and
+fault injection (`--drop-every`: every N-th response is cut off half-way), so connection reuse,
+concurrency and resume of partial files can be measured without network access. Compared:
+
+- `requests.get`: one un-pooled request per file, sequentially (a new connection every time)
+- `DownloadManager[w=1]` / `DownloadManager[w=N]`: pooled session, sequential / concurrent
+
+Every run verifies the sha256 of each file.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import re
+import shutil
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from mdivicomtools.download import DownloadManager, DownloadTask
+
+from .common import format_results, make_workdir, report_comparison, result_entry, timed, write_results
+
+KIB = 1024
+_RANGE = re.compile(r"bytes=(\d+)-(\d*)$")
+
+
+class RangeServer:
+    """
+    Threaded local HTTP server serving `files` (name -> bytes) at `/<name>`, with an `ETag` per file
+    and `Range` requests honoured unless their `If-Range` does not match it.
+
+    `latency` seconds are slept before each response; with `drop_every=N`, every N-th GET sends only
+    the first half of its body and closes the connection.
+    """
+
+    def __init__(self, files: Dict[str, bytes], *, latency: float = 0.0, drop_every: int = 0):
+        self.files = files
+        self.latency = latency
+        self.drop_every = drop_every
+        self.requests = 0
+        self.connections = 0
+        self.range_requests = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self) -> None:
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                with server._lock:
+                    server.requests += 1
+                    drop = bool(server.drop_every) and server.requests % server.drop_every == 0
+                if server.latency:
+                    time.sleep(server.latency)
+                data = server.files.get(self.path.lstrip("/"))
+                if data is None:
+                    self.send_error(404)
+                    return
+                start, end, status = 0, len(data), 200
+                etag = f'"{len(data):x}-{hash(data) & 0xffffffffffff:x}"'
+                match = _RANGE.match(self.headers.get("Range", ""))
+                if_range = self.headers.get("If-Range")
+                if match and (if_range is None or if_range == etag):
+                    with server._lock:
+                        server.range_requests += 1
+                    start = int(match.group(1))
+                    end = int(match.group(2)) + 1 if match.group(2) else len(data)
+                    if start >= len(data):
+                        self.send_response(416)
+                        self.send_header("Content-Range", f"bytes */{len(data)}")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    status = 206
+                body = data[start:end]
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Accept-Ranges", "bytes")
+                self.send_header("ETag", etag)
+                if status == 206:
+                    self.send_header("Content-Range", f"bytes {start}-{end - 1}/{len(data)}")
+                self.end_headers()
+                if drop:
+                    self.wfile.write(body[: len(body) // 2])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    return
+                self.wfile.write(body)
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def __enter__(self) -> "RangeServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def _make_files(count: int, size: int) -> Dict[str, bytes]:
+    files = {}
+    for i in range(count):
+        seed = hashlib.sha256(str(i).encode()).digest()
+        files[f"file-{i:05d}.bin"] = (seed * (size // len(seed) + 1))[:size]
+    return files
+
+
+def _tasks(server: RangeServer, dest: Path) -> List[DownloadTask]:
+    return [
+        DownloadTask.for_stream(
+            f"{server.url}/{name}",
+            dest,
+            f"{i // 50:03d}",
+            "video",
+            "str-video-01",
+            name,
+            checksum="sha256:" + hashlib.sha256(data).hexdigest(),
+            size=len(data),
+        )
+        for i, (name, data) in enumerate(server.files.items())
+    ]
+
+
+def _plain_get(tasks: List[DownloadTask]) -> List[Dict[str, Any]]:
+    results = []
+    for task in tasks:
+        task.dest.parent.mkdir(parents=True, exist_ok=True)
+        response = requests.get(task.url, timeout=60)
+        response.raise_for_status()
+        task.dest.write_bytes(response.content)
+        ok = "sha256:" + hashlib.sha256(response.content).hexdigest() == task.checksum
+        results.append({"status": "downloaded" if ok else "failed"})
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(prog="python -m benchmarks.download", description="Download throughput against a local HTTP server.")
+    p.add_argument("--files", type=int, default=200)
+    p.add_argument("--size-kib", type=int, default=512)
+    p.add_argument("--workers", type=int, default=8)
+    p.add_argument("--latency-ms", type=float, default=20.0, help="Server-side delay per request (simulated round trip).")
+    p.add_argument("--drop-every", type=int, default=0, help="Cut every N-th response off half-way (exercises resume).")
+    p.add_argument("--repeats", type=int, default=3)
+    p.add_argument("--workdir", type=Path, default=None)
+    p.add_argument("--out", type=Path, default=None)
+    p.add_argument("--compare", type=Path, default=None)
+    p.add_argument("--threshold", type=float, default=1.2)
+    p.add_argument("--fail-on-regression", action="store_true")
+    args = p.parse_args(argv)
+
+    files = _make_files(args.files, args.size_kib * KIB)
+    total_mib = args.files * args.size_kib / 1024
+    workdir = make_workdir("mdivicom-download-bench-", args.workdir)
+    dest = workdir / "dataset"
+    results: List[Dict[str, Any]] = []
+    try:
+        with RangeServer(files, latency=args.latency_ms / 1000.0, drop_every=args.drop_every) as server:
+            tasks = _tasks(server, dest)
+            runners = {}
+            if not args.drop_every:
+                runners["requests.get"] = lambda: _plain_get(tasks)
+            for workers in (1, args.workers):
+                def run(workers: int = workers) -> List[Dict[str, Any]]:
+                    with DownloadManager(workers=workers, backoff=0.0) as manager:
+                        return manager.download_all(tasks)
+
+                runners[f"DownloadManager[w={workers}]"] = run
+
+            for name, run in runners.items():
+                before = (server.requests, server.connections, server.range_requests)
+                best, timings, outcome = timed(run, repeats=args.repeats, setup=lambda: shutil.rmtree(dest, ignore_errors=True))
+                failed = [r for r in outcome if r["status"] == "failed"]
+                if failed:
+                    raise SystemExit(f"{name}: {len(failed)} download(s) failed, e.g. {failed[0].get('error')}")
+                repeats = max(1, args.repeats)
+                extra = {
+                    "mib_per_second": total_mib / best,
+                    "connections_per_run": (server.connections - before[1]) / repeats,
+                    "resumes_per_run": (server.range_requests - before[2]) / repeats,
+                }
+                results.append(result_entry(name, args.files, best, timings, **extra))
+                print(
+                    f"  {name:<24} {args.files:>6} files {best:8.3f}s {total_mib / best:9.1f} MiB/s"
+                    f" {extra['connections_per_run']:7.1f} conn {extra['resumes_per_run']:6.1f} resumes",
+                    file=sys.stderr,
+                )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    params = {
+        "files": args.files,
+        "size_kib": args.size_kib,
+        "workers": args.workers,
+        "latency_ms": args.latency_ms,
+        "drop_every": args.drop_every,
+        "repeats": args.repeats,
+    }
+    payload = write_results(args.out, "download", params, results)
+    print(format_results(results))
+    if args.compare:
+        regressions = report_comparison(args.compare, payload, args.threshold)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,290 @@
+"""
+Overhead of `mdivicom` itself: entry-point discovery, plugin resolution, config parsing,
+provenance writing and process start, measured with N trivial stub plugins installed.
+
+    python -m benchmarks.runner --plugins 1,10,100,1000 --out bench/runner.json
+    python -m benchmarks.runner --compare bench/runner.json
+
+Stub plugins are separate distributions (`<name>.dist-info` with `entry_points.txt`) in a
+temporary site directory that is put on PYTHONPATH of the measured processes only, so the
+current environment is never modified.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .common import default_workdir, format_results, make_workdir, report_comparison, result_entry, timed, write_results
+
+STUB_PREFIX = "mdibenchstub"
+
+_STUB_MODULE = '''\
+def get_plugin():
+    return {{
+        "meta": {{
+            "api_version": "mdivicomtools.plugin.v0.1",
+            "id": "bench-{index:05d}",
+            "kind": "python",
+            "version": "0.1.0",
+            "description": "synthetic benchmark stub",
+            "publisher": "bench",
+        }},
+        "entry": {{"callable": "{module}:run"}},
+    }}
+
+
+def run(dataset_dir, out_dir, config, *, work_dir=None, dry_run=False):
+    if not dry_run:
+        (out_dir / "{module}.txt").write_text(str(dataset_dir), encoding="utf-8")
+'''
+
+
+def install_stub_plugins(site_dir: Path, count: int) -> List[str]:
+    """Write `count` stub plugin distributions into `site_dir`; returns their plugin ids."""
+    site_dir.mkdir(parents=True, exist_ok=True)
+    ids = []
+    for index in range(count):
+        module = f"{STUB_PREFIX}_{index:05d}"
+        (site_dir / f"{module}.py").write_text(_STUB_MODULE.format(index=index, module=module), encoding="utf-8")
+        dist_info = site_dir / f"{module}-0.1.0.dist-info"
+        dist_info.mkdir(exist_ok=True)
+        (dist_info / "METADATA").write_text(f"Metadata-Version: 2.1\nName: {module}\nVersion: 0.1.0\n", encoding="utf-8")
+        (dist_info / "entry_points.txt").write_text(f"[mdivicomtools.plugins]\nbench-{index:05d} = {module}:get_plugin\n", encoding="utf-8")
+        ids.append(f"bench-{index:05d}")
+    return ids
+
+
+def _env(site_dir: Optional[Path]) -> Dict[str, str]:
+    env = dict(os.environ)
+    if site_dir is not None:
+        env["PYTHONPATH"] = os.pathsep.join(p for p in (str(site_dir), env.get("PYTHONPATH", "")) if p)
+    return env
+
+
+def _cli(args: List[str]) -> List[str]:
+    return [sys.executable, "-m", "mdivicomtools", *args]
+
+
+def _time_process(cmd: List[str], env: Dict[str, str], repeats: int) -> List[float]:
+    timings = []
+    for _ in range(max(1, repeats)):
+        t0 = time.perf_counter()
+        proc = subprocess.run(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        timings.append(time.perf_counter() - t0)
+        if proc.returncode != 0:
+            raise SystemExit(f"{' '.join(cmd)} failed: {proc.stderr.decode(errors='replace')[-2000:]}")
+    return timings
+
+
+def _stage_worker(plugin_ref: str, dataset: str, out: str) -> Dict[str, float]:
+    """In-process breakdown of one `run` (executed in a child process with the stub site on sys.path)."""
+    t0 = time.perf_counter()
+    from mdivicomtools import cli
+    from mdivicomtools.plugin_registry import PluginRef, get_plugin, list_plugins
+    from mdivicomtools.provenance import finish_run_record, new_run_id, run_record, write_run_record
+
+    timings = {"import_cli": time.perf_counter() - t0}
+
+    t0 = time.perf_counter()
+    list_plugins()
+    timings["discover_plugins"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    plugin = get_plugin(PluginRef.parse(plugin_ref), resolve_execution=True)
+    timings["resolve_plugin"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    config = cli._parse_config('{"alpha": 1, "beta": [1, 2, 3]}')
+    timings["parse_config"] = time.perf_counter() - t0
+
+    out_dir = Path(out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    t0 = time.perf_counter()
+    record = run_record(plugin=plugin, dataset_dir=Path(dataset), out_dir=out_dir, work_dir=None, config=config, backend="auto")
+    record_path = write_run_record(out_dir, new_run_id(), record)
+    finish_run_record(record_path, status="succeeded")
+    timings["provenance"] = time.perf_counter() - t0
+    return timings
+
+
+def _run_stage_worker(site_dir: Path, plugin_ref: str, dataset: Path, out: Path, repeats: int) -> Dict[str, float]:
+    best: Dict[str, float] = {}
+    for _ in range(max(1, repeats)):
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.runner", "_stages", plugin_ref, str(dataset), str(out)],
+            env=_env(site_dir),
+            cwd=str(Path(__file__).resolve().parent.parent),
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            raise SystemExit(f"stage worker failed: {proc.stderr[-2000:]}")
+        for name, seconds in json.loads(proc.stdout).items():
+            best[name] = min(seconds, best.get(name, seconds))
+    return best
+
+
+def _make_sessions(dataset: Path, count: int) -> List[Path]:
+    sessions = []
+    for s in range(count):
+        session = dataset / "sessions" / f"ses-{s:06d}"
+        session.mkdir(parents=True, exist_ok=True)
+        sessions.append(session)
+    return sessions
+
+
+def bench_plugin_count(count: int, workdir: Path, repeats: int) -> List[Dict[str, Any]]:
+    site_dir = workdir / f"site-{count}"
+    ids = install_stub_plugins(site_dir, count)
+    env = _env(site_dir)
+    dataset = workdir / "dataset"
+    session = _make_sessions(dataset, 1)[0]
+    out = workdir / f"out-{count}"
+    target = ids[-1]
+    results = []
+
+    def record(name: str, timings: List[float]) -> None:
+        results.append(result_entry(name, count, min(timings), timings, unit="plugins"))
+        print(f"  {name:<36} {min(timings):9.4f}s", file=sys.stderr)
+
+    print(f"[{count} plugins installed]", file=sys.stderr)
+    record("cli_plugins_list", _time_process(_cli(["plugins", "list"]), env, repeats))
+    record("cli_plugins_info", _time_process(_cli(["plugins", "info", target]), env, repeats))
+    record("cli_run", _time_process(_cli(["run", target, "--dataset", str(session), "--out", str(out), "--config", '{"alpha": 1}']), env, repeats))
+    for name, seconds in _run_stage_worker(site_dir, target, session, out, repeats).items():
+        results.append(result_entry(f"stage_{name}", count, seconds, [seconds], unit="plugins"))
+        print(f"  {'stage_' + name:<36} {seconds:9.4f}s", file=sys.stderr)
+    return results
+
+
+def bench_baseline(repeats: int) -> List[Dict[str, Any]]:
+    """Interpreter start and core import without any plugin, for scale."""
+    env = _env(None)
+    results = []
+    for name, cmd in (
+        ("python_startup", [sys.executable, "-c", "pass"]),
+        ("import_mdivicomtools_cli", [sys.executable, "-c", "import mdivicomtools.cli"]),
+    ):
+        timings = _time_process(cmd, env, repeats)
+        results.append(result_entry(name, 0, min(timings), timings, unit="plugins"))
+        print(f"  {name:<36} {min(timings):9.4f}s", file=sys.stderr)
+    return results
+
+
+def bench_batch(workdir: Path, sessions: int, subprocess_sessions: int, plugins: int, pool_sessions: int = 0) -> List[Dict[str, Any]]:
+    """Throughput of many trivial runs: in-process `cli.main` calls, one process per session and a one-worker warm pool."""
+    site_dir = workdir / f"site-{plugins}"
+    ids = install_stub_plugins(site_dir, plugins)
+    target = ids[-1]
+    session_dirs = _make_sessions(workdir / "batch-dataset", max(sessions, subprocess_sessions, pool_sessions))
+    out = workdir / "batch-out"
+    results = []
+    print(f"[batch: {sessions} sessions in-process, {subprocess_sessions} as processes, {pool_sessions} in a worker pool, {plugins} plugins]", file=sys.stderr)
+
+    if sessions:
+        sys.path.insert(0, str(site_dir))
+        try:
+            from mdivicomtools import cli
+
+            def run_all() -> None:
+                for session in session_dirs[:sessions]:
+                    cli.main(["run", target, "--dataset", str(session), "--out", str(out)])
+
+            best, timings, _ = timed(run_all)
+        finally:
+            sys.path.remove(str(site_dir))
+        results.append(result_entry("batch_in_process", sessions, best, timings, unit="sessions", sessions_per_second=sessions / best))
+        print(f"  {'batch_in_process':<36} {best:9.4f}s ({sessions / best:.1f} sessions/s)", file=sys.stderr)
+
+    if subprocess_sessions:
+        env = _env(site_dir)
+        t0 = time.perf_counter()
+        for session in session_dirs[:subprocess_sessions]:
+            _time_process(_cli(["run", target, "--dataset", str(session), "--out", str(out)]), env, 1)
+        elapsed = time.perf_counter() - t0
+        results.append(
+            result_entry("batch_subprocess", subprocess_sessions, elapsed, [elapsed], unit="sessions", sessions_per_second=subprocess_sessions / elapsed)
+        )
+        print(f"  {'batch_subprocess':<36} {elapsed:9.4f}s ({subprocess_sessions / elapsed:.1f} sessions/s)", file=sys.stderr)
+
+    if pool_sessions:
+        from mdivicomtools.workerpool import PluginWorkerPool
+
+        jobs = [{"dataset_dir": str(session), "out_dir": str(out), "config": {}} for session in session_dirs[:pool_sessions]]
+        # spawned workers inherit sys.path, so the stub site only needs to be on it while the pool runs
+        sys.path.insert(0, str(site_dir))
+        try:
+            t0 = time.perf_counter()
+            pool_results = PluginWorkerPool(target, workers=1, max_jobs_per_worker=0).map(jobs)
+            elapsed = time.perf_counter() - t0
+        finally:
+            sys.path.remove(str(site_dir))
+        if any(r["status"] != "succeeded" for r in pool_results):
+            raise SystemExit("batch_pool: some runs failed")
+        results.append(result_entry("batch_pool", pool_sessions, elapsed, [elapsed], unit="sessions", sessions_per_second=pool_sessions / elapsed))
+        print(f"  {'batch_pool':<36} {elapsed:9.4f}s ({pool_sessions / elapsed:.1f} sessions/s)", file=sys.stderr)
+    return results
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="python -m benchmarks.runner", description="Per-invocation overhead of the mdivicom runner.")
+    p.add_argument("--plugins", default="1,10,100,1000", help="Comma-separated numbers of installed stub plugins.")
+    p.add_argument("--repeats", type=int, default=5, help="Repetitions per measurement (best is reported).")
+    p.add_argument("--batch-sessions", type=int, default=2000, help="Trivial sessions run in-process for batch throughput (0 to skip).")
+    p.add_argument("--batch-subprocess", type=int, default=50, help="Trivial sessions run as separate processes (0 to skip).")
+    p.add_argument("--batch-pool", type=int, default=500, help="Trivial sessions run through a one-worker PluginWorkerPool (0 to skip).")
+    p.add_argument("--batch-plugins", type=int, default=10, help="Installed stub plugins during the batch benchmarks.")
+    p.add_argument("--workdir", type=Path, default=None, help="Scratch directory (default: /dev/shm if writable, else the temp dir).")
+    p.add_argument("--keep", action="store_true", help="Keep the temporary site and output directories.")
+    p.add_argument("--out", type=Path, default=None, help="Write JSON results here.")
+    p.add_argument("--compare", type=Path, default=None, help="Baseline results JSON to compare against.")
+    p.add_argument("--threshold", type=float, default=1.2, help="Slowdown ratio reported as a regression.")
+    p.add_argument("--fail-on-regression", action="store_true", help="Exit 1 if any benchmark regressed.")
+    return p
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "_stages":
+        print(json.dumps(_stage_worker(*argv[1:4])))
+        return 0
+
+    args = build_parser().parse_args(argv)
+    counts = [int(c) for c in args.plugins.split(",") if c.strip()]
+    workdir = make_workdir("mdivicom-runner-bench-", args.workdir, default_workdir())
+    results: List[Dict[str, Any]] = []
+    try:
+        results.extend(bench_baseline(args.repeats))
+        for count in counts:
+            results.extend(bench_plugin_count(count, workdir, args.repeats))
+        results.extend(bench_batch(workdir, args.batch_sessions, args.batch_subprocess, args.batch_plugins, args.batch_pool))
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    params = {
+        "plugins": counts,
+        "repeats": args.repeats,
+        "batch_sessions": args.batch_sessions,
+        "batch_subprocess": args.batch_subprocess,
+        "batch_pool": args.batch_pool,
+        "batch_plugins": args.batch_plugins,
+    }
+    payload = write_results(args.out, "runner", params, results)
+    print(format_results(results))
+    if args.compare:
+        regressions = report_comparison(args.compare, payload, args.threshold)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
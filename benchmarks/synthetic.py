@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import math
+import os
+import random
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+STREAM_TYPES = ("video", "audio", "eeg", "eyetracking", "motion")
+
+
+class TreeSpec:
+    """
+    Shape of a synthetic openSIDS dataset:
+    `sessions/ses-<n>/raw/<type>/str-<type>-<k>/[d00/d01/...]<chunk files>`.
+
+    The same spec and seed always produce the same names, sizes and contents.
+    """
+
+    __slots__ = ("sessions", "stream_types", "streams_per_type", "files_per_stream", "depth", "file_size", "seed")
+
+    def __init__(
+            self,
+            sessions: int,
+            stream_types: Sequence[str] = STREAM_TYPES[:3],
+            streams_per_type: int = 2,
+            files_per_stream: int = 10,
+            depth: int = 0,
+            file_size: int = 0,
+            seed: int = 0,
+    ):
+        self.sessions = sessions
+        self.stream_types = tuple(stream_types)
+        self.streams_per_type = streams_per_type
+        self.files_per_stream = files_per_stream
+        self.depth = depth
+        self.file_size = file_size
+        self.seed = seed
+
+    @classmethod
+    def for_file_count(cls, files: int, **kwargs: Any) -> "TreeSpec":
+        """Spec with at least `files` data files, varying only the number of sessions."""
+        spec = cls(sessions=1, **kwargs)
+        spec.sessions = max(1, math.ceil(files / spec.files_per_session))
+        return spec
+
+    @property
+    def files_per_session(self) -> int:
+        return len(self.stream_types) * self.streams_per_type * self.files_per_stream
+
+    @property
+    def data_files(self) -> int:
+        return self.sessions * self.files_per_session
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def session_label(index: int) -> str:
+    return f"ses-{index:06d}"
+
+
+def _write(path: str, data: bytes) -> None:
+    with open(path, "wb") as fh:
+        fh.write(data)
+
+
+def generate_tree(root: Path, spec: TreeSpec) -> Dict[str, Any]:
+    """
+    Write the dataset described by `spec` below `root` (which must not exist yet).
+
+    Data files are `chunk-<i>.bin` with `spec.file_size` pseudo-random bytes; every session and stream
+    gets its YAML sidecar. Returns counts of generated data files, sidecars and directories.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=False)
+    rng = random.Random(spec.seed)
+    payload_pool = [
+        rng.getrandbits(8 * spec.file_size).to_bytes(spec.file_size, "little") if spec.file_size else b""
+        for _ in range(16)
+    ]
+
+    _write(
+        str(root / "dataset_manifest.yaml"),
+        (
+            "dataset_id: synthetic\n"
+            "schema_version: 0.1.0\n"
+            f"generator_seed: {spec.seed}\n"
+            f"sessions: {spec.sessions}\n"
+        ).encode("utf-8"),
+    )
+    sessions_dir = root / "sessions"
+    n_files = n_sidecars = n_dirs = 0
+    nested = [f"d{level:02d}" for level in range(spec.depth)]
+    for s in range(spec.sessions):
+        label = session_label(s)
+        session_dir = os.path.join(str(sessions_dir), label)
+        os.makedirs(session_dir)
+        _write(
+            os.path.join(session_dir, f"{label}_session.yaml"),
+            f"session_id: '{label[4:]}'\nsubject: sub-{s % 97:03d}\nvisit: v{s % 3 + 1}\n".encode("utf-8"),
+        )
+        n_sidecars += 1
+        for stream_type in spec.stream_types:
+            for k in range(spec.streams_per_type):
+                stream_id = f"str-{stream_type}-{k:02d}"
+                stream_dir = os.path.join(session_dir, "raw", stream_type, stream_id)
+                data_dir = os.path.join(stream_dir, *nested) if nested else stream_dir
+                os.makedirs(data_dir)
+                n_dirs += 1
+                _write(
+                    os.path.join(stream_dir, f"{stream_id}_stream.yaml"),
+                    f"stream_id: {stream_id}\nstream_type: {stream_type}\nfiles: {spec.files_per_stream}\n".encode("utf-8"),
+                )
+                n_sidecars += 1
+                for i in range(spec.files_per_stream):
+                    _write(os.path.join(data_dir, f"chunk-{i:05d}.bin"), payload_pool[(s + k + i) % len(payload_pool)])
+                    n_files += 1
+    return {"data_files": n_files, "sidecars": n_sidecars, "stream_dirs": n_dirs, "sessions": spec.sessions}
+
+
+def session_table(spec: TreeSpec, rows: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Metadata rows (one per session) for `build_transformation_map_from_df` benchmarks."""
+    count = spec.sessions if rows is None else rows
+    return [
+        {"recording_id": session_label(s), "subject": f"{s % 97:03d}", "visit": f"v{s % 3 + 1}"}
+        for s in range(count)
+    ]
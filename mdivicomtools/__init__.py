@@ -14,6 +14,8 @@ from .utils.rename import (
     copy_item,
     sanitize_filename
 )
+from .utils.plan import TransformationPlan
+from .utils.conflicts import ConflictReport, analyze_conflicts
 
 # split folders and folders2files still needs to be tested!
 
@@ -25,13 +27,16 @@ def vc_rename(base_dir,
               partial_strict=True,
               dryrun=True,
               handle_symlinks=True,
-              sequential_delete=False):
+              sequential_delete=False,
+              allow_existing=False,
+              case_insensitive_target=True):
     """
     Rename files in a directory using a find/replace scheme.
 
     This function retrieves all files in the specified directory, applies a string find/replace
     transformation with an optional prefix, and moves the files under a secure copy folder structure.
-    Conflicts are checked before any actual file copying occurs.
+    Conflicts (duplicate destinations, case/Unicode collisions, existing destinations and file/directory
+    clashes) are checked for the whole plan before any actual file copying occurs.
 
     Args:
         base_dir (str): The root directory containing the files to transform.
@@ -45,8 +50,12 @@ def vc_rename(base_dir,
         sequential_delete (bool, optional): If True, deletes the source file after a successful copy. Use with caution. Defaults to False.
                                             WARNING: Enabling this option will permanently delete the source files upon successful transformation.
                                             Ensure you have proper backups before proceeding. Defaults to False.
+        allow_existing (bool, optional): If True, destinations that already exist do not abort the run (files are
+                                         overwritten, directories merged). Defaults to False.
+        case_insensitive_target (bool, optional): Set to False when the destination filesystem compares names exactly,
+                                                  so case/Unicode-normalization collisions do not abort. Defaults to True.
     Returns:
-        Dict[Path, Path]: A mapping of original file paths to their transformed paths.
+        TransformationPlan: A mapping of original file paths to their transformed paths.
     """
     files = get_file_list(base_dir)
     transformation_map = plan_transformations(
@@ -58,7 +67,13 @@ def vc_rename(base_dir,
         partial_strict=partial_strict,
         securecopy_folder=securecopy_folder
     )
-    if check_for_conflicts(transformation_map):
+    conflicts = analyze_conflicts(
+        transformation_map,
+        allow_existing=allow_existing,
+        case_insensitive_target=case_insensitive_target
+    )
+    if conflicts:
+        print(conflicts.summary())
         print("Conflicts detected! Aborting.")
     else:
         apply_transformations(
@@ -76,7 +91,9 @@ def vc_combine_folder(hierarchies,
                       securecopy_folder: Optional[str] = None,
                       dryrun=True,
                       handle_symlinks=True,
-                      sequential_delete=False):
+                      sequential_delete=False,
+                      allow_existing=False,
+                      case_insensitive_target=True):
     """
     Combine multiple folder hierarchies into single-level folders.
 
@@ -93,12 +110,22 @@ def vc_combine_folder(hierarchies,
         sequential_delete (bool, optional): If True, deletes the source after a successful transformation. Defaults to False.
                                             WARNING: Enabling this option will permanently delete the source folders upon successful transformation.
                                             Ensure you have proper backups before proceeding. Defaults to False.
+        allow_existing (bool, optional): If True, destinations that already exist do not abort the run (files are
+                                         overwritten, directories merged). Defaults to False.
+        case_insensitive_target (bool, optional): Set to False when the destination filesystem compares names exactly,
+                                                  so case/Unicode-normalization collisions do not abort. Defaults to True.
 
     Returns:
-        Dict[Path, Path]: A mapping of original folder paths to their new combined folder paths.
+        TransformationPlan: A mapping of original folder paths to their new combined folder paths.
     """
     transformation_map = plan_combine_folder_hierarchies(hierarchies, root_dir=root_dir, securecopy_folder=securecopy_folder)
-    if check_for_conflicts(transformation_map):
+    conflicts = analyze_conflicts(
+        transformation_map,
+        allow_existing=allow_existing,
+        case_insensitive_target=case_insensitive_target
+    )
+    if conflicts:
+        print(conflicts.summary())
         print("Conflicts detected! Aborting.")
     else:
         apply_transformations(
@@ -117,7 +144,9 @@ def vc_split_folder(combined_folders,
                     securecopy_folder: Optional[str] = None,
                     dryrun=True,
                     handle_symlinks=True,
-                    sequential_delete=False):
+                    sequential_delete=False,
+                    allow_existing=False,
+                    case_insensitive_target=True):
     """
     Split previously combined folders back into hierarchical folder structures.
 
@@ -134,12 +163,22 @@ def vc_split_folder(combined_folders,
         sequential_delete (bool, optional): If True, deletes the source after a successful transformation. Defaults to False.
                                             WARNING: Enabling this option will permanently delete the source folders upon successful transformation.
                                             Ensure you have proper backups before proceeding. Defaults to False.
+        allow_existing (bool, optional): If True, destinations that already exist do not abort the run (files are
+                                         overwritten, directories merged). Defaults to False.
+        case_insensitive_target (bool, optional): Set to False when the destination filesystem compares names exactly,
+                                                  so case/Unicode-normalization collisions do not abort. Defaults to True.
 
     Returns:
-        Dict[Path, Path]: A mapping of original combined folder paths to their new hierarchical folder paths.
+        TransformationPlan: A mapping of original combined folder paths to their new hierarchical folder paths.
     """
     transformation_map = plan_split_folder_hierarchies(combined_folders, root_dir=root_dir, securecopy_folder=securecopy_folder)
-    if check_for_conflicts(transformation_map):
+    conflicts = analyze_conflicts(
+        transformation_map,
+        allow_existing=allow_existing,
+        case_insensitive_target=case_insensitive_target
+    )
+    if conflicts:
+        print(conflicts.summary())
         print("Conflicts detected! Aborting.")
     else:
         apply_transformations(
@@ -160,7 +199,9 @@ def vc_folder2files(file_paths,
                     securecopy_folder: Optional[str] = None,
                     dryrun=True,
                     handle_symlinks=True,
-                    sequential_delete=False):
+                    sequential_delete=False,
+                    allow_existing=False,
+                    case_insensitive_target=True):
     """
     Prepend specific folder names to filenames, optionally removing the original folder structure.
 
@@ -179,9 +220,13 @@ def vc_folder2files(file_paths,
         sequential_delete (bool, optional): If True, deletes the source file after a successful transformation. Defaults to False.
                                             WARNING: Enabling this option will permanently delete the source folders upon successful transformation.
                                             Ensure you have proper backups before proceeding. Defaults to False.
+        allow_existing (bool, optional): If True, destinations that already exist do not abort the run (files are
+                                         overwritten, directories merged). Defaults to False.
+        case_insensitive_target (bool, optional): Set to False when the destination filesystem compares names exactly,
+                                                  so case/Unicode-normalization collisions do not abort. Defaults to True.
 
     Returns:
-        Dict[Path, Path]: A mapping of original file paths to their transformed file paths.
+        TransformationPlan: A mapping of original file paths to their transformed file paths.
     """
     transformation_map = plan_prepend_foldernames_to_filename(
         file_paths=file_paths,
@@ -191,7 +236,13 @@ def vc_folder2files(file_paths,
         securecopy_folder=securecopy_folder
     )
 
-    if check_for_conflicts(transformation_map):
+    conflicts = analyze_conflicts(
+        transformation_map,
+        allow_existing=allow_existing,
+        case_insensitive_target=case_insensitive_target
+    )
+    if conflicts:
+        print(conflicts.summary())
         print("Conflicts detected! Aborting.")
     else:
         apply_transformations(
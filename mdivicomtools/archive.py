@@ -0,0 +1,573 @@
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import json
+import lzma
+import mmap
+import os
+import secrets
+import stat
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .provenance import core_version, finish_run_record, new_run_id, run_record, write_run_record
+from .utils.events import get_event_bus
+
+PathLike = Union[str, Path]
+
+PACK_FORMAT = "mdivicomtools-pack/0.1"
+MAGIC = b"MDIPACK1"
+# trailer: index offset, index length, magic
+_FOOTER = struct.Struct("<QQ8s")
+INDEX_SUFFIX = ".index.json"
+DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024
+DEFAULT_JOBS = 4
+CODECS = ("auto", "zlib", "lzma", "store")
+# already-compressed media: compressing them again costs CPU and saves nothing
+STORED_SUFFIXES = frozenset(
+    (".mp4", ".mov", ".m4v", ".mkv", ".avi", ".webm", ".mp3", ".m4a", ".aac", ".flac", ".ogg", ".opus",
+     ".jpg", ".jpeg", ".png", ".gif", ".webp", ".zip", ".gz", ".bz2", ".xz", ".zst", ".7z", ".npz")
+)
+
+
+_HAVE_PREAD = hasattr(os, "pread")
+
+
+class PackError(RuntimeError):
+    pass
+
+
+def index_path(archive: PathLike) -> Path:
+    """Sidecar member index of an archive: `<archive>.index.json`."""
+    archive = Path(archive)
+    return archive.with_name(archive.name + INDEX_SUFFIX)
+
+
+def _compress(codec: str, level: Optional[int], data: bytes) -> bytes:
+    if codec == "zlib":
+        return zlib.compress(data, 6 if level is None else level)
+    if codec == "lzma":
+        return lzma.compress(data, preset=6 if level is None else level)
+    return data
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zlib":
+        return zlib.decompress(data)
+    if codec == "lzma":
+        return lzma.decompress(data)
+    if codec == "store":
+        return data
+    raise PackError(f"Unknown member codec: {codec}")
+
+
+def _member_codec(path: Path, codec: str) -> str:
+    if codec != "auto":
+        return codec
+    return "store" if path.suffix.lower() in STORED_SUFFIXES else "zlib"
+
+
+def _walk(source: Path, prefix: str) -> Iterator[Tuple[Path, str, os.stat_result]]:
+    """(path, archive name, lstat) for `source` and everything below it, directories before their contents."""
+    st = source.lstat()
+    yield source, prefix, st
+    if not stat.S_ISDIR(st.st_mode):
+        return
+    stack = [(source, prefix)]
+    while stack:
+        directory, name = stack.pop()
+        with os.scandir(directory) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        subdirs = []
+        for entry in entries:
+            child = f"{name}/{entry.name}"
+            st = entry.stat(follow_symlinks=False)
+            yield Path(entry.path), child, st
+            if stat.S_ISDIR(st.st_mode):
+                subdirs.append((Path(entry.path), child))
+        stack.extend(reversed(subdirs))
+
+
+class _PendingMember:
+    __slots__ = ("entry", "hasher", "blocks_left", "read_done")
+
+    def __init__(self, entry: Dict[str, Any]):
+        self.entry = entry
+        self.hasher = hashlib.sha256()
+        self.blocks_left = 0
+        self.read_done = False
+
+
+def pack(
+        sources: Sequence[PathLike],
+        archive: PathLike,
+        *,
+        codec: str = "auto",
+        level: Optional[int] = None,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        jobs: int = DEFAULT_JOBS,
+        record_dir: Optional[PathLike] = None,
+) -> Dict[str, Any]:
+    """
+    Stream session / result bundle directories (or single files) into one archive.
+
+    Every file is cut into `block_size` blocks that are compressed independently on `jobs` threads
+    (zlib and lzma release the GIL) and written in order, so memory stays bounded at a few blocks per
+    thread. `codec="auto"` uses zlib except for already-compressed media (`STORED_SUFFIXES`), which are
+    stored: stored members are contiguous in the archive and can be memory-mapped by offset. Members
+    are named `<source dir name>/<relative path>`.
+
+    The member index (offsets, block sizes, sizes, sha256, mode, mtime) is appended to the archive and
+    written to the sidecar `<archive>.index.json`. With `record_dir`, the operation gets a run record
+    in `<record_dir>/_runs/` like `mdivicom run`.
+
+    Returns:
+        Dict[str, Any]: Summary (`archive`, `index`, `members`, `files`, `bytes`, `stored_bytes`, `seconds`, `run_id`).
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec {codec!r}; expected one of {', '.join(CODECS)}")
+    archive = Path(archive)
+    sources = [Path(s) for s in sources]
+    config = {"sources": [str(s) for s in sources], "codec": codec, "level": level, "block_size": block_size}
+    # recorded as the run's dataset_dir
+    common = sources[0] if len(sources) == 1 else Path(os.path.commonpath([str(s.resolve()) for s in sources]))
+    with _OperationRecord("pack", common, record_dir, config) as finish:
+        summary = _pack(sources, archive, codec=codec, level=level, block_size=block_size, jobs=jobs)
+        summary["run_id"] = finish(summary)
+    return summary
+
+
+def _pack(sources: List[Path], archive: Path, *, codec: str, level: Optional[int], block_size: int, jobs: int) -> Dict[str, Any]:
+    events = get_event_bus()
+    started = time.perf_counter()
+    names = [s.resolve().name for s in sources]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Sources must have distinct names: {', '.join(names)}")
+    target = archive.resolve()
+    for source in sources:
+        if source.resolve() in target.parents:
+            raise ValueError(f"The archive must not be written inside a packed directory: {source}")
+
+    archive.parent.mkdir(parents=True, exist_ok=True)
+    tmp = archive.with_name(f".{archive.name}.{secrets.token_hex(4)}.tmp")
+    members: List[Dict[str, Any]] = []
+    totals = {"files": 0, "bytes": 0, "stored_bytes": 0}
+    # (member, block future or raw block) in archive order
+    queue: Deque[Tuple[_PendingMember, Any]] = deque()
+    max_inflight = max(2, jobs * 2)
+
+    with open(tmp, "wb") as out, ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        out.write(MAGIC)
+        offset = len(MAGIC)
+
+        def drain(keep: int) -> None:
+            nonlocal offset
+            while len(queue) > keep:
+                member, block = queue.popleft()
+                data = block.result() if isinstance(block, Future) else block
+                entry = member.entry
+                if entry["offset"] is None:
+                    entry["offset"] = offset
+                if data:
+                    out.write(data)
+                    offset += len(data)
+                    if entry["codec"] != "store":
+                        entry["blocks"].append(len(data))
+                    entry["stored_size"] += len(data)
+                    totals["stored_bytes"] += len(data)
+                member.blocks_left -= 1
+                if member.read_done and member.blocks_left == 0:
+                    entry["sha256"] = member.hasher.hexdigest()
+                events.emit("pack.progress", throttle=True, files=totals["files"], bytes=totals["bytes"], stored_bytes=totals["stored_bytes"])
+
+        try:
+            for source, name in zip(sources, names):
+                for path, arcname, st in _walk(source, name):
+                    entry: Dict[str, Any] = {"path": arcname, "mode": stat.S_IMODE(st.st_mode), "mtime_ns": st.st_mtime_ns}
+                    if stat.S_ISDIR(st.st_mode):
+                        entry["type"] = "dir"
+                        members.append(entry)
+                        continue
+                    if stat.S_ISLNK(st.st_mode):
+                        entry.update(type="symlink", target=os.readlink(path))
+                        members.append(entry)
+                        continue
+                    if not stat.S_ISREG(st.st_mode):
+                        continue  # sockets, fifos, devices
+                    member_codec = _member_codec(path, codec)
+                    entry.update(type="file", codec=member_codec, offset=None, size=0, stored_size=0)
+                    if member_codec != "store":
+                        entry.update(block_size=block_size, blocks=[])
+                    members.append(entry)
+                    member = _PendingMember(entry)
+                    with open(path, "rb") as fh:
+                        while True:
+                            block = fh.read(block_size)
+                            if not block:
+                                break
+                            member.hasher.update(block)
+                            entry["size"] += len(block)
+                            totals["bytes"] += len(block)
+                            member.blocks_left += 1
+                            if member_codec == "store":
+                                queue.append((member, block))
+                            else:
+                                queue.append((member, pool.submit(_compress, member_codec, level, block)))
+                            drain(max_inflight)
+                    if not entry["size"]:
+                        # empty file: a marker so its offset is assigned in archive order
+                        member.blocks_left += 1
+                        queue.append((member, b""))
+                    member.read_done = True
+                    if member.blocks_left == 0:
+                        entry["sha256"] = member.hasher.hexdigest()
+                    totals["files"] += 1
+            drain(0)
+        except BaseException:
+            out.close()
+            tmp.unlink()
+            raise
+
+        index = {
+            "format": PACK_FORMAT,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "producer": {"tool_ref": "mdivicomtools", "tool_version": core_version()},
+            "sources": names,
+            "members": members,
+            "index_offset": offset,
+        }
+        data = json.dumps(index, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        out.write(data)
+        out.write(_FOOTER.pack(offset, len(data), MAGIC))
+        archive_size = offset + len(data) + _FOOTER.size
+    os.replace(tmp, archive)
+
+    index["archive_size"] = archive_size
+    sidecar = index_path(archive)
+    sidecar_tmp = sidecar.with_name(f".{sidecar.name}.{secrets.token_hex(4)}.tmp")
+    sidecar_tmp.write_text(json.dumps(index, indent=2, ensure_ascii=False, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(sidecar_tmp, sidecar)
+
+    summary = {"archive": str(archive), "index": str(sidecar), "members": len(members), "archive_bytes": archive_size, "seconds": time.perf_counter() - started}
+    summary.update(totals)
+    events.emit("pack.finished", **summary)
+    return summary
+
+
+class _OperationRecord:
+    """Run record for a core archive operation (`plugin.id` = `core.<operation>`), finished on exit."""
+
+    def __init__(self, operation: str, dataset_dir: Path, record_dir: Optional[PathLike], config: Dict[str, Any]):
+        self.record_path: Optional[Path] = None
+        self.run_id: Optional[str] = None
+        if record_dir is None:
+            return
+        plugin = {"id": f"core.{operation}", "publisher": "mdivicomtools", "kind": "core", "version": core_version(), "entry_point": None}
+        out_dir = Path(record_dir)
+        self.run_id = new_run_id()
+        record = run_record(plugin=plugin, dataset_dir=dataset_dir.resolve(), out_dir=out_dir.resolve(), work_dir=None, config=config, backend="core")
+        record["config"] = config
+        self.record_path = write_run_record(out_dir, self.run_id, record)
+
+    def __enter__(self) -> Callable[[Dict[str, Any]], Optional[str]]:
+        def finish(summary: Dict[str, Any]) -> Optional[str]:
+            if self.record_path is not None:
+                finish_run_record(self.record_path, status="succeeded", extra={"result": summary})
+            return self.run_id
+
+        return finish
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if exc_type is not None and self.record_path is not None:
+            finish_run_record(self.record_path, status="failed", error=f"{exc_type.__name__}: {exc}")
+
+
+def read_index(archive: PathLike) -> Dict[str, Any]:
+    """
+    Member index of an archive: the sidecar when it matches the archive size, else the archive trailer.
+    """
+    archive = Path(archive)
+    size = archive.stat().st_size
+    sidecar = index_path(archive)
+    if sidecar.exists():
+        try:
+            index = json.loads(sidecar.read_text(encoding="utf-8"))
+        except ValueError:
+            index = None
+        if index is not None and index.get("archive_size") == size:
+            return index
+    with open(archive, "rb") as fh:
+        if size < len(MAGIC) + _FOOTER.size or fh.read(len(MAGIC)) != MAGIC:
+            raise PackError(f"Not an mdivicom pack archive: {archive}")
+        fh.seek(size - _FOOTER.size)
+        offset, length, magic = _FOOTER.unpack(fh.read(_FOOTER.size))
+        if magic != MAGIC or offset + length + _FOOTER.size != size:
+            raise PackError(f"Truncated or corrupt archive (no member index): {archive}")
+        fh.seek(offset)
+        index = json.loads(fh.read(length).decode("utf-8"))
+    index["archive_size"] = size
+    return index
+
+
+class PackArchive:
+    """
+    Random access to the members of a pack archive via its index; nothing else is scanned.
+
+        with PackArchive("ses-01.mdipack") as archive:
+            data = archive.read("ses-01/raw/audio/str-audio-01/mic.wav")
+            view = archive.mmap("ses-01/raw/video/str-video-01/cam1.mp4")  # stored members only
+
+    Stored members are returned as zero-copy memoryviews over a read-only mmap; compressed members are
+    decompressed block by block.
+    """
+
+    def __init__(self, path: PathLike):
+        self.path = Path(path)
+        self.index = read_index(self.path)
+        self.members: List[Dict[str, Any]] = self.index["members"]
+        self._by_path = {m["path"]: m for m in self.members}
+        self._fh = open(self.path, "rb")
+        self._mmap: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+
+    def member(self, path: str) -> Dict[str, Any]:
+        try:
+            return self._by_path[path]
+        except KeyError:
+            raise KeyError(f"No member {path!r} in {self.path}") from None
+
+    def select(self, patterns: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """Members matching any of the glob `patterns` (a directory pattern also selects its contents)."""
+        if not patterns:
+            return list(self.members)
+        selected = []
+        for m in self.members:
+            if any(fnmatch.fnmatchcase(m["path"], p) or m["path"].startswith(p.rstrip("/") + "/") for p in patterns):
+                selected.append(m)
+        return selected
+
+    def _file_member(self, path: str) -> Dict[str, Any]:
+        m = self.member(path)
+        if m["type"] != "file":
+            raise PackError(f"{path} is a {m['type']}, not a file")
+        return m
+
+    def iter_blocks(self, path: str) -> Iterator[bytes]:
+        """Uncompressed content of a file member in blocks."""
+        m = self._file_member(path)
+        if m["codec"] == "store":
+            remaining, offset = m["size"], m["offset"]
+            while remaining:
+                n = min(remaining, DEFAULT_BLOCK_SIZE)
+                yield self._read_at(offset, n)
+                offset += n
+                remaining -= n
+            return
+        offset = m["offset"]
+        for length in m["blocks"]:
+            yield _decompress(m["codec"], self._read_at(offset, length))
+            offset += length
+
+    def _read_at(self, offset: int, length: int) -> bytes:
+        if _HAVE_PREAD:
+            # positional reads: extraction threads share one file descriptor without seeking
+            return os.pread(self._fh.fileno(), length, offset)
+        with self._lock:
+            self._fh.seek(offset)
+            return self._fh.read(length)
+
+    def read(self, path: str, *, verify: bool = True) -> bytes:
+        """Whole content of a file member (sha256-verified unless `verify=False`)."""
+        data = b"".join(self.iter_blocks(path))
+        if verify and hashlib.sha256(data).hexdigest() != self._file_member(path)["sha256"]:
+            raise PackError(f"Checksum mismatch for {path}")
+        return data
+
+    def mmap(self, path: str) -> memoryview:
+        """Zero-copy view of a stored (uncompressed) member."""
+        m = self._file_member(path)
+        if m["codec"] != "store":
+            raise PackError(f"{path} is {m['codec']}-compressed; only stored members can be memory-mapped")
+        if self._mmap is None:
+            self._mmap = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self._mmap)[m["offset"]:m["offset"] + m["size"]]
+
+    def extract(self, path: str, dest: PathLike) -> Path:
+        """Write one file member to `dest` (temp + rename), verifying its sha256; mode and mtime are restored."""
+        m = self._file_member(path)
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(f".{dest.name}.{secrets.token_hex(4)}.tmp")
+        hasher = hashlib.sha256()
+        try:
+            with open(tmp, "wb") as fh:
+                for block in self.iter_blocks(path):
+                    hasher.update(block)
+                    fh.write(block)
+            if hasher.hexdigest() != m["sha256"]:
+                raise PackError(f"Checksum mismatch for {path}")
+            os.chmod(tmp, m["mode"])
+            os.utime(tmp, ns=(m["mtime_ns"], m["mtime_ns"]))
+            os.replace(tmp, dest)
+        except BaseException:
+            if tmp.exists():
+                tmp.unlink()
+            raise
+        return dest
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass  # views handed out by mmap() are still alive; the map is released with them
+            self._mmap = None
+        self._fh.close()
+
+    def __enter__(self) -> "PackArchive":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def _safe_target(dest_root: Path, member_path: str) -> Path:
+    """Map a member path below `dest_root` (already resolved), refusing ones that escape it, also through symlinks."""
+    rel = Path(member_path)
+    if not rel.parts or rel.is_absolute() or ".." in rel.parts:
+        raise PackError(f"Refusing to extract member outside the destination: {member_path}")
+    target = dest_root / rel
+    parent = target.parent.resolve()
+    if parent != dest_root and dest_root not in parent.parents:
+        raise PackError(f"Refusing to extract member through a symlink leaving the destination: {member_path}")
+    return target
+
+
+def _link_escapes(dest_root: Path, link: Path) -> bool:
+    """Whether the (possibly dangling) symlink `link` resolves outside `dest_root`."""
+    resolved = Path(os.path.realpath(link))
+    return resolved != dest_root and dest_root not in resolved.parents
+
+
+def unpack(
+        archive: PathLike,
+        dest_dir: PathLike,
+        *,
+        members: Optional[Sequence[str]] = None,
+        jobs: int = DEFAULT_JOBS,
+        overwrite: bool = False,
+        record_dir: Optional[PathLike] = None,
+        allow_external_symlinks: bool = False,
+) -> Dict[str, Any]:
+    """
+    Extract an archive (or the members matching the glob patterns in `members`) into `dest_dir`.
+
+    Files are decompressed and written on `jobs` threads, each read directly at its indexed offset and
+    verified against its sha256. Existing files are kept unless `overwrite=True`. With `record_dir`,
+    the operation gets a run record like `pack`.
+
+    No member is written outside `dest_dir`, also not through a symlink on the way. Symlink members are
+    created after all files; ones that are absolute or resolve outside `dest_dir` are refused (reported
+    under `failed`) unless `allow_external_symlinks=True`.
+
+    Returns:
+        Dict[str, Any]: Summary (`files`, `bytes`, `skipped`, `failed` (path -> error), `seconds`, `run_id`).
+    """
+    archive = Path(archive)
+    dest_dir = Path(dest_dir)
+    config = {"archive": str(archive), "members": list(members or []), "overwrite": overwrite, "allow_external_symlinks": allow_external_symlinks}
+    with _OperationRecord("unpack", dest_dir, record_dir, config) as finish:
+        summary = _unpack(archive, dest_dir, members=members, jobs=jobs, overwrite=overwrite, allow_external_symlinks=allow_external_symlinks)
+        summary["run_id"] = finish(summary)
+    return summary
+
+
+def _unpack(
+        archive: Path,
+        dest_dir: Path,
+        *,
+        members: Optional[Sequence[str]],
+        jobs: int,
+        overwrite: bool,
+        allow_external_symlinks: bool,
+) -> Dict[str, Any]:
+    events = get_event_bus()
+    started = time.perf_counter()
+    summary: Dict[str, Any] = {"archive": str(archive), "dest_dir": str(dest_dir), "files": 0, "bytes": 0, "skipped": 0, "failed": {}}
+    with PackArchive(archive) as pack_archive:
+        selected = pack_archive.select(members)
+        if members and not selected:
+            raise PackError(f"No members match {', '.join(members)}")
+        dest_dir.mkdir(parents=True, exist_ok=True)
+        dest_root = dest_dir.resolve()
+        files = []
+        links = []
+        for m in selected:
+            target = _safe_target(dest_root, m["path"])
+            if m["type"] == "dir":
+                target.mkdir(parents=True, exist_ok=True)
+            elif m["type"] == "symlink":
+                links.append((m, target))
+            elif target.exists() and not overwrite:
+                summary["skipped"] += 1
+            else:
+                files.append((m, target))
+
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            futures = [(m, pool.submit(pack_archive.extract, m["path"], target)) for m, target in files]
+            for m, future in futures:
+                try:
+                    future.result()
+                except (OSError, PackError, zlib.error, lzma.LZMAError) as exc:
+                    summary["failed"][m["path"]] = f"{type(exc).__name__}: {exc}"
+                    continue
+                summary["files"] += 1
+                summary["bytes"] += m["size"]
+                events.emit("unpack.progress", throttle=True, files=summary["files"], bytes=summary["bytes"])
+
+        # symlinks only once every file is written, so no member is extracted through one of them
+        created = []
+        for m, target in links:
+            link_target = m["target"]
+            if not allow_external_symlinks:
+                lexical = os.path.normpath(os.path.join(os.path.dirname(m["path"]), link_target))
+                if os.path.isabs(link_target) or lexical == ".." or lexical.startswith(".." + os.sep):
+                    summary["failed"][m["path"]] = f"PackError: symlink target leaves the destination: {link_target}"
+                    continue
+            target = _safe_target(dest_root, m["path"])
+            if os.path.lexists(target):
+                if not overwrite:
+                    summary["skipped"] += 1
+                    continue
+                target.unlink()
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.symlink(link_target, target)
+            created.append((m, target))
+        if not allow_external_symlinks:
+            # a chain of individually harmless links can still point outside; check what they resolve to
+            for m, target in created:
+                if _link_escapes(dest_root, target):
+                    target.unlink()
+                    summary["failed"][m["path"]] = f"PackError: symlink resolves outside the destination: {m['target']}"
+
+        # directory metadata last (writing their contents changed their mtimes), deepest first
+        for m in reversed(selected):
+            if m["type"] == "dir":
+                target = _safe_target(dest_root, m["path"])
+                if target.is_symlink():
+                    continue
+                os.chmod(target, m["mode"])
+                os.utime(target, ns=(m["mtime_ns"], m["mtime_ns"]))
+    summary["seconds"] = time.perf_counter() - started
+    events.emit("unpack.finished", **summary)
+    if summary["failed"]:
+        raise PackError(f"{len(summary['failed'])} member(s) could not be extracted: {', '.join(sorted(summary['failed']))}")
+    return summary
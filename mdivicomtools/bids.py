@@ -0,0 +1,382 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import secrets
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from .inventory import DatasetInventory, SessionInfo, StreamInfo, scan_dataset
+from .provenance import core_version
+from .utils.events import get_event_bus
+
+PathLike = Union[str, Path]
+
+BIDS_VERSION = "1.9.0"
+STATE_PATH = Path(".mdivicom") / "bids_view.json"
+STATE_FORMAT = "mdivicomtools-bids-view/0.1"
+LINK_MODES = ("symlink", "hardlink")
+DEFAULT_TASK = "interaction"
+
+# openSIDS stream type -> (BIDS datatype, filename suffix); overridden by `bids.datatype` / `bids.suffix`
+# in the stream sidecar. Unknown stream types become `beh/<stream_type>`.
+STREAM_TYPE_MAP: Dict[str, Tuple[str, str]] = {
+    "video": ("beh", "video"),
+    "audio": ("beh", "audio"),
+    "gaze": ("beh", "eyetrack"),
+    "eyetracking": ("beh", "eyetrack"),
+    "physio": ("beh", "physio"),
+    "imu": ("motion", "motion"),
+    "motion": ("motion", "motion"),
+    "eeg": ("eeg", "eeg"),
+    "meg": ("meg", "meg"),
+    "ieeg": ("ieeg", "ieeg"),
+    "nirs": ("nirs", "nirs"),
+}
+
+_LABEL_CHARS = re.compile(r"[^A-Za-z0-9]")
+
+
+def bids_label(value: Any) -> str:
+    """BIDS entity label: alphanumerics only (`"sub-001"` is passed as `"001"`)."""
+    return _LABEL_CHARS.sub("", str(value))
+
+
+def _bids_hints(sidecar: Dict[str, Any]) -> Dict[str, Any]:
+    hints = sidecar.get("bids")
+    return hints if isinstance(hints, dict) else {}
+
+
+def _extension(name: str) -> str:
+    lower = name.lower()
+    base, ext = os.path.splitext(lower)
+    if ext == ".gz":
+        ext = os.path.splitext(base)[1] + ext
+    return ext
+
+
+def _strip_prefix(value: str, prefix: str) -> str:
+    return value[len(prefix):] if value.startswith(prefix) else value
+
+
+class ViewEntry:
+    """
+    One path of the BIDS view: a link to a payload file (`source`) or a generated sidecar (`content`).
+    """
+
+    __slots__ = ("path", "source", "content")
+
+    def __init__(self, path: str, source: Optional[str] = None, content: Optional[bytes] = None):
+        self.path = path
+        self.source = source
+        self.content = content
+
+    @property
+    def is_link(self) -> bool:
+        return self.source is not None
+
+    def __repr__(self) -> str:
+        return f"ViewEntry({self.path} <- {self.source or 'generated'})"
+
+
+def _json_bytes(data: Any) -> bytes:
+    return (json.dumps(data, indent=2, ensure_ascii=False, sort_keys=True) + "\n").encode("utf-8")
+
+
+def _tsv_bytes(header: List[str], rows: List[List[Any]]) -> bytes:
+    lines = ["\t".join(header)] + ["\t".join("n/a" if v is None else str(v) for v in row) for row in rows]
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _payload_files(stream: StreamInfo) -> Iterator[str]:
+    """Payload files of a stream directory (recursive, sorted), without its sidecar, hidden and partial files."""
+    sidecar_name = f"{stream.stream_id}_stream.yaml"
+    root = os.fspath(stream.path)
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except FileNotFoundError:
+            continue
+        subdirs = []
+        for entry in entries:
+            if entry.name.startswith(".") or entry.name.endswith(".part"):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif directory == root and entry.name == sidecar_name:
+                continue
+            else:
+                yield entry.path
+        stack.extend(reversed(subdirs))
+
+
+def _subject(session: SessionInfo) -> Optional[str]:
+    hints = _bids_hints(session.sidecar)
+    for value in (hints.get("subject"), session.sidecar.get("subject"), session.sidecar.get("participant_id")):
+        if value not in (None, ""):
+            return bids_label(_strip_prefix(str(value), "sub-"))
+    return None
+
+
+def plan_bids_view(
+        inventory: DatasetInventory,
+        *,
+        task: Optional[str] = None,
+) -> Tuple[List[ViewEntry], Dict[str, Any]]:
+    """
+    Compute the BIDS view of an openSIDS dataset from its session and stream sidecars.
+
+    Mapping (every part can be overridden with a `bids:` block in the sidecars):
+
+    - subject: session `bids.subject`, else `subject`, else `participant_id` (sessions without one are skipped)
+    - session: session `bids.session`, else the openSIDS session id
+    - datatype / suffix: stream `bids.datatype` / `bids.suffix`, else `STREAM_TYPE_MAP[stream_type]`
+    - task: stream `bids.task`, session `bids.task`, manifest `bids.task`, `task`, else `DEFAULT_TASK`
+    - acq: stream `bids.acq`, else the stream id without `str-` (`str-video-01` -> `video01`)
+    - run: added when a stream has several payload files with the same extension (in name order)
+
+    Payload files become link entries `sub-<s>/ses-<x>/<datatype>/sub-<s>_ses-<x>_task-<t>_acq-<a>[_run-<n>]_<suffix><ext>`;
+    generated entries are `dataset_description.json`, `participants.tsv`, `sub-<s>/sub-<s>_sessions.tsv` and one
+    JSON sidecar per stream (without `run`, so it applies to all runs) carrying the stream sidecar fields.
+
+    Returns:
+        Tuple[List[ViewEntry], Dict[str, Any]]: View entries, and issues (`skipped_sessions`: label -> reason,
+        `conflicts`: list of `{path, sources}` where several files map to one BIDS path; the first one wins).
+    """
+    manifest_hints = _bids_hints(inventory.manifest)
+    default_task = task or manifest_hints.get("task") or inventory.manifest.get("task") or DEFAULT_TASK
+    root = str(inventory.root)
+    entries: Dict[str, ViewEntry] = {}
+    conflicts: Dict[str, List[str]] = {}
+    skipped: Dict[str, str] = {}
+    sessions_by_subject: Dict[str, List[List[Any]]] = {}
+
+    def add(entry: ViewEntry) -> None:
+        existing = entries.get(entry.path)
+        if existing is None:
+            entries[entry.path] = entry
+        elif entry.is_link:
+            conflicts.setdefault(entry.path, [os.path.relpath(existing.source or "", root)]).append(os.path.relpath(entry.source, root))
+
+    for session in inventory.sessions:
+        subject = _subject(session)
+        if not subject:
+            skipped[session.label] = "no subject in session sidecar"
+            continue
+        session_hints = _bids_hints(session.sidecar)
+        ses = bids_label(session_hints.get("session") or session.session_id)
+        sessions_by_subject.setdefault(subject, []).append([f"ses-{ses}", session.label, session.sidecar.get("acq_time")])
+        prefix = f"sub-{subject}/ses-{ses}"
+        for stream in session.streams:
+            stream_hints = _bids_hints(stream.sidecar)
+            datatype, suffix = STREAM_TYPE_MAP.get(stream.stream_type, ("beh", bids_label(stream.stream_type)))
+            datatype = stream_hints.get("datatype") or datatype
+            suffix = stream_hints.get("suffix") or suffix
+            stream_task = bids_label(stream_hints.get("task") or session_hints.get("task") or default_task)
+            acq = bids_label(stream_hints.get("acq") or _strip_prefix(stream.stream_id, "str-"))
+            stem_base = f"sub-{subject}_ses-{ses}_task-{stream_task}_acq-{acq}"
+
+            by_ext: Dict[str, List[str]] = {}
+            for source in _payload_files(stream):
+                by_ext.setdefault(_extension(os.path.basename(source)), []).append(source)
+            for ext, sources in sorted(by_ext.items()):
+                for n, source in enumerate(sources, 1):
+                    run = f"_run-{n}" if len(sources) > 1 else ""
+                    add(ViewEntry(f"{prefix}/{datatype}/{stem_base}{run}_{suffix}{ext}", source=source))
+            if by_ext:
+                # one sidecar without the run entity applies to all runs (BIDS inheritance principle)
+                metadata = {k: v for k, v in stream.sidecar.items() if k != "bids"}
+                sidecar = {"TaskName": stream_task, "OpenSIDS": {"session": session.label, "stream_type": stream.stream_type, "stream_id": stream.stream_id, "stream": metadata}}
+                add(ViewEntry(f"{prefix}/{datatype}/{stem_base}_{suffix}.json", content=_json_bytes(sidecar)))
+
+    name = manifest_hints.get("name") or inventory.manifest.get("name") or inventory.manifest.get("dataset_id") or inventory.root.name
+    description = {
+        "Name": str(name),
+        "BIDSVersion": BIDS_VERSION,
+        "DatasetType": "raw",
+        "GeneratedBy": [{"Name": "mdivicomtools", "Version": core_version() or "unknown", "Description": "openSIDS link-farm BIDS view"}],
+        "SourceDatasets": [{"URL": inventory.root.as_uri()}],
+    }
+    add(ViewEntry("dataset_description.json", content=_json_bytes(description)))
+    add(ViewEntry("participants.tsv", content=_tsv_bytes(["participant_id"], [[f"sub-{s}"] for s in sorted(sessions_by_subject)])))
+    for subject, rows in sorted(sessions_by_subject.items()):
+        add(ViewEntry(f"sub-{subject}/sub-{subject}_sessions.tsv", content=_tsv_bytes(["session_id", "opensids_session", "acq_time"], sorted(rows))))
+
+    issues = {"skipped_sessions": skipped, "conflicts": [{"path": p, "sources": s} for p, s in sorted(conflicts.items())]}
+    return sorted(entries.values(), key=lambda e: e.path), issues
+
+
+# ---------------------------------------------------------------------- materialization
+
+
+def _read_state(view_root: Path) -> Set[str]:
+    try:
+        data = json.loads((view_root / STATE_PATH).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return set()
+    if not isinstance(data, dict) or data.get("format") != STATE_FORMAT:
+        return set()
+    return set(data.get("paths", []))
+
+
+def _write_state(view_root: Path, dataset_root: Path, link: str, paths: List[str]) -> None:
+    path = view_root / STATE_PATH
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{secrets.token_hex(4)}.tmp")
+    payload = {"format": STATE_FORMAT, "dataset_root": str(dataset_root), "link": link, "paths": paths}
+    tmp.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _link_is_current(target: str, entry: ViewEntry, link: str) -> bool:
+    try:
+        if link == "symlink":
+            return os.readlink(target) == os.path.relpath(entry.source, os.path.dirname(target))
+        st = os.lstat(target)
+        src = os.stat(entry.source)
+    except OSError:
+        return False
+    return (st.st_ino, st.st_dev) == (src.st_ino, src.st_dev)
+
+
+def _file_is_current(target: str, content: bytes) -> bool:
+    try:
+        if os.path.islink(target) or os.path.getsize(target) != len(content):
+            return False
+        with open(target, "rb") as fh:
+            return fh.read() == content
+    except OSError:
+        return False
+
+
+def _replace(target: str, make: Any) -> None:
+    """Create the new entry under a temporary name and rename it over `target` (no window without a file)."""
+    directory, name = os.path.split(target)
+    os.makedirs(directory, exist_ok=True)
+    tmp = os.path.join(directory, f".{name}.{secrets.token_hex(4)}.tmp")
+    make(tmp)
+    try:
+        os.replace(tmp, target)
+    except OSError:
+        os.unlink(tmp)
+        raise
+
+
+def _write_bytes(path: str, content: bytes) -> None:
+    with open(path, "wb") as fh:
+        fh.write(content)
+
+
+def _prune_empty_dirs(view_root: Path, removed: List[str]) -> None:
+    for directory in sorted({os.path.dirname(p) for p in removed}, key=len, reverse=True):
+        current = directory
+        while current:
+            try:
+                os.rmdir(view_root / current)
+            except OSError:
+                break
+            current = os.path.dirname(current)
+
+
+def export_bids_view(
+        dataset_root: PathLike,
+        view_root: PathLike,
+        *,
+        link: str = "symlink",
+        task: Optional[str] = None,
+        dry_run: bool = False,
+        use_cache: bool = True,
+) -> Dict[str, Any]:
+    """
+    Materialize (or update) a BIDS view of an openSIDS dataset without copying payloads.
+
+    Payload files are linked into the view (`link="symlink"`: relative symlinks, so the dataset and the
+    view can be moved together; `"hardlink"`: same filesystem only, survives moving the view alone).
+    Only `dataset_description.json`, `participants.tsv`, `*_sessions.tsv` and the per-file JSON sidecars
+    are written as real files. The sidecars come from the cached inventory (`scan_dataset`).
+
+    Re-exports are incremental: links that already point to their source and generated files whose
+    content is unchanged are left alone; entries that disappeared from the dataset are removed. The view
+    remembers the paths it owns in `<view>/.mdivicom/bids_view.json`, and files it does not own are
+    never touched.
+
+    Returns:
+        Dict[str, Any]: Summary with counts (`linked`, `written`, `unchanged`, `removed`), `skipped_sessions`,
+        `conflicts`, `errors` (path -> message) and `seconds`.
+    """
+    if link not in LINK_MODES:
+        raise ValueError(f"Unknown link mode {link!r}; expected one of {', '.join(LINK_MODES)}")
+    started = time.perf_counter()
+    events = get_event_bus()
+    inventory = scan_dataset(dataset_root, use_cache=use_cache)
+    view = Path(view_root).expanduser().resolve()
+    if view == inventory.root or inventory.root in view.parents:
+        raise ValueError(f"The BIDS view must be outside the dataset: {view}")
+    entries, issues = plan_bids_view(inventory, task=task)
+
+    owned = _read_state(view)
+    summary: Dict[str, Any] = {"view_root": str(view), "entries": len(entries), "linked": 0, "written": 0, "unchanged": 0, "removed": 0, "errors": {}}
+    summary.update(issues)
+    wanted = {e.path for e in entries}
+    done: List[str] = []
+
+    for i, entry in enumerate(entries):
+        target = str(view / entry.path)
+        if entry.is_link:
+            if _link_is_current(target, entry, link):
+                summary["unchanged"] += 1
+                done.append(entry.path)
+                continue
+            if os.path.lexists(target) and entry.path not in owned:
+                summary["errors"][entry.path] = "exists and is not managed by this view"
+                continue
+            if not dry_run:
+                source = entry.source
+                try:
+                    if link == "symlink":
+                        relative = os.path.relpath(source, os.path.dirname(target))
+                        _replace(target, lambda tmp: os.symlink(relative, tmp))
+                    else:
+                        _replace(target, lambda tmp: os.link(source, tmp))
+                except OSError as exc:
+                    summary["errors"][entry.path] = f"{type(exc).__name__}: {exc}"
+                    continue
+            summary["linked"] += 1
+        else:
+            if _file_is_current(target, entry.content):
+                summary["unchanged"] += 1
+                done.append(entry.path)
+                continue
+            if os.path.lexists(target) and entry.path not in owned:
+                summary["errors"][entry.path] = "exists and is not managed by this view"
+                continue
+            if not dry_run:
+                content = entry.content
+                try:
+                    _replace(target, lambda tmp: _write_bytes(tmp, content))
+                except OSError as exc:
+                    summary["errors"][entry.path] = f"{type(exc).__name__}: {exc}"
+                    continue
+            summary["written"] += 1
+        done.append(entry.path)
+        events.emit("bids.progress", throttle=True, entries=i + 1, total=len(entries))
+
+    stale = sorted(owned - wanted)
+    if not dry_run:
+        for path in stale:
+            try:
+                os.unlink(view / path)
+            except FileNotFoundError:
+                pass
+        _prune_empty_dirs(view, stale)
+        # entries that failed stay owned if they were before, so a later export can fix them
+        _write_state(view, inventory.root, link, sorted(set(done) | (owned & wanted)))
+    summary["removed"] = len(stale)
+    summary["seconds"] = time.perf_counter() - started
+    events.emit("bids.finished", **{k: v for k, v in summary.items() if k not in ("errors", "conflicts", "skipped_sessions")})
+    return summary
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
+import inspect
 import json
+import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from .plugin_registry import PluginNotFoundError, PluginRef, get_plugin, list_plugins
-from .provenance import new_run_id, run_record, write_run_record
+from .provenance import finish_run_record, new_run_id, run_record, write_run_record
+from .run_index import query_runs, rebuild_index
+from .utils.events import get_event_bus, setup_events
 
 
 def _json_sanitize(obj: Any) -> Any:
@@ -65,40 +70,582 @@ def _cmd_plugins_info(args: argparse.Namespace) -> int:
     return 0
 
 
+def _start_run(plugin: Dict[str, Any], *, dataset_dir: Path, out_dir: Path, work_dir: Optional[Path], config: Dict[str, Any], backend: str) -> Tuple[str, Path]:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    run_id = new_run_id()
+    record_path = write_run_record(out_dir, run_id, run_record(plugin=plugin, dataset_dir=dataset_dir, out_dir=out_dir, work_dir=work_dir, config=config, backend=backend))
+    return run_id, record_path
+
+
+def _accepts_keyword(fn: Any, name: str) -> bool:
+    try:
+        return name in inspect.signature(fn).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def _call_plugin(
+        plugin: Dict[str, Any],
+        *,
+        dataset_dir: Path,
+        out_dir: Path,
+        work_dir: Optional[Path],
+        config: Dict[str, Any],
+        backend: str,
+        dry_run: bool,
+        profiler: Any = None,
+) -> None:
+    if backend == "auto":
+        backend = plugin.get("kind", "python")
+
+    if backend == "python":
+        run_fn = plugin.get("run")
+        if not callable(run_fn):
+            raise TypeError(f"Plugin {plugin.get('id')} is missing a callable 'run' function")
+        kwargs: Dict[str, Any] = {}
+        if _accepts_keyword(run_fn, "output_writer"):
+            from .resultbundle import writer_factory
+
+            kwargs["output_writer"] = writer_factory(out_dir, {"tool_ref": plugin.get("id"), "tool_version": plugin.get("version")})
+        with profiler if profiler is not None else contextlib.nullcontext():
+            run_fn(dataset_dir=dataset_dir, out_dir=out_dir, config=config, work_dir=work_dir, dry_run=dry_run, **kwargs)
+    elif backend == "docker":
+        raise NotImplementedError("docker backend is not implemented in this scaffold yet")
+    else:
+        raise ValueError(f"Unknown backend: {backend}")
+
+
+def _setup_events(args: argparse.Namespace) -> None:
+    if args.events or args.events_socket:
+        setup_events(jsonl_path=args.events, socket_path=args.events_socket, min_interval=args.events_interval, command=args.cmd)
+
+
 def _cmd_run(args: argparse.Namespace) -> int:
+    _setup_events(args)
+    events = get_event_bus()
+    started = time.perf_counter()
     plugin_ref = PluginRef.parse(args.plugin_ref)
-    plugin = get_plugin(plugin_ref, resolve_execution=True)
+    with events.stage("resolve_plugin"):
+        plugin = get_plugin(plugin_ref, resolve_execution=True)
 
     dataset_dir = Path(args.dataset).expanduser().resolve()
     out_dir = Path(args.out).expanduser().resolve()
     work_dir = Path(args.work).expanduser().resolve() if args.work else None
     config = _parse_config(args.config)
 
-    out_dir.mkdir(parents=True, exist_ok=True)
+    with events.stage("provenance"):
+        run_id, record_path = _start_run(plugin, dataset_dir=dataset_dir, out_dir=out_dir, work_dir=work_dir, config=config, backend=args.backend)
+    events.emit("run.started", run_id=run_id, plugin=plugin.get("id"), dataset_dir=str(dataset_dir), out_dir=str(out_dir))
 
-    run_id = new_run_id()
-    record_path = write_run_record(out_dir, run_id, run_record(plugin=plugin, dataset_dir=dataset_dir, out_dir=out_dir, work_dir=work_dir, config=config, backend=args.backend))
+    profiler = None
+    if args.profile:
+        from .profiling import RunProfiler
 
-    try:
-        backend = args.backend
-        if backend == "auto":
-            backend = plugin.get("kind", "python")
-
-        if backend == "python":
-            run_fn = plugin.get("run")
-            if not callable(run_fn):
-                raise TypeError(f"Plugin {plugin.get('id')} is missing a callable 'run' function")
-            run_fn(dataset_dir=dataset_dir, out_dir=out_dir, config=config, work_dir=work_dir, dry_run=bool(args.dry_run))
-        elif backend == "docker":
-            raise NotImplementedError("docker backend is not implemented in this scaffold yet")
-        else:
-            raise ValueError(f"Unknown backend: {backend}")
+        profiler = RunProfiler(
+            args.profile, record_path.parent / run_id, top_n=args.profile_top, interval=args.profile_interval, frames=args.profile_frames
+        )
 
+    try:
+        with events.stage("plugin", run_id=run_id):
+            _call_plugin(
+                plugin,
+                dataset_dir=dataset_dir,
+                out_dir=out_dir,
+                work_dir=work_dir,
+                config=config,
+                backend=args.backend,
+                dry_run=bool(args.dry_run),
+                profiler=profiler,
+            )
+        finish_run_record(record_path, status="succeeded", extra=_profile_extra(profiler))
+        events.emit("run.finished", run_id=run_id, status="succeeded", seconds=time.perf_counter() - started)
         return 0
     except Exception as exc:
+        finish_run_record(record_path, status="failed", error=f"{type(exc).__name__}: {exc}", extra=_profile_extra(profiler))
+        events.emit("run.finished", run_id=run_id, status="failed", error=f"{type(exc).__name__}: {exc}", seconds=time.perf_counter() - started)
         raise SystemExit(f"Run failed (run_id={run_id}). See {record_path} for provenance. Error: {exc}") from exc
 
 
+def _batch_jobs(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    config = _parse_config(args.config)
+    out_dir = str(Path(args.out).expanduser().resolve()) if args.out else None
+    work_dir = str(Path(args.work).expanduser().resolve()) if args.work else None
+
+    specs: List[Dict[str, Any]] = [{"dataset": dataset} for dataset in args.dataset or []]
+    if args.jobs_file:
+        with open(args.jobs_file, "r", encoding="utf-8") as fh:
+            for line_no, line in enumerate(fh, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                spec = json.loads(line)
+                if not isinstance(spec, dict) or not spec.get("dataset"):
+                    raise SystemExit(f"{args.jobs_file}:{line_no}: each job needs a 'dataset'")
+                specs.append(spec)
+    if not specs:
+        raise SystemExit("No jobs: pass --dataset and/or --jobs-file")
+
+    jobs = []
+    for spec in specs:
+        job_out = str(Path(spec["out"]).expanduser().resolve()) if spec.get("out") else out_dir
+        if job_out is None:
+            raise SystemExit(f"No output directory for dataset {spec['dataset']}: pass --out or set 'out' in the job")
+        job_config = spec.get("config", config)
+        if isinstance(job_config, str):
+            job_config = _parse_config(job_config)
+        jobs.append(
+            {
+                "dataset_dir": str(Path(spec["dataset"]).expanduser().resolve()),
+                "out_dir": job_out,
+                "work_dir": str(Path(spec["work"]).expanduser().resolve()) if spec.get("work") else work_dir,
+                "config": job_config,
+                "dry_run": bool(args.dry_run),
+            }
+        )
+    return jobs
+
+
+def _cmd_batch(args: argparse.Namespace) -> int:
+    from .workerpool import PluginWorkerPool
+
+    _setup_events(args)
+    events = get_event_bus()
+    started = time.perf_counter()
+
+    # resolve metadata here so unknown/ambiguous plugins fail before any worker starts
+    plugin = get_plugin(PluginRef.parse(args.plugin_ref))
+    if plugin.get("kind", "python") != "python":
+        raise SystemExit(f"mdivicom batch runs python-lane plugins only; {args.plugin_ref} is kind={plugin.get('kind')}")
+    jobs = _batch_jobs(args)
+
+    events.emit("batch.started", plugin=plugin.get("id"), jobs=len(jobs), workers=args.workers)
+
+    def report(result: Dict[str, Any]) -> None:
+        events.emit(
+            "run.finished",
+            run_id=result["run_id"],
+            status=result["status"],
+            error=result["error"],
+            dataset_dir=result["dataset_dir"],
+            worker_pid=result["pid"],
+        )
+        if not args.json:
+            detail = f"\t{result['error']}" if result["error"] else ""
+            print(f"{result['run_id'] or '-'}\t{result['status']}\t{result['dataset_dir']}{detail}", flush=True)
+
+    pool = PluginWorkerPool(
+        args.plugin_ref,
+        workers=args.workers,
+        backend=args.backend,
+        max_jobs_per_worker=args.max_jobs_per_worker,
+        max_worker_rss_mb=args.max_worker_memory_mb,
+    )
+    try:
+        results = pool.map(jobs, on_result=report)
+    except RuntimeError as exc:
+        raise SystemExit(str(exc)) from exc
+    events.emit(
+        "batch.finished",
+        jobs=len(results),
+        failed=sum(1 for r in results if r["status"] != "succeeded"),
+        workers_started=pool.workers_started,
+        workers_recycled=pool.workers_recycled,
+        seconds=time.perf_counter() - started,
+    )
+    if args.json:
+        payload = {"results": results, "workers_started": pool.workers_started, "workers_recycled": pool.workers_recycled}
+        print(json.dumps(payload, indent=2, ensure_ascii=False, sort_keys=True))
+    return 0 if all(r["status"] == "succeeded" for r in results) else 1
+
+
+def _cmd_watch(args: argparse.Namespace) -> int:
+    import subprocess
+    import sys
+
+    from .utils.rename import get_file_list, plan_transformations
+    from .watch import SessionWatcher
+
+    if not args.run and not args.find:
+        raise SystemExit("Nothing to do: pass --run <plugin> and/or --find/--replace")
+    if args.run and not args.out:
+        raise SystemExit("--run needs --out")
+    if args.replace and len(args.replace) != len(args.find or []):
+        raise SystemExit("--replace must be given once per --find")
+
+    _setup_events(args)
+    events = get_event_bus()
+    dataset_dir = Path(args.dataset).expanduser().resolve()
+    plans_dir = Path(args.plans_dir).expanduser().resolve() if args.plans_dir else dataset_dir / ".mdivicom" / "plans"
+    # anything written below the watched sessions would look like a change and re-trigger the watch
+    sessions_dir = dataset_dir / "sessions"
+    for option, value in (("--out", args.out), ("--plans-dir", args.plans_dir)):
+        target = Path(value).expanduser().resolve() if value else None
+        if target is not None and (target == sessions_dir or sessions_dir in target.parents):
+            raise SystemExit(f"{option} must be outside {sessions_dir}: {target}")
+
+    def on_ready(sessions: List[Path]) -> Set[str]:
+        events.emit("watch.sessions_ready", sessions=[s.name for s in sessions])
+        failed: Set[str] = set()
+        if args.find:
+            plans_dir.mkdir(parents=True, exist_ok=True)
+            for session in sessions:
+                # same base directory as a full-tree plan, restricted to the changed session
+                plan = plan_transformations(str(dataset_dir), get_file_list(str(session)), args.find, args.replace, securecopy_folder=args.securecopy_folder)
+                plan_path = plan.save(plans_dir / f"{session.name}.plan")
+                print(f"{session.name}\tplanned\t{len(plan)} entries\t{plan_path}", flush=True)
+        for plugin_ref in args.run or []:
+            cmd = [sys.executable, "-m", "mdivicomtools", "batch", plugin_ref, "--out", args.out, "--workers", str(min(args.workers, len(sessions))), "--json"]
+            for session in sessions:
+                cmd += ["--dataset", str(session)]
+            if args.config:
+                cmd += ["--config", args.config]
+            proc = subprocess.run(cmd, stdout=subprocess.PIPE, text=True)
+            try:
+                results = json.loads(proc.stdout)["results"]
+            except (ValueError, KeyError):
+                # batch itself failed (e.g. plugin not found): retry all of them after their next change
+                print(f"{plugin_ref}: batch failed with exit code {proc.returncode}", flush=True)
+                failed.update(s.name for s in sessions)
+                continue
+            for result in results:
+                name = Path(result["dataset_dir"]).name
+                if result["status"] != "succeeded":
+                    failed.add(name)
+                detail = f"\t{result['error']}" if result["error"] else ""
+                print(f"{name}\t{plugin_ref}\t{result['status']}\t{result['run_id'] or '-'}{detail}", flush=True)
+        return failed
+
+    watcher = SessionWatcher(
+        dataset_dir,
+        quiet_seconds=args.quiet,
+        poll_interval=args.poll_interval,
+        use_inotify=False if args.poll else None,
+        state_path=args.state,
+        rescan_interval=args.rescan_interval,
+    )
+    print(f"Watching {watcher.sessions_dir} ({watcher.source.kind}, quiet period {args.quiet:g}s)", file=sys.stderr, flush=True)
+    try:
+        watcher.run(on_ready, once=bool(args.once))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def _profile_extra(profiler: Any) -> Optional[Dict[str, Any]]:
+    if profiler is None or not profiler.artifacts:
+        return None
+    return {"profile": profiler.to_record()}
+
+
+def _cmd_runs_list(args: argparse.Namespace) -> int:
+    runs_dir = Path(args.out).expanduser().resolve() / "_runs"
+    dataset_dir = str(Path(args.dataset).expanduser().resolve()) if args.dataset else None
+    try:
+        runs = query_runs(
+            runs_dir,
+            plugin=args.plugin,
+            config_hash=args.config_hash,
+            status=args.status,
+            dataset_dir=dataset_dir,
+            since=args.since,
+            until=args.until,
+            last=args.last,
+        )
+    except ValueError as exc:
+        raise SystemExit(f"mdivicom runs list: --since/--until: {exc}") from exc
+    if args.json:
+        print(json.dumps(runs, indent=2, ensure_ascii=False, sort_keys=True))
+        return 0
+
+    if not runs:
+        print("(no runs found)")
+        return 0
+
+    for entry in runs:
+        publisher = entry.get("publisher")
+        plugin = f"{publisher + '/' if publisher else ''}{entry.get('plugin_id') or 'unknown'}"
+        print(f"{entry.get('run_id')}\t{entry.get('status') or 'unknown'}\t{plugin}\t{(entry.get('config_hash_sha256') or '')[:12]}\t{entry.get('dataset_dir')}")
+    return 0
+
+
+def _cmd_runs_reindex(args: argparse.Namespace) -> int:
+    runs_dir = Path(args.out).expanduser().resolve() / "_runs"
+    if not runs_dir.is_dir():
+        raise SystemExit(f"No run records found: {runs_dir} does not exist")
+    stats = rebuild_index(runs_dir, full=bool(args.full))
+    print(json.dumps(stats, sort_keys=True))
+    return 0
+
+
+def _cmd_inventory(args: argparse.Namespace) -> int:
+    from .inventory import scan_dataset
+
+    inventory = scan_dataset(args.dataset, cache_path=args.cache, use_cache=not args.no_cache)
+    if args.json:
+        print(json.dumps(inventory.to_dict(), indent=2, ensure_ascii=False, sort_keys=True))
+        return 0
+
+    for session in inventory.sessions:
+        streams = ", ".join(f"{s.stream_type}/{s.stream_id}" for s in session.streams) or "(no streams)"
+        print(f"{session.label}\t{streams}")
+    return 0
+
+
+def _cmd_sync_fit(args: argparse.Namespace) -> int:
+    from .sync import find_sessions_with_markers, fit_sessions
+
+    dataset_dir = Path(args.dataset).expanduser().resolve()
+    if args.session:
+        session_dirs = [dataset_dir / "sessions" / (s if s.startswith("ses-") else f"ses-{s}") for s in args.session]
+    else:
+        session_dirs = find_sessions_with_markers(dataset_dir)
+
+    results = fit_sessions(
+        session_dirs,
+        jobs=args.jobs,
+        piecewise=args.piecewise,
+        max_gap=args.max_gap,
+        outlier_sigma=args.outlier_sigma,
+        dry_run=bool(args.dry_run),
+    )
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False, sort_keys=True))
+    else:
+        for result in results:
+            detail = f"{result['streams']} stream(s)" if result["status"] == "ok" else result["error"]
+            print(f"{Path(result['session_dir']).name}\t{result['status']}\t{detail}")
+    return 0 if all(r["status"] == "ok" for r in results) else 1
+
+
+def _cmd_download(args: argparse.Namespace) -> int:
+    from .download import DownloadManager, load_manifest
+
+    _setup_events(args)
+    dataset_dir = Path(args.dataset).expanduser().resolve()
+    try:
+        tasks = load_manifest(args.manifest, dataset_dir)
+    except (OSError, ValueError) as exc:
+        raise SystemExit(f"Invalid download manifest: {exc}") from exc
+    headers = {}
+    for header in args.header or []:
+        name, sep, value = header.partition(":")
+        if not sep:
+            raise SystemExit(f"--header must be 'Name: value', got {header!r}")
+        headers[name.strip()] = value.strip()
+
+    def report(result: Dict[str, Any]) -> None:
+        if not args.json:
+            detail = f"\t{result['error']}" if result["error"] else ""
+            print(f"{result['status']}\t{result['path']}{detail}", flush=True)
+
+    with DownloadManager(workers=args.workers, headers=headers, retries=args.retries, overwrite=args.overwrite) as manager:
+        results = manager.download_all(tasks, on_result=report)
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False, sort_keys=True))
+    return 0 if all(r["status"] != "failed" for r in results) else 1
+
+
+def _cmd_pack(args: argparse.Namespace) -> int:
+    from .archive import pack
+
+    _setup_events(args)
+    archive = Path(args.out).expanduser().resolve()
+    record_dir = None if args.no_record else Path(args.record_dir or archive.parent).expanduser().resolve()
+    try:
+        summary = pack(
+            [Path(s).expanduser() for s in args.sources],
+            archive,
+            codec=args.codec,
+            level=args.level,
+            block_size=int(args.block_size_mib * 1024 * 1024),
+            jobs=args.jobs,
+            record_dir=record_dir,
+        )
+    except (OSError, ValueError) as exc:
+        raise SystemExit(f"pack failed: {exc}") from exc
+    if args.json:
+        print(json.dumps(summary, indent=2, ensure_ascii=False, sort_keys=True))
+    else:
+        ratio = summary["stored_bytes"] / summary["bytes"] if summary["bytes"] else 1.0
+        print(f"{summary['archive']}\t{summary['files']} files\t{summary['bytes']} -> {summary['stored_bytes']} bytes ({ratio:.0%})\t{summary['seconds']:.1f}s")
+    return 0
+
+
+def _cmd_unpack(args: argparse.Namespace) -> int:
+    from .archive import PackArchive, PackError, unpack
+
+    _setup_events(args)
+    archive = Path(args.archive).expanduser().resolve()
+    if args.list:
+        try:
+            with PackArchive(archive) as pack_archive:
+                selected = pack_archive.select(args.member)
+        except (OSError, PackError) as exc:
+            raise SystemExit(str(exc)) from exc
+        if args.json:
+            print(json.dumps(selected, indent=2, ensure_ascii=False, sort_keys=True))
+        else:
+            for m in selected:
+                if m["type"] == "file":
+                    print(f"{m['path']}\t{m['size']}\t{m['codec']}\t@{m['offset']}")
+                else:
+                    print(f"{m['path']}\t{m['type']}")
+        return 0
+
+    if not args.dest:
+        raise SystemExit("unpack needs --dest (or --list)")
+    record_dir = None if args.no_record else Path(args.record_dir or archive.parent).expanduser().resolve()
+    try:
+        summary = unpack(archive, Path(args.dest).expanduser(), members=args.member, jobs=args.jobs, overwrite=args.overwrite, record_dir=record_dir,
+                         allow_external_symlinks=args.allow_external_symlinks)
+    except (OSError, PackError) as exc:
+        raise SystemExit(f"unpack failed: {exc}") from exc
+    if args.json:
+        print(json.dumps(summary, indent=2, ensure_ascii=False, sort_keys=True))
+    else:
+        print(f"{summary['dest_dir']}\t{summary['files']} files\t{summary['bytes']} bytes\t{summary['skipped']} skipped\t{summary['seconds']:.1f}s")
+    return 0
+
+
+def _cmd_bids_view(args: argparse.Namespace) -> int:
+    from .bids import export_bids_view
+
+    _setup_events(args)
+    try:
+        summary = export_bids_view(args.dataset, args.out, link=args.link, task=args.task, dry_run=bool(args.dry_run), use_cache=not args.no_cache)
+    except (OSError, ValueError) as exc:
+        raise SystemExit(f"bids-view failed: {exc}") from exc
+    if args.json:
+        print(json.dumps(summary, indent=2, ensure_ascii=False, sort_keys=True))
+    else:
+        for label, reason in sorted(summary["skipped_sessions"].items()):
+            print(f"skipped\t{label}\t{reason}")
+        for conflict in summary["conflicts"]:
+            print(f"conflict\t{conflict['path']}\t{', '.join(conflict['sources'])}")
+        for path, error in sorted(summary["errors"].items()):
+            print(f"error\t{path}\t{error}")
+        print(
+            f"{summary['view_root']}\t{summary['entries']} entries\t{summary['linked']} linked\t{summary['written']} written"
+            f"\t{summary['unchanged']} unchanged\t{summary['removed']} removed\t{summary['seconds']:.1f}s"
+        )
+    return 0 if not summary["errors"] else 1
+
+
+def _cmd_infer(args: argparse.Namespace) -> int:
+    from .infer import infer_tree
+
+    root = Path(args.input).expanduser()
+    if not root.is_dir():
+        raise SystemExit(f"infer: not a directory: {root}")
+    _setup_events(args)
+    summary = infer_tree(root, Path(args.out).expanduser(), jobs=args.jobs, limit=args.sniff_bytes, use_cache=not args.no_cache, dry_run=bool(args.dry_run))
+    if args.json:
+        print(json.dumps(summary, indent=2, ensure_ascii=False, sort_keys=True))
+    else:
+        for bundle in summary["bundles"]:
+            print(f"{bundle['status']}\t{bundle['type']}\t{bundle['root']}\t{bundle['path']}")
+        stats = summary["stats"]
+        print(
+            f"{len(summary['bundles'])} bundles\t{stats['directories']} directories\t{stats['files']} candidate files"
+            f"\t{stats['sniffed']} sniffed\t{stats['cached']} cached\t{summary['seconds']:.1f}s"
+        )
+    return 0
+
+
+def _cmd_probe(args: argparse.Namespace) -> int:
+    from .mediaprobe import DEFAULT_STREAM_TYPES, probe_dataset
+
+    _setup_events(args)
+    try:
+        streams, stats = probe_dataset(
+            args.dataset,
+            stream_types=args.type or DEFAULT_STREAM_TYPES,
+            jobs=args.jobs,
+            use_cache=not args.no_cache,
+            write_sidecars=not args.no_write,
+        )
+    except OSError as exc:
+        raise SystemExit(f"probe failed: {exc}") from exc
+    if args.json:
+        payload = {
+            "stats": stats,
+            "streams": [
+                {
+                    "session_id": s.session_id,
+                    "stream_type": s.stream_type,
+                    "stream_id": s.stream_id,
+                    "sidecar": str(s.sidecar_path),
+                    "files": {s.relpath(f): f.to_dict() for f in s.files},
+                    "errors": s.errors,
+                }
+                for s in streams
+            ],
+        }
+        print(json.dumps(payload, indent=2, ensure_ascii=False, sort_keys=True))
+    else:
+        for s in streams:
+            for f in s.files:
+                track = f.video or f.audio
+                rate = f"{f.video.fps} fps" if f.video else (f"{f.audio.sample_rate} Hz" if f.audio else "")
+                duration = f"{f.duration:.3f}s" if f.duration is not None else "?"
+                print(f"ses-{s.session_id}\t{s.stream_id}\t{s.relpath(f)}\t{f.container}/{track.codec if track else '?'}\t{duration}\t{rate}")
+            for name, error in sorted(s.errors.items()):
+                print(f"ses-{s.session_id}\t{s.stream_id}\t{name}\terror\t{error}")
+        print(f"{stats['files']} files\t{stats['probed']} probed\t{stats['cached']} cached\t{stats['errors']} errors\t{stats['sidecars_written']} sidecars written")
+    return 0 if not stats["errors"] else 1
+
+
+def _cmd_dedupe(args: argparse.Namespace) -> int:
+    from .utils.dedupe import DEFAULT_CACHE_PATH, DigestCache, drop_duplicates_from_plan, find_duplicates, link_duplicates
+    from .utils.plan import TransformationPlan
+
+    plan = TransformationPlan.load(args.plan) if args.plan else None
+    paths = [Path(p).expanduser() for p in args.paths]
+    if plan is not None and not paths:
+        paths = [Path(src) for src, _ in plan.iter_rows()]
+    if not paths:
+        raise SystemExit("dedupe needs paths to scan (or --plan)")
+    if args.link and plan is not None:
+        raise SystemExit("--link and --plan are mutually exclusive")
+
+    cache = None
+    if not args.no_cache:
+        cache_root = next((p for p in paths if p.is_dir()), paths[0].parent)
+        cache = DigestCache(Path(args.cache) if args.cache else cache_root / DEFAULT_CACHE_PATH)
+    report = find_duplicates(paths, min_size=args.min_size, jobs=args.jobs, cache=cache)
+    payload = report.to_dict()
+
+    if args.link:
+        payload["link"] = link_duplicates(report, mode=args.link, dry_run=bool(args.dry_run))
+    if plan is not None:
+        reduced, dropped = drop_duplicates_from_plan(plan, report)
+        payload["plan"] = {"entries": len(plan), "kept": len(reduced), "dropped": dropped}
+        if args.plan_out and not args.dry_run:
+            reduced.save(args.plan_out)
+            payload["plan"]["saved"] = str(args.plan_out)
+
+    if args.json:
+        print(json.dumps(payload, indent=2, ensure_ascii=False, sort_keys=True))
+    else:
+        print(report.summary())
+        if "link" in payload:
+            link = payload["link"]
+            verb = "would link" if args.dry_run else "linked"
+            print(f"{verb} {link['linked']} files ({link['mode']}), {link['bytes_reclaimed']} bytes reclaimed")
+            for path, error in sorted(link["failed"].items()):
+                print(f"  failed\t{path}\t{error}")
+        if "plan" in payload:
+            info = payload["plan"]
+            print(f"plan: {info['entries']} entries, {len(info['dropped'])} duplicate sources dropped" + (f", saved to {info['saved']}" if "saved" in info else ""))
+    return 0 if not payload.get("link", {}).get("failed") else 1
+
+
+def _add_event_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--events", help="Append progress/telemetry events as JSON lines to this file")
+    parser.add_argument("--events-socket", help="Send progress/telemetry events as JSON datagrams to this Unix socket")
+    parser.add_argument("--events-interval", type=float, default=1.0, help="Minimum seconds between two progress events of one type")
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(prog="mdivicom")
     sub = parser.add_subparsers(dest="cmd", required=True)
@@ -122,8 +669,176 @@ def build_parser() -> argparse.ArgumentParser:
     run.add_argument("--config", help="Config JSON or path to JSON file")
     run.add_argument("--backend", choices=["auto", "python", "docker"], default="auto")
     run.add_argument("--dry-run", action="store_true")
+    run.add_argument(
+        "--profile",
+        choices=["cprofile", "tracemalloc", "sample"],
+        help="Profile the plugin call; artifacts go to <out>/_runs/<run_id>/ and are linked from the run record",
+    )
+    run.add_argument("--profile-top", type=int, default=50, help="Entries in the profile/allocation summaries")
+    run.add_argument("--profile-interval", type=float, default=0.01, help="Sampling interval in seconds for --profile=sample")
+    run.add_argument("--profile-frames", type=int, default=1, help="Traceback depth stored per allocation for --profile=tracemalloc")
+    _add_event_arguments(run)
     run.set_defaults(_handler=_cmd_run)
 
+    batch = sub.add_parser("batch", help="Run a python-lane plugin over many datasets in warm worker processes")
+    batch.add_argument("plugin_ref", help="Plugin reference (<id> or <publisher>/<id>)")
+    batch.add_argument("--dataset", action="append", help="Dataset/input directory (repeatable)")
+    batch.add_argument("--jobs-file", help="JSON lines file with one job per line: {\"dataset\": ..., \"out\": ..., \"config\": ..., \"work\": ...}")
+    batch.add_argument("--out", help="Output directory (run root) for jobs that do not set their own")
+    batch.add_argument("--work", help="Optional working directory for jobs that do not set their own")
+    batch.add_argument("--config", help="Config JSON or path to JSON file for jobs that do not set their own")
+    batch.add_argument("--backend", choices=["auto", "python"], default="auto")
+    batch.add_argument("--dry-run", action="store_true")
+    batch.add_argument("--workers", type=int, default=4, help="Number of worker processes")
+    batch.add_argument("--max-jobs-per-worker", type=int, default=100, help="Replace a worker after this many jobs (0: never)")
+    batch.add_argument("--max-worker-memory-mb", type=float, help="Replace a worker whose RSS exceeds this after a job")
+    batch.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    _add_event_arguments(batch)
+    batch.set_defaults(_handler=_cmd_batch)
+
+    watch = sub.add_parser("watch", help="Re-plan / re-run sessions of a dataset as they change")
+    watch.add_argument("--dataset", required=True, help="openSIDS dataset root (watches <dataset>/sessions)")
+    watch.add_argument("--run", action="append", help="Plugin to run on every changed session (repeatable; via mdivicom batch)")
+    watch.add_argument("--out", help="Output directory (run root) for --run; must not be below <dataset>/sessions")
+    watch.add_argument("--config", help="Config JSON or path to JSON file for --run")
+    watch.add_argument("--workers", type=int, default=4, help="Worker processes per batch of changed sessions")
+    watch.add_argument("--find", action="append", help="Re-plan changed sessions with plan_transformations (repeatable)")
+    watch.add_argument("--replace", action="append", help="Replacement for the corresponding --find")
+    watch.add_argument("--securecopy-folder", default="securecopy", help="Target folder of --find/--replace plans")
+    watch.add_argument("--plans-dir", help="Where session plans are saved (default: <dataset>/.mdivicom/plans)")
+    watch.add_argument("--quiet", type=float, default=60.0, help="Seconds without changes before a session is processed")
+    watch.add_argument("--poll", action="store_true", help="Poll instead of using inotify (needed on network mounts written by other hosts)")
+    watch.add_argument("--poll-interval", type=float, default=10.0, help="Polling interval in seconds")
+    watch.add_argument("--rescan-interval", type=float, default=600.0, help="With --poll: re-check all files this often (in-place rewrites)")
+    watch.add_argument("--state", help="Processed-session state file (default: <dataset>/.mdivicom/watch.json)")
+    watch.add_argument("--once", action="store_true", help="Process changed sessions once, then exit")
+    _add_event_arguments(watch)
+    watch.set_defaults(_handler=_cmd_watch)
+
+    runs = sub.add_parser("runs", help="Query run provenance records under <out>/_runs")
+    runs_sub = runs.add_subparsers(dest="runs_cmd", required=True)
+
+    runs_list = runs_sub.add_parser("list", help="List runs from the run index")
+    runs_list.add_argument("--out", required=True, help="Output directory (run root)")
+    runs_list.add_argument("--plugin", help="Plugin reference (<id> or <publisher>/<id>)")
+    runs_list.add_argument("--config-hash", help="Config hash (or prefix)")
+    runs_list.add_argument("--status", choices=["started", "succeeded", "failed"])
+    runs_list.add_argument("--dataset", help="Only runs on this dataset directory")
+    runs_list.add_argument("--since", help="ISO timestamp (inclusive, UTC if no offset)")
+    runs_list.add_argument("--until", help="ISO timestamp (exclusive, UTC if no offset)")
+    runs_list.add_argument("--last", type=int, help="Only show the N most recent matches")
+    runs_list.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    runs_list.set_defaults(_handler=_cmd_runs_list)
+
+    runs_reindex = runs_sub.add_parser("reindex", help="Compact the run index and backfill missing runs")
+    runs_reindex.add_argument("--out", required=True, help="Output directory (run root)")
+    runs_reindex.add_argument("--full", action="store_true", help="Re-read every run record instead of trusting the existing index")
+    runs_reindex.set_defaults(_handler=_cmd_runs_reindex)
+
+    inventory = sub.add_parser("inventory", help="List sessions and streams of an openSIDS dataset")
+    inventory.add_argument("--dataset", required=True, help="openSIDS dataset root")
+    inventory.add_argument("--cache", help="Inventory cache file (default: <dataset>/.mdivicom/inventory.json)")
+    inventory.add_argument("--no-cache", action="store_true", help="Ignore and do not write the inventory cache")
+    inventory.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    inventory.set_defaults(_handler=_cmd_inventory)
+
+    download = sub.add_parser("download", help="Download files into the raw/ layout of an openSIDS dataset")
+    download.add_argument("--manifest", required=True, help="JSON lines file: {\"url\": ..., \"session\": ..., \"stream_type\": ..., \"stream_id\": ..., \"filename\": ..., \"checksum\": \"sha256:...\"} or {\"url\": ..., \"dest\": ...}")
+    download.add_argument("--dataset", required=True, help="openSIDS dataset root")
+    download.add_argument("--workers", type=int, default=4, help="Concurrent downloads (and pooled connections)")
+    download.add_argument("--retries", type=int, default=3, help="Resume attempts after a dropped connection")
+    download.add_argument("--header", action="append", help="Extra request header 'Name: value' (repeatable)")
+    download.add_argument("--overwrite", action="store_true", help="Download files that already exist again")
+    download.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    _add_event_arguments(download)
+    download.set_defaults(_handler=_cmd_download)
+
+    pack = sub.add_parser("pack", help="Pack session / result bundle directories into an indexed archive")
+    pack.add_argument("sources", nargs="+", help="Directories (e.g. sessions/ses-01) or files to pack")
+    pack.add_argument("--out", "-o", required=True, help="Archive path (member index: <archive>.index.json)")
+    pack.add_argument("--codec", choices=["auto", "zlib", "lzma", "store"], default="auto", help="Per-member compression (auto: zlib, media files stored)")
+    pack.add_argument("--level", type=int, help="Compression level (zlib 0-9, lzma 0-9)")
+    pack.add_argument("--jobs", type=int, default=4, help="Compression threads")
+    pack.add_argument("--block-size-mib", type=float, default=4.0, help="Members are compressed in independent blocks of this size")
+    pack.add_argument("--record-dir", help="Write the run record to <dir>/_runs (default: the archive directory)")
+    pack.add_argument("--no-record", action="store_true", help="Do not write a run record")
+    pack.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    _add_event_arguments(pack)
+    pack.set_defaults(_handler=_cmd_pack)
+
+    unpack = sub.add_parser("unpack", help="Extract (or list) members of an archive written by mdivicom pack")
+    unpack.add_argument("archive", help="Archive path")
+    unpack.add_argument("--dest", help="Destination directory")
+    unpack.add_argument("--member", action="append", help="Only members matching this glob or directory (repeatable)")
+    unpack.add_argument("--list", action="store_true", help="List members (size, codec, offset) instead of extracting")
+    unpack.add_argument("--jobs", type=int, default=4, help="Extraction threads")
+    unpack.add_argument("--overwrite", action="store_true", help="Replace existing files")
+    unpack.add_argument("--allow-external-symlinks", action="store_true", help="Also create symlinks pointing outside --dest")
+    unpack.add_argument("--record-dir", help="Write the run record to <dir>/_runs (default: the archive directory)")
+    unpack.add_argument("--no-record", action="store_true", help="Do not write a run record")
+    unpack.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    _add_event_arguments(unpack)
+    unpack.set_defaults(_handler=_cmd_unpack)
+
+    bids_view = sub.add_parser("bids-view", help="Export (or update) a BIDS view of an openSIDS dataset as links")
+    bids_view.add_argument("--dataset", required=True, help="openSIDS dataset root")
+    bids_view.add_argument("--out", required=True, help="BIDS view root (outside the dataset)")
+    bids_view.add_argument("--link", choices=["symlink", "hardlink"], default="symlink", help="How payload files are linked into the view")
+    bids_view.add_argument("--task", help="Default BIDS task label (default: manifest bids.task / task, else 'interaction')")
+    bids_view.add_argument("--dry-run", action="store_true", help="Report what would change without touching the view")
+    bids_view.add_argument("--no-cache", action="store_true", help="Ignore the inventory cache")
+    bids_view.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    _add_event_arguments(bids_view)
+    bids_view.set_defaults(_handler=_cmd_bids_view)
+
+    infer = sub.add_parser("infer", help="Classify legacy vendor exports and write detached resultbundle.json sidecars")
+    infer.add_argument("input", help="Tree of exports without sidecars (read only)")
+    infer.add_argument("--out", required=True, help="Output directory; sidecars go to <out>/resultbundles/...")
+    infer.add_argument("--jobs", type=int, default=8, help="Sniffing threads")
+    infer.add_argument("--sniff-bytes", type=int, default=8 * 1024, help="Bytes read from the head of each candidate file")
+    infer.add_argument("--no-cache", action="store_true", help="Do not read or write <out>/.mdivicom/sniff_cache.json")
+    infer.add_argument("--dry-run", action="store_true", help="Report what would be written")
+    infer.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    _add_event_arguments(infer)
+    infer.set_defaults(_handler=_cmd_infer)
+
+    probe = sub.add_parser("probe", help="Read duration/fps/sample rate from MP4/MOV/WAV headers of video and audio streams")
+    probe.add_argument("--dataset", required=True, help="openSIDS dataset root")
+    probe.add_argument("--type", action="append", help="Stream type to probe (repeatable; default: video and audio)")
+    probe.add_argument("--jobs", type=int, default=4, help="Probing threads")
+    probe.add_argument("--no-cache", action="store_true", help="Re-probe every file instead of reusing sidecar entries")
+    probe.add_argument("--no-write", action="store_true", help="Do not update the stream sidecars")
+    probe.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    _add_event_arguments(probe)
+    probe.set_defaults(_handler=_cmd_probe)
+
+    dedupe = sub.add_parser("dedupe", help="Find duplicate files; optionally hardlink/reflink them or drop them from a plan")
+    dedupe.add_argument("paths", nargs="*", help="Directories/files to scan (default with --plan: the plan sources)")
+    dedupe.add_argument("--min-size", type=int, default=1, help="Ignore files smaller than this many bytes")
+    dedupe.add_argument("--jobs", type=int, default=4, help="Hashing threads")
+    dedupe.add_argument("--cache", help="Digest cache file (default: <first directory>/.mdivicom/digests.json)")
+    dedupe.add_argument("--no-cache", action="store_true", help="Do not read or write a digest cache")
+    dedupe.add_argument("--link", choices=["hardlink", "reflink"], help="Replace duplicates with links to the kept copy")
+    dedupe.add_argument("--plan", help="Saved TransformationPlan whose duplicate sources should be dropped")
+    dedupe.add_argument("--plan-out", help="Where to save the reduced plan")
+    dedupe.add_argument("--dry-run", action="store_true", help="Report only; do not link files or save the plan")
+    dedupe.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    dedupe.set_defaults(_handler=_cmd_dedupe)
+
+    sync = sub.add_parser("sync", help="Timebase alignment helpers")
+    sync_sub = sync.add_subparsers(dest="sync_cmd", required=True)
+
+    sync_fit = sync_sub.add_parser("fit", help="Fit timebase maps from derived/sync/sync_markers.tsv")
+    sync_fit.add_argument("--dataset", required=True, help="openSIDS dataset root")
+    sync_fit.add_argument("--session", action="append", help="Session id (repeatable; default: all sessions with sync markers)")
+    sync_fit.add_argument("--jobs", type=int, default=1, help="Number of parallel worker processes")
+    sync_fit.add_argument("--piecewise", action="store_true", help="Fit one segment per 'segment' column value / anchor gap")
+    sync_fit.add_argument("--max-gap", type=float, help="With --piecewise: split segments at anchor gaps larger than this (stream time units)")
+    sync_fit.add_argument("--outlier-sigma", type=float, default=3.0, help="Report residuals beyond this many robust sigmas as outliers")
+    sync_fit.add_argument("--dry-run", action="store_true", help="Fit and report without writing files")
+    sync_fit.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    sync_fit.set_defaults(_handler=_cmd_sync_fit)
+
     return parser
 
 
@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .utils.events import get_event_bus
+
+PathLike = Union[str, Path]
+
+DEFAULT_WORKERS = 4
+# network read size; a dropped connection loses at most the chunk in flight (urllib3 discards short reads)
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_TIMEOUT = (10.0, 60.0)  # (connect, read) seconds
+PART_SUFFIX = ".part"
+# validator (ETag / Last-Modified) of the response a `.part` file was started from, in `.<dest name>.part.json`
+PART_META_SUFFIX = ".part.json"
+
+_RETRY_EXCEPTIONS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+
+class ChecksumMismatch(RuntimeError):
+    pass
+
+
+def raw_stream_path(dataset_dir: PathLike, session_id: str, stream_type: str, stream_id: str, filename: str) -> Path:
+    """Destination of a stream file in the openSIDS layout: `sessions/ses-<id>/raw/<type>/<stream_id>/<filename>`."""
+    session = session_id if session_id.startswith("ses-") else f"ses-{session_id}"
+    return Path(dataset_dir) / "sessions" / session / "raw" / stream_type / stream_id / filename
+
+
+def _parse_content_range(value: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """`"bytes 100-199/1000"` -> (100, 1000); `"bytes */1000"` -> (None, 1000); unknown parts are None."""
+    if not value or not value.startswith("bytes "):
+        return None, None
+    span, _, total = value[len("bytes "):].partition("/")
+    start = span.partition("-")[0]
+    return (int(start) if start.isdigit() else None), (int(total) if total.isdigit() else None)
+
+
+def _parse_checksum(checksum: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """`"sha256:<hex>"` -> ("sha256", "<hex>"); a bare hex digest is taken as sha256."""
+    if not checksum:
+        return None, None
+    algorithm, _, value = checksum.rpartition(":")
+    algorithm = (algorithm or "sha256").lower()
+    hashlib.new(algorithm)  # ValueError on unknown algorithms
+    return algorithm, value.lower()
+
+
+class _PartState:
+    """Per-download state of the `.part` file, kept across attempts (a retry must see a reset hasher)."""
+
+    __slots__ = ("part", "meta_path", "algorithm", "hasher", "validator", "resumable")
+
+    def __init__(self, part: Path, algorithm: Optional[str]):
+        self.part = part
+        self.meta_path = part.with_name("." + part.name[: -len(PART_SUFFIX)] + PART_META_SUFFIX)
+        self.algorithm = algorithm
+        self.hasher = hashlib.new(algorithm) if algorithm else None
+        self.validator: Optional[str] = None
+        self.resumable = False
+
+    def load(self, url: str, chunk_size: int) -> None:
+        """Trust an existing `.part` only if it was started from `url` and its validator was saved."""
+        try:
+            meta = json.loads(self.meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            meta = None
+        if not self.part.exists() or not isinstance(meta, dict) or meta.get("url") != url or not meta.get("validator"):
+            return
+        self.validator = meta["validator"]
+        self.resumable = True
+        if self.hasher is not None:
+            with open(self.part, "rb") as fh:
+                for block in iter(lambda: fh.read(chunk_size), b""):
+                    self.hasher.update(block)
+
+    def restart(self, url: str, headers: Any) -> None:
+        """The part file is rewritten from byte 0 with the body of a response carrying `headers`."""
+        self.hasher = hashlib.new(self.algorithm) if self.algorithm else None
+        etag = headers.get("ETag")
+        # weak validators are not allowed in If-Range
+        self.validator = etag if etag and not etag.startswith("W/") else headers.get("Last-Modified")
+        self.resumable = True
+        tmp = self.meta_path.with_name(self.meta_path.name + ".tmp")
+        tmp.write_text(json.dumps({"url": url, "validator": self.validator}), encoding="utf-8")
+        os.replace(tmp, self.meta_path)
+
+    def discard(self) -> None:
+        for path in (self.part, self.meta_path):
+            if path.exists():
+                path.unlink()
+
+
+class DownloadTask:
+    """
+    One file to fetch: `url` -> `dest`, with an optional expected `checksum` (`"<algorithm>:<hex>"`) and `size`.
+    """
+
+    __slots__ = ("url", "dest", "checksum", "size", "headers")
+
+    def __init__(self, url: str, dest: PathLike, *, checksum: Optional[str] = None, size: Optional[int] = None, headers: Optional[Dict[str, str]] = None):
+        self.url = url
+        self.dest = Path(dest)
+        self.checksum = checksum
+        self.size = size
+        self.headers = dict(headers or {})
+
+    @classmethod
+    def for_stream(
+            cls,
+            url: str,
+            dataset_dir: PathLike,
+            session_id: str,
+            stream_type: str,
+            stream_id: str,
+            filename: str,
+            **kwargs: Any,
+    ) -> "DownloadTask":
+        return cls(url, raw_stream_path(dataset_dir, session_id, stream_type, stream_id, filename), **kwargs)
+
+    def __repr__(self) -> str:
+        return f"DownloadTask({self.url} -> {self.dest})"
+
+
+def load_manifest(path: PathLike, dataset_dir: Optional[PathLike] = None) -> List[DownloadTask]:
+    """
+    Read download tasks from a JSON lines manifest (one object per line).
+
+    Each line has `url` plus either `dest` (relative paths are taken relative to `dataset_dir`) or
+    `session` / `stream_type` / `stream_id` / `filename` (placed with `raw_stream_path`), and
+    optionally `checksum`, `size` and `headers`.
+    """
+    tasks: List[DownloadTask] = []
+    with open(path, "r", encoding="utf-8") as fh:
+        for lineno, line in enumerate(fh, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            spec = json.loads(line)
+            extra = {"checksum": spec.get("checksum"), "size": spec.get("size"), "headers": spec.get("headers")}
+            if "dest" in spec:
+                dest = Path(spec["dest"])
+                if not dest.is_absolute():
+                    if dataset_dir is None:
+                        raise ValueError(f"{path}:{lineno}: relative dest needs a dataset directory")
+                    dest = Path(dataset_dir) / dest
+                tasks.append(DownloadTask(spec["url"], dest, **extra))
+            else:
+                if dataset_dir is None:
+                    raise ValueError(f"{path}:{lineno}: session/stream entries need a dataset directory")
+                try:
+                    where = [spec[k] for k in ("session", "stream_type", "stream_id", "filename")]
+                except KeyError as exc:
+                    raise ValueError(f"{path}:{lineno}: missing {exc.args[0]!r} (or 'dest')") from exc
+                tasks.append(DownloadTask.for_stream(spec["url"], dataset_dir, *where, **extra))
+    return tasks
+
+
+class DownloadManager:
+    """
+    Concurrent downloads over one pooled `requests.Session`.
+
+    - at most `workers` transfers run at once, sharing keep-alive connections (`pool_maxsize = workers`)
+    - files are streamed to `<dest>.part` and renamed into place once complete and verified
+    - an existing `.part` file is resumed with an HTTP `Range` request guarded by `If-Range` (the ETag or
+      Last-Modified of the response it was started from, saved in `.<dest name>.part.json`); a `.part` without
+      a saved validator, a changed resource, a server that ignores `Range` or a `Content-Range` that
+      does not continue at the part's size all restart from byte 0. Dropped connections are retried
+      `retries` times, each resuming where it stopped
+    - the checksum is computed while writing (only bytes already on disk from an earlier attempt are
+      read back), and a mismatch discards the file
+    - existing destination files are skipped unless `overwrite=True`
+
+    Progress is published on the event bus (`download.progress`, throttled; `download.finished`).
+    """
+
+    def __init__(
+            self,
+            *,
+            workers: int = DEFAULT_WORKERS,
+            session: Optional[requests.Session] = None,
+            headers: Optional[Dict[str, str]] = None,
+            timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+            chunk_size: int = DEFAULT_CHUNK_SIZE,
+            retries: int = 3,
+            backoff: float = 1.0,
+            overwrite: bool = False,
+    ):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.backoff = backoff
+        self.overwrite = overwrite
+        self._own_session = session is None
+        self.session = session or requests.Session()
+        if self._own_session:
+            adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+        self._events = get_event_bus()
+        self._lock = threading.Lock()
+        self.bytes_downloaded = 0
+
+    # ------------------------------------------------------------------ single file
+
+    def _transfer(self, task: DownloadTask, state: _PartState) -> bool:
+        """One GET, appending to the part file from its current size if it can be resumed; returns whether it was."""
+        part = state.part
+        offset = part.stat().st_size if state.resumable and part.exists() else 0
+        headers = dict(task.headers)
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            if state.validator:
+                headers["If-Range"] = state.validator
+        with self.session.get(task.url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if offset and response.status_code in (206, 416):
+                start, total = _parse_content_range(response.headers.get("Content-Range"))
+                if response.status_code == 416 and total == offset:
+                    # nothing left to fetch: the partial file is already complete
+                    return True
+                if response.status_code == 416 or start != offset or (total is not None and total <= offset):
+                    # the part does not belong to this version of the resource
+                    restart = True
+                else:
+                    restart = False
+                if restart:
+                    state.resumable = False
+                else:
+                    self._write(response, part, state, append=True)
+                    return True
+            else:
+                response.raise_for_status()
+                # a full body: a fresh download, a changed resource (If-Range) or Range not honoured
+                state.restart(task.url, response.headers)
+                self._write(response, part, state, append=False)
+                return False
+        return self._transfer(task, state)
+
+    def _write(self, response: requests.Response, part: Path, state: _PartState, *, append: bool) -> None:
+        with open(part, "ab" if append else "wb") as fh:
+            for block in response.iter_content(chunk_size=self.chunk_size):
+                fh.write(block)
+                if state.hasher is not None:
+                    state.hasher.update(block)
+                with self._lock:
+                    self.bytes_downloaded += len(block)
+                self._events.emit("download.progress", throttle=True, bytes_downloaded=self.bytes_downloaded)
+
+    def download(self, task: DownloadTask) -> Dict[str, Any]:
+        """Fetch one file; returns a result dict (`status`: downloaded/resumed/skipped/failed)."""
+        result: Dict[str, Any] = {"url": task.url, "path": str(task.dest), "status": None, "bytes": 0, "error": None}
+        started = time.perf_counter()
+        if task.dest.exists() and not self.overwrite:
+            result.update(status="skipped", bytes=task.dest.stat().st_size)
+            return result
+        algorithm, expected = _parse_checksum(task.checksum)
+        part = task.dest.with_name(task.dest.name + PART_SUFFIX)
+        task.dest.parent.mkdir(parents=True, exist_ok=True)
+        state = _PartState(part, algorithm)
+        try:
+            state.load(task.url, self.chunk_size)
+            resumed = False
+            for attempt in range(self.retries + 1):
+                try:
+                    # the last, successful transfer tells whether the file kept bytes from before
+                    resumed = self._transfer(task, state)
+                    break
+                except _RETRY_EXCEPTIONS:
+                    if attempt == self.retries:
+                        raise
+                    time.sleep(self.backoff * (2 ** attempt))
+            size = part.stat().st_size
+            if task.size is not None and size != task.size:
+                raise ChecksumMismatch(f"size {size} != expected {task.size}")
+            hasher = state.hasher
+            if hasher is not None and hasher.hexdigest() != expected:
+                raise ChecksumMismatch(f"{algorithm} {hasher.hexdigest()} != expected {expected}")
+            os.replace(part, task.dest)
+            if state.meta_path.exists():
+                state.meta_path.unlink()
+            result.update(status="resumed" if resumed else "downloaded", bytes=size)
+            if hasher is not None:
+                result[algorithm] = hasher.hexdigest()
+        except ChecksumMismatch as exc:
+            # corrupt data cannot be resumed
+            state.discard()
+            result.update(status="failed", error=f"ChecksumMismatch: {exc}")
+        except Exception as exc:
+            # keep the partial file (and its validator) for the next attempt
+            result.update(status="failed", error=f"{type(exc).__name__}: {exc}")
+        result["seconds"] = time.perf_counter() - started
+        self._events.emit("download.finished", **result)
+        return result
+
+    # ------------------------------------------------------------------ many files
+
+    def download_all(
+            self,
+            tasks: Iterable[DownloadTask],
+            on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Download tasks with at most `workers` in flight; results are returned in task order."""
+        tasks = list(tasks)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(tasks)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self.download, task): i for i, task in enumerate(tasks)}
+            for future in as_completed(futures):
+                result = future.result()
+                results[futures[future]] = result
+                if on_result is not None:
+                    on_result(result)
+        return results  # type: ignore[return-value]
+
+    def close(self) -> None:
+        if self._own_session:
+            self.session.close()
+
+    def __enter__(self) -> "DownloadManager":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
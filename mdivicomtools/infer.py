@@ -0,0 +1,568 @@
+from __future__ import annotations
+
+import csv
+import fnmatch
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .provenance import core_version
+from .resultbundle import SIDECAR_NAME
+from .utils.events import get_event_bus
+
+PathLike = Union[str, Path]
+
+# bytes read from the head of each candidate file; headers of vendor exports fit comfortably
+DEFAULT_SNIFF_BYTES = 8 * 1024
+DEFAULT_JOBS = 8
+REGISTRY_DIR = "resultbundles"
+CACHE_PATH = Path(".mdivicom") / "sniff_cache.json"
+CACHE_FORMAT = "mdivicomtools-sniff/0.2"
+
+_DELIMITED = {".csv": ",", ".tsv": "\t", ".txt": None}
+_JSON_LINES = (".jsonl", ".ndjson")
+_XML = (".xml", ".eaf")
+_UNIT = re.compile(r"\s*[\[(]([^\])]+)[\])]\s*$")
+_XML_ROOT = re.compile(r"<([A-Za-z_][\w.:-]*)")
+_UNITS = {"ns": "ns", "us": "us", "µs": "us", "μs": "us", "ms": "ms", "s": "s"}
+
+
+def normalize_column(name: str) -> str:
+    """Column name as matched by the rules: stripped, lower case, without a trailing unit (`"timestamp [ns]"` -> `"timestamp"`)."""
+    return _UNIT.sub("", name.strip()).strip().lower()
+
+
+def _column_unit(name: str) -> Optional[str]:
+    match = _UNIT.search(name)
+    return _UNITS.get(match.group(1).strip()) if match else None
+
+
+# ---------------------------------------------------------------------- sniffing
+
+def _json_top_keys(text: str) -> List[str]:
+    """Keys of the top-level object (or of the first object of a top-level list) in a possibly truncated JSON head."""
+    keys: List[str] = []
+    depth = 0
+    target = None
+    in_string = escape = False
+    start = 0
+    last_string = None
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+                last_string = text[start:i]
+            continue
+        if ch == '"':
+            in_string = True
+            start = i + 1
+        elif ch in "{[":
+            depth += 1
+            if ch == "{" and target is None:
+                target = depth
+        elif ch in "}]":
+            if depth == target:
+                break
+            depth -= 1
+        elif ch == ":" and depth == target and last_string is not None:
+            keys.append(last_string)
+        elif not ch.isspace():
+            last_string = None
+    return keys
+
+
+def sniff_file(path: PathLike, limit: int = DEFAULT_SNIFF_BYTES) -> Dict[str, Any]:
+    """
+    Read at most `limit` bytes of `path` and describe its header.
+
+    Returns a dict with `format` plus, depending on it, `columns` and `delimiter` (CSV/TSV: the
+    header row, names as written, e.g. OpenFace's `" timestamp"`), `keys` (JSON: top-level keys; JSON lines: keys of the first record) or
+    `root_element` (XML). Files of other formats are not read.
+    """
+    path = Path(path)
+    ext = path.suffix.lower()
+    info: Dict[str, Any] = {"format": ext.lstrip(".") or None}
+    if ext not in _DELIMITED and ext != ".json" and ext not in _JSON_LINES and ext not in _XML:
+        return info
+    with open(path, "rb") as fh:
+        head = fh.read(limit)
+        truncated = bool(fh.read(1))
+    text = head.decode("utf-8-sig", errors="replace")
+    if ext in _DELIMITED:
+        line = text.splitlines()[0] if text else ""
+        delimiter = _DELIMITED[ext] or max(",\t;", key=line.count)
+        columns = next(csv.reader([line], delimiter=delimiter), []) if line else []
+        info.update(format="tsv" if delimiter == "\t" else "csv", delimiter=delimiter, columns=columns)
+    elif ext == ".json":
+        keys = None
+        if not truncated:
+            try:
+                data = json.loads(text)
+                if isinstance(data, list) and data and isinstance(data[0], dict):
+                    data = data[0]
+                keys = list(data) if isinstance(data, dict) else []
+            except ValueError:
+                pass
+        info["keys"] = keys if keys is not None else _json_top_keys(text)
+    elif ext in _JSON_LINES:
+        info["format"] = "jsonl"
+        first = text.split("\n", 1)[0]
+        try:
+            record = json.loads(first)
+            info["keys"] = list(record) if isinstance(record, dict) else []
+        except ValueError:
+            info["keys"] = _json_top_keys(first)
+    else:
+        info["format"] = "xml"
+        for match in _XML_ROOT.finditer(text):
+            info["root_element"] = match.group(1)
+            break
+    return info
+
+
+class SniffCache:
+    """
+    Persisted `sniff_file` results keyed by absolute path and validated by size and mtime.
+
+    Header descriptions are cached rather than classifications, so adding export types does not
+    invalidate it. Thread-safe; `save()` writes atomically and only when something changed.
+    """
+
+    __slots__ = ("path", "limit", "_entries", "_lock", "_dirty", "hits")
+
+    def __init__(self, path: Optional[PathLike] = None, limit: int = DEFAULT_SNIFF_BYTES):
+        self.path = Path(path) if path is not None else None
+        self.limit = limit
+        self._entries: Dict[str, List[Any]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.hits = 0
+        if self.path is not None:
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = None
+            if isinstance(data, dict) and data.get("format") == CACHE_FORMAT and data.get("sniff_bytes") == limit:
+                self._entries = data.get("entries", {})
+
+    def get(self, path: str, st: os.stat_result) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(path)
+        if entry is None or entry[:2] != [st.st_size, st.st_mtime_ns]:
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry[2]
+
+    def put(self, path: str, st: os.stat_result, info: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[path] = [st.st_size, st.st_mtime_ns, info]
+            self._dirty = True
+
+    def save(self) -> None:
+        if self.path is None or not self._dirty:
+            return
+        payload = {"format": CACHE_FORMAT, "sniff_bytes": self.limit, "entries": self._entries}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{secrets.token_hex(4)}.tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+
+# ---------------------------------------------------------------------- export types
+
+class FileRule:
+    """
+    One file of an export type: a filename glob (case-insensitive) plus header requirements.
+
+    `columns` (normalized, see `normalize_column`), `keys` (JSON) and `root_element` (XML) must all be
+    present for a file to match. `key_columns` maps normalized join/time keys to normalized column
+    names and is resolved to the actual vendor column names; `time` is copied into the `files[]` entry.
+    With `many=True`, every matching file of the directory is listed (otherwise the first one).
+    """
+
+    __slots__ = ("pattern", "role", "format", "required", "columns", "keys", "root_element", "key_columns", "time", "many")
+
+    def __init__(
+            self,
+            pattern: str,
+            role: str,
+            format: str,
+            *,
+            required: bool = True,
+            columns: Sequence[str] = (),
+            keys: Sequence[str] = (),
+            root_element: Optional[str] = None,
+            key_columns: Optional[Dict[str, str]] = None,
+            time: Optional[Dict[str, Any]] = None,
+            many: bool = False,
+    ):
+        self.pattern = pattern.lower()
+        self.role = role
+        self.format = format
+        self.required = required
+        self.columns = tuple(columns)
+        self.keys = tuple(keys)
+        self.root_element = root_element
+        self.key_columns = dict(key_columns or {})
+        self.time = dict(time) if time else None
+        self.many = many
+
+    @property
+    def needs_header(self) -> bool:
+        return bool(self.columns or self.keys or self.root_element or self.key_columns)
+
+    def matches(self, name: str, info: Optional[Dict[str, Any]]) -> bool:
+        if not fnmatch.fnmatchcase(name.lower(), self.pattern):
+            return False
+        if not self.needs_header:
+            return True
+        if info is None:
+            return False
+        if self.columns or self.key_columns:
+            present = {normalize_column(c) for c in info.get("columns") or ()}
+            if not present.issuperset(self.columns) or not present.issuperset(self.key_columns.values()):
+                return False
+        if self.keys and not set(info.get("keys") or ()).issuperset(self.keys):
+            return False
+        if self.root_element and info.get("root_element") != self.root_element:
+            return False
+        return True
+
+    def entry(self, relpath: str, info: Optional[Dict[str, Any]], size: int) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {"path": relpath, "role": self.role, "format": self.format, "required": self.required, "size_bytes": size}
+        if self.key_columns:
+            actual = {normalize_column(c): c for c in (info or {}).get("columns") or ()}
+            entry["key_columns"] = {key: actual[column] for key, column in self.key_columns.items()}
+        if self.time:
+            entry["time"] = dict(self.time)
+        return entry
+
+
+class ExportType:
+    """
+    A legacy/vendor export recognized without a sidecar: the `resultbundle_type` it is registered as
+    and the file rules that identify it within one directory (all `required` rules must match).
+
+    A `time_reference` unit of None is taken from the unit suffix of the first time key column
+    (e.g. `"Recording timestamp [μs]"`).
+    """
+
+    __slots__ = ("resultbundle_type", "schema_version", "time_reference", "files", "upstream_tool")
+
+    def __init__(
+            self,
+            resultbundle_type: str,
+            schema_version: str,
+            time_reference: Dict[str, Any],
+            files: Sequence[FileRule],
+            upstream_tool: Optional[Dict[str, Any]] = None,
+    ):
+        if not any(rule.required for rule in files):
+            raise ValueError(f"{resultbundle_type}: an export type needs at least one required file rule")
+        self.resultbundle_type = resultbundle_type
+        self.schema_version = schema_version
+        self.time_reference = dict(time_reference)
+        self.files = tuple(files)
+        self.upstream_tool = dict(upstream_tool) if upstream_tool else None
+
+    def __repr__(self) -> str:
+        return f"ExportType({self.resultbundle_type})"
+
+
+_POINT_NS = {"kind": "point", "key": "timestamp_ns"}
+_INTERVAL_NS = {"kind": "interval", "start_key": "start_ns", "end_key": "end_ns"}
+
+EXPORT_TYPES: List[ExportType] = [
+    ExportType(
+        "pupilcloud.raw_export.v4",
+        "4.0.0",
+        {"kind": "unix", "unit": "ns"},
+        [
+            FileRule("info.json", "recording_info", "json", keys=("recording_id", "start_time")),
+            FileRule("gaze.csv", "gaze", "csv", columns=("gaze x", "gaze y"), key_columns={"timestamp_ns": "timestamp"}, time=_POINT_NS),
+            FileRule("fixations.csv", "fixations", "csv", required=False, key_columns={"start_ns": "start timestamp", "end_ns": "end timestamp"}, time=_INTERVAL_NS),
+            FileRule("saccades.csv", "saccades", "csv", required=False, key_columns={"start_ns": "start timestamp", "end_ns": "end timestamp"}, time=_INTERVAL_NS),
+            FileRule("blinks.csv", "blinks", "csv", required=False, key_columns={"start_ns": "start timestamp", "end_ns": "end timestamp"}, time=_INTERVAL_NS),
+            FileRule("events.csv", "events", "csv", required=False, columns=("name",), key_columns={"timestamp_ns": "timestamp"}, time=_POINT_NS),
+            FileRule("imu.csv", "imu", "csv", required=False, key_columns={"timestamp_ns": "timestamp"}, time=_POINT_NS),
+            FileRule("3d_eye_states.csv", "eye_states", "csv", required=False, key_columns={"timestamp_ns": "timestamp"}, time=_POINT_NS),
+            FileRule("world_timestamps.csv", "scene_timestamps", "csv", required=False, key_columns={"timestamp_ns": "timestamp"}, time=_POINT_NS),
+            FileRule("scene_camera.json", "scene_camera", "json", required=False),
+            FileRule("*.mp4", "scene_video", "mp4", required=False, many=True),
+        ],
+        upstream_tool={"name": "Pupil Cloud", "export": "Timeseries Data"},
+    ),
+    ExportType(
+        "tobii.prolab.data_export.v1",
+        "1.0.0",
+        {"kind": "recording", "unit": None},
+        [
+            FileRule(
+                "*.tsv",
+                "samples",
+                "tsv",
+                columns=("gaze point x", "gaze point y"),
+                key_columns={"timestamp": "recording timestamp"},
+                time={"kind": "point", "key": "timestamp"},
+                many=True,
+            ),
+        ],
+        upstream_tool={"name": "Tobii Pro Lab", "export": "Data Export"},
+    ),
+    ExportType(
+        "openface.features.v2",
+        "2.0.0",
+        {"kind": "media", "unit": "s"},
+        [
+            FileRule(
+                "*.csv",
+                "features",
+                "csv",
+                columns=("frame", "face_id", "confidence", "success"),
+                key_columns={"timestamp": "timestamp"},
+                time={"kind": "point", "key": "timestamp"},
+                many=True,
+            ),
+        ],
+        upstream_tool={"name": "OpenFace", "export": "FeatureExtraction"},
+    ),
+    ExportType(
+        "elan.annotations.v3",
+        "3.0.0",
+        {"kind": "media", "unit": "ms"},
+        [FileRule("*.eaf", "annotations", "xml", root_element="ANNOTATION_DOCUMENT", many=True)],
+        upstream_tool={"name": "ELAN"},
+    ),
+]
+
+
+def register_export_type(export_type: ExportType) -> None:
+    """Add (or replace, by `resultbundle_type`) an export type recognized by `infer_resultbundles`."""
+    EXPORT_TYPES[:] = [t for t in EXPORT_TYPES if t.resultbundle_type != export_type.resultbundle_type]
+    EXPORT_TYPES.append(export_type)
+
+
+# ---------------------------------------------------------------------- inference
+
+class InferredBundle:
+    """A payload directory classified as `export_type`, with its `files[]` entries (paths relative to `root`)."""
+
+    __slots__ = ("root", "export_type", "files")
+
+    def __init__(self, root: Path, export_type: ExportType, files: List[Dict[str, Any]]):
+        self.root = root
+        self.export_type = export_type
+        self.files = files
+
+    def __repr__(self) -> str:
+        return f"InferredBundle({self.export_type.resultbundle_type} at {self.root}, files={len(self.files)})"
+
+    def sidecar(self, tree_root: PathLike) -> Dict[str, Any]:
+        """Detached `resultbundle.json` content (without `created_at`); `source.root` is relative to `source.root_base`."""
+        export_type = self.export_type
+        time_reference = dict(export_type.time_reference)
+        if "unit" in time_reference and time_reference["unit"] is None:
+            time_reference["unit"] = next((f["unit"] for f in self.files if f.get("unit")), None)
+        tree_root = Path(tree_root).resolve()
+        bundle: Dict[str, Any] = {
+            "resultbundle_type": export_type.resultbundle_type,
+            "schema_version": export_type.schema_version,
+            "time_reference": time_reference,
+            "files": [{k: v for k, v in f.items() if k != "unit"} for f in self.files],
+            "producer": {"tool_ref": "mdivicomtools.infer", "tool_version": core_version()},
+            "source": {"root": Path(os.path.relpath(self.root.resolve(), tree_root)).as_posix(), "root_base": str(tree_root)},
+            "inferred": True,
+        }
+        if export_type.upstream_tool:
+            bundle["upstream_tool"] = dict(export_type.upstream_tool)
+        return bundle
+
+
+def _classify(directory: Path, files: Dict[str, Tuple[int, Optional[Dict[str, Any]]]], types: Sequence[ExportType]) -> List[InferredBundle]:
+    bundles = []
+    names = sorted(files)
+    for export_type in types:
+        entries: List[Dict[str, Any]] = []
+        used = set()
+        complete = True
+        for rule in export_type.files:
+            matched = [n for n in names if n not in used and rule.matches(n, files[n][1])]
+            if not rule.many:
+                matched = matched[:1]
+            if not matched and rule.required:
+                complete = False
+                break
+            for name in matched:
+                used.add(name)
+                size, info = files[name]
+                entry = rule.entry(name, info, size)
+                time_keys = [entry.get("key_columns", {}).get(rule.time[k]) for k in ("key", "start_key") if rule.time and k in rule.time]
+                unit = next((_column_unit(c) for c in time_keys if c), None)
+                if unit:
+                    entry["unit"] = unit
+                entries.append(entry)
+        if complete:
+            bundles.append(InferredBundle(directory, export_type, entries))
+    return bundles
+
+
+def infer_resultbundles(
+        root: PathLike,
+        *,
+        jobs: int = DEFAULT_JOBS,
+        cache: Optional[SniffCache] = None,
+        limit: int = DEFAULT_SNIFF_BYTES,
+        types: Optional[Sequence[ExportType]] = None,
+) -> Tuple[List[InferredBundle], Dict[str, int]]:
+    """
+    Classify the directories under `root` as known vendor exports without parsing full files.
+
+    The tree is walked once (hidden directories and directories that already carry a
+    `resultbundle.json`, which is authoritative, are skipped). Only files whose name matches a rule
+    that inspects headers are read, at most `limit` bytes each, on `jobs` threads; results are reused
+    from `cache` while size and mtime are unchanged.
+
+    Returns:
+        (bundles, stats): the inferred bundles and counters (`directories`, `files`, `sniffed`, `cached`).
+    """
+    root = Path(root)
+    types = list(EXPORT_TYPES if types is None else types)
+    cache = cache if cache is not None else SniffCache(limit=limit)
+    patterns = [rule.pattern for t in types for rule in t.files]
+    header_patterns = [rule.pattern for t in types for rule in t.files if rule.needs_header]
+    stats = {"directories": 0, "files": 0, "sniffed": 0, "cached": 0}
+
+    listing: Dict[Path, Dict[str, Tuple[int, Optional[Dict[str, Any]]]]] = {}
+    to_sniff: List[Tuple[Path, str, os.stat_result]] = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        if SIDECAR_NAME in filenames:
+            dirnames[:] = []
+            continue
+        directory = Path(dirpath)
+        stats["directories"] += 1
+        entries = {}
+        for name in filenames:
+            lower = name.lower()
+            if name.startswith(".") or not any(fnmatch.fnmatchcase(lower, p) for p in patterns):
+                continue
+            try:
+                st = os.stat(os.path.join(dirpath, name))
+            except OSError:
+                continue
+            entries[name] = (st.st_size, None)
+            if any(fnmatch.fnmatchcase(lower, p) for p in header_patterns):
+                to_sniff.append((directory, name, st))
+        if entries:
+            listing[directory] = entries
+        stats["files"] += len(entries)
+
+    events = get_event_bus()
+
+    def sniff(item: Tuple[Path, str, os.stat_result]) -> Tuple[Path, str, Optional[Dict[str, Any]]]:
+        directory, name, st = item
+        path = str((directory / name).resolve())
+        info = cache.get(path, st)
+        if info is None:
+            try:
+                info = sniff_file(path, limit)
+            except OSError:
+                return directory, name, None
+            cache.put(path, st, info)
+        return directory, name, info
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        for done, (directory, name, info) in enumerate(pool.map(sniff, to_sniff), 1):
+            size = listing[directory][name][0]
+            listing[directory][name] = (size, info)
+            events.emit("infer.progress", throttle=True, files_done=done, files_total=len(to_sniff))
+    stats["cached"] = cache.hits
+    stats["sniffed"] = len(to_sniff) - cache.hits
+
+    bundles: List[InferredBundle] = []
+    for directory in sorted(listing):
+        bundles.extend(_classify(directory, listing[directory], types))
+    return bundles, stats
+
+
+def detached_sidecar_path(out_dir: PathLike, tree_root: PathLike, bundle: InferredBundle) -> Path:
+    """`<out_dir>/resultbundles/<payload root relative to tree_root>/<resultbundle_type>/resultbundle.json`."""
+    rel = Path(os.path.relpath(bundle.root.resolve(), Path(tree_root).resolve()))
+    return Path(out_dir) / REGISTRY_DIR / rel / bundle.export_type.resultbundle_type / SIDECAR_NAME
+
+
+def write_detached_sidecars(
+        bundles: Iterable[InferredBundle],
+        tree_root: PathLike,
+        out_dir: PathLike,
+        *,
+        dry_run: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Write one detached sidecar per bundle (temp + rename). Sidecars whose content is unchanged are
+    left alone (their `created_at` is kept). Returns `{"path", "type", "status"}` per bundle with
+    status `written`, `updated` or `unchanged`.
+    """
+    results = []
+    for bundle in bundles:
+        path = detached_sidecar_path(out_dir, tree_root, bundle)
+        content = bundle.sidecar(tree_root)
+        status = "written"
+        try:
+            existing = json.loads(path.read_text(encoding="utf-8"))
+            existing.pop("created_at", None)
+            status = "unchanged" if existing == content else "updated"
+        except (OSError, ValueError):
+            pass
+        if status != "unchanged" and not dry_run:
+            content["created_at"] = datetime.now(timezone.utc).isoformat()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f".{SIDECAR_NAME}.{secrets.token_hex(4)}.tmp")
+            tmp.write_text(json.dumps(content, indent=2, ensure_ascii=False, sort_keys=True) + "\n", encoding="utf-8")
+            os.replace(tmp, path)
+        results.append({"path": str(path), "type": bundle.export_type.resultbundle_type, "root": str(bundle.root), "status": status})
+    return results
+
+
+def infer_tree(
+        root: PathLike,
+        out_dir: PathLike,
+        *,
+        jobs: int = DEFAULT_JOBS,
+        limit: int = DEFAULT_SNIFF_BYTES,
+        use_cache: bool = True,
+        dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Infer result bundles under `root` and register them as detached sidecars under `<out_dir>/resultbundles/`.
+
+    The sniff cache lives at `<out_dir>/.mdivicom/sniff_cache.json`, so the (possibly read-only)
+    input tree is never written to.
+    """
+    started = time.perf_counter()
+    cache = SniffCache(Path(out_dir) / CACHE_PATH if use_cache else None, limit=limit)
+    bundles, stats = infer_resultbundles(root, jobs=jobs, cache=cache, limit=limit)
+    sidecars = write_detached_sidecars(bundles, root, out_dir, dry_run=dry_run)
+    if not dry_run:
+        cache.save()
+    result = {
+        "root": str(Path(root).resolve()),
+        "out_dir": str(Path(out_dir).resolve()),
+        "stats": stats,
+        "bundles": sidecars,
+        "seconds": time.perf_counter() - started,
+    }
+    get_event_bus().emit("infer.finished", bundles=len(sidecars), seconds=result["seconds"], **stats)
+    return result
@@ -0,0 +1,347 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+PathLike = Union[str, Path]
+Pairs = Tuple[np.ndarray, np.ndarray]
+
+CACHE_FORMAT_VERSION = 1
+
+# Queries are processed in blocks so that candidate expansion stays bounded in memory.
+_QUERY_BLOCK = 65536
+
+
+def _read_table(path: PathLike) -> pd.DataFrame:
+    path = Path(path)
+    sep = "," if path.suffix.lower() == ".csv" else "\t"
+    return pd.read_csv(path, sep=sep)
+
+
+def _as_float_array(values: Any) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64).reshape(-1)
+
+
+def _expand_ranges(lo: np.ndarray, hi: np.ndarray) -> Pairs:
+    counts = np.clip(hi - lo, 0, None)
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    query_idx = np.repeat(np.arange(len(lo), dtype=np.int64), counts)
+    run_starts = np.repeat(np.cumsum(counts) - counts, counts)
+    positions = np.repeat(lo, counts) + (np.arange(total, dtype=np.int64) - run_starts)
+    return query_idx, positions
+
+
+class IntervalIndex:
+    """
+    Static index over a table of intervals for batched overlap/containment/point queries.
+
+    Intervals are grouped into power-of-two length classes and sorted by start within each
+    class. A query then only inspects intervals whose start lies in a window bounded by the
+    class' maximum length, so a batch of m queries against n intervals costs roughly
+    O(m log n + k) (k = number of hits) instead of the O(n*m) of a nested loop.
+
+    Conventions:
+        - intervals are half-open ``[start, end)``; zero-length intervals are allowed;
+        - two intervals overlap if ``a.start < b.end and b.start < a.end``;
+        - a point ``t`` is in an interval if ``start <= t < end`` (zero-length intervals match ``t == start``).
+
+    All query methods return ``(query_idx, interval_idx)`` arrays of positions into the
+    query arrays and into the rows the index was built from, sorted by query then interval.
+    """
+
+    __slots__ = ("starts", "ends", "order", "_sorted_starts", "_sorted_ends", "_classes", "meta")
+
+    def __init__(self, starts: Any, ends: Any, *, meta: Optional[Dict[str, Any]] = None):
+        starts = _as_float_array(starts)
+        ends = _as_float_array(ends)
+        if starts.shape != ends.shape:
+            raise ValueError("starts and ends must have the same length")
+        if np.isnan(starts).any() or np.isnan(ends).any():
+            raise ValueError("Interval bounds must not contain NaN")
+        if (ends < starts).any():
+            raise ValueError("Interval ends must not be smaller than starts")
+
+        self.starts = starts
+        self.ends = ends
+        self.meta: Dict[str, Any] = dict(meta or {})
+
+        lengths = ends - starts
+        # zero-length intervals form their own class below all power-of-two classes
+        length_class = np.full(len(starts), np.iinfo(np.int64).min, dtype=np.int64)
+        positive = lengths > 0
+        length_class[positive] = np.ceil(np.log2(lengths[positive])).astype(np.int64)
+
+        self.order = np.lexsort((starts, length_class))
+        self._sorted_starts = starts[self.order]
+        self._sorted_ends = ends[self.order]
+
+        sorted_class = length_class[self.order]
+        bounds = np.flatnonzero(np.diff(sorted_class)) + 1
+        edges = np.concatenate(([0], bounds, [len(starts)])).astype(np.int64)
+        self._classes = []
+        for lo, hi in zip(edges[:-1], edges[1:]):
+            if hi > lo:
+                max_len = float((self._sorted_ends[lo:hi] - self._sorted_starts[lo:hi]).max())
+                self._classes.append((int(lo), int(hi), max_len))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __repr__(self) -> str:
+        return f"IntervalIndex(n={len(self)}, length_classes={len(self._classes)})"
+
+    # ------------------------------------------------------------------ construction
+
+    @classmethod
+    def from_frame(
+            cls,
+            df: pd.DataFrame,
+            start_col: str = "onset",
+            duration_col: Optional[str] = "duration",
+            end_col: Optional[str] = None,
+    ) -> "IntervalIndex":
+        """
+        Build an index from a DataFrame with either start/end or start/duration columns.
+
+        Defaults follow the openSIDS `events.tsv` pivot (`onset`/`duration` in `t_session`).
+        Rows with a missing duration are treated as point events (zero length).
+        """
+        starts = df[start_col].to_numpy(dtype=np.float64)
+        if end_col is not None:
+            ends = df[end_col].to_numpy(dtype=np.float64)
+        elif duration_col is not None:
+            durations = df[duration_col].to_numpy(dtype=np.float64)
+            ends = starts + np.nan_to_num(durations, nan=0.0)
+        else:
+            ends = starts
+        return cls(starts, ends)
+
+    @classmethod
+    def from_events_tsv(cls, path: PathLike) -> "IntervalIndex":
+        """Build an index from an openSIDS `events.tsv` (`onset`/`duration` columns)."""
+        return cls.from_frame(_read_table(path))
+
+    @classmethod
+    def from_resultbundle_file(cls, bundle_root: PathLike, file_entry: Dict[str, Any]) -> "IntervalIndex":
+        """
+        Build an index from a `files[]` entry of a `resultbundle.json` with `time.kind = interval`.
+
+        `time.start_key` / `time.end_key` are resolved through `key_columns` when present, so
+        vendor column names do not need to be known by the caller.
+        """
+        time_ref = file_entry.get("time") or {}
+        if time_ref.get("kind") != "interval":
+            raise ValueError(f"File entry {file_entry.get('path')!r} is not interval-typed (time.kind={time_ref.get('kind')!r})")
+        key_columns = file_entry.get("key_columns") or {}
+        start_key = time_ref.get("start_key")
+        end_key = time_ref.get("end_key")
+        if not start_key or not end_key:
+            raise ValueError(f"File entry {file_entry.get('path')!r} is missing time.start_key/time.end_key")
+        df = _read_table(Path(bundle_root) / file_entry["path"])
+        return cls.from_frame(df, start_col=key_columns.get(start_key, start_key), duration_col=None, end_col=key_columns.get(end_key, end_key))
+
+    # ------------------------------------------------------------------ queries
+
+    def _search(self, lo_keys: np.ndarray, hi_keys: np.ndarray, keep, *, shift: bool = True) -> Pairs:
+        """
+        Collect candidates whose start lies in ``[lo_key - max_len, hi_key]`` (``[lo_key, hi_key]``
+        without `shift`) per length class and filter them with ``keep(query_pos, sorted_pos)``.
+        """
+        out_q = []
+        out_i = []
+        n_queries = len(lo_keys)
+        for block_start in range(0, n_queries, _QUERY_BLOCK):
+            block = slice(block_start, min(block_start + _QUERY_BLOCK, n_queries))
+            lo_block = lo_keys[block]
+            hi_block = hi_keys[block]
+            for c_lo, c_hi, max_len in self._classes:
+                class_starts = self._sorted_starts[c_lo:c_hi]
+                lo = np.searchsorted(class_starts, lo_block - max_len if shift else lo_block, side="left") + c_lo
+                hi = np.searchsorted(class_starts, hi_block, side="right") + c_lo
+                q, pos = _expand_ranges(lo, hi)
+                if len(q) == 0:
+                    continue
+                q += block_start
+                mask = keep(q, pos)
+                out_q.append(q[mask])
+                out_i.append(self.order[pos[mask]])
+        if not out_q:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        query_idx = np.concatenate(out_q)
+        interval_idx = np.concatenate(out_i)
+        ordering = np.lexsort((interval_idx, query_idx))
+        return query_idx[ordering], interval_idx[ordering]
+
+    def overlaps(self, query_starts: Any, query_ends: Any) -> Pairs:
+        """Return all (query, interval) pairs whose intervals overlap."""
+        qs = _as_float_array(query_starts)
+        qe = _as_float_array(query_ends)
+
+        def keep(q, pos):
+            s = self._sorted_starts[pos]
+            e = self._sorted_ends[pos]
+            a = qs[q]
+            b = qe[q]
+            proper = (s < b) & (e > a)
+            # zero-length intervals/queries follow point-in-interval semantics
+            interval_is_point = (s == e) & (a <= s) & (s < b)
+            query_is_point = (a == b) & (s <= a) & (a < e)
+            both_points = (s == e) & (a == b) & (s == a)
+            return proper | interval_is_point | query_is_point | both_points
+
+        return self._search(qs, qe, keep)
+
+    def within(self, query_starts: Any, query_ends: Any) -> Pairs:
+        """Return all (query, interval) pairs where the interval lies completely inside the query window."""
+        qs = _as_float_array(query_starts)
+        qe = _as_float_array(query_ends)
+
+        def keep(q, pos):
+            return self._sorted_ends[pos] <= qe[q]
+
+        return self._search(qs, qe, keep, shift=False)
+
+    def containing(self, query_starts: Any, query_ends: Any) -> Pairs:
+        """Return all (query, interval) pairs where the interval completely contains the query window."""
+        qs = _as_float_array(query_starts)
+        qe = _as_float_array(query_ends)
+
+        def keep(q, pos):
+            return self._sorted_ends[pos] >= qe[q]
+
+        return self._search(qs, qs, keep)
+
+    def at(self, points: Any) -> Pairs:
+        """Return all (point, interval) pairs where the point falls into the interval."""
+        t = _as_float_array(points)
+
+        def keep(q, pos):
+            s = self._sorted_starts[pos]
+            e = self._sorted_ends[pos]
+            return (e > t[q]) | ((s == e) & (s == t[q]))
+
+        return self._search(t, t, keep)
+
+    def count_overlaps(self, query_starts: Any, query_ends: Any) -> np.ndarray:
+        """Number of overlapping intervals per query (same semantics as `overlaps`)."""
+        q, _ = self.overlaps(query_starts, query_ends)
+        return np.bincount(q, minlength=len(_as_float_array(query_starts)))
+
+    # ------------------------------------------------------------------ persistence
+
+    def save(self, path: PathLike) -> Path:
+        """Persist the built index (including sort order) as an uncompressed `.npz` file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        meta = dict(self.meta)
+        meta["format_version"] = CACHE_FORMAT_VERSION
+        with open(tmp, "wb") as fh:
+            np.savez(
+                fh,
+                starts=self.starts,
+                ends=self.ends,
+                order=self.order,
+                classes=np.asarray(self._classes, dtype=np.float64).reshape(-1, 3),
+                meta=np.asarray(json.dumps(meta, sort_keys=True)),
+            )
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: PathLike) -> "IntervalIndex":
+        """Load an index written by `save` without re-sorting."""
+        with np.load(Path(path), allow_pickle=False) as data:
+            obj = cls.__new__(cls)
+            obj.starts = data["starts"]
+            obj.ends = data["ends"]
+            obj.order = data["order"]
+            obj._sorted_starts = obj.starts[obj.order]
+            obj._sorted_ends = obj.ends[obj.order]
+            obj._classes = [(int(lo), int(hi), float(max_len)) for lo, hi, max_len in data["classes"]]
+            obj.meta = json.loads(str(data["meta"]))
+        if obj.meta.get("format_version") != CACHE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported interval index cache format in {path}")
+        return obj
+
+    @classmethod
+    def cached(
+            cls,
+            table_path: PathLike,
+            cache_path: Optional[PathLike] = None,
+            *,
+            start_col: str = "onset",
+            duration_col: Optional[str] = "duration",
+            end_col: Optional[str] = None,
+    ) -> "IntervalIndex":
+        """
+        Load the index for `table_path` from `cache_path`, rebuilding it if the table changed.
+
+        The cache is keyed by the table's size, mtime and the column selection. By default the
+        cache is stored next to the table as `<name>.intervals.npz`.
+        """
+        table_path = Path(table_path)
+        cache_path = Path(cache_path) if cache_path else table_path.with_name(table_path.name + ".intervals.npz")
+        st = table_path.stat()
+        key = {
+            "source_size": st.st_size,
+            "source_mtime_ns": st.st_mtime_ns,
+            "start_col": start_col,
+            "duration_col": duration_col,
+            "end_col": end_col,
+        }
+        if cache_path.exists():
+            try:
+                cached = cls.load(cache_path)
+                if all(cached.meta.get(k) == v for k, v in key.items()):
+                    return cached
+            except (OSError, ValueError, KeyError):
+                pass
+        index = cls.from_frame(_read_table(table_path), start_col=start_col, duration_col=duration_col, end_col=end_col)
+        index.meta.update(key)
+        try:
+            index.save(cache_path)
+        except OSError:
+            # read-only dataset: the index is still usable, just not persisted
+            pass
+        return index
+
+
+def overlap_join(
+        left: pd.DataFrame,
+        right: pd.DataFrame,
+        *,
+        left_cols: Sequence[Optional[str]] = ("onset", "duration", None),
+        right_cols: Sequence[Optional[str]] = ("onset", "duration", None),
+        how: str = "overlaps",
+) -> pd.DataFrame:
+    """
+    Pair rows of two interval tables, e.g. fixations overlapping each utterance.
+
+    `left_cols` / `right_cols` are `(start_col, duration_col, end_col)` triples as in
+    `IntervalIndex.from_frame`. `how` is one of `overlaps`, `within` (right row inside left
+    row) or `containing` (right row contains left row).
+
+    Returns:
+        pd.DataFrame: columns `left_index` / `right_index` holding the index labels of the paired rows.
+    """
+    left_index = IntervalIndex.from_frame(left, *left_cols)
+    right_index = IntervalIndex.from_frame(right, *right_cols)
+    queries = (left_index.starts, left_index.ends)
+    if how == "overlaps":
+        q, i = right_index.overlaps(*queries)
+    elif how == "within":
+        q, i = right_index.within(*queries)
+    elif how == "containing":
+        q, i = right_index.containing(*queries)
+    else:
+        raise ValueError(f"Unknown join type: {how}")
+    return pd.DataFrame({"left_index": left.index.to_numpy()[q], "right_index": right.index.to_numpy()[i]})
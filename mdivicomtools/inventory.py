@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import yaml
+
+PathLike = Union[str, Path]
+
+CACHE_FORMAT_VERSION = 1
+DEFAULT_CACHE_PATH = Path(".mdivicom") / "inventory.json"
+
+MANIFEST_NAME = "dataset_manifest.yaml"
+
+
+class _SidecarLoader(getattr(yaml, "CSafeLoader", yaml.SafeLoader)):  # type: ignore[misc]
+    """Safe YAML loader that keeps timestamps as strings, so parsed and cached sidecars are identical."""
+
+
+_SidecarLoader.yaml_implicit_resolvers = {
+    first: [(tag, regexp) for tag, regexp in resolvers if tag != "tag:yaml.org,2002:timestamp"]
+    for first, resolvers in yaml.SafeLoader.yaml_implicit_resolvers.items()
+}
+
+
+def load_sidecar(path: PathLike) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as fh:
+        data = yaml.load(fh, Loader=_SidecarLoader)
+    return data if isinstance(data, dict) else {}
+
+
+def _opt_path(path: Optional[str]) -> Optional[Path]:
+    return Path(path) if path is not None else None
+
+
+class StreamInfo:
+    # paths are kept as strings and materialized on access; building Path objects dominates cached scans
+    __slots__ = ("stream_id", "stream_type", "_path", "_sidecar_path", "sidecar")
+
+    def __init__(self, stream_id: str, stream_type: str, path: str, sidecar_path: Optional[str], sidecar: Dict[str, Any]):
+        self.stream_id = stream_id
+        self.stream_type = stream_type
+        self._path = path
+        self._sidecar_path = sidecar_path
+        self.sidecar = sidecar
+
+    @property
+    def path(self) -> Path:
+        return Path(self._path)
+
+    @property
+    def sidecar_path(self) -> Optional[Path]:
+        return _opt_path(self._sidecar_path)
+
+    def __repr__(self) -> str:
+        return f"StreamInfo({self.stream_type}/{self.stream_id})"
+
+
+class SessionInfo:
+    __slots__ = ("session_id", "_path", "_sidecar_path", "sidecar", "streams", "fingerprint")
+
+    def __init__(
+            self,
+            session_id: str,
+            path: str,
+            sidecar_path: Optional[str],
+            sidecar: Dict[str, Any],
+            streams: List[StreamInfo],
+            fingerprint: List[Tuple[str, int]],
+    ):
+        self.session_id = session_id
+        self._path = path
+        self._sidecar_path = sidecar_path
+        self.sidecar = sidecar
+        self.streams = streams
+        self.fingerprint = fingerprint
+
+    @property
+    def path(self) -> Path:
+        return Path(self._path)
+
+    @property
+    def sidecar_path(self) -> Optional[Path]:
+        return _opt_path(self._sidecar_path)
+
+    @property
+    def label(self) -> str:
+        return f"ses-{self.session_id}"
+
+    def streams_of_type(self, stream_type: str) -> List[StreamInfo]:
+        return [s for s in self.streams if s.stream_type == stream_type]
+
+    def __repr__(self) -> str:
+        return f"SessionInfo({self.label}, streams={len(self.streams)})"
+
+
+class DatasetInventory:
+    """
+    Typed in-memory view of an openSIDS dataset: manifest, sessions, streams and their sidecars.
+
+    Use `scan_dataset` to build (and cache) an inventory.
+    """
+
+    __slots__ = ("root", "manifest_path", "manifest", "sessions", "stats")
+
+    def __init__(self, root: Path, manifest_path: Optional[Path], manifest: Dict[str, Any], sessions: List[SessionInfo]):
+        self.root = root
+        self.manifest_path = manifest_path
+        self.manifest = manifest
+        self.sessions = sessions
+        self.stats: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def __iter__(self) -> Iterator[SessionInfo]:
+        return iter(self.sessions)
+
+    def __repr__(self) -> str:
+        return f"DatasetInventory({self.root}, sessions={len(self.sessions)})"
+
+    def session(self, session_id: str) -> SessionInfo:
+        session_id = session_id[4:] if session_id.startswith("ses-") else session_id
+        for session in self.sessions:
+            if session.session_id == session_id:
+                return session
+        raise KeyError(f"Session not found: ses-{session_id}")
+
+    def streams(self, stream_type: Optional[str] = None) -> Iterator[Tuple[SessionInfo, StreamInfo]]:
+        for session in self.sessions:
+            for stream in session.streams:
+                if stream_type is None or stream.stream_type == stream_type:
+                    yield session, stream
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "root": str(self.root),
+            "manifest": self.manifest,
+            "sessions": [_session_to_cache(str(self.root), s) for s in self.sessions],
+        }
+
+
+# ---------------------------------------------------------------------- scanning
+
+
+def _mtime_ns(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return -1
+
+
+def subdirs(path: str) -> List[os.DirEntry]:
+    """Non-hidden subdirectories of `path` sorted by name (empty if `path` does not exist)."""
+    try:
+        with os.scandir(path) as it:
+            return sorted((e for e in it if e.is_dir() and not e.name.startswith(".")), key=lambda e: e.name)
+    except FileNotFoundError:
+        return []
+
+
+def _scan_session(root: str, session_path: str) -> SessionInfo:
+    session_name = os.path.basename(session_path)
+    rel = lambda p: os.path.relpath(p, root)  # noqa: E731
+    fingerprint: List[Tuple[str, int]] = [(rel(session_path), _mtime_ns(session_path))]
+
+    sidecar_path: Optional[str] = os.path.join(session_path, f"{session_name}_session.yaml")
+    sidecar_mtime = _mtime_ns(sidecar_path)
+    fingerprint.append((rel(sidecar_path), sidecar_mtime))
+    if sidecar_mtime < 0:
+        sidecar_path = None
+    sidecar = load_sidecar(sidecar_path) if sidecar_path else {}
+
+    raw_dir = os.path.join(session_path, "raw")
+    fingerprint.append((rel(raw_dir), _mtime_ns(raw_dir)))
+    streams: List[StreamInfo] = []
+    for type_entry in subdirs(raw_dir):
+        fingerprint.append((rel(type_entry.path), type_entry.stat().st_mtime_ns))
+        for stream_entry in subdirs(type_entry.path):
+            if not stream_entry.name.startswith("str-"):
+                continue
+            fingerprint.append((rel(stream_entry.path), stream_entry.stat().st_mtime_ns))
+            stream_sidecar: Optional[str] = os.path.join(stream_entry.path, f"{stream_entry.name}_stream.yaml")
+            stream_mtime = _mtime_ns(stream_sidecar)
+            fingerprint.append((rel(stream_sidecar), stream_mtime))
+            if stream_mtime < 0:
+                stream_sidecar = None
+            streams.append(
+                StreamInfo(
+                    stream_id=stream_entry.name,
+                    stream_type=type_entry.name,
+                    path=stream_entry.path,
+                    sidecar_path=stream_sidecar,
+                    sidecar=load_sidecar(stream_sidecar) if stream_sidecar else {},
+                )
+            )
+    return SessionInfo(session_name[len("ses-"):], session_path, sidecar_path, sidecar, streams, fingerprint)
+
+
+def _fingerprint_is_current(root: str, fingerprint: List[Tuple[str, int]]) -> bool:
+    prefix = root + os.sep
+    return all(_mtime_ns(prefix + rel) == mtime for rel, mtime in fingerprint)
+
+
+# ---------------------------------------------------------------------- cache (de)serialization
+
+
+def _session_to_cache(root: str, session: SessionInfo) -> Dict[str, Any]:
+    rel = lambda p: os.path.relpath(p, root) if p is not None else None  # noqa: E731
+    return {
+        "session_id": session.session_id,
+        "path": rel(session._path),
+        "sidecar_path": rel(session._sidecar_path),
+        "sidecar": session.sidecar,
+        "fingerprint": session.fingerprint,
+        "streams": [
+            {
+                "stream_id": s.stream_id,
+                "stream_type": s.stream_type,
+                "path": rel(s._path),
+                "sidecar_path": rel(s._sidecar_path),
+                "sidecar": s.sidecar,
+            }
+            for s in session.streams
+        ],
+    }
+
+
+def _session_from_cache(root: str, data: Dict[str, Any]) -> SessionInfo:
+    prefix = root + os.sep
+    path = lambda p: prefix + p if p is not None else None  # noqa: E731
+    streams = [
+        StreamInfo(s["stream_id"], s["stream_type"], prefix + s["path"], path(s["sidecar_path"]), s["sidecar"])
+        for s in data["streams"]
+    ]
+    return SessionInfo(data["session_id"], prefix + data["path"], path(data["sidecar_path"]), data["sidecar"], streams, data["fingerprint"])
+
+
+def _read_cache(cache_path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        data = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("format_version") != CACHE_FORMAT_VERSION:
+        return None
+    return data
+
+
+def _write_cache(cache_path: Path, root: str, inventory: DatasetInventory, manifest_mtime: int) -> None:
+    payload = {
+        "format_version": CACHE_FORMAT_VERSION,
+        "manifest_mtime_ns": manifest_mtime,
+        "manifest": inventory.manifest,
+        "sessions": {s.label: _session_to_cache(root, s) for s in inventory.sessions},
+    }
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_path.with_name(cache_path.name + f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, cache_path)
+    except OSError:
+        # read-only datasets still get an (uncached) inventory
+        pass
+
+
+def scan_dataset(
+        dataset_root: PathLike,
+        *,
+        cache_path: Optional[PathLike] = None,
+        use_cache: bool = True,
+) -> DatasetInventory:
+    """
+    Build the inventory of an openSIDS dataset, reusing a persisted cache where possible.
+
+    Each cached session records the mtimes of its session/raw/type/stream directories and
+    sidecar files; only sessions whose fingerprint changed (plus new sessions) are re-parsed.
+    Adding or removing a stream changes a directory mtime, so no deep walk is required.
+
+    Args:
+        dataset_root (PathLike): Dataset root containing `dataset_manifest.yaml` and `sessions/`.
+        cache_path (Optional[PathLike]): Cache file; defaults to `<dataset_root>/.mdivicom/inventory.json`.
+        use_cache (bool): If False, ignore and do not write the cache.
+
+    Returns:
+        DatasetInventory: the inventory; `inventory.stats` reports `sessions_cached` / `sessions_scanned`.
+    """
+    root_path = Path(dataset_root).expanduser().resolve()
+    root = str(root_path)
+    cache_file = Path(cache_path) if cache_path else root_path / DEFAULT_CACHE_PATH
+    cached = _read_cache(cache_file) if use_cache else None
+    cached_sessions: Dict[str, Any] = cached["sessions"] if cached else {}
+
+    manifest_path: Optional[Path] = root_path / MANIFEST_NAME
+    manifest_mtime = _mtime_ns(str(manifest_path))
+    if manifest_mtime < 0:
+        manifest_path, manifest = None, {}
+    elif cached and cached.get("manifest_mtime_ns") == manifest_mtime:
+        manifest = cached["manifest"]
+    else:
+        manifest = load_sidecar(manifest_path)
+
+    sessions: List[SessionInfo] = []
+    n_cached = 0
+    for entry in subdirs(os.path.join(root, "sessions")):
+        if not entry.name.startswith("ses-"):
+            continue
+        hit = cached_sessions.get(entry.name)
+        if hit is not None and _fingerprint_is_current(root, hit["fingerprint"]):
+            sessions.append(_session_from_cache(root, hit))
+            n_cached += 1
+        else:
+            sessions.append(_scan_session(root, entry.path))
+
+    inventory = DatasetInventory(root_path, manifest_path, manifest, sessions)
+    inventory.stats = {"sessions_cached": n_cached, "sessions_scanned": len(sessions) - n_cached}
+    dirty = (
+        cached is None
+        or inventory.stats["sessions_scanned"] > 0
+        or len(cached_sessions) != len(sessions)
+        or cached.get("manifest_mtime_ns") != manifest_mtime
+    )
+    if use_cache and dirty:
+        _write_cache(cache_file, root, inventory, manifest_mtime)
+    return inventory
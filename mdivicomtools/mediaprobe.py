@@ -0,0 +1,503 @@
+from __future__ import annotations
+
+import os
+import re
+import secrets
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import yaml
+
+from .inventory import scan_dataset
+from .utils.events import get_event_bus
+
+PathLike = Union[str, Path]
+
+PROBE_FORMAT = "mdivicomtools-mediaprobe/0.1"
+MEDIA_EXTENSIONS = frozenset({".mp4", ".m4v", ".m4a", ".mov", ".3gp", ".wav", ".wave", ".bwf", ".rf64"})
+DEFAULT_STREAM_TYPES = ("video", "audio")
+DEFAULT_JOBS = 4
+# a moov box larger than this is treated as corrupt rather than read into memory
+MAX_MOOV_SIZE = 256 * 1024 * 1024
+
+_MP4_EPOCH = datetime(1904, 1, 1, tzinfo=timezone.utc)
+_MP4_TOP_LEVEL = {b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide", b"pnot", b"uuid", b"moof", b"mfra", b"styp", b"sidx"}
+_WAV_FORMATS = {1: "pcm", 3: "float", 6: "alaw", 7: "mulaw", 0x55: "mp3"}
+
+
+class MediaProbeError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class VideoTrack:
+    codec: str
+    width: int
+    height: int
+    fps: Optional[float]
+    frame_count: int
+    duration: Optional[float]
+
+
+@dataclass(frozen=True)
+class AudioTrack:
+    codec: str
+    sample_rate: int
+    channels: int
+    bits_per_sample: Optional[int]
+    # sample frames (one sample per channel)
+    frame_count: int
+    duration: Optional[float]
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    """Container-level metadata of one media file; `start_time` is the recorded creation time (ISO 8601) if any."""
+
+    path: str
+    container: str
+    size: int
+    mtime_ns: int
+    duration: Optional[float]
+    start_time: Optional[str]
+    video: Optional[VideoTrack] = None
+    audio: Optional[AudioTrack] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop("path")
+        return {k: v for k, v in data.items() if v is not None}
+
+    @classmethod
+    def from_dict(cls, path: str, data: Dict[str, Any]) -> "MediaInfo":
+        video = data.get("video")
+        audio = data.get("audio")
+        return cls(
+            path=path,
+            container=data["container"],
+            size=data["size"],
+            mtime_ns=data["mtime_ns"],
+            duration=data.get("duration"),
+            start_time=data.get("start_time"),
+            video=VideoTrack(**video) if video else None,
+            audio=AudioTrack(**audio) if audio else None,
+        )
+
+
+# ---------------------------------------------------------------------- MP4 / MOV
+
+def _read_exact(fh: BinaryIO, size: int) -> bytes:
+    data = fh.read(size)
+    if len(data) != size:
+        raise MediaProbeError("unexpected end of file")
+    return data
+
+
+def _top_level_boxes(fh: BinaryIO, file_size: int) -> Iterator[Tuple[bytes, int, int]]:
+    """Yield (type, payload offset, payload size) of the top-level boxes, seeking over their payloads."""
+    offset = 0
+    while offset + 8 <= file_size:
+        fh.seek(offset)
+        size, box_type = struct.unpack(">I4s", _read_exact(fh, 8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", _read_exact(fh, 8))[0]
+            header = 16
+        elif size == 0:
+            size = file_size - offset
+        if size < header:
+            raise MediaProbeError(f"invalid box size {size} at offset {offset}")
+        yield box_type, offset + header, size - header
+        offset += size
+
+
+def _boxes(data: memoryview) -> Iterator[Tuple[bytes, memoryview]]:
+    """Child boxes of an in-memory container box."""
+    offset = 0
+    end = len(data)
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            break
+        yield box_type, data[offset + header:offset + size]
+        offset += size
+
+
+def _child(data: memoryview, *path: bytes) -> Optional[memoryview]:
+    for name in path:
+        for box_type, payload in _boxes(data):
+            if box_type == name:
+                data = payload
+                break
+        else:
+            return None
+    return data
+
+
+def _full_box_times(payload: memoryview) -> Tuple[int, int, int]:
+    """(creation_time, timescale, duration) of an `mvhd` / `mdhd` box (version 0 or 1)."""
+    if len(payload) < 4 or len(payload) < (32 if payload[0] == 1 else 20):
+        raise MediaProbeError(f"truncated mvhd/mdhd box ({len(payload)} bytes)")
+    if payload[0] == 1:
+        creation, _, timescale, duration = struct.unpack_from(">QQIQ", payload, 4)
+        unknown = 0xFFFFFFFFFFFFFFFF
+    else:
+        creation, _, timescale, duration = struct.unpack_from(">IIII", payload, 4)
+        unknown = 0xFFFFFFFF
+    return creation, timescale, 0 if duration == unknown else duration
+
+
+def _mp4_time(seconds: int) -> Optional[str]:
+    if not seconds:
+        return None
+    try:
+        return (_MP4_EPOCH + timedelta(seconds=seconds)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    except OverflowError:
+        return None
+
+
+def _stts_totals(stbl: memoryview) -> Tuple[int, int]:
+    """(sample count, summed sample durations in media timescale units) from `stts`."""
+    stts = _child(stbl, b"stts")
+    if stts is None or len(stts) < 8:
+        return 0, 0
+    count = struct.unpack_from(">I", stts, 4)[0]
+    samples = ticks = 0
+    for sample_count, delta in struct.iter_unpack(">II", stts[8:8 + 8 * count]):
+        samples += sample_count
+        ticks += sample_count * delta
+    return samples, ticks
+
+
+def _mp4_track(trak: memoryview) -> Optional[Union[VideoTrack, AudioTrack]]:
+    mdia = _child(trak, b"mdia")
+    if mdia is None:
+        return None
+    hdlr = _child(mdia, b"hdlr")
+    mdhd = _child(mdia, b"mdhd")
+    stbl = _child(mdia, b"minf", b"stbl")
+    if hdlr is None or mdhd is None or stbl is None or len(hdlr) < 12:
+        return None
+    handler = bytes(hdlr[8:12])
+    if handler not in (b"vide", b"soun"):
+        return None
+    _, timescale, duration_ticks = _full_box_times(mdhd)
+    samples, ticks = _stts_totals(stbl)
+    ticks = ticks or duration_ticks
+    duration = ticks / timescale if timescale and ticks else None
+    stsd = _child(stbl, b"stsd")
+    entry = stsd[8:] if stsd is not None and len(stsd) >= 24 else None
+    codec = bytes(entry[4:8]).decode("latin-1").strip() if entry is not None else ""
+    if handler == b"vide":
+        width = height = 0
+        if entry is not None and len(entry) >= 36:
+            width, height = struct.unpack_from(">HH", entry, 32)
+        fps = round(samples * timescale / ticks, 6) if samples and ticks and timescale else None
+        return VideoTrack(codec=codec, width=width, height=height, fps=fps, frame_count=samples, duration=duration)
+    channels = bits = rate = 0
+    if entry is not None and len(entry) >= 36:
+        channels, bits = struct.unpack_from(">HH", entry, 24)
+        rate = struct.unpack_from(">I", entry, 32)[0] >> 16
+    # the 16.16 rate field overflows above 65535 Hz; audio tracks normally use the sample rate as timescale
+    sample_rate = timescale if timescale >= 8000 or not rate else rate
+    frame_count = round(ticks * sample_rate / timescale) if timescale else 0
+    return AudioTrack(codec=codec, sample_rate=sample_rate, channels=channels, bits_per_sample=bits or None, frame_count=frame_count, duration=duration)
+
+
+def _probe_mp4(fh: BinaryIO, path: str, st: os.stat_result) -> MediaInfo:
+    container = "mp4"
+    moov = None
+    for box_type, offset, size in _top_level_boxes(fh, st.st_size):
+        if box_type == b"ftyp" and size >= 4:
+            fh.seek(offset)
+            if _read_exact(fh, 4) == b"qt  ":
+                container = "mov"
+        elif box_type == b"moov":
+            if size > MAX_MOOV_SIZE:
+                raise MediaProbeError(f"moov box of {size} bytes")
+            fh.seek(offset)
+            moov = memoryview(_read_exact(fh, size))
+            break
+    if moov is None:
+        raise MediaProbeError("no moov box")
+    mvhd = _child(moov, b"mvhd")
+    created, timescale, duration_ticks = _full_box_times(mvhd) if mvhd is not None else (0, 0, 0)
+    video = audio = None
+    for box_type, payload in _boxes(moov):
+        if box_type != b"trak":
+            continue
+        track = _mp4_track(payload)
+        if isinstance(track, VideoTrack) and video is None:
+            video = track
+        elif isinstance(track, AudioTrack) and audio is None:
+            audio = track
+    duration = duration_ticks / timescale if timescale and duration_ticks else None
+    if duration is None:
+        durations = [t.duration for t in (video, audio) if t is not None and t.duration]
+        duration = max(durations) if durations else None
+    return MediaInfo(path, container, st.st_size, st.st_mtime_ns, duration, _mp4_time(created), video, audio)
+
+
+# ---------------------------------------------------------------------- WAV / RF64
+
+def _bext_start(bext: bytes) -> Optional[str]:
+    """Origination date/time of a Broadcast WAVE `bext` chunk as `YYYY-MM-DDTHH:MM:SS` (local, as recorded)."""
+    if len(bext) < 338:
+        return None
+    date = bext[320:330].decode("latin-1").strip("\0 ")
+    clock = bext[330:338].decode("latin-1").strip("\0 ")
+    if not re.match(r"\d{4}.\d{2}.\d{2}$", date):
+        return None
+    date = f"{date[0:4]}-{date[5:7]}-{date[8:10]}"
+    if re.match(r"\d{2}.\d{2}.\d{2}$", clock):
+        return f"{date}T{clock[0:2]}:{clock[3:5]}:{clock[6:8]}"
+    return date
+
+
+def _probe_wav(fh: BinaryIO, path: str, st: os.stat_result, riff_id: bytes) -> MediaInfo:
+    offset = 12
+    fmt = None
+    data_size = None
+    data_offset = 0
+    ds64_data_size = None
+    start_time = None
+    while offset + 8 <= st.st_size:
+        fh.seek(offset)
+        chunk_id, size = struct.unpack("<4sI", _read_exact(fh, 8))
+        if chunk_id == b"ds64":
+            ds64_data_size = struct.unpack("<QQ", _read_exact(fh, 16))[1]
+        elif chunk_id == b"fmt ":
+            fmt = _read_exact(fh, min(size, 40))
+        elif chunk_id == b"bext":
+            start_time = _bext_start(fh.read(min(size, 346)))
+        elif chunk_id == b"data":
+            data_size = ds64_data_size if size == 0xFFFFFFFF and ds64_data_size is not None else size
+            data_offset = offset + 8
+            # the data chunk may be followed by metadata chunks; stop only if nothing is missing
+            if fmt is not None and start_time is not None:
+                break
+            size = data_size
+        offset += 8 + size + (size & 1)
+    if fmt is None or len(fmt) < 16:
+        raise MediaProbeError("no fmt chunk")
+    audio_format, channels, sample_rate, _, block_align, bits = struct.unpack_from("<HHIIHH", fmt)
+    if audio_format == 0xFFFE and len(fmt) >= 26:
+        # WAVE_FORMAT_EXTENSIBLE: the format code is the first two bytes of the subformat GUID
+        audio_format = struct.unpack_from("<H", fmt, 24)[0]
+    if data_size is None:
+        raise MediaProbeError("no data chunk")
+    # a truncated recording has less data than its header claims
+    data_size = min(data_size, max(0, st.st_size - data_offset))
+    frame_count = data_size // block_align if block_align else 0
+    duration = frame_count / sample_rate if sample_rate else None
+    audio = AudioTrack(
+        codec=_WAV_FORMATS.get(audio_format, f"0x{audio_format:04x}"),
+        sample_rate=sample_rate,
+        channels=channels,
+        bits_per_sample=bits or None,
+        frame_count=frame_count,
+        duration=duration,
+    )
+    container = "rf64" if riff_id in (b"RF64", b"BW64") else "wav"
+    return MediaInfo(path, container, st.st_size, st.st_mtime_ns, duration, start_time, None, audio)
+
+
+def probe_file(path: PathLike) -> MediaInfo:
+    """
+    Read the container header of an MP4/MOV or WAV/RF64 file without decoding or reading the payload.
+
+    MP4/MOV: top-level boxes are skipped by seeking (so `mdat` is never read) and only `moov` is
+    loaded; duration, creation time, and per first video/audio track the codec, dimensions, frame
+    count, fps and sample rate are taken from `mvhd`/`mdhd`/`stsd`/`stts`. WAV: chunks are walked by
+    seeking; `fmt `, `data` (size only), `ds64` (RF64) and `bext` (Broadcast WAVE origination time).
+
+    Raises:
+        MediaProbeError: unknown or malformed container.
+    """
+    path = str(path)
+    st = os.stat(path)
+    with open(path, "rb") as fh:
+        head = fh.read(12)
+        if len(head) < 12:
+            raise MediaProbeError("file too short")
+        try:
+            if head[:4] in (b"RIFF", b"RF64", b"BW64") and head[8:12] == b"WAVE":
+                return _probe_wav(fh, path, st, head[:4])
+            if head[4:8] in _MP4_TOP_LEVEL:
+                return _probe_mp4(fh, path, st)
+        except (struct.error, IndexError) as exc:
+            # a box or chunk shorter than its fields
+            raise MediaProbeError(f"malformed header: {exc}") from exc
+    raise MediaProbeError("not an MP4/MOV or WAV file")
+
+
+# ---------------------------------------------------------------------- stream sidecars
+
+class StreamMedia:
+    """Probe results of one stream: `files` in stream-relative path order, plus per-file `errors`."""
+
+    __slots__ = ("session_id", "stream_type", "stream_id", "path", "sidecar_path", "files", "errors")
+
+    def __init__(self, session_id: str, stream_type: str, stream_id: str, path: Path, sidecar_path: Path):
+        self.session_id = session_id
+        self.stream_type = stream_type
+        self.stream_id = stream_id
+        self.path = path
+        self.sidecar_path = sidecar_path
+        self.files: List[MediaInfo] = []
+        self.errors: Dict[str, str] = {}
+
+    def __repr__(self) -> str:
+        return f"StreamMedia(ses-{self.session_id}/{self.stream_type}/{self.stream_id}, files={len(self.files)})"
+
+    @property
+    def duration(self) -> Optional[float]:
+        durations = [f.duration for f in self.files if f.duration is not None]
+        return sum(durations) if durations else None
+
+    def relpath(self, info: MediaInfo) -> str:
+        """Stream-relative path of a probed file, as used for the keys of the sidecar `media.files` block."""
+        return os.path.relpath(info.path, str(self.path)).replace(os.sep, "/")
+
+    def media_block(self) -> Dict[str, Any]:
+        return {"probe_format": PROBE_FORMAT, "files": {self.relpath(info): info.to_dict() for info in self.files}}
+
+
+def _media_files(stream_dir: str) -> List[str]:
+    found = []
+    for root, dirs, files in os.walk(stream_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if not name.startswith(".") and os.path.splitext(name)[1].lower() in MEDIA_EXTENSIONS:
+                found.append(os.path.join(root, name))
+    return found
+
+
+def _cached_entries(sidecar: Dict[str, Any]) -> Dict[str, Any]:
+    media = sidecar.get("media")
+    if not isinstance(media, dict) or media.get("probe_format") != PROBE_FORMAT:
+        return {}
+    files = media.get("files")
+    return files if isinstance(files, dict) else {}
+
+
+_TOP_LEVEL_KEY = re.compile(r"^[^\s#]")
+
+
+def write_media_block(sidecar_path: PathLike, block: Dict[str, Any], header: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Replace (or append) the top-level `media:` block of a YAML stream sidecar, leaving the rest of the
+    file, including comments, untouched. A missing sidecar is created with `header` fields first.
+    """
+    path = Path(sidecar_path)
+    dumped = yaml.safe_dump({"media": block}, sort_keys=False, default_flow_style=False, allow_unicode=True)
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines(keepends=True)
+    except FileNotFoundError:
+        lines = [yaml.safe_dump(header, sort_keys=False, default_flow_style=False, allow_unicode=True)] if header else []
+    start = next((i for i, line in enumerate(lines) if line.startswith("media:")), None)
+    if start is None:
+        if lines and not lines[-1].endswith("\n"):
+            lines[-1] += "\n"
+        lines.append(dumped)
+    else:
+        end = next((i for i in range(start + 1, len(lines)) if _TOP_LEVEL_KEY.match(lines[i])), len(lines))
+        lines[start:end] = [dumped]
+    tmp = path.with_name(f".{path.name}.{secrets.token_hex(4)}.tmp")
+    tmp.write_text("".join(lines), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def probe_dataset(
+        dataset_root: PathLike,
+        *,
+        stream_types: Sequence[str] = DEFAULT_STREAM_TYPES,
+        jobs: int = DEFAULT_JOBS,
+        use_cache: bool = True,
+        write_sidecars: bool = True,
+) -> Tuple[List[StreamMedia], Dict[str, int]]:
+    """
+    Probe the media files of the `raw/<stream_type>/str-*` streams of an openSIDS dataset.
+
+    Results are cached in each stream sidecar (`<stream_id>_stream.yaml`, top-level `media:` block,
+    one entry per file keyed by its stream-relative path). Entries whose size and mtime still match
+    are reused; the others are probed on `jobs` threads and the block is rewritten only for streams
+    whose results changed (a missing sidecar is created).
+
+    Returns:
+        (streams, stats): per-stream results and counters (`files`, `probed`, `cached`, `errors`, `sidecars_written`).
+    """
+    started = time.perf_counter()
+    inventory = scan_dataset(dataset_root, use_cache=use_cache)
+    events = get_event_bus()
+    streams: List[StreamMedia] = []
+    cached_entries: List[Dict[str, Any]] = []
+    todo: List[Tuple[int, str]] = []
+    stats = {"files": 0, "probed": 0, "cached": 0, "errors": 0, "sidecars_written": 0}
+
+    for session, stream in inventory.streams():
+        if stream.stream_type not in stream_types:
+            continue
+        sidecar_path = stream.sidecar_path or stream.path / f"{stream.stream_id}_stream.yaml"
+        result = StreamMedia(session.session_id, stream.stream_type, stream.stream_id, stream.path, sidecar_path)
+        cached = _cached_entries(stream.sidecar) if use_cache else {}
+        index = len(streams)
+        streams.append(result)
+        cached_entries.append(cached)
+        stream_dir = str(stream.path)
+        for path in _media_files(stream_dir):
+            stats["files"] += 1
+            rel = os.path.relpath(path, stream_dir).replace(os.sep, "/")
+            entry = cached.get(rel)
+            if isinstance(entry, dict):
+                try:
+                    st = os.stat(path)
+                    if entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+                        result.files.append(MediaInfo.from_dict(path, entry))
+                        stats["cached"] += 1
+                        continue
+                except (OSError, KeyError, TypeError):
+                    pass
+            todo.append((index, path))
+
+    def probe(item: Tuple[int, str]) -> Tuple[int, str, Optional[MediaInfo], Optional[str]]:
+        index, path = item
+        try:
+            return index, path, probe_file(path), None
+        except (OSError, MediaProbeError) as exc:
+            return index, path, None, f"{type(exc).__name__}: {exc}"
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        for done, (index, path, info, error) in enumerate(pool.map(probe, todo), 1):
+            result = streams[index]
+            if info is not None:
+                result.files.append(info)
+                stats["probed"] += 1
+            else:
+                result.errors[os.path.relpath(path, str(result.path))] = error  # type: ignore[assignment]
+                stats["errors"] += 1
+            events.emit("probe.progress", throttle=True, files_done=done, files_total=len(todo))
+
+    for result, cached in zip(streams, cached_entries):
+        result.files.sort(key=lambda info: info.path)
+        block = result.media_block()
+        if write_sidecars and (block["files"] or cached) and block["files"] != cached:
+            try:
+                write_media_block(result.sidecar_path, block, header={"stream_id": result.stream_id, "stream_type": result.stream_type})
+                stats["sidecars_written"] += 1
+            except OSError as exc:
+                result.errors[result.sidecar_path.name] = f"{type(exc).__name__}: {exc}"
+                stats["errors"] += 1
+    events.emit("probe.finished", seconds=time.perf_counter() - started, **stats)
+    return streams, stats
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Any, Dict, List, Optional
+
+PROFILERS = ("cprofile", "tracemalloc", "sample")
+
+
+class _StackSampler:
+    """
+    Wall-clock sampler of one thread's Python stack (collapsed-stack output for flamegraphs).
+
+    A daemon thread wakes every `interval` seconds and walks the target thread's current frame; the
+    profiled code itself is not instrumented, so the overhead is one stack walk per interval.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._labels: Dict[CodeType, str] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="mdivicom-sampler", daemon=True)
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})".replace(";", ":")
+        return label
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame: Optional[FrameType] = sys._current_frames().get(self.thread_id)
+            if frame is None or frame.f_code.co_filename == __file__:
+                # not started yet / already inside the profiler's own exit
+                continue
+            stack: List[str] = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[";".join(stack)] += 1
+            self.samples += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class RunProfiler:
+    """
+    Context manager that profiles the wrapped plugin call and writes artifacts into `artifacts_dir`.
+
+    Kinds:
+        - cprofile: deterministic profile, `profile.pstats` plus a `profile_top.txt` summary.
+        - tracemalloc: allocation tracking, `tracemalloc_top.txt` / `tracemalloc.json` with the top-N
+          allocation sites and peak traced memory. Every allocation is traced, so allocation-heavy code
+          runs several times slower; keep `frames` small unless full tracebacks are needed.
+        - sample: low-overhead stack sampling of the calling thread, `profile.collapsed`
+          (`frame;frame;frame count` lines for flamegraph.pl / speedscope).
+
+    Artifacts are written even if the call raises; `artifacts` maps artifact names to paths relative
+    to the run record's directory.
+    """
+
+    def __init__(self, kind: str, artifacts_dir: Path, *, top_n: int = 50, interval: float = 0.01, frames: int = 1):
+        if kind not in PROFILERS:
+            raise ValueError(f"Unknown profiler: {kind} (expected one of {', '.join(PROFILERS)})")
+        self.kind = kind
+        self.artifacts_dir = artifacts_dir
+        self.top_n = top_n
+        self.interval = interval
+        self.frames = frames
+        self.artifacts: Dict[str, str] = {}
+        self.stats: Dict[str, Any] = {}
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[_StackSampler] = None
+        self._started = 0.0
+        self._tracemalloc_was_tracing = False
+
+    def __enter__(self) -> "RunProfiler":
+        self.artifacts_dir.mkdir(parents=True, exist_ok=True)
+        self._started = time.perf_counter()
+        if self.kind == "cprofile":
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        elif self.kind == "tracemalloc":
+            self._tracemalloc_was_tracing = tracemalloc.is_tracing()
+            if not self._tracemalloc_was_tracing:
+                tracemalloc.start(self.frames)
+            if hasattr(tracemalloc, "reset_peak"):  # py>=3.9
+                tracemalloc.reset_peak()
+        else:
+            self._sampler = _StackSampler(threading.get_ident(), self.interval)
+            self._sampler.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        elapsed = time.perf_counter() - self._started
+        if self.kind == "cprofile":
+            assert self._profile is not None
+            self._profile.disable()
+            self._write_cprofile()
+        elif self.kind == "tracemalloc":
+            self._write_tracemalloc()
+        else:
+            assert self._sampler is not None
+            self._sampler.stop()
+            self._write_collapsed()
+        self.stats["wall_seconds"] = elapsed
+
+    def _rel(self, path: Path) -> str:
+        return f"{self.artifacts_dir.name}/{path.name}"
+
+    def _write_cprofile(self) -> None:
+        assert self._profile is not None
+        pstats_path = self.artifacts_dir / "profile.pstats"
+        self._profile.dump_stats(str(pstats_path))
+        buf = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=buf)
+        stats.sort_stats("cumulative").print_stats(self.top_n)
+        top_path = self.artifacts_dir / "profile_top.txt"
+        top_path.write_text(buf.getvalue(), encoding="utf-8")
+        self.artifacts.update({"pstats": self._rel(pstats_path), "summary": self._rel(top_path)})
+        self.stats["calls"] = stats.total_calls  # type: ignore[attr-defined]
+
+    def _write_tracemalloc(self) -> None:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if not self._tracemalloc_was_tracing:
+            tracemalloc.stop()
+        snapshot = snapshot.filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            )
+        )
+        by_line = snapshot.statistics("lineno")[: self.top_n]
+        by_trace = snapshot.statistics("traceback")[: min(self.top_n, 10)]
+
+        lines = [f"peak traced memory: {peak} bytes, still allocated at exit: {current} bytes", "", f"top {len(by_line)} allocation sites:"]
+        lines.extend(f"  {stat.size:>12} B {stat.count:>8} blocks  {stat.traceback[0].filename}:{stat.traceback[0].lineno}" for stat in by_line)
+        lines.extend(["", "largest allocation tracebacks:"])
+        for stat in by_trace:
+            lines.append(f"  {stat.size} B in {stat.count} blocks")
+            lines.extend(f"    {line}" for line in stat.traceback.format())
+        top_path = self.artifacts_dir / "tracemalloc_top.txt"
+        top_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+        report = {
+            "peak_bytes": peak,
+            "current_bytes": current,
+            "top": [
+                {"file": s.traceback[0].filename, "line": s.traceback[0].lineno, "size_bytes": s.size, "count": s.count}
+                for s in by_line
+            ],
+        }
+        json_path = self.artifacts_dir / "tracemalloc.json"
+        json_path.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        self.artifacts.update({"allocations": self._rel(top_path), "allocations_json": self._rel(json_path)})
+        self.stats.update({"peak_bytes": peak, "current_bytes": current, "frames": tracemalloc.get_traceback_limit()})
+
+    def _write_collapsed(self) -> None:
+        assert self._sampler is not None
+        collapsed_path = self.artifacts_dir / "profile.collapsed"
+        with open(collapsed_path, "w", encoding="utf-8") as fh:
+            for stack, count in self._sampler.stacks.most_common():
+                fh.write(f"{stack} {count}\n")
+        self.artifacts["collapsed_stacks"] = self._rel(collapsed_path)
+        self.stats.update({"samples": self._sampler.samples, "interval_seconds": self.interval})
+
+    def to_record(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "artifacts": dict(self.artifacts), "stats": dict(self.stats)}
@@ -7,6 +7,20 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, Optional
 
+from .run_index import append_index_entry, index_entry
+
+try:
+    from importlib.metadata import PackageNotFoundError, version
+except ImportError:  # pragma: no cover (py<3.8)
+    from importlib_metadata import PackageNotFoundError, version  # type: ignore
+
+
+def core_version() -> Optional[str]:
+    try:
+        return version("mdivicomtools")
+    except PackageNotFoundError:
+        return None
+
 
 def new_run_id() -> str:
     ts = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
@@ -39,6 +53,7 @@ def run_record(*, plugin: Dict[str, Any], dataset_dir: Path, out_dir: Path, work
         "out_dir": str(out_dir),
         "work_dir": str(work_dir) if work_dir else None,
         "config_hash_sha256": config_hash(config),
+        "status": "started",
     }
 
 
@@ -49,4 +64,24 @@ def write_run_record(out_dir: Path, run_id: str, record: Dict[str, Any]) -> Path
     record["run_id"] = run_id
     path = runs_dir / f"{run_id}.json"
     path.write_text(json.dumps(record, indent=2, ensure_ascii=False, sort_keys=True) + "\n", encoding="utf-8")
+    append_index_entry(runs_dir, index_entry(record, path))
     return path
+
+
+def finish_run_record(
+        record_path: Path,
+        *,
+        status: str,
+        error: Optional[str] = None,
+        extra: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    record = json.loads(record_path.read_text(encoding="utf-8"))
+    if extra:
+        record.update(extra)
+    record["status"] = status
+    record["finished_at"] = datetime.now(timezone.utc).isoformat()
+    if error is not None:
+        record["error"] = error
+    record_path.write_text(json.dumps(record, indent=2, ensure_ascii=False, sort_keys=True) + "\n", encoding="utf-8")
+    append_index_entry(record_path.parent, index_entry(record, record_path))
+    return record
@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import secrets
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from .provenance import core_version
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+SIDECAR_NAME = "resultbundle.json"
+# committed files[] entries are appended here as they are written; removed once the sidecar is final
+JOURNAL_NAME = ".resultbundle.files.jsonl"
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+_COPY_CHUNK = 8 * 1024 * 1024
+
+
+class _HashingRaw(io.RawIOBase):
+    """Unbuffered writer over a file descriptor that hashes and counts every byte written."""
+
+    def __init__(self, fd: int, hasher: Any):
+        self._fd = fd
+        self.hasher = hasher
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        n = os.write(self._fd, data)
+        self.hasher.update(memoryview(data).cast("B")[:n])
+        self.size += n
+        return n
+
+    def fileno(self) -> int:
+        return self._fd
+
+
+class OutputFile:
+    """
+    One output being streamed into a bundle (returned by `OutputWriter.open`).
+
+    Bytes go to a temporary file next to the destination; `commit()` renames it into place and adds the
+    `files[]` entry, `abort()` removes it. Used as a context manager it commits on success and aborts
+    if the block raises.
+    """
+
+    def __init__(self, writer: "OutputWriter", relpath: str, entry: Dict[str, Any], *, text: bool, encoding: Optional[str], newline: Optional[str]):
+        self._writer = writer
+        self.relpath = relpath
+        self._entry = entry
+        self.path = writer.root / relpath
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp_path = self.path.with_name(f".{self.path.name}.{secrets.token_hex(4)}.tmp")
+        fd = os.open(str(self._tmp_path), os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+        self._raw = _HashingRaw(fd, hashlib.new(writer.digest))
+        self._fh: Any = io.BufferedWriter(self._raw, buffer_size=writer.buffer_size)
+        if text:
+            self._fh = io.TextIOWrapper(self._fh, encoding=encoding or "utf-8", newline=newline)
+        self.closed = False
+
+    def write(self, data: Any) -> int:
+        return self._fh.write(data)
+
+    def writelines(self, lines: Any) -> None:
+        self._fh.writelines(lines)
+
+    def _close_fd(self) -> None:
+        self._fh.flush()
+        if self._writer.fsync:
+            os.fsync(self._raw.fileno())
+        fd = self._raw.fileno()
+        self._fh.close()
+        os.close(fd)
+        self.closed = True
+
+    def commit(self) -> Dict[str, Any]:
+        """Finish the file: rename it into place and record its `files[]` entry (with size and digest)."""
+        if self.closed:
+            raise ValueError(f"{self.relpath} is already closed")
+        self._close_fd()
+        os.replace(self._tmp_path, self.path)
+        entry = dict(self._entry)
+        entry["size_bytes"] = self._raw.size
+        entry[self._writer.digest] = self._raw.hasher.hexdigest()
+        self._writer._add(entry)
+        return entry
+
+    def abort(self) -> None:
+        """Discard the partial file; the bundle inventory is not touched."""
+        if not self.closed:
+            try:
+                self._close_fd()
+            except OSError:
+                pass
+        try:
+            os.unlink(self._tmp_path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "OutputFile":
+        return self
+
+    def __exit__(self, exc_type: Any, *exc: Any) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+
+class OutputWriter:
+    """
+    Streaming writer for a result bundle: plugins write outputs through it and get `resultbundle.json`
+    without a second pass over the data.
+
+    Every file is written to a temporary name and renamed into place when committed, so readers never
+    see partial outputs. Size and digest are computed from the bytes as they are written. Each committed
+    entry is appended to a journal (`.resultbundle.files.jsonl`) so an interrupted run can be resumed
+    with `resume=True`; `close()` writes the sidecar once (atomically) and removes the journal.
+
+        with OutputWriter(out_dir / "gaze", resultbundle_type="acme.gaze.v1", schema_version="1.0.0",
+                          time_reference={"kind": "session", "unit": "s"}) as bundle:
+            with bundle.open("gaze.tsv", role="samples", format="tsv", text=True) as fh:
+                for row in rows:
+                    fh.write(row)
+
+    Leaving the `with` block with an exception aborts open files and does not write the sidecar.
+    """
+
+    def __init__(
+            self,
+            root: PathLike,
+            *,
+            resultbundle_type: str,
+            schema_version: str,
+            time_reference: Dict[str, Any],
+            producer: Optional[Dict[str, Any]] = None,
+            digest: str = "sha256",
+            buffer_size: int = DEFAULT_BUFFER_SIZE,
+            fsync: bool = False,
+            resume: bool = False,
+            **fields: Any,
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        hashlib.new(digest)  # fail early on unknown algorithms
+        self.digest = digest
+        self.buffer_size = buffer_size
+        self.fsync = fsync
+        self.header: Dict[str, Any] = {
+            "resultbundle_type": resultbundle_type,
+            "schema_version": schema_version,
+            "time_reference": dict(time_reference),
+            "producer": dict(producer) if producer else {"tool_ref": "mdivicomtools", "tool_version": core_version()},
+        }
+        self.header.update(fields)
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self._open: List[OutputFile] = []
+        self._lock = threading.Lock()
+        self.closed = False
+        self._journal_path = self.root / JOURNAL_NAME
+        if resume:
+            self._files.update((e["path"], e) for e in read_journal(self.root) if (self.root / e["path"]).exists())
+        elif self._journal_path.exists():
+            self._journal_path.unlink()
+
+    def _relpath(self, path: PathLike) -> str:
+        rel = Path(path)
+        if rel.is_absolute() or ".." in rel.parts or not rel.parts:
+            raise ValueError(f"Output path must be relative to the bundle root: {path}")
+        if rel.as_posix() in (SIDECAR_NAME, JOURNAL_NAME):
+            raise ValueError(f"{rel.as_posix()} is reserved for the bundle sidecar")
+        return rel.as_posix()
+
+    def open(
+            self,
+            path: PathLike,
+            *,
+            role: str,
+            format: str,
+            required: bool = True,
+            text: bool = False,
+            encoding: Optional[str] = None,
+            newline: Optional[str] = None,
+            **entry: Any,
+    ) -> OutputFile:
+        """
+        Start streaming one output file (binary, or text with `text=True`).
+
+        Extra keyword arguments (`time`, `key_columns`, ...) are stored in the `files[]` entry as given.
+        """
+        if self.closed:
+            raise ValueError("OutputWriter is closed")
+        relpath = self._relpath(path)
+        file_entry = {"path": relpath, "role": role, "format": format, "required": required}
+        file_entry.update(entry)
+        out = OutputFile(self, relpath, file_entry, text=text, encoding=encoding, newline=newline)
+        with self._lock:
+            self._open.append(out)
+        return out
+
+    def write_bytes(self, path: PathLike, data: bytes, **entry: Any) -> Dict[str, Any]:
+        with self.open(path, **entry) as fh:
+            fh.write(data)
+        return self._files[self._relpath(path)]
+
+    def write_text(self, path: PathLike, text: str, *, encoding: str = "utf-8", **entry: Any) -> Dict[str, Any]:
+        with self.open(path, text=True, encoding=encoding, **entry) as fh:
+            fh.write(text)
+        return self._files[self._relpath(path)]
+
+    def add_file(self, path: PathLike, source: PathLike, **entry: Any) -> Dict[str, Any]:
+        """Copy an existing file (e.g. written by an external tool) into the bundle, hashing while copying."""
+        with open(source, "rb", buffering=0) as src, self.open(path, **entry) as fh:
+            while True:
+                chunk = src.read(_COPY_CHUNK)
+                if not chunk:
+                    break
+                fh.write(chunk)
+        return self._files[self._relpath(path)]
+
+    def _add(self, entry: Dict[str, Any]) -> None:
+        line = (json.dumps(entry, ensure_ascii=False, sort_keys=True, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            self._open = [f for f in self._open if not f.closed]
+            self._files[entry["path"]] = entry
+            # one O_APPEND write per entry, like the run index
+            fd = os.open(str(self._journal_path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+
+    @property
+    def files(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._files.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        bundle = dict(self.header)
+        bundle["created_at"] = datetime.now(timezone.utc).isoformat()
+        bundle["files"] = self.files
+        return bundle
+
+    def close(self) -> Path:
+        """Write `resultbundle.json` (temp + rename) and drop the journal; returns the sidecar path."""
+        if self.closed:
+            return self.root / SIDECAR_NAME
+        pending = [f.relpath for f in self._open if not f.closed]
+        if pending:
+            # release their descriptors and temp files; the sidecar is not written
+            self.abort()
+            raise ValueError(f"Cannot close bundle with open outputs: {', '.join(pending)}")
+        sidecar = self.root / SIDECAR_NAME
+        tmp = sidecar.with_name(f".{SIDECAR_NAME}.{secrets.token_hex(4)}.tmp")
+        tmp.write_text(json.dumps(self.to_dict(), indent=2, ensure_ascii=False, sort_keys=True) + "\n", encoding="utf-8")
+        os.replace(tmp, sidecar)
+        if self._journal_path.exists():
+            self._journal_path.unlink()
+        self.closed = True
+        return sidecar
+
+    def abort(self) -> None:
+        """Discard files still being written; committed files and the journal stay for `resume=True`."""
+        for out in list(self._open):
+            if not out.closed:
+                out.abort()
+        self.closed = True
+
+    def __enter__(self) -> "OutputWriter":
+        return self
+
+    def __exit__(self, exc_type: Any, *exc: Any) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def writer_factory(out_dir: PathLike, producer: Optional[Dict[str, Any]] = None) -> Callable[..., OutputWriter]:
+    """
+    `output_writer` callable handed to python plugins that accept it.
+
+    `output_writer(subdir=None, **kwargs)` returns an `OutputWriter` rooted at `out_dir` (or
+    `out_dir/subdir`); `producer` is used unless the plugin passes its own.
+    """
+    out_dir = Path(out_dir)
+
+    def output_writer(subdir: Optional[PathLike] = None, **kwargs: Any) -> OutputWriter:
+        if producer is not None:
+            kwargs.setdefault("producer", producer)
+        return OutputWriter(out_dir / subdir if subdir is not None else out_dir, **kwargs)
+
+    return output_writer
+
+
+def read_journal(root: PathLike) -> List[Dict[str, Any]]:
+    """Committed `files[]` entries of an unfinished bundle (later entries for the same path win)."""
+    entries: Dict[str, Dict[str, Any]] = {}
+    path = Path(root) / JOURNAL_NAME
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn last line
+            entries[entry["path"]] = entry
+    return list(entries.values())
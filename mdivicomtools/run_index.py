@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+INDEX_NAME = "index.jsonl"
+
+
+def index_path(runs_dir: Path) -> Path:
+    return runs_dir / INDEX_NAME
+
+
+def index_entry(record: Dict[str, Any], record_path: Path) -> Dict[str, Any]:
+    plugin = record.get("plugin") or {}
+    return {
+        "run_id": record.get("run_id"),
+        "created_at": record.get("created_at"),
+        "finished_at": record.get("finished_at"),
+        "status": record.get("status"),
+        "plugin_id": plugin.get("id"),
+        "publisher": plugin.get("publisher"),
+        "plugin_version": plugin.get("version"),
+        "backend": record.get("backend"),
+        "dataset_dir": record.get("dataset_dir"),
+        "config_hash_sha256": record.get("config_hash_sha256"),
+        "record": record_path.name,
+    }
+
+
+def _compact_line(entry: Dict[str, Any]) -> str:
+    return json.dumps(entry, ensure_ascii=False, sort_keys=True, separators=(",", ":")) + "\n"
+
+
+def append_index_entry(runs_dir: Path, entry: Dict[str, Any]) -> None:
+    # One O_APPEND write per line keeps concurrent writers from interleaving partial lines.
+    line = _compact_line(entry).encode("utf-8")
+    fd = os.open(str(index_path(runs_dir)), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def read_index(runs_dir: Path) -> Dict[str, Dict[str, Any]]:
+    """Read the run index; later lines for the same run_id supersede earlier ones."""
+    entries: Dict[str, Dict[str, Any]] = {}
+    path = index_path(runs_dir)
+    if not path.exists():
+        return entries
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # a torn last line from an interrupted writer; `rebuild_index` drops it
+                continue
+            run_id = entry.get("run_id")
+            if run_id:
+                entries[run_id] = entry
+    return entries
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"invalid timestamp {value!r}: expected ISO 8601, e.g. 2024-05-01 or 2024-05-01T12:00:00Z") from None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def query_runs(
+        runs_dir: Path,
+        *,
+        plugin: Optional[str] = None,
+        config_hash: Optional[str] = None,
+        status: Optional[str] = None,
+        dataset_dir: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        last: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Filter the run index of `<out_dir>/_runs`.
+
+    Args:
+        runs_dir (Path): The `_runs` directory.
+        plugin (Optional[str]): Plugin reference (`<id>` or `<publisher>/<id>`).
+        config_hash (Optional[str]): Config hash or unambiguous prefix.
+        status (Optional[str]): Run status (`started`, `succeeded`, `failed`).
+        dataset_dir (Optional[str]): Dataset directory as recorded in the run record.
+        since (Optional[str]): ISO timestamp; only runs created at or after it (naive values are UTC).
+        until (Optional[str]): ISO timestamp; only runs created before it.
+        last (Optional[int]): Only return the N most recent matches.
+
+    Returns:
+        List[Dict[str, Any]]: matching index entries, oldest first.
+
+    Raises:
+        ValueError: `since` or `until` is not an ISO timestamp.
+    """
+    publisher = None
+    plugin_id = plugin
+    if plugin and "/" in plugin:
+        publisher, plugin_id = plugin.split("/", 1)
+    since_dt = _parse_time(since)
+    until_dt = _parse_time(until)
+
+    matches = []
+    for entry in read_index(runs_dir).values():
+        if plugin_id and entry.get("plugin_id") != plugin_id:
+            continue
+        if publisher and entry.get("publisher") != publisher:
+            continue
+        if config_hash and not str(entry.get("config_hash_sha256") or "").startswith(config_hash):
+            continue
+        if status and entry.get("status") != status:
+            continue
+        if dataset_dir and entry.get("dataset_dir") != dataset_dir:
+            continue
+        if since_dt or until_dt:
+            try:
+                created = _parse_time(entry.get("created_at"))
+            except ValueError:
+                # a hand-edited or foreign record; it cannot match a time filter
+                created = None
+            if created is None:
+                continue
+            if since_dt and created < since_dt:
+                continue
+            if until_dt and created >= until_dt:
+                continue
+        matches.append(entry)
+
+    matches.sort(key=lambda e: (e.get("created_at") or "", e.get("run_id") or ""))
+    if last is not None:
+        matches = matches[-last:] if last > 0 else []
+    return matches
+
+
+def _iter_record_files(runs_dir: Path) -> Iterator[os.DirEntry]:
+    with os.scandir(runs_dir) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.endswith(".json"):
+                yield entry
+
+
+def rebuild_index(runs_dir: Path, *, full: bool = False) -> Dict[str, int]:
+    """
+    Compact the run index and backfill runs that are missing from it.
+
+    The existing index is reduced to one line per run. Per-run JSON records are only parsed
+    when their run is not indexed yet (or always with `full=True`), so compacting a large
+    `_runs` directory costs one directory listing plus the index itself.
+
+    Returns:
+        Dict[str, int]: counts of `indexed`, `backfilled`, `dropped` (index lines without record) and `unreadable` records.
+    """
+    path = index_path(runs_dir)
+    indexed_size = path.stat().st_size if path.exists() else 0
+    existing = {} if full else read_index(runs_dir)
+    entries: Dict[str, Dict[str, Any]] = {}
+    backfilled = 0
+    unreadable = 0
+    for file_entry in _iter_record_files(runs_dir):
+        run_id = file_entry.name[: -len(".json")]
+        if run_id in existing:
+            entries[run_id] = existing[run_id]
+            continue
+        try:
+            record = json.loads(Path(file_entry.path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            unreadable += 1
+            continue
+        record.setdefault("run_id", run_id)
+        entries[run_id] = index_entry(record, Path(file_entry.path))
+        backfilled += 1
+
+    ordered = sorted(entries.values(), key=lambda e: (e.get("created_at") or "", e.get("run_id") or ""))
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as fh:
+        fh.writelines(_compact_line(entry).encode("utf-8") for entry in ordered)
+        # carry over lines appended by concurrent runs while we were rebuilding
+        if path.exists():
+            with open(path, "rb") as current:
+                current.seek(indexed_size)
+                fh.write(current.read())
+    os.replace(tmp, path)
+    return {
+        "indexed": len(ordered),
+        "backfilled": backfilled,
+        "dropped": len(set(existing) - set(entries)),
+        "unreadable": unreadable,
+    }
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import json
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .provenance import core_version
+
+PathLike = Union[str, Path]
+
+TIMEBASE_MAP_SCHEMA_VERSION = "0.1.0"
+MARKER_COLUMNS = ("stream_id", "t_stream", "t_session")
+
+# Huber tuning constant (95% efficiency under Gaussian noise) and MAD -> sigma factor.
+HUBER_K = 1.345
+_MAD_SIGMA = 1.4826
+
+
+def read_sync_markers(path: PathLike) -> pd.DataFrame:
+    """
+    Read `derived/sync/sync_markers.tsv`.
+
+    Required columns: `stream_id`, `t_stream` (stream-native time) and `t_session` (canonical
+    session time of the same anchor). An optional `segment` column splits a stream into
+    independently fitted pieces (e.g. recorder restarts). Extra columns are ignored.
+    """
+    df = pd.read_csv(path, sep="\t")
+    missing = [col for col in MARKER_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"{path}: sync markers are missing required column(s): {', '.join(missing)}")
+    df = df.dropna(subset=list(MARKER_COLUMNS))
+    df["stream_id"] = df["stream_id"].astype(str)
+    return df
+
+
+def _assign_segments(df: pd.DataFrame, piecewise: bool, max_gap: Optional[float]) -> pd.Series:
+    segment = df["segment"].astype(str) if (piecewise and "segment" in df.columns) else pd.Series("0", index=df.index)
+    if piecewise and max_gap is not None:
+        ordered = df.sort_values(["stream_id", "t_stream"])
+        gap_break = ordered.groupby("stream_id")["t_stream"].diff().gt(max_gap)
+        gap_id = gap_break.groupby(ordered["stream_id"]).cumsum().astype(int).astype(str)
+        segment = segment + "." + gap_id.reindex(df.index)
+    return segment
+
+
+def fit_robust_lines(x: np.ndarray, y: np.ndarray, mask: np.ndarray, *, iterations: int = 20, k: float = HUBER_K) -> Dict[str, np.ndarray]:
+    """
+    Fit ``y = offset + scale * x`` independently for every row of padded 2D arrays.
+
+    All groups are solved at once with Huber-weighted iteratively reweighted least squares
+    (robust scale from the median absolute deviation). Groups with a single anchor, or with
+    no spread in `x`, are fitted as pure offsets (``scale = 1``).
+
+    Args:
+        x (np.ndarray): (groups, markers) stream-native times, padded arbitrarily.
+        y (np.ndarray): (groups, markers) session times, same shape as `x`.
+        mask (np.ndarray): (groups, markers) boolean mask of valid entries.
+        iterations (int): Maximum number of IRLS iterations.
+        k (float): Huber threshold in units of the robust residual scale.
+
+    Returns:
+        Dict[str, np.ndarray]: per-group `offset`, `scale`, `sigma` and the per-marker `residuals` and `weights`.
+    """
+    valid = mask.astype(np.float64)
+    n = valid.sum(axis=1)
+    weights = valid.copy()
+    x = np.where(mask, x, 0.0)
+    y = np.where(mask, y, 0.0)
+    # center x for numerical stability on large (e.g. epoch-based) timestamps
+    x_ref = np.divide((x * valid).sum(axis=1), n, out=np.zeros_like(n), where=n > 0)[:, None]
+    xc = x - x_ref
+
+    scale = np.ones(len(x))
+    intercept = np.zeros(len(x))
+    sigma = np.zeros(len(x))
+    for _ in range(max(iterations, 1)):
+        sw = weights.sum(axis=1)
+        safe_sw = np.where(sw > 0, sw, 1.0)
+        mx = (weights * xc).sum(axis=1) / safe_sw
+        my = (weights * y).sum(axis=1) / safe_sw
+        dx = xc - mx[:, None]
+        sxx = (weights * dx * dx).sum(axis=1)
+        sxy = (weights * dx * (y - my[:, None])).sum(axis=1)
+        has_spread = (sxx > 0) & (n > 1)
+        new_scale = np.where(has_spread, sxy / np.where(has_spread, sxx, 1.0), 1.0)
+        new_intercept = my - new_scale * mx
+
+        residuals = y - (new_intercept[:, None] + new_scale[:, None] * xc)
+        abs_res = np.where(mask, np.abs(residuals), np.nan)
+        with np.errstate(all="ignore"):
+            sigma = _MAD_SIGMA * np.nanmedian(abs_res, axis=1)
+        sigma = np.nan_to_num(sigma, nan=0.0)
+
+        threshold = (k * sigma)[:, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            huber = np.where(np.abs(residuals) <= threshold, 1.0, threshold / np.abs(residuals))
+        huber = np.where(threshold > 0, huber, 1.0)
+        new_weights = valid * huber
+
+        converged = np.allclose(new_scale, scale, rtol=0, atol=1e-12) and np.allclose(new_intercept, intercept, rtol=0, atol=1e-9)
+        scale, intercept, weights = new_scale, new_intercept, new_weights
+        if converged:
+            break
+
+    residuals = np.where(mask, y - (intercept[:, None] + scale[:, None] * xc), np.nan)
+    offset = intercept - scale * x_ref[:, 0]
+    return {"offset": offset, "scale": scale, "sigma": sigma, "residuals": residuals, "weights": np.where(mask, weights, np.nan)}
+
+
+def _pad_groups(groups: Sequence[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    width = max((len(gx) for gx, _ in groups), default=0)
+    x = np.zeros((len(groups), width))
+    y = np.zeros((len(groups), width))
+    mask = np.zeros((len(groups), width), dtype=bool)
+    for row, (gx, gy) in enumerate(groups):
+        x[row, :len(gx)] = gx
+        y[row, :len(gy)] = gy
+        mask[row, :len(gx)] = True
+    return x, y, mask
+
+
+def fit_session_markers(
+        markers: pd.DataFrame,
+        *,
+        piecewise: bool = False,
+        max_gap: Optional[float] = None,
+        outlier_sigma: float = 3.0,
+) -> Tuple[Dict[str, Dict[str, Any]], pd.DataFrame]:
+    """
+    Estimate offset + drift (optionally piecewise) for all streams of one session at once.
+
+    Args:
+        markers (pd.DataFrame): Output of `read_sync_markers`.
+        piecewise (bool): If True, fit one line per `segment` value and/or per gap-separated run of anchors.
+        max_gap (Optional[float]): With `piecewise`, start a new segment when consecutive anchors are further apart (stream time units).
+        outlier_sigma (float): Residuals beyond this many robust sigmas are reported as outliers.
+
+    Returns:
+        Tuple[Dict[str, Dict], pd.DataFrame]: timebase maps keyed by stream id, and the per-marker residual table.
+    """
+    markers = markers.copy()
+    markers["_segment"] = _assign_segments(markers, piecewise, max_gap)
+    keys: List[Tuple[str, str]] = []
+    groups: List[Tuple[np.ndarray, np.ndarray]] = []
+    row_index: List[np.ndarray] = []
+    for (stream_id, segment), grp in markers.groupby(["stream_id", "_segment"], sort=True):
+        grp = grp.sort_values("t_stream")
+        keys.append((stream_id, segment))
+        groups.append((grp["t_stream"].to_numpy(dtype=np.float64), grp["t_session"].to_numpy(dtype=np.float64)))
+        row_index.append(grp.index.to_numpy())
+
+    if not groups:
+        return {}, markers.drop(columns="_segment").assign(residual=[], outlier=[])
+
+    x, y, mask = _pad_groups(groups)
+    fit = fit_robust_lines(x, y, mask)
+
+    residual = pd.Series(np.nan, index=markers.index)
+    outlier = pd.Series(False, index=markers.index)
+    maps: Dict[str, Dict[str, Any]] = {}
+    for row, ((stream_id, segment), (gx, _), idx) in enumerate(zip(keys, groups, row_index)):
+        res = fit["residuals"][row, :len(gx)]
+        sigma = float(fit["sigma"][row])
+        is_outlier = np.abs(res) > outlier_sigma * sigma if sigma > 0 else np.zeros(len(res), dtype=bool)
+        residual.loc[idx] = res
+        outlier.loc[idx] = is_outlier
+        inlier_res = res[~is_outlier]
+        scale = float(fit["scale"][row])
+        entry = maps.setdefault(stream_id, {"stream_id": stream_id, "segments": []})
+        entry["segments"].append(
+            {
+                "segment": segment,
+                "t_stream_start": float(gx.min()),
+                "t_stream_end": float(gx.max()),
+                "offset": float(fit["offset"][row]),
+                "scale": scale,
+                "drift_ppm": (scale - 1.0) * 1e6,
+                "n_markers": int(len(gx)),
+                "n_outliers": int(is_outlier.sum()),
+                "residual_sigma": sigma,
+                "residual_rmse": float(np.sqrt(np.mean(inlier_res ** 2))) if len(inlier_res) else None,
+                "residual_max_abs": float(np.abs(res).max()),
+            }
+        )
+
+    for stream_id, entry in maps.items():
+        entry["model"] = "piecewise_linear" if len(entry["segments"]) > 1 else "linear"
+        entry["segments"].sort(key=lambda seg: seg["t_stream_start"])
+
+    table = markers.drop(columns="_segment").assign(residual=residual, outlier=outlier)
+    return maps, table
+
+
+def _timebase_map_document(entry: Dict[str, Any], created_at: str) -> Dict[str, Any]:
+    return {
+        "schema_version": TIMEBASE_MAP_SCHEMA_VERSION,
+        "stream_id": entry["stream_id"],
+        "source_time": "t_stream",
+        "target_time": "t_session",
+        "mapping": "t_session = offset + scale * t_stream",
+        "model": entry["model"],
+        "segments": entry["segments"],
+        "created_at": created_at,
+        "producer": {"tool_ref": "mdivicomtools.sync", "tool_version": core_version()},
+    }
+
+
+def fit_session(
+        session_dir: PathLike,
+        *,
+        piecewise: bool = False,
+        max_gap: Optional[float] = None,
+        outlier_sigma: float = 3.0,
+        dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Fit `derived/sync/sync_markers.tsv` of one session and write the timebase maps and reports.
+
+    Writes `derived/sync/timebase_maps/<stream_id>_timebase_map.json` per stream plus
+    `derived/sync/reports/timebase_fit.json` (summary) and `timebase_fit_residuals.tsv`.
+
+    Returns:
+        Dict[str, Any]: the summary report (also written to disk unless `dry_run`).
+    """
+    session_dir = Path(session_dir)
+    sync_dir = session_dir / "derived" / "sync"
+    markers_path = sync_dir / "sync_markers.tsv"
+    created_at = datetime.now(timezone.utc).isoformat()
+
+    maps, residuals = fit_session_markers(read_sync_markers(markers_path), piecewise=piecewise, max_gap=max_gap, outlier_sigma=outlier_sigma)
+    report = {
+        "session": session_dir.name,
+        "markers": str(markers_path),
+        "created_at": created_at,
+        "piecewise": piecewise,
+        "max_gap": max_gap,
+        "outlier_sigma": outlier_sigma,
+        "streams": {stream_id: {"model": entry["model"], "segments": entry["segments"]} for stream_id, entry in sorted(maps.items())},
+    }
+    if dry_run:
+        return report
+
+    maps_dir = sync_dir / "timebase_maps"
+    reports_dir = sync_dir / "reports"
+    maps_dir.mkdir(parents=True, exist_ok=True)
+    reports_dir.mkdir(parents=True, exist_ok=True)
+    for stream_id, entry in maps.items():
+        path = maps_dir / f"{stream_id}_timebase_map.json"
+        path.write_text(json.dumps(_timebase_map_document(entry, created_at), indent=2, ensure_ascii=False, sort_keys=True) + "\n", encoding="utf-8")
+    residuals.to_csv(reports_dir / "timebase_fit_residuals.tsv", sep="\t", index=False)
+    (reports_dir / "timebase_fit.json").write_text(json.dumps(report, indent=2, ensure_ascii=False, sort_keys=True) + "\n", encoding="utf-8")
+    return report
+
+
+def find_sessions_with_markers(dataset_root: PathLike) -> List[Path]:
+    sessions_dir = Path(dataset_root) / "sessions"
+    return sorted(p.parent.parent.parent for p in sessions_dir.glob("ses-*/derived/sync/sync_markers.tsv"))
+
+
+def _fit_session_job(args: Tuple[str, Dict[str, Any]]) -> Dict[str, Any]:
+    session_dir, kwargs = args
+    try:
+        report = fit_session(session_dir, **kwargs)
+        return {"session_dir": session_dir, "status": "ok", "streams": len(report["streams"])}
+    except Exception as exc:
+        return {"session_dir": session_dir, "status": "error", "error": f"{type(exc).__name__}: {exc}"}
+
+
+def fit_sessions(
+        session_dirs: Iterable[PathLike],
+        *,
+        jobs: int = 1,
+        **fit_kwargs: Any,
+) -> List[Dict[str, Any]]:
+    """
+    Run `fit_session` over many sessions, in parallel worker processes when `jobs > 1`.
+
+    Failures are isolated per session and reported in the returned status list instead of
+    aborting the batch.
+    """
+    work = [(str(p), fit_kwargs) for p in session_dirs]
+    if jobs <= 1 or len(work) <= 1:
+        return [_fit_session_job(item) for item in work]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(_fit_session_job, work, chunksize=max(1, len(work) // (jobs * 4))))
@@ -1,33 +1,74 @@
 # mdivicomtools/utils/__init__.py
 
 # (Recommend renaming logging_utils.py -> logging_utils.py)
-from .logging_utils import setup_logging
+from .logging_utils import setup_logging, setup_queue_logging, stop_queue_logging
+from .events import EventBus, get_event_bus, setup_events, stop_events
 
 from .rename import (
     sanitize_filename,
+    sanitize_filenames,
     get_file_list,
     plan_transformations,
+    replan_transformations,
     check_for_conflicts,
     apply_transformations,
+    apply_plan_delta,
     plan_combine_folder_hierarchies,
     plan_split_folder_hierarchies,
     plan_prepend_foldernames_to_filename,
     build_transformation_map_from_df,
-    plan_complex_file_reorder
+    replan_transformation_map_from_df,
+    plan_complex_file_reorder,
+    replan_complex_file_reorder
     # (Possibly add or remove items as needed)
 )
+from .plan import TransformationPlan
+from .conflicts import ConflictReport, analyze_conflicts
+from .reporting import PlanReportWriter, PlanSummary, summarize_plan
+from .workitems import CopyProgress, EntryResult, copy_plan, expand_entry
+from .replan import PlanChanges, PlanDelta, update_plan
+from .dedupe import DigestCache, DuplicateReport, drop_duplicates_from_plan, find_duplicates, link_duplicates
 
 # Make only these “officially” visible at mdivicomtools.utils
 __all__ = [
     "setup_logging",
+    "setup_queue_logging",
+    "stop_queue_logging",
+    "EventBus",
+    "get_event_bus",
+    "setup_events",
+    "stop_events",
     "sanitize_filename",
+    "sanitize_filenames",
     "get_file_list",
     "plan_transformations",
+    "replan_transformations",
     "check_for_conflicts",
     "apply_transformations",
+    "apply_plan_delta",
     "plan_combine_folder_hierarchies",
     "plan_split_folder_hierarchies",
     "plan_prepend_foldernames_to_filename",
     "build_transformation_map_from_df",
+    "replan_transformation_map_from_df",
     "plan_complex_file_reorder",
+    "replan_complex_file_reorder",
+    "TransformationPlan",
+    "ConflictReport",
+    "analyze_conflicts",
+    "PlanSummary",
+    "PlanReportWriter",
+    "summarize_plan",
+    "CopyProgress",
+    "EntryResult",
+    "copy_plan",
+    "expand_entry",
+    "DigestCache",
+    "DuplicateReport",
+    "find_duplicates",
+    "link_duplicates",
+    "drop_duplicates_from_plan",
+    "PlanChanges",
+    "PlanDelta",
+    "update_plan",
 ]
\ No newline at end of file
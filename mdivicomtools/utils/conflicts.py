@@ -0,0 +1,253 @@
+# mdivicomtools/utils/conflicts.py
+
+import os
+import unicodedata
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from mdivicomtools.utils.plan import PlanLike, TransformationPlan
+
+CONFLICT_CLASSES = (
+    "duplicate_destination",
+    "case_collision",
+    "unicode_normalization_collision",
+    "exists_at_destination",
+    "file_directory_clash",
+)
+
+
+def _fold(name: str) -> str:
+    """Key under which case-insensitive / normalization-insensitive filesystems (SMB, exFAT, APFS) compare names."""
+    return unicodedata.normalize("NFC", name).casefold()
+
+
+def _collision_class(a: str, b: str) -> str:
+    if unicodedata.normalize("NFC", a) == unicodedata.normalize("NFC", b):
+        return "unicode_normalization_collision"
+    return "case_collision"
+
+
+class ConflictReport:
+    """
+    Result of `analyze_conflicts`: per-class conflict counts plus a few sample entries.
+
+    Truthiness reports whether any conflict was found, so it can replace the boolean of
+    `check_for_conflicts` in `if` statements.
+    """
+
+    __slots__ = ("counts", "samples", "entries_checked", "directories_listed", "max_samples")
+
+    def __init__(self, max_samples: int = 10):
+        self.counts: Dict[str, int] = {name: 0 for name in CONFLICT_CLASSES}
+        self.samples: Dict[str, List[Tuple[str, str]]] = {name: [] for name in CONFLICT_CLASSES}
+        self.entries_checked = 0
+        self.directories_listed = 0
+        self.max_samples = max_samples
+
+    def add(self, conflict_class: str, destination: str, other: str) -> None:
+        self.counts[conflict_class] += 1
+        samples = self.samples[conflict_class]
+        if len(samples) < self.max_samples:
+            samples.append((destination, other))
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def __bool__(self) -> bool:
+        return self.total > 0
+
+    def __repr__(self) -> str:
+        found = ", ".join(f"{k}={v}" for k, v in self.counts.items() if v)
+        return f"ConflictReport(entries={self.entries_checked}, {found or 'no conflicts'})"
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "entries_checked": self.entries_checked,
+            "directories_listed": self.directories_listed,
+            "counts": dict(self.counts),
+            "samples": {k: [list(s) for s in v] for k, v in self.samples.items() if v},
+        }
+
+    def summary(self) -> str:
+        lines = [f"Checked {self.entries_checked} planned entries against {self.directories_listed} destination directories."]
+        for name in CONFLICT_CLASSES:
+            count = self.counts[name]
+            if not count:
+                continue
+            lines.append(f"  {name}: {count}")
+            for destination, other in self.samples[name]:
+                lines.append(f"    {destination}  <->  {other}")
+            if count > len(self.samples[name]):
+                lines.append(f"    ... and {count - len(self.samples[name])} more")
+        if not self:
+            lines.append("  no conflicts")
+        return "\n".join(lines)
+
+
+def _iter_entries(transformation_map: PlanLike) -> Iterator[Tuple[str, str, str]]:
+    """Yield `(src, dst_dir, dst_name)` strings for every plan entry."""
+    if isinstance(transformation_map, TransformationPlan):
+        for src, dst in transformation_map.iter_rows():
+            dst_dir, dst_name = os.path.split(dst)
+            yield src, dst_dir, dst_name
+    else:
+        for src, dst in transformation_map.items():
+            dst_dir, dst_name = os.path.split(os.fspath(dst))
+            yield os.fspath(src), dst_dir, dst_name
+
+
+class _DestinationIndex:
+    """Lazily lists each destination directory once and answers existence/fold lookups from memory."""
+
+    def __init__(self):
+        self._listings: Dict[str, Optional[Tuple[Dict[str, bool], Dict[str, str]]]] = {}
+        self._file_ancestor: Dict[str, Optional[str]] = {}
+
+    def listing(self, directory: str) -> Optional[Tuple[Dict[str, bool], Dict[str, str]]]:
+        if directory in self._listings:
+            return self._listings[directory]
+        try:
+            with os.scandir(directory or ".") as it:
+                names: Dict[str, bool] = {}
+                for entry in it:
+                    try:
+                        names[entry.name] = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        names[entry.name] = False
+            listing: Optional[Tuple[Dict[str, bool], Dict[str, str]]] = (names, {_fold(n): n for n in names})
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            listing = None
+        self._listings[directory] = listing
+        return listing
+
+    @property
+    def directories_listed(self) -> int:
+        return sum(1 for v in self._listings.values() if v is not None)
+
+    def file_ancestor(self, directory: str) -> Optional[str]:
+        """Return an existing non-directory on the path to `directory` (which would block creating it)."""
+        if directory in self._file_ancestor:
+            return self._file_ancestor[directory]
+        result: Optional[str] = None
+        if directory and not os.path.isdir(directory):
+            if os.path.lexists(directory):
+                result = directory
+            else:
+                parent = os.path.dirname(directory)
+                result = self.file_ancestor(parent) if parent != directory else None
+        self._file_ancestor[directory] = result
+        return result
+
+
+def _planned_directories(dst_dirs: List[str]) -> Dict[str, str]:
+    """All directories (including ancestors) that the plan needs to exist, normcased -> original."""
+    planned: Dict[str, str] = {}
+    for directory in dst_dirs:
+        while directory:
+            key = os.path.normcase(directory)
+            if key in planned:
+                break
+            planned[key] = directory
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                break
+            directory = parent
+    return planned
+
+
+def analyze_conflicts(
+        transformation_map: PlanLike,
+        *,
+        check_existing: bool = True,
+        allow_existing: bool = False,
+        case_insensitive_target: bool = True,
+        max_samples: int = 10,
+) -> ConflictReport:
+    """
+    Check a whole plan for every class of destination conflict in one hashed pass.
+
+    Conflict classes:
+        - duplicate_destination: two sources map to the same destination.
+        - case_collision / unicode_normalization_collision: destinations (or a destination and an
+          existing entry) that differ only by case or Unicode normalization, which collide on
+          case-insensitive targets such as SMB shares or exFAT.
+        - exists_at_destination: the destination already exists (directories planned onto an
+          existing directory are merged by the copy and are counted here as well).
+        - file_directory_clash: a planned file sits where another entry needs a directory, a file
+          would replace an existing directory, or an existing file blocks a destination directory.
+
+    Each destination directory is listed at most once, so the existing tree is indexed only
+    where the plan writes.
+
+    Args:
+        transformation_map (PlanLike): A TransformationPlan or dictionary of old_path -> new_path.
+        check_existing (bool): If False, only check the plan against itself (no filesystem access).
+        allow_existing (bool): If True, do not report exists_at_destination (the copy overwrites existing
+            files and merges into existing directories); file/directory clashes are still reported.
+        case_insensitive_target (bool): If False, the target compares names exactly (e.g. ext4), so
+            case and Unicode-normalization collisions are not reported.
+        max_samples (int): Number of sample entries kept per conflict class.
+
+    Returns:
+        ConflictReport: counts and samples per conflict class; falsy if there are no conflicts.
+    """
+    report = ConflictReport(max_samples=max_samples)
+    if isinstance(transformation_map, TransformationPlan):
+        dst_dirs = transformation_map.destination_directories()
+    else:
+        dst_dirs = list({os.path.dirname(os.fspath(d)) for d in transformation_map.values()})
+    planned_dirs = _planned_directories(dst_dirs)
+    index = _DestinationIndex() if check_existing else None
+
+    seen: Dict[str, str] = {}
+    seen_fold: Dict[str, str] = {}
+    fold_dirs: Dict[str, str] = {}
+    for src, dst_dir, dst_name in _iter_entries(transformation_map):
+        report.entries_checked += 1
+        dst = os.path.join(dst_dir, dst_name)
+        key = os.path.normcase(dst)
+
+        other = seen.get(key)
+        if other is not None:
+            report.add("duplicate_destination", dst, src)
+            continue
+        seen[key] = src
+
+        if case_insensitive_target:
+            folded_dir = fold_dirs.get(dst_dir)
+            if folded_dir is None:
+                folded_dir = fold_dirs[dst_dir] = _fold(dst_dir)
+            fold_key = folded_dir + "\0" + _fold(dst_name)
+            other = seen_fold.get(fold_key)
+            if other is not None:
+                report.add(_collision_class(dst, other), dst, other)
+            else:
+                seen_fold[fold_key] = dst
+
+        if key in planned_dirs and not os.path.isdir(src):
+            report.add("file_directory_clash", dst, "planned as a directory by another entry")
+
+        if index is None:
+            continue
+        blocker = index.file_ancestor(dst_dir)
+        if blocker is not None:
+            report.add("file_directory_clash", dst, f"existing file {blocker}")
+            continue
+        listing = index.listing(dst_dir)
+        if listing is None:
+            continue
+        names, folded_names = listing
+        if dst_name in names:
+            if names[dst_name] and not os.path.isdir(src):
+                report.add("file_directory_clash", dst, "existing directory")
+            elif not allow_existing:
+                report.add("exists_at_destination", dst, src)
+        elif case_insensitive_target:
+            existing = folded_names.get(_fold(dst_name))
+            if existing is not None:
+                existing_path = os.path.join(dst_dir, existing)
+                report.add(_collision_class(dst, existing_path), dst, f"existing {existing_path}")
+
+    if index is not None:
+        report.directories_listed = index.directories_listed
+    return report
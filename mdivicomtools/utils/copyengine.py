@@ -0,0 +1,158 @@
+# mdivicomtools/utils/copyengine.py
+
+import errno
+import os
+import shutil
+import sys
+from typing import Optional, Union
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+# Chunk size for the read/write fallback and for each in-kernel copy call.
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+# Files at least this large get posix_fadvise hints; for small files the extra syscalls cost more than they save.
+FADVISE_MIN_SIZE = 64 * 1024 * 1024
+# While copying large files, source pages already copied are dropped from the page cache in windows of this size.
+FADVISE_WINDOW = 256 * 1024 * 1024
+
+# errnos meaning "this copy method is not available for this pair of files" (fall back to the next method)
+_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EBADF, errno.EPERM}
+
+_HAVE_COPY_FILE_RANGE = hasattr(os, "copy_file_range")
+# sendfile() to a regular file is Linux-only
+_HAVE_SENDFILE = hasattr(os, "sendfile") and sys.platform.startswith("linux")
+_HAVE_FADVISE = hasattr(os, "posix_fadvise")
+
+
+def _fadvise(fd: int, offset: int, length: int, advice_name: str) -> None:
+    if not _HAVE_FADVISE:
+        return
+    try:
+        os.posix_fadvise(fd, offset, length, getattr(os, advice_name))
+    except OSError:
+        pass
+
+
+def _copy_in_kernel(method: str, src_fd: int, dst_fd: int, size: int, chunk_size: int, advise: bool) -> int:
+    """Copy with `copy_file_range` or `sendfile` (explicit offsets); returns bytes copied."""
+    offset = 0
+    dropped = 0
+    while offset < size:
+        if method == "sendfile":
+            n = os.sendfile(dst_fd, src_fd, offset, min(chunk_size, size - offset))
+        else:
+            n = os.copy_file_range(src_fd, dst_fd, min(chunk_size, size - offset), offset, offset)
+        if n == 0:
+            if offset == 0:
+                # some filesystems (e.g. procfs/sysfs, older cross-device kernels) report 0 instead of an error
+                raise OSError(errno.EXDEV, f"{method} made no progress")
+            break  # source shrank while copying
+        offset += n
+        if advise and offset - dropped >= FADVISE_WINDOW:
+            _fadvise(src_fd, dropped, offset - dropped, "POSIX_FADV_DONTNEED")
+            dropped = offset
+    return offset
+
+
+def _copy_chunked(fsrc, dst_fd: int, chunk_size: int, advise: bool) -> int:
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    total = 0
+    dropped = 0
+    while True:
+        n = fsrc.readinto(buf)
+        if not n:
+            break
+        written = 0
+        while written < n:
+            written += os.write(dst_fd, view[written:n])
+        total += n
+        if advise and total - dropped >= FADVISE_WINDOW:
+            _fadvise(fsrc.fileno(), dropped, total - dropped, "POSIX_FADV_DONTNEED")
+            dropped = total
+    return total
+
+
+def copy_file(
+        src: PathLike,
+        dst: PathLike,
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        fadvise: bool = True,
+        copy_metadata: bool = True,
+) -> int:
+    """
+    Copy a regular file like `shutil.copy2`, using in-kernel copies where the platform allows it.
+
+    Order of attempts: `os.copy_file_range` (Linux; may reflink or do a server-side copy on
+    Btrfs/XFS/NFS 4.2), `os.sendfile`, then a read/write loop with `chunk_size` buffers. For large
+    files, `posix_fadvise` announces sequential access and drops already-copied source pages, so a
+    multi-GB copy does not fill the page cache with source data. Symlinks are followed.
+
+    Args:
+        src (PathLike): Source file.
+        dst (PathLike): Destination file path (not a directory).
+        chunk_size (int): Bytes per copy call / buffer size of the fallback loop.
+        fadvise (bool): Whether to give page-cache hints for files of at least FADVISE_MIN_SIZE bytes.
+        copy_metadata (bool): Copy permission bits, timestamps and flags like `shutil.copystat` (as `copy2` does).
+
+    Returns:
+        int: Number of bytes copied.
+    """
+    global _HAVE_COPY_FILE_RANGE, _HAVE_SENDFILE
+    with open(src, "rb", buffering=0) as fsrc:
+        src_fd = fsrc.fileno()
+        src_st = os.fstat(src_fd)
+        size = src_st.st_size
+        # opening dst with "wb" would truncate src when both name the same file (like shutil.copyfile)
+        try:
+            dst_st = os.stat(dst)
+        except OSError:
+            pass
+        else:
+            if (dst_st.st_dev, dst_st.st_ino) == (src_st.st_dev, src_st.st_ino):
+                raise shutil.SameFileError(f"{os.fspath(src)!r} and {os.fspath(dst)!r} are the same file")
+        advise = fadvise and size >= FADVISE_MIN_SIZE
+        if advise:
+            _fadvise(src_fd, 0, 0, "POSIX_FADV_SEQUENTIAL")
+        with open(dst, "wb", buffering=0) as fdst:
+            dst_fd = fdst.fileno()
+            copied: Optional[int] = None
+            for name in ("copy_file_range", "sendfile"):
+                if size == 0 or (name == "copy_file_range" and not _HAVE_COPY_FILE_RANGE) or (name == "sendfile" and not _HAVE_SENDFILE):
+                    continue
+                try:
+                    copied = _copy_in_kernel(name, src_fd, dst_fd, size, chunk_size, advise)
+                    break
+                except OSError as exc:
+                    if exc.errno not in _UNSUPPORTED:
+                        raise
+                    if exc.errno == errno.ENOSYS:
+                        # not implemented by this kernel: do not try again for later files
+                        if name == "copy_file_range":
+                            _HAVE_COPY_FILE_RANGE = False
+                        else:
+                            _HAVE_SENDFILE = False
+                    # these errors are raised before any data is transferred; rewind both files and restart with the next method
+                    os.lseek(src_fd, 0, os.SEEK_SET)
+                    os.ftruncate(dst_fd, 0)
+                    os.lseek(dst_fd, 0, os.SEEK_SET)
+            if copied is None:
+                copied = _copy_chunked(fsrc, dst_fd, chunk_size, advise)
+            if copied < size:
+                raise OSError(errno.EIO, f"Short copy: {copied} of {size} bytes", os.fspath(src))
+            # no DONTNEED on the destination: on dirty pages it forces synchronous writeback and
+            # roughly halves throughput; the kernel writes them back and reclaims them normally
+        if advise:
+            _fadvise(src_fd, 0, 0, "POSIX_FADV_DONTNEED")
+    if copy_metadata:
+        shutil.copystat(src, dst)
+    return copied
+
+
+def copy_file2(src: PathLike, dst: PathLike) -> str:
+    """`shutil.copy2`-compatible signature (usable as `copy_function` for `shutil.copytree`)."""
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+    copy_file(src, dst)
+    return os.fspath(dst)
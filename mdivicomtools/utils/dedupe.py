@@ -0,0 +1,483 @@
+# mdivicomtools/utils/dedupe.py
+
+import hashlib
+import json
+import os
+import secrets
+import shutil
+import stat
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from mdivicomtools.utils.plan import PlanLike, TransformationPlan
+
+PathLike = Union[str, Path]
+
+DEFAULT_JOBS = 4
+# bytes hashed at each end of a file in the partial-hash stage
+DEFAULT_EDGE_SIZE = 64 * 1024
+_READ_CHUNK = 1024 * 1024
+CACHE_FORMAT = "mdivicomtools-digests/0.1"
+DEFAULT_CACHE_PATH = Path(".mdivicom") / "digests.json"
+LINK_MODES = ("hardlink", "reflink")
+# linux/fs.h: _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+
+
+class DigestCache:
+    """
+    Persisted file digests keyed by absolute path and validated by size, mtime and inode.
+
+    Both the partial (first/last block) and the full digest are stored, so a later run only
+    reads files that changed since they were hashed. Thread-safe; `save()` writes atomically
+    and only when something changed.
+    """
+
+    __slots__ = ("path", "algorithm", "edge_size", "_entries", "_lock", "_dirty", "hits")
+
+    def __init__(self, path: Optional[PathLike] = None, algorithm: str = "sha256", edge_size: int = DEFAULT_EDGE_SIZE):
+        hashlib.new(algorithm)  # fail early on unknown algorithms
+        self.path = Path(path) if path is not None else None
+        self.algorithm = algorithm
+        self.edge_size = edge_size
+        self._entries: Dict[str, List[Any]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.hits = 0
+        if self.path is not None:
+            self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if (
+                isinstance(data, dict)
+                and data.get("format") == CACHE_FORMAT
+                and data.get("algorithm") == self.algorithm
+                and data.get("edge_size") == self.edge_size
+        ):
+            self._entries = data.get("entries", {})
+
+    def get(self, path: str, st: os.stat_result, kind: str) -> Optional[str]:
+        """Cached `"partial"` or `"full"` digest of `path` if the file is unchanged, else None."""
+        entry = self._entries.get(path)
+        if entry is None or entry[:3] != [st.st_size, st.st_mtime_ns, st.st_ino]:
+            return None
+        digest = entry[3] if kind == "partial" else entry[4]
+        if digest is not None:
+            with self._lock:
+                self.hits += 1
+        return digest
+
+    def put(self, path: str, st: os.stat_result, kind: str, digest: str) -> None:
+        key = [st.st_size, st.st_mtime_ns, st.st_ino]
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[:3] != key:
+                entry = key + [None, None]
+                self._entries[path] = entry
+            entry[3 if kind == "partial" else 4] = digest
+            self._dirty = True
+
+    def prune(self) -> int:
+        """Drop entries of files that no longer exist; returns the number removed."""
+        with self._lock:
+            missing = [p for p in self._entries if not os.path.exists(p)]
+            for p in missing:
+                del self._entries[p]
+            self._dirty = self._dirty or bool(missing)
+        return len(missing)
+
+    def save(self) -> None:
+        if self.path is None or not self._dirty:
+            return
+        payload = {"format": CACHE_FORMAT, "algorithm": self.algorithm, "edge_size": self.edge_size, "entries": self._entries}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f".{self.path.name}.{secrets.token_hex(4)}.tmp")
+            tmp.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            # a read-only location only loses the cache, not the result
+            return
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DuplicateSet:
+    """
+    Files with identical content. `paths[0]` is the copy that is kept by `link_duplicates`
+    and `drop_duplicates_from_plan` (the shortest path, then alphabetical).
+
+    `paths` holds one path per inode; other names of the same inode (existing hardlinks) are
+    listed in `links` under that path and are handled together with it.
+    """
+
+    __slots__ = ("size", "digest", "paths", "links")
+
+    def __init__(self, size: int, digest: str, paths: List[str], links: Optional[Dict[str, List[str]]] = None):
+        self.size = size
+        self.digest = digest
+        self.paths = sorted(paths, key=_path_order)
+        self.links: Dict[str, List[str]] = {p: a for p, a in (links or {}).items() if a}
+
+    @property
+    def keep(self) -> str:
+        return self.paths[0]
+
+    @property
+    def duplicates(self) -> List[str]:
+        return self.paths[1:]
+
+    def names(self, path: str) -> List[str]:
+        """`path` plus the other names of its inode."""
+        return [path] + self.links.get(path, [])
+
+    @property
+    def wasted_bytes(self) -> int:
+        return self.size * (len(self.paths) - 1)
+
+    def __repr__(self) -> str:
+        return f"DuplicateSet({len(self.paths)} x {self.size} bytes, {self.digest[:12]})"
+
+
+class DuplicateReport:
+    """
+    Result of `find_duplicates`: duplicate sets (largest waste first) plus per-stage counters.
+
+    Truthiness reports whether any duplicates were found. Files that are already hardlinks of each
+    other are not reported as duplicates (they use no extra space); they are counted in `already_linked`.
+    """
+
+    __slots__ = ("sets", "stats", "max_samples")
+
+    def __init__(self, max_samples: int = 10):
+        self.sets: List[DuplicateSet] = []
+        self.stats: Dict[str, int] = {
+            "files_scanned": 0,
+            "bytes_scanned": 0,
+            "already_linked": 0,
+            "size_candidates": 0,
+            "partial_hashed": 0,
+            "full_hashed": 0,
+            "cache_hits": 0,
+        }
+        self.max_samples = max_samples
+
+    @property
+    def duplicate_files(self) -> int:
+        return sum(len(s.paths) - 1 for s in self.sets)
+
+    @property
+    def wasted_bytes(self) -> int:
+        return sum(s.wasted_bytes for s in self.sets)
+
+    def __bool__(self) -> bool:
+        return bool(self.sets)
+
+    def __repr__(self) -> str:
+        return f"DuplicateReport(sets={len(self.sets)}, duplicate_files={self.duplicate_files}, wasted_bytes={self.wasted_bytes})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "stats": dict(self.stats),
+            "duplicate_sets": len(self.sets),
+            "duplicate_files": self.duplicate_files,
+            "wasted_bytes": self.wasted_bytes,
+            "sets": [{"size": s.size, "digest": s.digest, "keep": s.keep, "duplicates": s.duplicates, "links": s.links} for s in self.sets],
+        }
+
+    def summary(self) -> str:
+        stats = self.stats
+        lines = [
+            f"Scanned {stats['files_scanned']} files ({stats['bytes_scanned']} bytes): {stats['size_candidates']} share a size, "
+            f"{stats['partial_hashed']} partial and {stats['full_hashed']} full hashes computed ({stats['cache_hits']} cached).",
+        ]
+        if not self:
+            lines.append("  no duplicates")
+            return "\n".join(lines)
+        lines.append(f"  {len(self.sets)} duplicate sets, {self.duplicate_files} redundant files, {self.wasted_bytes} bytes reclaimable")
+        for s in self.sets[: self.max_samples]:
+            lines.append(f"    {s.wasted_bytes:>14}  {s.keep}  (+{len(s.duplicates)}: {', '.join(s.duplicates[:3])}{' ...' if len(s.duplicates) > 3 else ''})")
+        if len(self.sets) > self.max_samples:
+            lines.append(f"    ... and {len(self.sets) - self.max_samples} more sets")
+        return "\n".join(lines)
+
+
+def _path_order(path: str) -> Tuple[int, str]:
+    return len(path), path
+
+
+def _iter_files(paths: Iterable[PathLike]) -> Iterator[Tuple[str, os.stat_result]]:
+    """Regular files (not symlinks) at or below `paths`, with their stat; hidden directories are skipped."""
+    stack: List[str] = []
+    for path in paths:
+        path = os.path.abspath(os.fspath(path))
+        try:
+            st = os.lstat(path)
+        except FileNotFoundError:
+            continue
+        if stat.S_ISREG(st.st_mode):
+            yield path, st
+        elif stat.S_ISDIR(st.st_mode):
+            stack.append(path)
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if not entry.name.startswith("."):
+                    stack.append(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry.path, entry.stat(follow_symlinks=False)
+
+
+def _partial_digest(path: str, size: int, algorithm: str, edge_size: int) -> str:
+    hasher = hashlib.new(algorithm)
+    hasher.update(size.to_bytes(8, "little"))
+    with open(path, "rb") as fh:
+        hasher.update(fh.read(edge_size))
+        if size > edge_size:
+            fh.seek(max(edge_size, size - edge_size))
+            hasher.update(fh.read(edge_size))
+    return hasher.hexdigest()
+
+
+def _full_digest(path: str, algorithm: str) -> str:
+    hasher = hashlib.new(algorithm)
+    with open(path, "rb", buffering=0) as fh:
+        if hasattr(os, "posix_fadvise"):
+            try:
+                os.posix_fadvise(fh.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            except OSError:
+                pass
+        while True:
+            chunk = fh.read(_READ_CHUNK)
+            if not chunk:
+                break
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def find_duplicates(
+        paths: Iterable[PathLike],
+        *,
+        min_size: int = 1,
+        jobs: int = DEFAULT_JOBS,
+        cache: Optional[DigestCache] = None,
+        algorithm: str = "sha256",
+        edge_size: int = DEFAULT_EDGE_SIZE,
+        max_samples: int = 10,
+) -> DuplicateReport:
+    """
+    Find files with identical content below `paths` (directories are walked, files taken as is).
+
+    Stages, each only for the survivors of the previous one:
+    1. group by size (one `stat` per file from the directory walk; hardlinks of one inode count once)
+    2. digest of the size plus the first and last `edge_size` bytes
+    3. full streaming digest (skipped when stage 2 already covered the whole file)
+
+    Stages 2 and 3 run on `jobs` threads (hashlib releases the GIL). With a `DigestCache`,
+    unchanged files are not read again; the cache is saved before returning.
+
+    Args:
+        paths (Iterable[PathLike]): Directories and/or files to compare.
+        min_size (int): Ignore files smaller than this many bytes (empty files are never reported).
+        jobs (int): Hashing threads.
+        cache (Optional[DigestCache]): Digest cache to read and update; its algorithm and edge size win.
+        algorithm (str): hashlib algorithm when no cache is given.
+        edge_size (int): Bytes hashed at each end of a file in stage 2 when no cache is given.
+        max_samples (int): Sets listed by `DuplicateReport.summary()`.
+
+    Returns:
+        DuplicateReport: Duplicate sets and stage counters.
+    """
+    if cache is not None:
+        algorithm, edge_size = cache.algorithm, cache.edge_size
+    report = DuplicateReport(max_samples=max_samples)
+    stats = report.stats
+    hits_before = cache.hits if cache is not None else 0
+
+    by_inode: Dict[Tuple[int, int], List[Tuple[str, os.stat_result]]] = {}
+    for path, st in _iter_files(paths):
+        stats["files_scanned"] += 1
+        stats["bytes_scanned"] += st.st_size
+        if st.st_size < max(1, min_size):
+            continue
+        by_inode.setdefault((st.st_dev, st.st_ino), []).append((path, st))
+    # one representative (the first name in keep order) per inode; the other names are existing hardlinks
+    by_size: Dict[int, List[Tuple[str, os.stat_result]]] = {}
+    aliases: Dict[str, List[str]] = {}
+    for names in by_inode.values():
+        names.sort(key=lambda item: _path_order(item[0]))
+        if len(names) > 1:
+            stats["already_linked"] += len(names) - 1
+            aliases[names[0][0]] = [p for p, _ in names[1:]]
+        by_size.setdefault(names[0][1].st_size, []).append(names[0])
+    del by_inode
+    candidates = [group for group in by_size.values() if len(group) > 1]
+    stats["size_candidates"] = sum(len(g) for g in candidates)
+
+    def digest(item: Tuple[str, os.stat_result], kind: str) -> Tuple[str, os.stat_result, Optional[str]]:
+        path, st = item
+        if cache is not None:
+            cached = cache.get(path, st, kind)
+            if cached is not None:
+                return path, st, cached
+        try:
+            if kind == "partial":
+                value = _partial_digest(path, st.st_size, algorithm, edge_size)
+            else:
+                value = _full_digest(path, algorithm)
+        except OSError:
+            return path, st, None  # vanished or unreadable: not a duplicate candidate
+        with lock:
+            stats[f"{kind}_hashed"] += 1
+        if cache is not None:
+            cache.put(path, st, kind, value)
+        return path, st, value
+
+    lock = threading.Lock()
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        partial_groups: Dict[Tuple[int, str], List[Tuple[str, os.stat_result]]] = {}
+        items = [item for group in candidates for item in group]
+        for path, st, value in pool.map(lambda item: digest(item, "partial"), items):
+            if value is not None:
+                partial_groups.setdefault((st.st_size, value), []).append((path, st))
+
+        full_groups: Dict[Tuple[int, str], List[str]] = {}
+        needs_full: List[Tuple[str, os.stat_result]] = []
+        for (size, value), group in partial_groups.items():
+            if len(group) < 2:
+                continue
+            if size <= 2 * edge_size:
+                # the partial digest already covered every byte
+                full_groups[(size, value)] = [p for p, _ in group]
+            else:
+                needs_full.extend(group)
+        for path, st, value in pool.map(lambda item: digest(item, "full"), needs_full):
+            if value is not None:
+                full_groups.setdefault((st.st_size, value), []).append(path)
+
+    report.sets = [
+        DuplicateSet(size, value, group, {p: aliases[p] for p in group if p in aliases})
+        for (size, value), group in full_groups.items()
+        if len(group) > 1
+    ]
+    report.sets.sort(key=lambda s: (-s.wasted_bytes, s.keep))
+    if cache is not None:
+        stats["cache_hits"] = cache.hits - hits_before
+        cache.save()
+    return report
+
+
+def _reflink(src: str, dst: str) -> None:
+    """Create `dst` as a copy-on-write clone of `src` (FICLONE; btrfs, XFS, bcachefs, ...)."""
+    if not sys.platform.startswith("linux"):
+        raise OSError(f"reflinks are not supported on {sys.platform}")
+    import fcntl
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+
+
+def _replace_with_link(keep: str, path: str, mode: str) -> None:
+    directory, name = os.path.split(path)
+    tmp = os.path.join(directory, f".{name}.{secrets.token_hex(4)}.tmp")
+    try:
+        if mode == "hardlink":
+            os.link(keep, tmp)
+        else:
+            _reflink(keep, tmp)
+            shutil.copystat(path, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.lexists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def link_duplicates(report: DuplicateReport, mode: str = "hardlink", dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Replace every duplicate (and its other hardlinked names) with a hardlink to, or a reflink of,
+    the kept copy of its set.
+
+    Sizes of both files are re-checked right before linking, and each duplicate is replaced via a
+    temporary name plus rename, so a failure leaves the original in place. Reflinked files keep their
+    own permissions and timestamps; hardlinked files share those of the kept copy.
+
+    Args:
+        report (DuplicateReport): Result of `find_duplicates`.
+        mode (str): `"hardlink"` or `"reflink"`.
+        dry_run (bool): Only count what would be linked.
+
+    Returns:
+        Dict[str, Any]: `linked`, `bytes_reclaimed`, `failed` (path -> error).
+    """
+    if mode not in LINK_MODES:
+        raise ValueError(f"Unknown link mode {mode!r}; expected one of {', '.join(LINK_MODES)}")
+    result: Dict[str, Any] = {"mode": mode, "dry_run": dry_run, "linked": 0, "bytes_reclaimed": 0, "failed": {}}
+    for dup_set in report.sets:
+        keep = dup_set.keep
+        for duplicate in dup_set.duplicates:
+            for path in dup_set.names(duplicate):
+                try:
+                    if os.path.getsize(keep) != dup_set.size or os.path.getsize(path) != dup_set.size:
+                        raise OSError("file changed since it was scanned")
+                    if not dry_run:
+                        _replace_with_link(keep, path, mode)
+                except OSError as exc:
+                    result["failed"][path] = f"{type(exc).__name__}: {exc}"
+                    continue
+                result["linked"] += 1
+            if not any(p in result["failed"] for p in dup_set.names(duplicate)):
+                result["bytes_reclaimed"] += dup_set.size
+    return result
+
+
+def drop_duplicates_from_plan(
+        transformation_map: PlanLike,
+        report: DuplicateReport,
+) -> Tuple[TransformationPlan, Dict[str, str]]:
+    """
+    Remove plan entries whose source duplicates another planned source, so each content is copied once.
+
+    Within every duplicate set, the first planned member (in `DuplicateSet.paths` order) is kept;
+    existing hardlinks of one file count as duplicates too, since copying breaks the link anyway.
+    Directory entries and sources outside the report are left as they are.
+
+    Args:
+        transformation_map (PlanLike): A `TransformationPlan` or `Dict[Path, Path]`.
+        report (DuplicateReport): Result of `find_duplicates` over (at least) the plan sources.
+
+    Returns:
+        Tuple[TransformationPlan, Dict[str, str]]: The reduced plan and `{dropped source: kept source}`.
+    """
+    if isinstance(transformation_map, TransformationPlan):
+        rows = list(transformation_map.iter_rows())
+        meta = transformation_map.meta
+    else:
+        rows = [(os.fspath(s), os.fspath(d)) for s, d in transformation_map.items()]
+        meta = {}
+    planned = {os.path.abspath(src) for src, _ in rows}
+    dropped: Dict[str, str] = {}
+    for dup_set in report.sets:
+        members = [name for p in dup_set.paths for name in dup_set.names(p) if name in planned]
+        for path in members[1:]:
+            dropped[path] = members[0]
+    plan = TransformationPlan(meta=meta)
+    for src, dst in rows:
+        if os.path.abspath(src) not in dropped:
+            plan.append(src, dst)
+    return plan, dropped
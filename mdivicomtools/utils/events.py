@@ -0,0 +1,192 @@
+# mdivicomtools/utils/events.py
+
+import atexit
+import contextlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+EVENT_SCHEMA = "mdivicomtools-events/0.1"
+# Throttled events of one type are delivered at most this often (seconds) by default.
+DEFAULT_MIN_INTERVAL = 1.0
+
+Event = Dict[str, Any]
+Sink = Callable[[Event], None]
+
+
+class JsonlSink:
+    """
+    Append events as JSON lines to a file (one write + flush per event, so `tail -f` sees them promptly).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fh = open(path, "a", encoding="utf-8")
+
+    def __call__(self, event: Event) -> None:
+        self._fh.write(json.dumps(event, ensure_ascii=False, sort_keys=True, separators=(",", ":")) + "\n")
+        self._fh.flush()
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+class UnixSocketSink:
+    """
+    Send each event as one JSON datagram to a local Unix socket (e.g. a dashboard collector).
+
+    The socket is non-blocking and connectionless: if nobody is listening, or the listener is too
+    slow, events are dropped (and counted in `dropped`) instead of stalling the instrumented code.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.dropped = 0
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+
+    def __call__(self, event: Event) -> None:
+        data = json.dumps(event, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        try:
+            self._sock.sendto(data, self.path)
+        except (BlockingIOError, ConnectionRefusedError, FileNotFoundError):
+            self.dropped += 1
+
+    def close(self) -> None:
+        self._sock.close()
+
+
+class EventBus:
+    """
+    Lightweight structured event stream (plan/copy progress, run lifecycle, stage timings).
+
+    Sinks are callables receiving one event dict: `JsonlSink`, `UnixSocketSink` or any function.
+    Every event carries `event` (type), `ts` (UNIX time), `seq`, `pid` and the bus `context` fields.
+
+    Progress-style events are sent with `throttle=True`: per event type, at most one is delivered
+    every `min_interval` seconds and the rest are dropped before any formatting happens, so
+    instrumenting a per-file loop costs one clock read per call. Lifecycle events (`throttle=False`)
+    are always delivered. With no sinks attached, `emit` returns immediately.
+    """
+
+    def __init__(self, sinks: Optional[List[Sink]] = None, *, min_interval: float = DEFAULT_MIN_INTERVAL, context: Optional[Dict[str, Any]] = None):
+        self.sinks: List[Sink] = list(sinks or [])
+        self.min_interval = min_interval
+        self.context: Dict[str, Any] = dict(context or {})
+        self.throttled = 0
+        self.sink_errors = 0
+        self._seq = 0
+        self._next_due: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return bool(self.sinks)
+
+    def add_sink(self, sink: Sink) -> None:
+        with self._lock:
+            self.sinks.append(sink)
+
+    def remove_sink(self, sink: Sink) -> None:
+        with self._lock:
+            self.sinks.remove(sink)
+
+    def emit(self, event_type: str, *, throttle: bool = False, **fields: Any) -> bool:
+        """Deliver one event to all sinks; returns False if it was throttled (or there are no sinks)."""
+        if not self.sinks:
+            return False
+        if throttle:
+            now = time.monotonic()
+            if now < self._next_due.get(event_type, 0.0):
+                self.throttled += 1
+                return False
+            self._next_due[event_type] = now + self.min_interval
+        with self._lock:
+            self._seq += 1
+            event: Event = {"event": event_type, "ts": time.time(), "seq": self._seq, "pid": os.getpid()}
+            event.update(self.context)
+            event.update(fields)
+            for sink in self.sinks:
+                try:
+                    sink(event)
+                except Exception:
+                    # a broken dashboard must not break a copy or a run; report the first failure only
+                    self.sink_errors += 1
+                    if self.sink_errors == 1:
+                        logger.warning("Event sink %r failed; further sink errors are counted silently", sink, exc_info=True)
+        return True
+
+    @contextlib.contextmanager
+    def stage(self, name: str, **fields: Any) -> Iterator[None]:
+        """Time a block and emit `stage.finished` with `stage`, `seconds` and `ok` (also if it raises)."""
+        started = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.emit("stage.finished", stage=name, seconds=time.perf_counter() - started, ok=ok, **fields)
+
+    def close(self) -> None:
+        with self._lock:
+            sinks, self.sinks = self.sinks, []
+        for sink in sinks:
+            close = getattr(sink, "close", None)
+            if callable(close):
+                close()
+
+
+_default_bus = EventBus()
+
+
+def get_event_bus() -> EventBus:
+    """The process-wide bus used by instrumented core code (no sinks until `setup_events` adds some)."""
+    return _default_bus
+
+
+def setup_events(
+        jsonl_path: Optional[str] = None,
+        socket_path: Optional[str] = None,
+        callback: Optional[Sink] = None,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        **context: Any,
+) -> EventBus:
+    """
+    Attach sinks to the process-wide event bus.
+
+    Args:
+        jsonl_path (Optional[str]): Append events to this JSON lines file.
+        socket_path (Optional[str]): Send events as datagrams to this Unix socket.
+        callback (Optional[Callable]): Call this function with every event dict.
+        min_interval (float): Minimum seconds between two throttled events of the same type.
+        **context: Fields added to every event (e.g. `job="nightly-copy"`).
+
+    Returns:
+        EventBus: The configured process-wide bus.
+    """
+    bus = _default_bus
+    bus.min_interval = min_interval
+    bus.context.update(context)
+    if jsonl_path:
+        bus.add_sink(JsonlSink(jsonl_path))
+    if socket_path:
+        bus.add_sink(UnixSocketSink(socket_path))
+    if callback is not None:
+        bus.add_sink(callback)
+    bus.emit("events.started", schema=EVENT_SCHEMA)
+    return bus
+
+
+def stop_events() -> None:
+    """Detach and close all sinks of the process-wide bus."""
+    _default_bus.close()
+    _default_bus.context.clear()
+
+
+atexit.register(stop_events)
@@ -1,8 +1,15 @@
 # mdivicomtools/utils/logging_utils.py
 
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
 from logging.config import dictConfig
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 
 # Some useful “preset” logging configurations for quick use
 PRESET_CONFIGS = {
@@ -95,7 +102,8 @@ def setup_logging(
     Args:
         level (int): Fallback logging level if neither preset nor dict_config_override is used.
         format_string (str): Fallback logging format string for basicConfig.
-        preset (str, optional): Key of a PRESET_CONFIGS dictionary for a quick, pre-built config.
+        preset (str, optional): Key of a PRESET_CONFIGS dictionary for a quick, pre-built config, or of
+            QUEUE_PRESETS for non-blocking logging through a background listener (see setup_queue_logging).
         dict_config_override (Dict, optional): A full logging config dict to override any other settings.
         date_format (str, optional): Date format for the fallback basicConfig approach.
     """
@@ -104,6 +112,11 @@ def setup_logging(
         dictConfig(dict_config_override)
         return
 
+    if preset and preset in QUEUE_PRESETS:
+        # Non-blocking variants are built programmatically (dictConfig only learned about QueueListener in Python 3.12)
+        setup_queue_logging(preset=preset, level=level, format_string=format_string)
+        return
+
     if preset and preset in PRESET_CONFIGS:
         # Second priority: use one of our preset configs
         dictConfig(PRESET_CONFIGS[preset])
@@ -114,4 +127,206 @@ def setup_logging(
         level=level,
         format=format_string,
         datefmt=date_format
-    )
\ No newline at end of file
+    )
+
+
+# Queue-based presets: records are handed to a bounded queue and written by a background
+# QueueListener thread, so logging from copy workers never blocks on the handler lock or a slow file.
+QUEUE_PRESETS = {
+    "queue_console": {"console": True},
+    "queue_console_rotating_file": {"console": True, "rotating_file": True},
+    "queue_jsonl": {"console": False, "jsonl": True},
+}
+
+_STANDARD_FORMAT = "%(asctime)s %(levelname)-8s %(name)s - %(message)s"
+
+_active_listener: Optional["QueueLoggingListener"] = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line (no external dependency)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+            "process": record.process,
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler with a bounded queue and an overflow policy.
+
+    Policies:
+        - "drop": records below `block_level` are dropped (and counted) when the queue is full;
+          records at or above it wait for space, so warnings and errors are never lost.
+        - "block": every record waits for space (backpressure on the logging thread).
+    """
+
+    def __init__(self, log_queue: "queue.Queue", policy: str = "drop", block_level: int = logging.WARNING):
+        if policy not in ("drop", "block"):
+            raise ValueError(f"Unknown queue overflow policy: {policy}")
+        super().__init__(log_queue)
+        self.policy = policy
+        self.block_level = block_level
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.policy == "block" or record.levelno >= self.block_level:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+
+class DrainingQueueListener(logging.handlers.QueueListener):
+    """
+    QueueListener whose stop sentinel waits for space in a bounded queue.
+
+    The stdlib listener enqueues its sentinel with `put_nowait`, which raises `queue.Full` exactly when
+    the drop policy is active and leaves the thread running. Here the sentinel waits up to
+    `sentinel_timeout` seconds; if the listener makes no room by then, pending records are discarded
+    (counted in `discarded`) so the thread can still be stopped and joined.
+    """
+
+    def __init__(self, log_queue: "queue.Queue", *handlers: logging.Handler, respect_handler_level: bool = False, sentinel_timeout: float = 30.0):
+        super().__init__(log_queue, *handlers, respect_handler_level=respect_handler_level)
+        self.sentinel_timeout = sentinel_timeout
+        self.discarded = 0
+
+    def enqueue_sentinel(self) -> None:
+        try:
+            self.queue.put(self._sentinel, timeout=self.sentinel_timeout)
+            return
+        except queue.Full:
+            pass
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+            self.discarded += 1
+            self.queue.task_done()
+        self.queue.put(self._sentinel, timeout=self.sentinel_timeout)
+
+
+class QueueLoggingListener:
+    """Owns the queue, the root QueueHandler and the background listener; `stop()` flushes and detaches."""
+
+    def __init__(self, handler: BoundedQueueHandler, listener: DrainingQueueListener, targets: List[logging.Handler]):
+        self.handler = handler
+        self.listener = listener
+        self.targets = targets
+        self._stopped = False
+
+    @property
+    def dropped(self) -> int:
+        return self.handler.dropped + self.listener.discarded
+
+    def stop(self) -> None:
+        """Drain the queue, close the target handlers and remove the queue handler from the root logger."""
+        if self._stopped:
+            return
+        self._stopped = True
+        root = logging.getLogger()
+        root.removeHandler(self.handler)
+        self.listener.stop()
+        if self.dropped:
+            message = f"mdivicomtools logging: dropped {self.dropped} record(s) because the log queue was full"
+            record = logging.LogRecord("mdivicomtools.utils.logging_utils", logging.WARNING, __file__, 0, message, None, None)
+            for target in self.targets:
+                target.handle(record)
+        for target in self.targets:
+            target.flush()
+            target.close()
+
+
+def setup_queue_logging(
+        preset: str = "queue_console",
+        level: int = logging.INFO,
+        filename: Optional[str] = None,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+        queue_size: int = 10000,
+        policy: str = "drop",
+        format_string: str = _STANDARD_FORMAT,
+) -> QueueLoggingListener:
+    """
+    Configure non-blocking logging: the root logger gets a bounded QueueHandler and a background
+    QueueListener writes to the preset's handlers. The listener is flushed on interpreter exit; calling
+    this again replaces the previous setup.
+
+    Args:
+        preset (str): One of QUEUE_PRESETS ("queue_console", "queue_console_rotating_file", "queue_jsonl").
+        level (int): Root logging level.
+        filename (str, optional): Log file for file presets (defaults to `mdivicomtools.log` / `mdivicomtools.log.jsonl`).
+        max_bytes (int): Rotation size of file handlers (0 disables rotation).
+        backup_count (int): Number of rotated files to keep.
+        queue_size (int): Maximum number of pending records.
+        policy (str): Overflow policy, "drop" (drop records below WARNING when full) or "block".
+        format_string (str): Format of text handlers.
+
+    Returns:
+        QueueLoggingListener: handle exposing `stop()` and the `dropped` counter.
+    """
+    global _active_listener
+    if preset not in QUEUE_PRESETS:
+        raise ValueError(f"Unknown queue logging preset: {preset}")
+    options = QUEUE_PRESETS[preset]
+
+    text_formatter = logging.Formatter(format_string)
+    targets: List[logging.Handler] = []
+    if options.get("console"):
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(text_formatter)
+        targets.append(console)
+    if options.get("rotating_file"):
+        file_handler = logging.handlers.RotatingFileHandler(
+            filename or "mdivicomtools.log", maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True
+        )
+        file_handler.setFormatter(text_formatter)
+        targets.append(file_handler)
+    if options.get("jsonl"):
+        jsonl_handler = logging.handlers.RotatingFileHandler(
+            filename or "mdivicomtools.log.jsonl", maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True
+        )
+        jsonl_handler.setFormatter(JsonLinesFormatter())
+        targets.append(jsonl_handler)
+
+    if _active_listener is not None:
+        _active_listener.stop()
+
+    handler = BoundedQueueHandler(queue.Queue(maxsize=queue_size), policy=policy)
+    listener = DrainingQueueListener(handler.queue, *targets, respect_handler_level=True)
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        if isinstance(existing, BoundedQueueHandler):
+            root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+    listener.start()
+
+    _active_listener = QueueLoggingListener(handler, listener, targets)
+    return _active_listener
+
+
+def stop_queue_logging() -> None:
+    """Flush and stop the active queue listener (also registered to run at exit)."""
+    global _active_listener
+    if _active_listener is not None:
+        _active_listener.stop()
+        _active_listener = None
+
+
+atexit.register(stop_queue_logging)
@@ -0,0 +1,351 @@
+# mdivicomtools/utils/plan.py
+
+import json
+import mmap
+import os
+from array import array
+from collections.abc import ItemsView, Mapping, ValuesView
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+PLAN_MAGIC = b"MDIPLAN\x01"
+PLAN_FORMAT_VERSION = 1
+_ALIGN = 8
+_CHUNK = 65536
+
+
+class _StringTable:
+    """
+    Read-only table of strings stored as one byte blob plus offsets (as saved on disk).
+
+    Strings are decoded on access, so a memory-mapped table costs no Python objects per entry
+    until an entry is actually used.
+    """
+
+    __slots__ = ("_offsets", "_blob")
+
+    def __init__(self, offsets: np.ndarray, blob: Union[bytes, memoryview, np.ndarray]):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        start = int(self._offsets[i])
+        end = int(self._offsets[i + 1])
+        return os.fsdecode(bytes(self._blob[start:end]))
+
+    def __iter__(self) -> Iterator[str]:
+        return self.iter_range(0, len(self))
+
+    def iter_range(self, start: int, stop: int) -> Iterator[str]:
+        offsets = self._offsets[start:stop + 1].tolist()
+        if not offsets:
+            return
+        base = offsets[0]
+        chunk = bytes(self._blob[base:offsets[-1]])
+        decode = os.fsdecode
+        for lo, hi in zip(offsets, offsets[1:]):
+            yield decode(chunk[lo - base:hi - base])
+
+
+
+def _encode_strings(values: Iterable[str]) -> Tuple[np.ndarray, bytes]:
+    encoded = [os.fsencode(v) for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+    if encoded:
+        np.cumsum(np.fromiter((len(b) for b in encoded), dtype=np.uint64, count=len(encoded)), out=offsets[1:])
+    return offsets, b"".join(encoded)
+
+
+def _split(path: Union[str, Path]) -> Tuple[str, str]:
+    return os.path.split(os.fspath(path))
+
+
+class _PlanItemsView(ItemsView):
+    def __iter__(self):
+        for src, dst in self._mapping.iter_rows():
+            yield Path(src), Path(dst)
+
+
+class _PlanValuesView(ValuesView):
+    def __iter__(self):
+        for dst in self._mapping.iter_destinations():
+            yield Path(dst)
+
+
+class TransformationPlan(Mapping):
+    """
+    Compact mapping of source paths to destination paths, as produced by the planners.
+
+    Paths are stored as an interned directory table plus per-entry filename columns and
+    integer directory indices, so a plan with millions of entries holds one string per
+    filename instead of two full `Path` objects per entry. It behaves like a read-only
+    `Dict[Path, Path]` (`items()`, `values()`, `len()`, lookups), and can be saved to a
+    binary file that `load(..., mmap_mode=True)` maps without parsing the entries.
+
+    Use `plan[src] = dst` to add or replace an entry and `append(src, dst)` when sources are
+    known to be unique (cheaper, no lookup index is built).
+    """
+
+    __slots__ = ("_dirs", "_dir_ids", "_src_dir", "_src_name", "_dst_dir", "_dst_name", "_lookup", "_mmap", "meta")
+
+    def __init__(self, mapping: Optional[Union["TransformationPlan", Dict[Path, Path]]] = None, meta: Optional[Dict[str, Any]] = None):
+        self._dirs: List[str] = []
+        self._dir_ids: Dict[str, int] = {}
+        self._src_dir = array("I")
+        self._src_name: Any = []
+        self._dst_dir = array("I")
+        self._dst_name: Any = []
+        self._lookup: Optional[Dict[Tuple[int, str], int]] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self.meta: Dict[str, Any] = dict(meta or {})
+        if mapping is not None:
+            if isinstance(mapping, TransformationPlan):
+                self.meta = {**mapping.meta, **self.meta}
+            for src, dst in mapping.items():
+                # mapping keys are unique already
+                self.append(src, dst)
+
+    # ------------------------------------------------------------------ building
+
+    def _intern(self, directory: str) -> int:
+        idx = self._dir_ids.get(directory)
+        if idx is None:
+            idx = len(self._dirs)
+            self._dirs.append(directory)
+            self._dir_ids[directory] = idx
+        return idx
+
+    def _make_mutable(self) -> None:
+        if isinstance(self._src_name, list):
+            return
+        # a loaded (mapped) plan is materialized before it is modified
+        self._src_dir = array("I", self._src_dir.tolist())
+        self._dst_dir = array("I", self._dst_dir.tolist())
+        self._src_name = list(self._src_name)
+        self._dst_name = list(self._dst_name)
+        self._close_mmap()
+
+    def _build_lookup(self) -> Dict[Tuple[int, str], int]:
+        if self._lookup is None:
+            self._lookup = {(int(d), n): row for row, (d, n) in enumerate(zip(self._src_dir, self._src_name))}
+        return self._lookup
+
+    def append(self, src: Union[str, Path], dst: Union[str, Path]) -> None:
+        """Add an entry without checking whether `src` is already planned."""
+        if not isinstance(self._src_name, list):
+            self._make_mutable()
+        src_dir, src_name = _split(src)
+        dst_dir, dst_name = _split(dst)
+        dir_ids = self._dir_ids
+        src_idx = dir_ids.get(src_dir)
+        if src_idx is None:
+            src_idx = self._intern(src_dir)
+        dst_idx = dir_ids.get(dst_dir)
+        if dst_idx is None:
+            dst_idx = self._intern(dst_dir)
+        if self._lookup is not None:
+            self._lookup[(src_idx, src_name)] = len(self._src_name)
+        self._src_dir.append(src_idx)
+        self._src_name.append(src_name)
+        self._dst_dir.append(dst_idx)
+        self._dst_name.append(dst_name)
+
+    def __setitem__(self, src: Union[str, Path], dst: Union[str, Path]) -> None:
+        self._make_mutable()
+        src_dir, src_name = _split(src)
+        key = (self._intern(src_dir), src_name)
+        row = self._build_lookup().get(key)
+        if row is None:
+            self.append(src, dst)
+            return
+        dst_dir, dst_name = _split(dst)
+        self._dst_dir[row] = self._intern(dst_dir)
+        self._dst_name[row] = dst_name
+
+    # ------------------------------------------------------------------ mapping protocol
+
+    def __len__(self) -> int:
+        return len(self._src_name)
+
+    def _src_str(self, row: int) -> str:
+        return os.path.join(self._dirs[self._src_dir[row]], self._src_name[row])
+
+    def _dst_str(self, row: int) -> str:
+        return os.path.join(self._dirs[self._dst_dir[row]], self._dst_name[row])
+
+    def _iter_column(self, dir_col: Any, name_col: Any) -> Iterator[str]:
+        # decode in chunks: per-row numpy scalar access and os.path.join dominate otherwise
+        prefixes = [d if not d or d.endswith(os.sep) else d + os.sep for d in self._dirs]
+        n = len(self)
+        for lo in range(0, n, _CHUNK):
+            hi = min(lo + _CHUNK, n)
+            names = name_col.iter_range(lo, hi) if isinstance(name_col, _StringTable) else name_col[lo:hi]
+            for dir_idx, name in zip(dir_col[lo:hi].tolist(), names):
+                yield prefixes[dir_idx] + name
+
+    def __iter__(self) -> Iterator[Path]:
+        for src in self._iter_column(self._src_dir, self._src_name):
+            yield Path(src)
+
+    def __getitem__(self, src: Union[str, Path]) -> Path:
+        src_dir, src_name = _split(src)
+        dir_idx = self._dir_ids.get(src_dir)
+        row = self._build_lookup().get((dir_idx, src_name)) if dir_idx is not None else None
+        if row is None:
+            raise KeyError(src)
+        return Path(self._dst_str(row))
+
+    def __contains__(self, src: object) -> bool:
+        try:
+            self[src]  # type: ignore[index]
+        except (KeyError, TypeError):
+            return False
+        return True
+
+    def __repr__(self) -> str:
+        return f"TransformationPlan(entries={len(self)}, directories={len(self._dirs)})"
+
+    def items(self) -> ItemsView:
+        return _PlanItemsView(self)
+
+    def values(self) -> ValuesView:
+        return _PlanValuesView(self)
+
+    def iter_rows(self) -> Iterator[Tuple[str, str]]:
+        """Yield `(src, dst)` as strings, without building `Path` objects."""
+        return zip(self._iter_column(self._src_dir, self._src_name), self._iter_column(self._dst_dir, self._dst_name))
+
+    def iter_destinations(self) -> Iterator[str]:
+        return self._iter_column(self._dst_dir, self._dst_name)
+
+    def source_directories(self) -> List[str]:
+        """Distinct source parent directories, straight from the interned directory table."""
+        return [self._dirs[i] for i in sorted(set(self._src_dir.tolist()))]
+
+    def destination_directories(self) -> List[str]:
+        """Distinct destination parent directories, straight from the interned directory table."""
+        return [self._dirs[i] for i in sorted(set(self._dst_dir.tolist()))]
+
+    def to_dict(self) -> Dict[Path, Path]:
+        return {Path(s): Path(d) for s, d in self.iter_rows()}
+
+    # ------------------------------------------------------------------ persistence
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """
+        Write the plan to a single binary file (header + directory table + columnar entries).
+
+        Sections are 8-byte aligned so `load(..., mmap_mode=True)` can map them in place.
+        """
+        path = Path(path)
+        n = len(self)
+        dir_offsets, dir_blob = _encode_strings(self._dirs)
+        src_offsets, src_blob = _encode_strings(self._src_name)
+        dst_offsets, dst_blob = _encode_strings(self._dst_name)
+        sections = [
+            ("dir_offsets", dir_offsets.tobytes()),
+            ("dir_blob", dir_blob),
+            ("src_dir", np.asarray(self._src_dir, dtype=np.uint32).tobytes()),
+            ("dst_dir", np.asarray(self._dst_dir, dtype=np.uint32).tobytes()),
+            ("src_name_offsets", src_offsets.tobytes()),
+            ("src_name_blob", src_blob),
+            ("dst_name_offsets", dst_offsets.tobytes()),
+            ("dst_name_blob", dst_blob),
+        ]
+        layout: Dict[str, List[int]] = {}
+        offset = 0
+        for name, payload in sections:
+            layout[name] = [offset, len(payload)]
+            offset += len(payload) + (-len(payload)) % _ALIGN
+        header = json.dumps(
+            {"format_version": PLAN_FORMAT_VERSION, "entries": n, "directories": len(self._dirs), "sections": layout, "meta": self.meta},
+            ensure_ascii=False,
+            sort_keys=True,
+        ).encode("utf-8")
+        header += b" " * ((-(len(PLAN_MAGIC) + 8 + len(header))) % _ALIGN)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as fh:
+            fh.write(PLAN_MAGIC)
+            fh.write(len(header).to_bytes(8, "little"))
+            fh.write(header)
+            for _, payload in sections:
+                fh.write(payload)
+                fh.write(b"\0" * ((-len(payload)) % _ALIGN))
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path], mmap_mode: bool = True) -> "TransformationPlan":
+        """
+        Load a plan written by `save`.
+
+        With `mmap_mode=True` the entry columns stay memory-mapped and filenames are decoded
+        lazily while iterating; only the (small) directory table is decoded up front.
+        """
+        with open(path, "rb") as fh:
+            if mmap_mode:
+                buf: Any = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                buf = fh.read()
+        if bytes(buf[:len(PLAN_MAGIC)]) != PLAN_MAGIC:
+            raise ValueError(f"Not a transformation plan file: {path}")
+        header_len = int.from_bytes(buf[len(PLAN_MAGIC):len(PLAN_MAGIC) + 8], "little")
+        data_start = len(PLAN_MAGIC) + 8 + header_len
+        header = json.loads(bytes(buf[len(PLAN_MAGIC) + 8:data_start]).decode("utf-8"))
+        if header.get("format_version") != PLAN_FORMAT_VERSION:
+            raise ValueError(f"Unsupported transformation plan format in {path}")
+        n = int(header["entries"])
+        layout = header["sections"]
+
+        def section(name: str, dtype: Any, count: int) -> np.ndarray:
+            offset, length = layout[name]
+            return np.frombuffer(buf, dtype=dtype, count=count, offset=data_start + offset) if count else np.empty(0, dtype=dtype)
+
+        def blob(name: str) -> memoryview:
+            offset, length = layout[name]
+            return memoryview(buf)[data_start + offset:data_start + offset + length]
+
+        plan = cls(meta=header.get("meta") or {})
+        dirs = _StringTable(section("dir_offsets", np.uint64, int(header["directories"]) + 1), blob("dir_blob"))
+        plan._dirs = list(dirs)
+        plan._dir_ids = {d: i for i, d in enumerate(plan._dirs)}
+        plan._src_dir = section("src_dir", np.uint32, n)
+        plan._dst_dir = section("dst_dir", np.uint32, n)
+        plan._src_name = _StringTable(section("src_name_offsets", np.uint64, n + 1), blob("src_name_blob"))
+        plan._dst_name = _StringTable(section("dst_name_offsets", np.uint64, n + 1), blob("dst_name_blob"))
+        if mmap_mode:
+            plan._mmap = buf
+        return plan
+
+    def _close_mmap(self) -> None:
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # views are still referenced elsewhere; the mapping is released with them
+                pass
+            self._mmap = None
+
+
+PlanLike = Union[TransformationPlan, Dict[Path, Path]]
+
+
+def as_plan(transformation_map: PlanLike) -> TransformationPlan:
+    """Return `transformation_map` as a `TransformationPlan` (no copy if it already is one)."""
+    if isinstance(transformation_map, TransformationPlan):
+        return transformation_map
+    return TransformationPlan(transformation_map)
+
+
+def iter_plan_rows(transformation_map: PlanLike) -> Iterator[Tuple[str, str]]:
+    """Yield `(src, dst)` as strings for a `TransformationPlan` or a plain `{src: dst}` dict."""
+    if isinstance(transformation_map, TransformationPlan):
+        return transformation_map.iter_rows()
+    return ((os.fspath(s), os.fspath(d)) for s, d in transformation_map.items())
@@ -3,12 +3,49 @@
 import os
 import re
 import shutil
+import time
 from pathlib import Path
-from typing import List, Optional, Dict, Set
+from typing import List, Optional, Dict, Set, Tuple
+import numpy as np
 import pandas as pd
 import logging
 from mdivicomtools.utils.logging_utils import setup_logging
-from typing import List, Optional
+from mdivicomtools.utils.copyengine import copy_file, copy_file2
+from mdivicomtools.utils.events import get_event_bus
+from mdivicomtools.utils.plan import PlanLike, TransformationPlan
+from mdivicomtools.utils.replan import PathMapper, PlanChanges, PlanDelta, update_plan
+from mdivicomtools.utils.reporting import PER_FILE_OUTPUT_LIMIT, PlanReportWriter, PlanSummary, format_bytes, source_base, summarize_plan
+from mdivicomtools.utils.workitems import DEFAULT_JOBS, CopyProgress, copy_plan
+
+logger = logging.getLogger(__name__)
+# Seconds between progress lines of bulk copies.
+PROGRESS_INTERVAL = 5.0
+
+
+def _report(message: str, level: int = logging.INFO) -> None:
+    """
+    User-facing output: goes through logging when it is configured (e.g. the non-blocking
+    `setup_queue_logging` presets), otherwise falls back to print() as before.
+    """
+    if logger.hasHandlers():
+        logger.log(level, message)
+    elif level >= logging.WARNING:
+        print(f"{logging.getLevelName(level)}: {message}")
+    else:
+        print(message)
+
+
+# Precomputed once: the character mapping of sanitize_filename (spaces -> "_", removed specials, German umlauts)
+_SANITIZE_TABLE = str.maketrans({
+    " ": "_",
+    **{c: None for c in '/:*?"<>|`%&='},
+    "ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss",
+})
+_RESERVED_NAMES = frozenset({"CON", "PRN", "AUX", "NUL", "COM1", "COM2", "COM3", "COM4", "COM5",
+                             "COM6", "COM7", "COM8", "COM9", "LPT1", "LPT2", "LPT3", "LPT4",
+                             "LPT5", "LPT6", "LPT7", "LPT8", "LPT9"})
+_to_str = np.frompyfunc(str, 1, 1)
+
 
 def sanitize_filename(name):
     """
@@ -21,22 +58,73 @@ def sanitize_filename(name):
     Returns:
         str: A sanitized, safe filename.
     """
-    # Replace spaces with underscores
-    name = name.replace(" ", "_")
-    # Remove or replace special characters
-    name = re.sub(r'[\/:*?"<>|`%&=]', "", name)
-    # replace german umlauts
-    name = name.replace("ä", "ae").replace("ö", "oe").replace("ü", "ue").replace("ß", "ss")
+    # Replace spaces with underscores, remove special characters and replace german umlauts in one pass
+    name = name.translate(_SANITIZE_TABLE)
     # Ensure the filename is not reserved or ends with a space/period
-    reserved_names = {"CON", "PRN", "AUX", "NUL", "COM1", "COM2", "COM3", "COM4", "COM5",
-                      "COM6", "COM7", "COM8", "COM9", "LPT1", "LPT2", "LPT3", "LPT4",
-                      "LPT5", "LPT6", "LPT7", "LPT8", "LPT9"}
-    if name.upper() in reserved_names:
+    if name.upper() in _RESERVED_NAMES:
         name += "_safe"
     name = name.rstrip(". ")
     return name
 
 
+def sanitize_filenames(names):
+    """
+    Batch version of `sanitize_filename` for a pandas Series or a list of names/paths.
+
+    Values are converted with `str()` and factorized, and the distinct strings are sanitized in one pass of
+    pandas string operations with the same translation table (`str.translate`, reserved-name check, `rstrip`),
+    so columns with repeated values (e.g. task or session labels) cost one hash lookup per row. Strings are
+    sanitized as a whole, exactly like `sanitize_filename`; `Path` items get their final component sanitized.
+
+    Args:
+        names (pd.Series | List[str | Path]): Values to sanitize.
+
+    Returns:
+        Tuple[pd.Series | List, Dict[str, List[str]]]: The sanitized values (a Series with the same index and
+        name for Series input, otherwise a list) and a collision report mapping every sanitized value that
+        was produced by more than one distinct input to the sorted list of those inputs.
+    """
+    values = np.empty(len(names), dtype=object)
+    values[:] = names.tolist() if isinstance(names, pd.Series) else list(names)
+    kinds = set(map(type, values))
+    paths = {i: v for i, v in enumerate(values) if isinstance(v, Path)} if any(issubclass(k, Path) for k in kinds) else {}
+    texts = values
+    if paths:
+        texts = values.copy()
+        for i, path in paths.items():
+            texts[i] = path.name
+    if kinds - {str}:
+        # str() per element without a Python-level loop (astype(str) would keep NaN as missing)
+        texts = _to_str(texts)
+
+    codes, uniques = pd.factorize(texts)
+    originals = pd.Series(uniques, dtype=object)
+    cleaned = originals.str.translate(_SANITIZE_TABLE)
+    # Ensure the filename is not reserved or ends with a space/period
+    cleaned = cleaned.mask(cleaned.str.upper().isin(_RESERVED_NAMES), cleaned + "_safe").str.rstrip(". ")
+    result = cleaned.to_numpy(dtype=object)[codes]
+
+    sources: Dict[str, Set[str]] = {}
+    keys = cleaned
+    if paths:
+        # path items are keyed by the whole path, not just the sanitized name
+        plain = np.ones(len(values), dtype=bool)
+        for i, path in paths.items():
+            plain[i] = False
+            result[i] = path.with_name(result[i]) if path.name else path
+            sources.setdefault(str(result[i]), set()).add(str(path))
+        keys = cleaned.iloc[np.unique(codes[plain])]
+    # only sanitized values reached from several inputs are grouped
+    shared = keys.duplicated(keep=False) | keys.isin(list(sources))
+    for value, group in originals[shared.index[shared]].groupby(keys[shared].to_numpy()):
+        sources.setdefault(value, set()).update(group)
+
+    collisions = {key: sorted(originals) for key, originals in sources.items() if len(originals) > 1}
+    if isinstance(names, pd.Series):
+        return pd.Series(result, index=names.index, name=names.name, dtype=object), collisions
+    return result.tolist(), collisions
+
+
 def get_file_list(base_dir: str, omit_hidden: bool = True) -> List[Path]:
     """
     Recursively retrieve a list of files from a directory, optionally omitting hidden items.
@@ -135,6 +223,44 @@ def transform_path(
     return new_path, partial_warning
 
 
+def _transform_mapper(
+        base_dir: str,
+        find_strings: List[str],
+        replace_strings: Optional[List[str]],
+        prefix: str,
+        securecopy_folder: str,
+        partial_strict: bool
+) -> Tuple[PathMapper, List[Path]]:
+    """Per-path mapping of `plan_transformations` and the list it collects partial matches in."""
+    base_path = Path(base_dir)
+    securecopy_dir = base_path / securecopy_folder
+    partial_matches = []  # type: List[Path]
+
+    def map_path(p: Path) -> Path:
+        new_p, partial_warning = transform_path(
+            original_path=p,
+            find_strings=find_strings,
+            replace_strings=replace_strings,
+            prefix=prefix,
+            base_dir=base_path,
+            securecopy_dir=securecopy_dir,
+            partial_strict=partial_strict
+        )
+        if partial_warning:
+            partial_matches.append(p)
+        return new_p
+
+    return map_path, partial_matches
+
+
+def _report_partial_matches(partial_matches: List[Path]) -> None:
+    if partial_matches:
+        # one aggregated warning instead of a line per file
+        _report(f"Potential partial match in {len(partial_matches)} path(s). The replacements may not be isolated words. Examples:", logging.WARNING)
+        for p in partial_matches[:5]:
+            _report(f"  {p}", logging.WARNING)
+
+
 def plan_transformations(
         base_dir: str,
         paths: List[Path],
@@ -143,7 +269,7 @@ def plan_transformations(
         prefix: str = "",
         securecopy_folder: str = "securecopy",
         partial_strict: bool = True
-) -> Dict[Path, Path]:
+) -> TransformationPlan:
     """
     Build a mapping from original paths to transformed paths based on specified string find/replace rules.
 
@@ -159,40 +285,69 @@ def plan_transformations(
         partial_strict (bool): If True, only replace exact word-boundary matches.
 
     Returns:
-        Dict[Path, Path]: A dictionary mapping each source path to its transformed path.
+        TransformationPlan: A mapping of each source path to its transformed path.
     """
-    base_path = Path(base_dir)
-    securecopy_dir = base_path / securecopy_folder
-    transformation_map = {}
-
+    map_path, partial_matches = _transform_mapper(base_dir, find_strings, replace_strings, prefix, securecopy_folder, partial_strict)
+    transformation_map = TransformationPlan(meta={"planner": "plan_transformations"})
     for p in paths:
-        new_p, partial_warning = transform_path(
-            original_path=p,
-            find_strings=find_strings,
-            replace_strings=replace_strings,
-            prefix=prefix,
-            base_dir=base_path,
-            securecopy_dir=securecopy_dir,
-            partial_strict=partial_strict
-        )
-        transformation_map[p] = new_p
-        if partial_warning:
-            print(f"WARNING: Potential partial match in '{p}'. The replacements may not be isolated words.")
+        transformation_map[p] = map_path(p)
+    _report_partial_matches(partial_matches)
     return transformation_map
 
 
-def check_for_conflicts(transformation_map: Dict[Path, Path]) -> bool:
+def replan_transformations(
+        base_dir: str,
+        previous_plan: PlanLike,
+        changes: PlanChanges,
+        find_strings: List[str],
+        replace_strings: Optional[List[str]],
+        prefix: str = "",
+        securecopy_folder: str = "securecopy",
+        partial_strict: bool = True
+) -> Tuple[TransformationPlan, PlanDelta]:
+    """
+    Update a plan made by `plan_transformations` with the same rules after the sources changed.
+
+    Only the paths in `changes` are transformed; the other entries of `previous_plan` are carried over
+    (see `mdivicomtools.utils.replan.update_plan`). The updated plan equals a full `plan_transformations`
+    run over the changed file list.
+
+    Args:
+        base_dir (str): The base directory of the original files.
+        previous_plan (PlanLike): A plan made earlier with the same rules (e.g. `TransformationPlan.load(...)`).
+        changes (PlanChanges): Paths added, removed or modified since `previous_plan` (spelled like its sources).
+        find_strings (List[str]): A list of patterns to find.
+        replace_strings (Optional[List[str]]): Corresponding replacements for each pattern.
+        prefix (str): String to prepend to found or replaced segments.
+        securecopy_folder (str): Name of the folder under which transformed files will be placed.
+        partial_strict (bool): If True, only replace exact word-boundary matches.
+
+    Returns:
+        Tuple[TransformationPlan, PlanDelta]: The updated plan and the entries to copy / destinations to delete.
+    """
+    map_path, partial_matches = _transform_mapper(base_dir, find_strings, replace_strings, prefix, securecopy_folder, partial_strict)
+    result = update_plan(previous_plan, changes, map_path, meta={"planner": "plan_transformations"})
+    _report_partial_matches(partial_matches)
+    return result
+
+
+def check_for_conflicts(transformation_map: PlanLike) -> bool:
     """
     Check for conflicts in a transformation map, i.e., multiple old paths mapping to the same new path.
 
     Args:
-        transformation_map (Dict[Path, Path]): A dictionary of old_path -> new_path.
+        transformation_map (PlanLike): A TransformationPlan or dictionary of old_path -> new_path.
 
     Returns:
         bool: True if conflicts exist (i.e., two or more keys share the same destination path), otherwise False.
     """
-    seen = set()  # type: Set[Path]
-    for new_p in transformation_map.values():
+    if isinstance(transformation_map, TransformationPlan):
+        # compare normalized strings instead of building a Path per entry
+        destinations = (os.path.normcase(d) for d in transformation_map.iter_destinations())
+    else:
+        destinations = transformation_map.values()
+    seen = set()  # type: Set[object]
+    for new_p in destinations:
         if new_p in seen:
             return True
         seen.add(new_p)
@@ -217,6 +372,7 @@ def copy_item(
             src,
             dst,
             symlinks=handle_symlinks,
+            copy_function=copy_file2,
             dirs_exist_ok=True
         )
     else:
@@ -225,7 +381,8 @@ def copy_item(
             link_target = os.readlink(src)
             os.symlink(link_target, dst)
         else:
-            shutil.copy2(src.resolve() if src.is_symlink() else src, dst)
+            # zero-copy where the platform allows it; metadata is preserved like shutil.copy2
+            copy_file(src, dst)
 
 
 def validate_copy(
@@ -282,60 +439,196 @@ def validate_copy(
     return src.stat().st_size == dst.stat().st_size
 
 def apply_transformations(
-        transformation_map: Dict[Path, Path],
+        transformation_map: PlanLike,
         dryrun: bool = True,
         handle_symlinks: bool = False,
-        sequential_delete: bool = False
+        sequential_delete: bool = False,
+        verbose: Optional[bool] = None,
+        report_path: Optional[str] = None,
+        jobs: int = DEFAULT_JOBS
 ) -> None:
     """
     Apply a mapping of old paths to new paths by copying (and optionally deleting) files.
 
+    Entries are expanded lazily into per-file work items (a directory entry becomes its directories and files),
+    which are copied on `jobs` threads through the zero-copy engine and validated file by file. Results are still
+    reported per plan entry, so a directory entry shows up as one line with its file count and bytes.
+
+    Output is aggregated: a summary (counts, bytes, per top-level directory, samples) is printed at the end.
+    Per-entry lines are only printed for small plans (up to PER_FILE_OUTPUT_LIMIT entries) or with verbose=True;
+    otherwise a progress line is printed every few seconds. Errors and validation failures are always included
+    in the summary samples.
+
+    Progress is also published on the event bus (`mdivicomtools.utils.events`, see `setup_events`): `plan.started`,
+    throttled `copy.progress` (files/bytes done, throughput, ETA), `copy.failed` per failed entry and `plan.finished`.
+
     Args:
-        transformation_map (Dict[Path, Path]): The old_path -> new_path mappings.
+        transformation_map (PlanLike): The old_path -> new_path mappings (TransformationPlan or dict).
         dryrun (bool): If True, only print intended actions without performing them.
         handle_symlinks (bool): If True, preserve symlinks during copy.
         sequential_delete (bool): If True, remove the original file after each successful copy and validation.
                                   Use with caution, as this can result in data loss if validation is insufficient.
                                   WARNING: Enabling this will permanently delete the source files if the copy validation succeeds.
                                   Ensure you have proper backups before proceeding.
+        verbose (Optional[bool]): Print one line per entry. Defaults to True for small plans and False in bulk mode.
+        report_path (Optional[str]): If given, write every entry with its outcome to this `.tsv` or `.jsonl` file (buffered).
+        jobs (int): Number of parallel copy threads (1 copies sequentially).
     """
-    if not dryrun and sequential_delete:
-        print("WARNING: sequential_delete is enabled. Source files will be permanently deleted after successful copy and validation. Please ensure you have proper backups!")
+    if verbose is None:
+        verbose = len(transformation_map) <= PER_FILE_OUTPUT_LIMIT
+    events = get_event_bus()
+    started = time.perf_counter()
+    events.emit("plan.started", entries=len(transformation_map), dryrun=dryrun, jobs=jobs)
+
+    if dryrun:
+        summary = summarize_plan(transformation_map, report_path=report_path)
+        if verbose:
+            for src, dst in transformation_map.items():
+                _report(f"DRY RUN: Would copy {src} -> {dst}")
+        _report(summary.summary(title="DRY RUN plan"))
+        events.emit("plan.finished", dryrun=True, entries=summary.entries, bytes=summary.bytes, seconds=time.perf_counter() - started)
+        return
+
+    if sequential_delete:
+        _report("sequential_delete is enabled. Source files will be permanently deleted after successful copy and validation. Please ensure you have proper backups!", logging.WARNING)
         # aks for user input to continue
         user_input = input("Do you want to continue? (yes/no): ")
         if user_input.lower() != "yes":
-            print("Aborting operation.")
+            _report("Aborting operation.")
             return
-    for src, dst in transformation_map.items():
-        if dryrun:
-            print(f"DRY RUN: Would copy {src} -> {dst}")
-        else:
-            try:
-                copy_item(src, dst, handle_symlinks=handle_symlinks)
-                # Validate copy
-                if validate_copy(src, dst, handle_symlinks):
-                    print(f"Copied {src} -> {dst}")
-                    if sequential_delete:
-                        # Double check before deleting source
-                        if validate_copy(src, dst, handle_symlinks):
-                            if src.is_dir():
-                                shutil.rmtree(src)
-                            else:
-                                src.unlink()
-                            print(f"Deleted original {src} after successful copy and validation.")
+
+    last_printed = 0.0
+
+    def report_progress(progress: CopyProgress) -> None:
+        nonlocal last_printed
+        elapsed = progress.elapsed
+        remaining = progress.entries_total - progress.entries_done
+        if events.active:
+            events.emit(
+                "copy.progress",
+                throttle=remaining > 0,
+                entries_done=progress.entries_done,
+                entries_total=progress.entries_total,
+                files_done=progress.files_done,
+                files_failed=progress.files_failed,
+                bytes_done=progress.bytes_done,
+                elapsed_seconds=elapsed,
+                bytes_per_second=progress.bytes_done / elapsed if elapsed > 0 else 0.0,
+                # directory entries are expanded lazily, so the estimate is per plan entry
+                eta_seconds=elapsed / progress.entries_done * remaining if progress.entries_done else None,
+            )
+        if not verbose and (elapsed - last_printed >= PROGRESS_INTERVAL or remaining == 0):
+            last_printed = elapsed
+            _report(
+                f"Progress: {progress.entries_done}/{progress.entries_total} entries, {progress.files_done} files, "
+                f"{format_bytes(progress.bytes_done)}, {progress.files_failed} failed ({elapsed:.0f}s)"
+            )
+
+    summary = PlanSummary(base=source_base(transformation_map))
+    progress = CopyProgress(
+        len(transformation_map),
+        callback=report_progress if events.active or not verbose else None,
+        interval=min(PROGRESS_INTERVAL, events.min_interval) if events.active else PROGRESS_INTERVAL,
+    )
+    writer = PlanReportWriter(report_path) if report_path else None
+    try:
+        for result in copy_plan(transformation_map, handle_symlinks=handle_symlinks, jobs=jobs, progress=progress):
+            src, dst = Path(result.src), Path(result.dst)
+            status, detail = result.status, result.detail
+            if status == "copied":
+                if verbose:
+                    _report(f"Copied {src} -> {dst}")
+                if sequential_delete:
+                    # Double check before deleting source
+                    if validate_copy(src, dst, handle_symlinks):
+                        if src.is_dir() and not (handle_symlinks and src.is_symlink()):
+                            shutil.rmtree(src)
                         else:
-                            print(f"Validation failed before delete for {src}. Not deleting.")
-                else:
-                    print(f"Validation failed for {src}. Destination {dst} may not match source.")
-            except Exception as e:
-                print(f"Error copying {src} to {dst}: {e}")
+                            src.unlink()
+                        status = "copied_deleted"
+                        if verbose:
+                            _report(f"Deleted original {src} after successful copy and validation.")
+                    else:
+                        status, detail = "delete_skipped", "validation failed before delete"
+                        if verbose:
+                            _report(f"Validation failed before delete for {src}. Not deleting.", logging.WARNING)
+            elif status == "validation_failed":
+                if verbose:
+                    _report(f"Validation failed for {src}. Destination {dst} may not match source: {detail}", logging.WARNING)
+            elif verbose:
+                _report(f"Error copying {src} to {dst}: {detail}", logging.ERROR)
+            if status in ("validation_failed", "error", "delete_skipped"):
+                events.emit("copy.failed", status=status, src=result.src, dst=result.dst, detail=detail)
+            summary.add(result.src, result.dst, result.bytes, status=status, detail=detail)
+            if writer is not None:
+                writer.write("copy", status, result.src, result.dst, result.bytes, detail)
+    finally:
+        if writer is not None:
+            writer.close()
+    _report(summary.summary(title="Transformation result"))
+    events.emit(
+        "plan.finished",
+        dryrun=False,
+        entries=summary.entries,
+        bytes=summary.bytes,
+        files=progress.files_done,
+        by_status=dict(summary.by_status),
+        seconds=time.perf_counter() - started,
+    )
+
+
+def apply_plan_delta(
+        delta: PlanDelta,
+        dryrun: bool = True,
+        handle_symlinks: bool = False,
+        report_path: Optional[str] = None,
+        jobs: int = DEFAULT_JOBS
+) -> int:
+    """
+    Bring a copy made from a previous plan up to date: delete stale destinations, then copy the delta.
+
+    Deletions come first, so a destination that moved to a place another entry vacated is not removed
+    after it was written. The copy step is `apply_transformations` on `delta.copy`.
+
+    Args:
+        delta (PlanDelta): The second result of a `replan_*` function or of `update_plan`.
+        dryrun (bool): If True, only print intended actions without performing them.
+        handle_symlinks (bool): If True, preserve symlinks during copy.
+        report_path (Optional[str]): Passed on to `apply_transformations`.
+        jobs (int): Number of parallel copy threads.
+
+    Returns:
+        int: Number of stale destinations deleted (or that would be deleted in a dry run).
+    """
+    copying = {os.path.normcase(d) for d in delta.copy.iter_destinations()}
+    deleted = 0
+    for dst in delta.delete:
+        if os.path.normcase(str(dst)) in copying:
+            # rewritten by the copy step anyway
+            continue
+        if dryrun:
+            _report(f"DRY RUN: Would delete {dst}")
+            deleted += 1
+            continue
+        try:
+            if dst.is_dir() and not dst.is_symlink():
+                shutil.rmtree(dst)
+            else:
+                dst.unlink()
+            deleted += 1
+        except FileNotFoundError:
+            pass
+    if delta.delete:
+        _report(f"{'DRY RUN: ' if dryrun else ''}{deleted} stale destination(s) {'to delete' if dryrun else 'deleted'}.")
+    apply_transformations(delta.copy, dryrun=dryrun, handle_symlinks=handle_symlinks, report_path=report_path, jobs=jobs)
+    return deleted
 
 
 def plan_combine_folder_hierarchies(
         hierarchies: List[List[str]],
         root_dir: str = ".",
         securecopy_folder: Optional[str] = None
-) -> Dict[Path, Path]:
+) -> TransformationPlan:
     """
     Identify directories matching specified hierarchies and plan to combine each hierarchy into a single directory name.
 
@@ -345,10 +638,10 @@ def plan_combine_folder_hierarchies(
         securecopy_folder (Optional[str]): If provided, place resulting paths under this folder in root_dir.
 
     Returns:
-        Dict[Path, Path]: A mapping of original paths to new combined-folder paths.
+        TransformationPlan: A mapping of original paths to new combined-folder paths.
     """
     root = Path(root_dir)
-    transformation_map = {}
+    transformation_map = TransformationPlan(meta={"planner": "plan_combine_folder_hierarchies"})
 
     for hierarchy in hierarchies:
         if len(hierarchy) < 2:
@@ -387,7 +680,7 @@ def plan_split_folder_hierarchies(
         combined_folders: List[str],
         root_dir: str = ".",
         securecopy_folder: Optional[str] = None
-) -> Dict[Path, Path]:
+) -> TransformationPlan:
     """
     Reverse the combination of folder hierarchies by splitting directories named with underscores into multiple levels.
 
@@ -397,10 +690,10 @@ def plan_split_folder_hierarchies(
         securecopy_folder (Optional[str]): If provided, place resulting paths under this folder in root_dir.
 
     Returns:
-        Dict[Path, Path]: A mapping of combined-folder paths to newly split hierarchy paths.
+        TransformationPlan: A mapping of combined-folder paths to newly split hierarchy paths.
     """
     root = Path(root_dir)
-    transformation_map = {}
+    transformation_map = TransformationPlan(meta={"planner": "plan_split_folder_hierarchies"})
 
     for combined in combined_folders:
         parts = combined.split("_")
@@ -431,7 +724,7 @@ def plan_prepend_foldernames_to_filename(
         folderremoval: bool = True,
         root_dir: str = ".",
         securecopy_folder: Optional[str] = None
-) -> Dict[Path, Path]:
+) -> TransformationPlan:
     """
     Prepend specific folder names to each file's basename, optionally removing those folder names from the directory structure.
 
@@ -445,9 +738,9 @@ def plan_prepend_foldernames_to_filename(
         securecopy_folder (Optional[str]): If provided, the new paths go under this folder in root_dir.
 
     Returns:
-        Dict[Path, Path]: A mapping of original file paths to new file paths.
+        TransformationPlan: A mapping of original file paths to new file paths.
     """
-    transformation_map = {}
+    transformation_map = TransformationPlan(meta={"planner": "plan_prepend_foldernames_to_filename"})
     folder_set = set(foldernames)
     prepend_str = "_".join(foldernames)
     root_path = Path(root_dir)
@@ -484,6 +777,57 @@ def plan_prepend_foldernames_to_filename(
     return transformation_map
 
 
+def _record_names(
+    df: pd.DataFrame,
+    key_field: str,
+    rename_format: str
+) -> Optional[List[Tuple[str, Optional[str]]]]:
+    """
+    `(recording_id, new folder name)` per DataFrame record, in row order; the name is None when a placeholder
+    value is missing. Returns None if `key_field` is not a column.
+    """
+    if key_field not in df.columns:
+        logger.warning("Key field '%s' not in DataFrame. Cannot build transformation map.", key_field)
+        return None
+
+    # Extract placeholders from rename_format
+    placeholders = re.findall(r'{([^}]+)}', rename_format)
+
+    # Row values as iterrows() would see them (DataFrame.values upcasts to a common dtype per row),
+    # without building a Series per row; placeholders are sanitized per column in one batch.
+    columns = list(df.columns)
+    rows = df.values
+    key_pos = columns.index(key_field)
+    sanitized_columns = {}
+    for ph in placeholders:
+        if ph not in columns:
+            continue
+        pos = columns.index(ph)
+        sanitized, collisions = sanitize_filenames([row[pos] for row in rows if row[pos] is not None])
+        for value, originals in collisions.items():
+            logger.warning("Placeholder '%s': values %s all sanitize to '%s'.", ph, originals, value)
+        sanitized_iter = iter(sanitized)
+        sanitized_columns[ph] = [None if row[pos] is None else next(sanitized_iter) for row in rows]
+
+    records = []  # type: List[Tuple[str, Optional[str]]]
+    for i, row in enumerate(rows):
+        recording_id = str(row[key_pos])
+
+        # Gather rename values
+        rename_values = {}
+        missing_placeholder = False
+        for ph in placeholders:
+            val = sanitized_columns[ph][i] if ph in sanitized_columns else None
+            if val is None:
+                logger.warning("Missing value for placeholder '%s' in record '%s'. Skipping this record.", ph, recording_id)
+                missing_placeholder = True
+                break
+            rename_values[ph] = val
+
+        records.append((recording_id, None if missing_placeholder else rename_format.format(**rename_values)))
+    return records
+
+
 def build_transformation_map_from_df(
     df: pd.DataFrame,
     base_dir: str,
@@ -491,7 +835,7 @@ def build_transformation_map_from_df(
     rename_format: str = 'task-{task_id}_run-{run_id}',
     target_directory: Optional[str] = None,
     include_non_matches: bool = True  # New argument
-) -> Dict[Path, Path]:
+) -> TransformationPlan:
     """
     Construct a mapping of original file paths to renamed paths using a DataFrame.
 
@@ -506,7 +850,7 @@ def build_transformation_map_from_df(
         include_non_matches (bool): If True, files with no matching key_field are copied as is.
 
     Returns:
-        Dict[Path, Path]: A mapping of source paths to renamed paths, or an empty dict if conflicts occur.
+        TransformationPlan: A mapping of source paths to renamed paths, or an empty plan if conflicts occur.
     """
     base_path = Path(base_dir)
     if target_directory is not None:
@@ -514,57 +858,50 @@ def build_transformation_map_from_df(
     else:
         target_path = base_path / "securecopy"
 
-    if key_field not in df.columns:
-        logging.warning("Key field '%s' not in DataFrame. Cannot build transformation map.", key_field)
-        return {}
+    records = _record_names(df, key_field, rename_format)
+    if records is None:
+        return TransformationPlan()
+
+    transformation_map = TransformationPlan(meta={"planner": "build_transformation_map_from_df"})
+    planned_targets = set()  # type: Set[Path]
 
     # Collect all files from base_dir
     all_files = get_file_list(str(base_path), omit_hidden=True)
 
-    # Extract placeholders from rename_format
-    placeholders = re.findall(r'{([^}]+)}', rename_format)
-
-    transformation_map = {}
+    # Index files by their path components once instead of scanning every file for every record
+    files_by_part: Dict[str, List[Path]] = {}
+    for original_file in all_files:
+        for part in set(original_file.relative_to(base_path).parts):
+            files_by_part.setdefault(part, []).append(original_file)
 
     # Build transformations for each record
     matched_files = set()
-    for _, row in df.iterrows():
-        recording_id = str(row[key_field])
-
-        # Gather rename values
-        rename_values = {}
-        missing_placeholder = False
-        for ph in placeholders:
-            val = row.get(ph)
-            if val is None:
-                logging.warning("Missing value for placeholder '%s' in record '%s'. Skipping this record.", ph, recording_id)
-                missing_placeholder = True
-                break
-            rename_values[ph] = sanitize_filename(str(val))
-
-        if missing_placeholder:
+    for recording_id, new_name in records:
+        if new_name is None:
             continue
 
-        new_name = rename_format.format(**rename_values)
-
         # For all files that contain recording_id as a directory component:
         # Replace that component with new_name, preserving the rest
-        for original_file in all_files:
+        for original_file in files_by_part.get(recording_id, ()):
             relative_path = original_file.relative_to(base_path)
             parts = list(relative_path.parts)
 
-            if recording_id in parts:
-                # Replace the directory corresponding to the recording_id
-                new_parts = [new_name if p == recording_id else p for p in parts]
-                # Construct the new path under target_path
-                new_path = target_path.joinpath(*new_parts)
+            # Replace the directory corresponding to the recording_id
+            new_parts = [new_name if p == recording_id else p for p in parts]
+            # Construct the new path under target_path
+            new_path = target_path.joinpath(*new_parts)
 
-                if new_path in transformation_map.values():
-                    logging.warning("Duplicate target path encountered: %s. Skipping this file to avoid conflict.", new_path)
-                    continue
+            if new_path in planned_targets:
+                logger.warning("Duplicate target path encountered: %s. Skipping this file to avoid conflict.", new_path)
+                continue
 
-                transformation_map[original_file] = new_path
-                matched_files.add(original_file)
+            previous = transformation_map.get(original_file)
+            if previous is not None:
+                # a later record re-maps this file; its former target is free again
+                planned_targets.discard(previous)
+            transformation_map[original_file] = new_path
+            planned_targets.add(new_path)
+            matched_files.add(original_file)
 
     # Handle non-matching files if include_non_matches is True
     if include_non_matches:
@@ -573,19 +910,133 @@ def build_transformation_map_from_df(
                 # Copy non-matching files "as is" to the target directory
                 relative_path = original_file.relative_to(base_path)
                 new_path = target_path / relative_path
-                if new_path in transformation_map.values():
-                    logging.warning("Duplicate target path for non-matching file: %s. Skipping to avoid conflict.", new_path)
+                if new_path in planned_targets:
+                    logger.warning("Duplicate target path for non-matching file: %s. Skipping to avoid conflict.", new_path)
                     continue
                 transformation_map[original_file] = new_path
+                planned_targets.add(new_path)
 
     # Check for conflicts in the completed map
     if check_for_conflicts(transformation_map):
-        logging.error("Conflicts detected in transformation map. Returning empty map.")
-        return {}
+        logger.error("Conflicts detected in transformation map. Returning empty map.")
+        return TransformationPlan()
 
     return transformation_map
 
 
+def replan_transformation_map_from_df(
+    df: pd.DataFrame,
+    base_dir: str,
+    previous_plan: PlanLike,
+    changes: PlanChanges,
+    key_field: str = 'recording_id',
+    rename_format: str = 'task-{task_id}_run-{run_id}',
+    target_directory: Optional[str] = None,
+    include_non_matches: bool = True
+) -> Tuple[TransformationPlan, PlanDelta]:
+    """
+    Update a plan made by `build_transformation_map_from_df` from the same DataFrame after files changed.
+
+    `base_dir` is not walked: only the files in `changes` are mapped (a file takes the name of the last record
+    whose key is one of its path components, as in a full run) and the other entries are carried over.
+    Changes to the DataFrame itself need a full re-plan.
+
+    Args:
+        df (pd.DataFrame): The DataFrame `previous_plan` was built from.
+        base_dir (str): The root directory containing original file structure.
+        previous_plan (PlanLike): A plan made earlier by `build_transformation_map_from_df`.
+        changes (PlanChanges): Paths added, removed or modified since `previous_plan`; relative paths are
+            taken relative to `base_dir`.
+        key_field (str): Column name identifying the directory to rename.
+        rename_format (str): Format string with placeholders, e.g. 'task-{task_id}_run-{run_id}'.
+        target_directory (Optional[str]): If provided, place new paths here. Otherwise, use `base_dir`/securecopy.
+        include_non_matches (bool): If True, files with no matching key_field are copied as is.
+
+    Returns:
+        Tuple[TransformationPlan, PlanDelta]: The updated plan and the entries to copy / destinations to delete
+        (an empty plan and delta if conflicts occur).
+    """
+    base_path = Path(base_dir)
+    if target_directory is not None:
+        target_path = Path(target_directory)
+    else:
+        target_path = base_path / "securecopy"
+
+    records = _record_names(df, key_field, rename_format)
+    if records is None:
+        return TransformationPlan(), PlanDelta()
+
+    # the last complete record per key wins, like the record loop of a full run
+    name_by_key = {}  # type: Dict[str, Tuple[int, str]]
+    for i, (recording_id, new_name) in enumerate(records):
+        if new_name is not None:
+            name_by_key[recording_id] = (i, new_name)
+
+    def map_path(original_file: Path) -> Optional[Path]:
+        parts = original_file.relative_to(base_path).parts
+        if any(p.startswith('.') for p in parts):
+            # hidden, as skipped by get_file_list
+            return None
+        matches = [name_by_key[p] + (p,) for p in set(parts) & name_by_key.keys()]
+        if matches:
+            _, new_name, recording_id = max(matches)
+            return target_path.joinpath(*[new_name if p == recording_id else p for p in parts])
+        return target_path.joinpath(*parts) if include_non_matches else None
+
+    plan, delta = update_plan(previous_plan, changes.anchored(base_path), map_path, meta={"planner": "build_transformation_map_from_df"})
+    if check_for_conflicts(plan):
+        logger.error("Conflicts detected in transformation map. Returning empty map.")
+        return TransformationPlan(), PlanDelta()
+    return plan, delta
+
+
+
+
+def _reorder_mapper(
+    base_dir: str,
+    source_structure: List[str],
+    target_index: List[int],
+    securecopy_folder: str,
+    target_dir: Optional[str]
+) -> Tuple[Path, PathMapper]:
+    """Resolved base directory and per-file mapping of `plan_complex_file_reorder`."""
+    base_path = Path(base_dir).resolve()
+
+    # Determine the reorder root
+    if target_dir:
+        reorder_root = Path(target_dir).resolve()
+    else:
+        reorder_root = base_path / securecopy_folder
+
+    # 1-based to 0-based
+    zero_based_index = [i - 1 for i in target_index]
+
+    def map_path(old_path: Path) -> Optional[Path]:
+        # Skip if old_path is inside reorder_root (avoid recursion or re-copying)
+        if reorder_root in old_path.parents:
+            return None
+
+        # Build the relative folder parts (excluding the file name)
+        relative = old_path.relative_to(base_path)
+        parts = list(relative.parts)
+
+        if not parts:
+            # Edge case: somehow the file is base_dir itself? skip
+            return None
+
+        filename = parts[-1]          # last part is the file name (or symlink name)
+        folder_parts = parts[:-1]     # everything before that is the folder chain
+
+        # Reorder the folder chain
+        new_folder_parts = reorder_path_complex(folder_parts, source_structure, zero_based_index)
+        if new_folder_parts is None:
+            # parse/match failure => skip
+            return None
+
+        # Build final path (append the filename at the end)
+        return reorder_root.joinpath(*new_folder_parts, filename)
+
+    return base_path, map_path
 
 
 def plan_complex_file_reorder(
@@ -594,7 +1045,7 @@ def plan_complex_file_reorder(
     target_index: List[int],
     securecopy_folder: str = "securecopy",
     target_dir: Optional[str] = None
-) -> Dict[Path, Path]:
+) -> TransformationPlan:
     """
     Build a transformation map for files by reordering folder segments according to a source structure and target index.
 
@@ -608,17 +1059,10 @@ def plan_complex_file_reorder(
         target_dir (Optional[str]): If provided, overrides the securecopy_folder location.
 
     Returns:
-        Dict[Path, Path]: A dictionary mapping each old file path to its reordered new path.
+        TransformationPlan: A mapping of each old file path to its reordered new path.
     """
-    base_path = Path(base_dir).resolve()
-
-    # Determine the reorder root
-    if target_dir:
-        reorder_root = Path(target_dir).resolve()
-    else:
-        reorder_root = base_path / securecopy_folder
-
-    transformation_map = {}
+    base_path, map_path = _reorder_mapper(base_dir, source_structure, target_index, securecopy_folder, target_dir)
+    transformation_map = TransformationPlan(meta={"planner": "plan_complex_file_reorder"})
 
     # 1) Collect files only
     all_files = []
@@ -640,40 +1084,63 @@ def plan_complex_file_reorder(
             if file_path.is_file() or file_path.is_symlink():
                 all_files.append(file_path)
 
-    # 2) Convert target_index from 1-based to 0-based
-    zero_based_index = [i - 1 for i in target_index]
-
-    # 3) Build a transformation map for each file
+    # 2) Build a transformation map for each file
     for old_path in all_files:
-        # Skip if old_path is inside reorder_root (avoid recursion or re-copying)
-        if reorder_root in old_path.parents:
+        new_path = map_path(old_path)
+        if new_path is None:
             continue
 
-        # Build the relative folder parts (excluding the file name)
-        relative = old_path.relative_to(base_path)
-        parts = list(relative.parts)
+        # Add to transformation map (paths come from a single walk, so they are unique)
+        transformation_map.append(old_path, new_path)
 
-        if not parts:
-            # Edge case: somehow the file is base_dir itself? skip
-            continue
+    return transformation_map
 
-        filename = parts[-1]          # last part is the file name (or symlink name)
-        folder_parts = parts[:-1]     # everything before that is the folder chain
 
-        # Reorder the folder chain
-        new_folder_parts = reorder_path_complex(folder_parts, source_structure, zero_based_index)
-        if new_folder_parts is None:
-            # parse/match failure => skip
-            continue
+def replan_complex_file_reorder(
+    base_dir: str,
+    previous_plan: PlanLike,
+    changes: PlanChanges,
+    source_structure: List[str],
+    target_index: List[int],
+    securecopy_folder: str = "securecopy",
+    target_dir: Optional[str] = None
+) -> Tuple[TransformationPlan, PlanDelta]:
+    """
+    Update a plan made by `plan_complex_file_reorder` with the same structure after files changed.
 
-        # Build final path (append the filename at the end)
-        new_parts = new_folder_parts + [filename]
-        new_path = reorder_root.joinpath(*new_parts)
+    `base_dir` is not walked: only the files in `changes` are reordered and the other entries are carried
+    over (see `mdivicomtools.utils.replan.update_plan`).
 
-        # Add to transformation map
-        transformation_map[old_path] = new_path
+    Args:
+        base_dir (str): Root directory for searching files.
+        previous_plan (PlanLike): A plan made earlier by `plan_complex_file_reorder`.
+        changes (PlanChanges): Paths added, removed or modified since `previous_plan`; relative paths are
+            taken relative to `base_dir`.
+        source_structure (List[str]): Blueprint for how folders are currently structured, with optional regex or wildcard markers.
+        target_index (List[int]): 1-based indices specifying how to reorder matched placeholders.
+        securecopy_folder (str): If `target_dir` is not given, place outputs here under `base_dir`.
+        target_dir (Optional[str]): If provided, overrides the securecopy_folder location.
 
-    return transformation_map
+    Returns:
+        Tuple[TransformationPlan, PlanDelta]: The updated plan and the entries to copy / destinations to delete.
+    """
+    base_path, map_path = _reorder_mapper(base_dir, source_structure, target_index, securecopy_folder, target_dir)
+
+    def map_changed(old_path: Path) -> Optional[Path]:
+        # the walk of a full run never yields these
+        if any(part in ('.git', 'git annex') for part in old_path.relative_to(base_path).parts[:-1]):
+            return None
+        if not (old_path.is_file() or old_path.is_symlink()):
+            return None
+        return map_path(old_path)
+
+    return update_plan(
+        previous_plan,
+        changes.anchored(base_path),
+        map_changed,
+        meta={"planner": "plan_complex_file_reorder"},
+        skip_dirs=('.git', 'git annex'),
+    )
 
 
 def reorder_path_complex(
@@ -0,0 +1,191 @@
+# mdivicomtools/utils/replan.py
+
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from mdivicomtools.utils.plan import PlanLike, TransformationPlan, as_plan
+
+PathLike = Union[str, Path]
+# maps one source file to its destination, or None when the planner would not plan it
+PathMapper = Callable[[Path], Optional[Path]]
+
+
+def _norm(path: PathLike) -> str:
+    # same spelling as the keys of a TransformationPlan (str(Path(...)))
+    return str(Path(path))
+
+
+class PlanChanges:
+    """
+    Source paths that were added, removed or modified since a plan was made.
+
+    Added and modified entries may be directories (they are expanded to their files when the
+    plan is updated); removed directories drop every planned source below them. A path that is
+    listed as added but already planned is treated as modified.
+    """
+
+    __slots__ = ("added", "removed", "modified")
+
+    def __init__(self, added: Iterable[PathLike] = (), removed: Iterable[PathLike] = (), modified: Iterable[PathLike] = ()):
+        self.added: Set[str] = {_norm(p) for p in added}
+        self.removed: Set[str] = {_norm(p) for p in removed}
+        self.modified: Set[str] = {_norm(p) for p in modified}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Iterable[PathLike]]) -> "PlanChanges":
+        """Build from `{"added": [...], "removed": [...], "modified": [...]}` (e.g. a JSON change list)."""
+        return cls(data.get("added", ()), data.get("removed", ()), data.get("modified", ()))
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        return {"added": sorted(self.added), "removed": sorted(self.removed), "modified": sorted(self.modified)}
+
+    def anchored(self, base_dir: PathLike) -> "PlanChanges":
+        """Return a copy with relative paths joined to `base_dir` (the way a planner walking `base_dir` spells them)."""
+        base = Path(base_dir)
+
+        def anchor(paths: Set[str]) -> List[Path]:
+            return [base / p for p in paths]
+
+        return PlanChanges(anchor(self.added), anchor(self.removed), anchor(self.modified))
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.removed) + len(self.modified)
+
+    def __bool__(self) -> bool:
+        return bool(len(self))
+
+    def __repr__(self) -> str:
+        return f"PlanChanges(added={len(self.added)}, removed={len(self.removed)}, modified={len(self.modified)})"
+
+
+class PlanDelta:
+    """
+    Work needed to bring a previous copy up to date with an updated plan.
+
+    `copy` is a `TransformationPlan` of the entries to (re)copy (added sources, modified sources and
+    sources whose destination moved) and can be passed to `apply_transformations` as is; `delete`
+    lists destinations of the previous plan that are no longer produced.
+    """
+
+    __slots__ = ("copy", "delete", "stats")
+
+    def __init__(self, meta: Optional[Dict[str, Any]] = None):
+        self.copy = TransformationPlan(meta={**(meta or {}), "delta": True})
+        self.delete: List[Path] = []
+        self.stats: Dict[str, int] = {"kept": 0, "added": 0, "modified": 0, "moved": 0, "removed": 0, "unplanned": 0}
+
+    def __bool__(self) -> bool:
+        return bool(len(self.copy) or self.delete)
+
+    def __repr__(self) -> str:
+        return f"PlanDelta(copy={len(self.copy)}, delete={len(self.delete)})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "stats": dict(self.stats),
+            "copy": [{"src": src, "dst": dst} for src, dst in self.copy.iter_rows()],
+            "delete": [str(p) for p in self.delete],
+        }
+
+    def summary(self) -> str:
+        stats = self.stats
+        return (
+            f"Plan delta: {len(self.copy)} to copy ({stats['added']} added, {stats['modified']} modified, {stats['moved']} moved), "
+            f"{len(self.delete)} to delete ({stats['removed']} removed, {stats['unplanned']} no longer planned), {stats['kept']} unchanged."
+        )
+
+
+def _expand(paths: Iterable[str], skip_dirs: Iterable[str] = (".git",)) -> Iterable[str]:
+    """Yield files for `paths`, walking the ones that are directories (so only the change set is walked)."""
+    skip = set(skip_dirs)
+    for path in sorted(paths):
+        if os.path.isdir(path) and not os.path.islink(path):
+            for root, dirs, files in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if d not in skip)
+                for name in sorted(files):
+                    yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def update_plan(
+        previous_plan: PlanLike,
+        changes: PlanChanges,
+        map_path: PathMapper,
+        meta: Optional[Dict[str, Any]] = None,
+        skip_dirs: Iterable[str] = (".git",),
+) -> Tuple[TransformationPlan, PlanDelta]:
+    """
+    Apply a change set to a previous plan by re-mapping only the changed sources.
+
+    Unchanged entries are carried over row by row (no filesystem access, no re-planning); removed
+    sources, including everything below a removed directory, are dropped and their destinations
+    scheduled for deletion; added and modified sources (directories are walked) go through
+    `map_path`. A source that `map_path` no longer plans is dropped like a removed one, and a
+    modified source whose destination changed is copied to the new place and deleted at the old one.
+
+    Args:
+        previous_plan (PlanLike): The plan the change set refers to (e.g. `TransformationPlan.load(...)`).
+        changes (PlanChanges): Added / removed / modified source paths, spelled like the plan sources.
+        map_path (Callable[[Path], Optional[Path]]): The planner's per-file mapping.
+        meta (Optional[Dict[str, Any]]): Metadata of the updated plan (defaults to the previous plan's).
+        skip_dirs (Iterable[str]): Directory names not descended into when expanding added/modified directories.
+
+    Returns:
+        Tuple[TransformationPlan, PlanDelta]: The updated plan and the copy/delete work it implies.
+    """
+    previous = as_plan(previous_plan)
+    meta = dict(previous.meta if meta is None else meta)
+    plan = TransformationPlan(meta=meta)
+    delta = PlanDelta(meta)
+    stats = delta.stats
+
+    removed = changes.removed
+    remapped: Dict[str, Optional[Path]] = {}
+    for path in _expand(changes.modified | changes.added, skip_dirs):
+        if path not in removed:
+            remapped[path] = map_path(Path(path))
+
+    # a source directory is dropped when it, or one of its parents, was removed; decided once per directory
+    dropped_dirs: Dict[str, bool] = {}
+
+    def under_removed(directory: str) -> bool:
+        hit = dropped_dirs.get(directory)
+        if hit is None:
+            parent = os.path.dirname(directory)
+            hit = directory in removed or (parent != directory and bool(parent) and under_removed(parent))
+            dropped_dirs[directory] = hit
+        return hit
+
+    for src, dst in previous.iter_rows():
+        if removed and (src in removed or under_removed(os.path.dirname(src))):
+            delta.delete.append(Path(dst))
+            stats["removed"] += 1
+            continue
+        if src not in remapped:
+            plan.append(src, dst)
+            stats["kept"] += 1
+            continue
+        new_dst = remapped.pop(src)
+        if new_dst is None:
+            delta.delete.append(Path(dst))
+            stats["unplanned"] += 1
+            continue
+        plan.append(src, new_dst)
+        if _norm(new_dst) != dst:
+            delta.delete.append(Path(dst))
+            delta.copy.append(src, new_dst)
+            stats["moved"] += 1
+        else:
+            delta.copy.append(src, new_dst)
+            stats["modified"] += 1
+
+    # whatever is left was not planned before
+    for src, new_dst in remapped.items():
+        if new_dst is None:
+            continue
+        plan.append(src, new_dst)
+        delta.copy.append(src, new_dst)
+        stats["added"] += 1
+    return plan, delta
@@ -0,0 +1,180 @@
+# mdivicomtools/utils/reporting.py
+
+import json
+import os
+import stat
+from pathlib import Path
+from typing import Dict, IO, List, Optional, Tuple, Union
+
+from mdivicomtools.utils.plan import PlanLike, TransformationPlan, iter_plan_rows
+
+# Plans up to this size keep the classic one-line-per-entry output by default.
+PER_FILE_OUTPUT_LIMIT = 200
+
+REPORT_COLUMNS = ("action", "status", "src", "dst", "size_bytes", "detail")
+
+
+def source_base(transformation_map: PlanLike) -> Optional[str]:
+    """Common parent directory of all plan sources (None if there is none), used to shorten report paths."""
+    if isinstance(transformation_map, TransformationPlan):
+        src_dirs = set(transformation_map.source_directories())
+    else:
+        src_dirs = {os.path.dirname(os.fspath(s)) for s in transformation_map}
+    src_dirs.discard("")
+    if not src_dirs:
+        return None
+    try:
+        return os.path.commonpath(list(src_dirs))
+    except ValueError:
+        # mixed absolute/relative sources have no common base
+        return None
+
+
+def format_bytes(num: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if abs(num) < 1024 or unit == "TiB":
+            return f"{num:.0f} {unit}" if unit == "B" else f"{num:.1f} {unit}"
+        num /= 1024.0
+    return f"{num:.1f} TiB"
+
+
+class PlanSummary:
+    """
+    Aggregated view of a plan or a run over it: counts, bytes, per-top-level-directory breakdown and samples.
+
+    Top-level directories are the first path component of each source below the common base
+    of all sources (e.g. `ses-01` for a plan over `sessions/`).
+    """
+
+    __slots__ = ("base", "entries", "bytes", "by_top_level", "by_status", "samples", "max_samples")
+
+    def __init__(self, base: Optional[str] = None, max_samples: int = 5):
+        self.base = base
+        self.entries = 0
+        self.bytes = 0
+        self.by_top_level: Dict[str, List[int]] = {}
+        self.by_status: Dict[str, int] = {}
+        self.samples: Dict[str, List[Tuple[str, str, str]]] = {}
+        self.max_samples = max_samples
+
+    def _top_level(self, src: str) -> str:
+        if self.base:
+            rel = src[len(self.base):].lstrip(os.sep) if src.startswith(self.base) else src
+        else:
+            rel = src
+        head, sep, _ = rel.partition(os.sep)
+        return head if sep else "."
+
+    def add(self, src: str, dst: str, size: Optional[int] = None, status: str = "planned", detail: str = "") -> None:
+        self.entries += 1
+        size = size or 0
+        self.bytes += size
+        bucket = self.by_top_level.setdefault(self._top_level(src), [0, 0])
+        bucket[0] += 1
+        bucket[1] += size
+        self.by_status[status] = self.by_status.get(status, 0) + 1
+        samples = self.samples.setdefault(status, [])
+        if len(samples) < self.max_samples:
+            samples.append((src, dst, detail))
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "base": self.base,
+            "entries": self.entries,
+            "bytes": self.bytes,
+            "by_status": dict(self.by_status),
+            "by_top_level": {k: {"entries": v[0], "bytes": v[1]} for k, v in sorted(self.by_top_level.items())},
+            "samples": {k: [list(s) for s in v] for k, v in self.samples.items()},
+        }
+
+    def summary(self, title: str = "Plan summary", max_groups: int = 20) -> str:
+        lines = [f"{title}: {self.entries} entries, {format_bytes(self.bytes)}" + (f" (base: {self.base})" if self.base else "")]
+        if self.by_status:
+            lines.append("  status: " + ", ".join(f"{k}={v}" for k, v in sorted(self.by_status.items())))
+        groups = sorted(self.by_top_level.items(), key=lambda kv: (-kv[1][0], kv[0]))
+        for name, (count, size) in groups[:max_groups]:
+            lines.append(f"  {name}: {count} entries, {format_bytes(size)}")
+        if len(groups) > max_groups:
+            rest = groups[max_groups:]
+            lines.append(f"  ... {len(rest)} more top-level directories ({sum(c for _, (c, _) in rest)} entries)")
+        for status, samples in sorted(self.samples.items()):
+            lines.append(f"  sample {status}:")
+            for src, dst, detail in samples:
+                lines.append(f"    {src} -> {dst}" + (f" ({detail})" if detail else ""))
+        return "\n".join(lines)
+
+
+class PlanReportWriter:
+    """
+    Buffered per-entry report writer (TSV or JSON lines, chosen by file suffix).
+
+    Usable as a context manager; rows are written through a large buffer so that millions
+    of entries cost a handful of write calls.
+    """
+
+    def __init__(self, path: Union[str, Path], fmt: Optional[str] = None, buffer_size: int = 1 << 20):
+        self.path = Path(path)
+        self.fmt = fmt or ("jsonl" if self.path.suffix.lower() in (".jsonl", ".json") else "tsv")
+        if self.fmt not in ("tsv", "jsonl"):
+            raise ValueError(f"Unknown report format: {self.fmt}")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh: IO[str] = open(self.path, "w", encoding="utf-8", buffering=buffer_size, newline="")
+        if self.fmt == "tsv":
+            self._fh.write("\t".join(REPORT_COLUMNS) + "\n")
+
+    def write(self, action: str, status: str, src: str, dst: str, size: Optional[int] = None, detail: str = "") -> None:
+        if self.fmt == "tsv":
+            values = (action, status, src, dst, "" if size is None else str(size), detail)
+            self._fh.write("\t".join(v.replace("\t", " ").replace("\n", " ") for v in values) + "\n")
+        else:
+            self._fh.write(json.dumps(dict(zip(REPORT_COLUMNS, (action, status, src, dst, size, detail))), ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        self._fh.close()
+
+    def __enter__(self) -> "PlanReportWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _size_of(path: str) -> Optional[int]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return 0 if stat.S_ISDIR(st.st_mode) else st.st_size
+
+
+def summarize_plan(
+        transformation_map: PlanLike,
+        *,
+        with_sizes: bool = True,
+        report_path: Optional[Union[str, Path]] = None,
+        max_samples: int = 5,
+) -> PlanSummary:
+    """
+    Aggregate a plan without printing per entry, optionally writing the full plan to a report file.
+
+    Args:
+        transformation_map (PlanLike): A TransformationPlan or dictionary of old_path -> new_path.
+        with_sizes (bool): If True, stat each source to report byte totals (directories count as 0 bytes).
+        report_path (Optional[str | Path]): If given, write every entry to this `.tsv` or `.jsonl` file.
+        max_samples (int): Number of sample entries kept in the summary.
+
+    Returns:
+        PlanSummary: the aggregated summary; print `summary.summary()` for a human-readable version.
+    """
+    summary = PlanSummary(base=source_base(transformation_map), max_samples=max_samples)
+    writer = PlanReportWriter(report_path) if report_path else None
+    try:
+        for src, dst in iter_plan_rows(transformation_map):
+            size = _size_of(src) if with_sizes else None
+            summary.add(src, dst, size)
+            if writer is not None:
+                writer.write("copy", "planned", src, dst, size)
+    finally:
+        if writer is not None:
+            writer.close()
+    return summary
@@ -0,0 +1,296 @@
+# mdivicomtools/utils/workitems.py
+
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from mdivicomtools.utils.copyengine import copy_file
+from mdivicomtools.utils.plan import PlanLike, iter_plan_rows
+
+DEFAULT_JOBS = 4
+
+
+class WorkItem:
+    """
+    One unit of copy work derived from a plan entry.
+
+    `kind` is "file" (copy content), "symlink" (recreate the link), "dir" (create the directory) or
+    "failed" (the path could not be read while expanding; `error` says why); `entry` is the index of
+    the plan entry the item was expanded from.
+    """
+
+    __slots__ = ("entry", "src", "dst", "kind", "size", "error")
+
+    def __init__(self, entry: int, src: str, dst: str, kind: str, size: int = 0, error: Optional[str] = None):
+        self.entry = entry
+        self.src = src
+        self.dst = dst
+        self.kind = kind
+        self.size = size
+        self.error = error
+
+    def __repr__(self) -> str:
+        return f"WorkItem({self.kind}, {self.src} -> {self.dst})"
+
+
+def _file_item(entry: int, src: str, dst: str, handle_symlinks: bool) -> WorkItem:
+    if handle_symlinks and os.path.islink(src):
+        return WorkItem(entry, src, dst, "symlink")
+    return WorkItem(entry, src, dst, "file", os.stat(src).st_size)
+
+
+def expand_entry(entry: int, src: str, dst: str, handle_symlinks: bool = False) -> Iterator[WorkItem]:
+    """
+    Lazily expand one plan entry into work items.
+
+    A directory entry yields its directories top-down (each before its contents) and every file below
+    it; a file entry yields itself. Symlinks are recreated with `handle_symlinks=True` and followed
+    otherwise, matching `shutil.copytree(symlinks=handle_symlinks)`. Like `copytree`, paths below a
+    directory entry that cannot be read (a dangling symlink, an unreadable subdirectory) do not stop
+    the walk: they are yielded as "failed" items.
+    """
+    if not os.path.isdir(src) or (handle_symlinks and os.path.islink(src)):
+        yield _file_item(entry, src, dst, handle_symlinks)
+        return
+
+    def failed(path: str, dst_path: str, exc: OSError) -> WorkItem:
+        return WorkItem(entry, path, dst_path, "failed", error=f"{type(exc).__name__}: {exc}")
+
+    def walk_failures() -> Iterator[WorkItem]:
+        while walk_errors:
+            exc = walk_errors.pop(0)
+            if exc.filename == src:
+                # the source directory itself could not be listed
+                raise exc
+            path = exc.filename or src
+            yield failed(path, os.path.join(dst, os.path.relpath(path, src)), exc)
+
+    walk_errors: List[OSError] = []
+    yield WorkItem(entry, src, dst, "dir")
+    for root, dirs, files in os.walk(src, followlinks=not handle_symlinks, onerror=walk_errors.append):
+        yield from walk_failures()
+        rel = os.path.relpath(root, src)
+        dst_root = dst if rel == os.curdir else os.path.join(dst, rel)
+        for name in dirs:
+            path = os.path.join(root, name)
+            if handle_symlinks and os.path.islink(path):
+                yield WorkItem(entry, path, os.path.join(dst_root, name), "symlink")
+            else:
+                yield WorkItem(entry, path, os.path.join(dst_root, name), "dir")
+        for name in files:
+            path, dst_path = os.path.join(root, name), os.path.join(dst_root, name)
+            try:
+                item = _file_item(entry, path, dst_path, handle_symlinks)
+            except OSError as exc:
+                item = failed(path, dst_path, exc)
+            yield item
+    yield from walk_failures()
+
+
+def _copy_and_validate(item: WorkItem) -> Tuple[WorkItem, bool, str]:
+    """Copy one file/symlink item and validate it; returns (item, ok, detail)."""
+    if item.kind == "symlink":
+        target = os.readlink(item.src)
+        os.symlink(target, item.dst)
+        if os.readlink(item.dst) != target:
+            return item, False, "symlink target differs"
+        return item, True, ""
+    copy_file(item.src, item.dst)
+    size = os.stat(item.dst).st_size
+    if size != item.size:
+        return item, False, f"size {size} != {item.size}"
+    return item, True, ""
+
+
+class CopyProgress:
+    """Running totals of a plan copy; `callback` is invoked on the main thread at most every `interval` seconds."""
+
+    __slots__ = ("files_done", "bytes_done", "files_failed", "entries_done", "entries_total", "started", "callback", "interval", "_last")
+
+    def __init__(self, entries_total: int, callback: Optional[Callable[["CopyProgress"], None]] = None, interval: float = 5.0):
+        self.files_done = 0
+        self.bytes_done = 0
+        self.files_failed = 0
+        self.entries_done = 0
+        self.entries_total = entries_total
+        self.started = time.monotonic()
+        self.callback = callback
+        self.interval = interval
+        self._last = self.started
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def tick(self, force: bool = False) -> None:
+        if self.callback is None:
+            return
+        now = time.monotonic()
+        if force or now - self._last >= self.interval:
+            self._last = now
+            self.callback(self)
+
+
+class EntryResult:
+    """Outcome of one plan entry, aggregated over its work items (the directory-level view for reporting)."""
+
+    __slots__ = ("index", "src", "dst", "files", "bytes", "failures", "error", "_pending", "_expanded")
+
+    def __init__(self, index: int, src: str, dst: str):
+        self.index = index
+        self.src = src
+        self.dst = dst
+        self.files = 0
+        self.bytes = 0
+        self.failures: List[Tuple[str, str]] = []
+        self.error: Optional[str] = None
+        self._pending = 0
+        self._expanded = False
+
+    @property
+    def status(self) -> str:
+        if self.error is not None:
+            return "error"
+        if self.failures:
+            return "validation_failed"
+        return "copied"
+
+    @property
+    def detail(self) -> str:
+        if self.error is not None:
+            return self.error
+        if self.failures:
+            path, why = self.failures[0]
+            more = f" (+{len(self.failures) - 1} more)" if len(self.failures) > 1 else ""
+            return f"{path}: {why}{more}"
+        return ""
+
+
+def copy_plan(
+        transformation_map: PlanLike,
+        *,
+        handle_symlinks: bool = False,
+        jobs: int = DEFAULT_JOBS,
+        on_entry_done: Optional[Callable[[EntryResult], None]] = None,
+        progress: Optional[CopyProgress] = None,
+        max_failures_per_entry: int = 10,
+) -> Iterator[EntryResult]:
+    """
+    Copy a plan by expanding its entries lazily into per-file work items and copying them on a thread pool.
+
+    Directories are created on the calling thread as they are walked (so they exist before their
+    files are submitted); files are copied with the zero-copy engine and validated individually.
+    Only a bounded number of items is in flight, so expanding a huge directory does not materialize
+    its file list. Directory timestamps and permissions are copied once all items are done.
+
+    Args:
+        transformation_map (PlanLike): The old_path -> new_path mappings (TransformationPlan or dict).
+        handle_symlinks (bool): If True, recreate symlinks instead of copying their targets.
+        jobs (int): Number of copy threads (1 copies on the calling thread).
+        on_entry_done (Optional[Callable]): Called on the calling thread when an entry has finished.
+        progress (Optional[CopyProgress]): Progress counters, updated as items finish.
+        max_failures_per_entry (int): Number of failed items remembered per entry.
+
+    Yields:
+        EntryResult: one result per plan entry, in completion order.
+    """
+    jobs = max(1, jobs)
+    results: Dict[int, EntryResult] = {}
+    finished: Deque[EntryResult] = deque()
+    created_dirs: List[Tuple[str, str]] = []
+
+    def complete_if_done(result: EntryResult) -> None:
+        if result._expanded and result._pending == 0:
+            del results[result.index]
+            if progress is not None:
+                progress.entries_done += 1
+            if on_entry_done is not None:
+                on_entry_done(result)
+            finished.append(result)
+
+    def record(item: WorkItem, ok: bool, detail: str) -> None:
+        result = results[item.entry]
+        result._pending -= 1
+        if ok:
+            result.files += 1
+            result.bytes += item.size
+            if progress is not None:
+                progress.files_done += 1
+                progress.bytes_done += item.size
+        else:
+            if len(result.failures) < max_failures_per_entry:
+                result.failures.append((item.dst, detail))
+            if progress is not None:
+                progress.files_failed += 1
+        if progress is not None:
+            progress.tick()
+        complete_if_done(result)
+
+    def run_inline(item: WorkItem) -> None:
+        try:
+            record(*_copy_and_validate(item))
+        except OSError as exc:
+            record(item, False, str(exc))
+
+    executor = ThreadPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    in_flight: Dict[Future, WorkItem] = {}
+
+    def drain(block_until: int) -> None:
+        while len(in_flight) > block_until:
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                item = in_flight.pop(future)
+                try:
+                    record(*future.result())
+                except OSError as exc:
+                    record(item, False, str(exc))
+
+    try:
+        for index, (src, dst) in enumerate(iter_plan_rows(transformation_map)):
+            result = results[index] = EntryResult(index, src, dst)
+            try:
+                for item in expand_entry(index, src, dst, handle_symlinks):
+                    if item.kind == "dir":
+                        os.makedirs(item.dst, exist_ok=True)
+                        created_dirs.append((item.src, item.dst))
+                        continue
+                    result._pending += 1
+                    if item.kind == "failed":
+                        record(item, False, item.error or "")
+                        while finished:
+                            yield finished.popleft()
+                        continue
+                    if item.src == src:
+                        # a file entry: make sure its parent exists
+                        os.makedirs(os.path.dirname(item.dst) or os.curdir, exist_ok=True)
+                    if executor is None:
+                        run_inline(item)
+                    else:
+                        in_flight[executor.submit(_copy_and_validate, item)] = item
+                        drain(jobs * 4)
+                    while finished:
+                        yield finished.popleft()
+            except OSError as exc:
+                result.error = f"{type(exc).__name__}: {exc}"
+            result._expanded = True
+            complete_if_done(result)
+            while finished:
+                yield finished.popleft()
+        drain(0)
+        while finished:
+            yield finished.popleft()
+    finally:
+        if executor is not None:
+            drain(0)
+            executor.shutdown(wait=True)
+        # like copytree: directory metadata last, deepest first, so copying files does not bump mtimes again
+        for src_dir, dst_dir in reversed(created_dirs):
+            try:
+                shutil.copystat(src_dir, dst_dir)
+            except OSError:
+                pass
+        if progress is not None:
+            progress.tick(force=True)
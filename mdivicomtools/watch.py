@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import json
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+from .inventory import subdirs
+
+PathLike = Union[str, Path]
+
+DEFAULT_STATE_PATH = Path(".mdivicom") / "watch.json"
+STATE_FORMAT_VERSION = 1
+DEFAULT_QUIET_SECONDS = 60.0
+DEFAULT_POLL_INTERVAL = 10.0
+# Polling only: every session is re-signatured this often to catch files rewritten in place.
+DEFAULT_RESCAN_INTERVAL = 600.0
+
+# (file count, total bytes, newest mtime_ns) of the non-hidden files of a session
+Signature = Tuple[int, int, int]
+
+
+def session_signature(session_path: PathLike) -> Signature:
+    """Walk one session and summarize its files; equal signatures mean nothing was added, removed or rewritten."""
+    count = size = newest = 0
+    stack = [str(session_path)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        continue
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    count += 1
+                    size += st.st_size
+                    newest = max(newest, st.st_mtime_ns)
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+    return count, size, newest
+
+
+def _session_dirs(sessions_dir: str) -> Dict[str, str]:
+    return {e.name: e.path for e in subdirs(sessions_dir) if e.name.startswith("ses-")}
+
+
+# ---------------------------------------------------------------------- change sources
+
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _InotifySource:
+    """
+    Linux inotify watches on `sessions/` and every directory below it (via libc, no extra dependency).
+
+    inotify is not recursive, so directories created later get their own watch when their creation is
+    seen. Raises OSError if inotify is unavailable or the watch limit is reached.
+    """
+
+    kind = "inotify"
+
+    def __init__(self, sessions_dir: str):
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is Linux-only")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.sessions_dir = sessions_dir
+        self._paths: Dict[int, str] = {}
+        try:
+            self._watch_tree(sessions_dir)
+        except OSError:
+            os.close(self._fd)
+            raise
+
+    def _watch(self, path: str) -> None:
+        wd = self._add_watch(self._fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR):
+                return  # vanished before we got to it
+            raise OSError(err, f"inotify_add_watch({path}): {os.strerror(err)}")
+        self._paths[wd] = path
+
+    def _watch_tree(self, path: str) -> None:
+        for root, dirs, _ in os.walk(path):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            self._watch(root)
+
+    def _session_of(self, path: str) -> Optional[str]:
+        rel = os.path.relpath(path, self.sessions_dir)
+        first = rel.split(os.sep, 1)[0]
+        return first if first.startswith("ses-") else None
+
+    def wait(self, timeout: float) -> Optional[Set[str]]:
+        """Block up to `timeout` seconds; returns changed session names, or None if events were lost."""
+        ready, _, _ = select.select([self._fd], [], [], max(0.0, timeout))
+        if not ready:
+            return set()
+        changed: Set[str] = set()
+        overflow = False
+        while True:
+            try:
+                data = os.read(self._fd, 1 << 16)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                name = os.fsdecode(data[offset + _EVENT_HEADER.size: offset + _EVENT_HEADER.size + length].rstrip(b"\0"))
+                offset += _EVENT_HEADER.size + length
+                if mask & _IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                parent = self._paths.get(wd)
+                if mask & _IN_IGNORED:
+                    self._paths.pop(wd, None)
+                    continue
+                if parent is None or name.startswith("."):
+                    continue
+                path = os.path.join(parent, name) if name else parent
+                if mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO):
+                    self._watch_tree(path)
+                session = self._session_of(path)
+                if session is not None:
+                    changed.add(session)
+        return None if overflow else changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class _PollingSource:
+    """
+    Portable fallback: every `interval` seconds, compare each session's directory mtimes (cheap, no
+    per-file stat) and fully re-signature only sessions that are still settling. Files rewritten in
+    place do not change directory mtimes, so all sessions are re-signatured every `rescan_interval`.
+    """
+
+    kind = "poll"
+
+    def __init__(self, sessions_dir: str, interval: float, rescan_interval: float = DEFAULT_RESCAN_INTERVAL):
+        self.sessions_dir = sessions_dir
+        self.interval = interval
+        self.rescan_interval = rescan_interval
+        self._next_rescan = time.monotonic() + rescan_interval
+        self._dir_state: Dict[str, Tuple[int, ...]] = {name: self._dir_mtimes(path) for name, path in _session_dirs(sessions_dir).items()}
+        self._signatures: Dict[str, Signature] = {}
+        self.settling: Set[str] = set()
+
+    @staticmethod
+    def _dir_mtimes(path: str) -> Tuple[int, ...]:
+        mtimes = []
+        for root, dirs, _ in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            try:
+                mtimes.append(os.stat(root).st_mtime_ns)
+            except FileNotFoundError:
+                pass
+        return tuple(mtimes)
+
+    def wait(self, timeout: float) -> Optional[Set[str]]:
+        time.sleep(max(0.0, min(timeout, self.interval)))
+        changed: Set[str] = set()
+        sessions = _session_dirs(self.sessions_dir)
+        rescan = time.monotonic() >= self._next_rescan
+        if rescan:
+            self._next_rescan = time.monotonic() + self.rescan_interval
+        for name, path in sessions.items():
+            state = self._dir_mtimes(path)
+            if self._dir_state.get(name) != state:
+                self._dir_state[name] = state
+                changed.add(name)
+            if rescan or name in self.settling or name in changed:
+                # files growing in place do not touch directory mtimes
+                signature = session_signature(path)
+                previous = self._signatures.get(name)
+                if previous != signature:
+                    self._signatures[name] = signature
+                    if previous is not None:
+                        changed.add(name)
+        for name in set(self._dir_state) - set(sessions):
+            del self._dir_state[name]
+            self._signatures.pop(name, None)
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+# ---------------------------------------------------------------------- watcher
+
+
+class SessionWatcher:
+    """
+    Watch `<dataset>/sessions/` and hand over sessions once their uploads are quiescent.
+
+    A session is *pending* after any change below it and *ready* once nothing changed for
+    `quiet_seconds`. Ready sessions whose signature (file count, bytes, newest mtime) differs from
+    the one recorded after they were last processed are passed to `on_ready`; the new signatures are
+    persisted in `<dataset>/.mdivicom/watch.json`, so restarts only pick up what changed meanwhile.
+
+    Uses inotify on Linux and falls back to polling (`poll_interval`) elsewhere, or when the watch
+    limit is exhausted. inotify does not see changes made by other hosts on network mounts; use
+    polling there (`use_inotify=False`).
+    """
+
+    def __init__(
+            self,
+            dataset_dir: PathLike,
+            *,
+            quiet_seconds: float = DEFAULT_QUIET_SECONDS,
+            poll_interval: float = DEFAULT_POLL_INTERVAL,
+            use_inotify: Optional[bool] = None,
+            state_path: Optional[PathLike] = None,
+            rescan_interval: float = DEFAULT_RESCAN_INTERVAL,
+    ):
+        self.dataset_dir = Path(dataset_dir).expanduser().resolve()
+        self.sessions_dir = str(self.dataset_dir / "sessions")
+        if not os.path.isdir(self.sessions_dir):
+            raise FileNotFoundError(f"No sessions directory: {self.sessions_dir}")
+        self.quiet_seconds = quiet_seconds
+        self.poll_interval = poll_interval
+        self.state_path = Path(state_path) if state_path else self.dataset_dir / DEFAULT_STATE_PATH
+        self.processed: Dict[str, Signature] = self._read_state()
+        self.pending: Dict[str, float] = {}
+        self.source: Any = None
+        if use_inotify is not False:
+            try:
+                self.source = _InotifySource(self.sessions_dir)
+            except OSError:
+                if use_inotify:
+                    raise
+        if self.source is None:
+            self.source = _PollingSource(self.sessions_dir, poll_interval, rescan_interval)
+
+    def _read_state(self) -> Dict[str, Signature]:
+        try:
+            data = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("format_version") != STATE_FORMAT_VERSION:
+            return {}
+        return {name: tuple(sig) for name, sig in data.get("sessions", {}).items()}  # type: ignore[misc]
+
+    def _write_state(self) -> None:
+        payload = {"format_version": STATE_FORMAT_VERSION, "sessions": {k: list(v) for k, v in sorted(self.processed.items())}}
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_name(self.state_path.name + f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(payload, sort_keys=True) + "\n", encoding="utf-8")
+        os.replace(tmp, self.state_path)
+
+    def _mark(self, names: Set[str], now: float) -> None:
+        for name in names:
+            self.pending[name] = now
+        if isinstance(self.source, _PollingSource):
+            self.source.settling.update(names)
+
+    def _mark_stale(self, now: float) -> None:
+        """Queue every session whose current signature differs from the processed one (startup, lost events)."""
+        for name, path in _session_dirs(self.sessions_dir).items():
+            signature = session_signature(path)
+            if isinstance(self.source, _PollingSource):
+                self.source._signatures[name] = signature
+            if self.processed.get(name) != signature:
+                self._mark({name}, now)
+
+    def _take_ready(self, now: float) -> List[Tuple[str, Signature]]:
+        ready = []
+        for name, since in sorted(self.pending.items()):
+            if now - since < self.quiet_seconds:
+                continue
+            del self.pending[name]
+            if isinstance(self.source, _PollingSource):
+                self.source.settling.discard(name)
+            path = os.path.join(self.sessions_dir, name)
+            if not os.path.isdir(path):
+                self.processed.pop(name, None)
+                continue
+            signature = session_signature(path)
+            if self.processed.get(name) != signature:
+                ready.append((name, signature))
+        return ready
+
+    def run(
+            self,
+            on_ready: Callable[[List[Path]], Optional[Set[str]]],
+            *,
+            once: bool = False,
+            max_cycles: Optional[int] = None,
+    ) -> int:
+        """
+        Watch until interrupted (or, with `once`, until nothing is pending); returns the number of
+        sessions handed to `on_ready`.
+
+        `on_ready` receives the ready session directories and may return the names of sessions that
+        failed; those are not recorded as processed and are retried after their next change.
+        """
+        handled = 0
+        cycles = 0
+        self._mark_stale(time.monotonic())
+        try:
+            while True:
+                now = time.monotonic()
+                ready = self._take_ready(now)
+                if ready:
+                    failed = on_ready([Path(self.sessions_dir) / name for name, _ in ready]) or set()
+                    for name, signature in ready:
+                        if name not in failed:
+                            self.processed[name] = signature
+                    self._write_state()
+                    handled += len(ready)
+                if once and not self.pending:
+                    return handled
+                cycles += 1
+                if max_cycles is not None and cycles > max_cycles:
+                    return handled
+                if self.pending:
+                    timeout = max(0.05, min(self.pending.values()) + self.quiet_seconds - time.monotonic())
+                else:
+                    timeout = self.poll_interval
+                changed = self.source.wait(timeout)
+                now = time.monotonic()
+                if changed is None:
+                    # inotify queue overflowed: fall back to comparing signatures once
+                    self._mark_stale(now)
+                else:
+                    self._mark(changed, now)
+        finally:
+            self.source.close()
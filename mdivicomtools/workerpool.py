@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import sys
+from multiprocessing.connection import Connection, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .plugin_registry import PluginRef, _ensure_python_run_callable, get_plugin
+from .provenance import finish_run_record
+
+DEFAULT_MAX_JOBS_PER_WORKER = 100
+
+
+def _rss_bytes() -> Optional[int]:
+    """Current resident set size of this process (peak RSS where the current value is not available)."""
+    try:
+        with open("/proc/self/statm", "rb") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:  # pragma: no cover (windows)
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _job_paths(job: Dict[str, Any]) -> Dict[str, Optional[Path]]:
+    return {
+        "dataset_dir": Path(job["dataset_dir"]),
+        "out_dir": Path(job["out_dir"]),
+        "work_dir": Path(job["work_dir"]) if job.get("work_dir") else None,
+    }
+
+
+def _worker_main(conn: Connection, plugin_ref: str, backend: str, max_jobs: int, max_rss_bytes: Optional[int]) -> None:
+    """
+    Worker process loop: resolve the plugin once, then run jobs sent by the pool until told to stop
+    or until the job/memory budget is used up.
+
+    Messages to the pool: ("ready", pid), ("init_failed", error), ("started", index, run_id, record_path),
+    ("done", index, status, error, retire_reason). A `retire_reason` other than None means the worker exits
+    after reporting the job.
+    """
+    # the CLI module is imported here (not at top level) so `cli` can import this module lazily
+    from .cli import _call_plugin, _start_run
+
+    try:
+        plugin = get_plugin(PluginRef.parse(plugin_ref))
+        plugin = _ensure_python_run_callable(plugin)
+    except Exception as exc:
+        conn.send(("init_failed", f"{type(exc).__name__}: {exc}"))
+        return
+    conn.send(("ready", os.getpid()))
+
+    done = 0
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        index, job = message
+        paths = _job_paths(job)
+        status, error = "succeeded", None
+        try:
+            run_id, record_path = _start_run(plugin, config=job["config"], backend=backend, **paths)
+        except Exception as exc:
+            conn.send(("done", index, "failed", f"{type(exc).__name__}: {exc}", None))
+            continue
+        conn.send(("started", index, run_id, str(record_path)))
+        try:
+            _call_plugin(plugin, config=job["config"], backend=backend, dry_run=bool(job.get("dry_run")), **paths)
+            finish_run_record(record_path, status="succeeded")
+        except Exception as exc:
+            status, error = "failed", f"{type(exc).__name__}: {exc}"
+            finish_run_record(record_path, status="failed", error=error)
+
+        done += 1
+        retire = None
+        if max_jobs and done >= max_jobs:
+            retire = f"{done} jobs"
+        elif max_rss_bytes:
+            rss = _rss_bytes()
+            if rss is not None and rss > max_rss_bytes:
+                retire = f"rss {rss} bytes"
+        conn.send(("done", index, status, error, retire))
+        if retire is not None:
+            return
+
+
+class _Worker:
+    __slots__ = ("process", "conn", "pid", "job", "record_path", "jobs_done", "ready")
+
+    def __init__(self, process: Any, conn: Connection):
+        self.process = process
+        self.conn = conn
+        self.pid: Optional[int] = None
+        self.job: Optional[int] = None
+        self.record_path: Optional[str] = None
+        self.jobs_done = 0
+        self.ready = False
+
+
+class PluginWorkerPool:
+    """
+    Long-lived worker processes that keep one python-lane plugin imported and run many jobs with it.
+
+    Each worker resolves the plugin once (entry point + `_ensure_python_run_callable`), so the plugin's
+    own imports are paid per worker instead of per session. Every job gets the same run record as
+    `mdivicom run` (`<out>/_runs/<run_id>.json`, `started` -> `succeeded`/`failed`). Workers are
+    replaced after `max_jobs_per_worker` jobs or when their RSS exceeds `max_worker_rss_mb` after a
+    job, to contain leaks in plugin code. A worker that dies mid-job fails only that job; its run
+    record is finished as `failed` by the pool.
+
+    Jobs are dicts with `dataset_dir`, `out_dir`, `config` and optional `work_dir` / `dry_run`.
+    """
+
+    def __init__(
+            self,
+            plugin_ref: str,
+            *,
+            workers: int = 4,
+            backend: str = "auto",
+            max_jobs_per_worker: int = DEFAULT_MAX_JOBS_PER_WORKER,
+            max_worker_rss_mb: Optional[float] = None,
+            start_method: str = "spawn",
+    ):
+        if backend not in ("auto", "python"):
+            raise ValueError(f"Worker pools only run python-lane plugins (backend={backend})")
+        self.plugin_ref = plugin_ref
+        self.workers = max(1, workers)
+        self.backend = backend
+        self.max_jobs_per_worker = max(0, max_jobs_per_worker)
+        self.max_worker_rss_bytes = int(max_worker_rss_mb * 1024 * 1024) if max_worker_rss_mb else None
+        self._ctx = multiprocessing.get_context(start_method)
+        self._pool: List[_Worker] = []
+        self.workers_started = 0
+        self.workers_recycled = 0
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.plugin_ref, self.backend, self.max_jobs_per_worker, self.max_worker_rss_bytes),
+            name=f"mdivicom-worker-{self.workers_started}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        self.workers_started += 1
+        worker = _Worker(process, parent_conn)
+        self._pool.append(worker)
+        return worker
+
+    def _remove(self, worker: _Worker) -> None:
+        self._pool.remove(worker)
+        worker.conn.close()
+        worker.process.join(timeout=5)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join()
+
+    def map(
+            self,
+            jobs: Iterable[Dict[str, Any]],
+            on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Run all jobs; returns one result dict per job, in job order.
+
+        Results carry `index`, `dataset_dir`, `out_dir`, `run_id`, `record_path`, `status`
+        (`succeeded`/`failed`), `error` and the worker `pid`. `on_result` is called in the
+        calling process as each job finishes.
+        """
+        jobs = list(jobs)
+        results: List[Dict[str, Any]] = [
+            {"index": i, "dataset_dir": str(job["dataset_dir"]), "out_dir": str(job["out_dir"]), "run_id": None, "record_path": None, "status": None, "error": None, "pid": None}
+            for i, job in enumerate(jobs)
+        ]
+        pending = list(range(len(jobs) - 1, -1, -1))  # popped from the end
+        remaining = len(jobs)
+
+        def finish(index: int, status: str, error: Optional[str]) -> None:
+            nonlocal remaining
+            results[index]["status"] = status
+            results[index]["error"] = error
+            remaining -= 1
+            if on_result is not None:
+                on_result(results[index])
+
+        try:
+            while remaining:
+                while pending and len(self._pool) < min(self.workers, remaining):
+                    self._spawn()
+                for worker in self._pool:
+                    if worker.ready and worker.job is None and pending:
+                        worker.job = pending.pop()
+                        results[worker.job]["pid"] = worker.pid
+                        worker.conn.send((worker.job, jobs[worker.job]))
+
+                by_handle: Dict[Any, _Worker] = {}
+                for worker in self._pool:
+                    by_handle[worker.conn] = worker
+                    by_handle[worker.process.sentinel] = worker
+                for handle in wait(list(by_handle)):
+                    worker = by_handle[handle]
+                    if worker not in self._pool:
+                        continue  # already removed via its other handle
+                    if handle is not worker.conn and worker.conn.poll():
+                        continue  # read what the worker sent before it exited first
+                    try:
+                        message = worker.conn.recv() if handle is worker.conn else None
+                    except EOFError:
+                        message = None
+                    if message is None:
+                        self._lost(worker, finish)
+                        continue
+                    kind = message[0]
+                    if kind == "ready":
+                        worker.ready, worker.pid = True, message[1]
+                    elif kind == "init_failed":
+                        raise RuntimeError(f"Worker could not load plugin {self.plugin_ref}: {message[1]}")
+                    elif kind == "started":
+                        _, index, run_id, record_path = message
+                        results[index]["run_id"], results[index]["record_path"] = run_id, record_path
+                        worker.record_path = record_path
+                    elif kind == "done":
+                        _, index, status, error, retire = message
+                        worker.job, worker.record_path = None, None
+                        worker.jobs_done += 1
+                        finish(index, status, error)
+                        if retire is not None:
+                            self.workers_recycled += 1
+                            self._remove(worker)
+        finally:
+            self.close()
+        return results
+
+    def _lost(self, worker: _Worker, finish: Callable[[int, str, Optional[str]], None]) -> None:
+        """A worker exited without being asked to: fail its current job and drop it."""
+        index = worker.job
+        self._remove(worker)
+        if not worker.ready:
+            raise RuntimeError(f"Worker for plugin {self.plugin_ref} exited during startup (exit code {worker.process.exitcode})")
+        if index is None:
+            return
+        error = f"WorkerExited: worker {worker.pid} exited with code {worker.process.exitcode}"
+        if worker.record_path is not None:
+            finish_run_record(Path(worker.record_path), status="failed", error=error)
+        finish(index, "failed", error)
+
+    def close(self) -> None:
+        for worker in list(self._pool):
+            if not worker.ready:
+                # still importing the plugin and holding no job: no need to wait for it
+                worker.process.terminate()
+            else:
+                try:
+                    worker.conn.send(None)
+                except OSError:
+                    pass
+            self._remove(worker)
+
+    def __enter__(self) -> "PluginWorkerPool":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
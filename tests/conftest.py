@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pytest
+
+_PLUGIN_MODULE = '''\
+import os
+
+
+def get_plugin():
+    return {
+        "meta": {"api_version": "mdivicomtools.plugin.v0.1", "id": "testplug", "kind": "python", "version": "0.1.0", "publisher": "tests"},
+        "entry": {"callable": "mdivicom_testplug:run"},
+    }
+
+
+def run(dataset_dir, out_dir, config, *, work_dir=None, dry_run=False):
+    action = config.get("action")
+    if action == "fail":
+        raise ValueError(f"cannot process {dataset_dir.name}")
+    if action == "exit":
+        os._exit(3)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / f"{dataset_dir.name}.pid").write_text(str(os.getpid()), encoding="utf-8")
+'''
+
+
+@pytest.fixture
+def plugin_site(tmp_path, monkeypatch):
+    """
+    Install the `testplug` plugin distribution in a temporary site directory that is on sys.path
+    and PYTHONPATH for the test. `config={"action": "fail"|"exit"}` makes a run raise or kill its process.
+    """
+    site = tmp_path / "site"
+    dist_info = site / "mdivicom_testplug-0.1.0.dist-info"
+    dist_info.mkdir(parents=True)
+    (site / "mdivicom_testplug.py").write_text(_PLUGIN_MODULE, encoding="utf-8")
+    (dist_info / "METADATA").write_text("Metadata-Version: 2.1\nName: mdivicom_testplug\nVersion: 0.1.0\n", encoding="utf-8")
+    (dist_info / "entry_points.txt").write_text("[mdivicomtools.plugins]\ntestplug = mdivicom_testplug:get_plugin\n", encoding="utf-8")
+    monkeypatch.syspath_prepend(str(site))
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join(p for p in (str(site), os.environ.get("PYTHONPATH", "")) if p))
+    yield site
+    sys.modules.pop("mdivicom_testplug", None)
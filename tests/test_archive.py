@@ -0,0 +1,89 @@
+import json
+import os
+
+import pytest
+
+from mdivicomtools.archive import PackError, index_path, pack, unpack
+
+
+def _packed(tmp_path):
+    src = tmp_path / "src"
+    (src / "x").mkdir(parents=True)
+    (src / "x" / "pwn").write_bytes(b"payload")
+    archive = tmp_path / "a.pack"
+    pack([src], archive)
+    return archive
+
+
+def _edit_index(archive, edit):
+    sidecar = index_path(archive)
+    index = json.loads(sidecar.read_text(encoding="utf-8"))
+    edit(index["members"])
+    sidecar.write_text(json.dumps(index), encoding="utf-8")
+
+
+def _symlink(path, target):
+    return {"mode": 0o777, "mtime_ns": 0, "path": path, "target": target, "type": "symlink"}
+
+
+def test_unpack_does_not_write_through_symlink_member(tmp_path):
+    archive = _packed(tmp_path)
+    outside = tmp_path / "outside"
+    outside.mkdir()
+
+    def edit(members):
+        file_member = next(m for m in members if m["type"] == "file")
+        file_member["path"] = "src/x/link/pwn"
+        members.insert(members.index(file_member), _symlink("src/x/link", str(outside)))
+
+    _edit_index(archive, edit)
+    dest = tmp_path / "dest"
+    with pytest.raises(PackError):
+        unpack(archive, dest, jobs=1)
+    assert list(outside.iterdir()) == []
+    assert not (dest / "src" / "x" / "link").is_symlink()
+    assert (dest / "src" / "x" / "link" / "pwn").read_bytes() == b"payload"
+
+
+def test_unpack_refuses_existing_symlink_leaving_destination(tmp_path):
+    archive = _packed(tmp_path)
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    dest = tmp_path / "dest"
+    (dest / "src").mkdir(parents=True)
+    os.symlink(outside, dest / "src" / "x")
+    with pytest.raises(PackError):
+        unpack(archive, dest, jobs=1)
+    assert list(outside.iterdir()) == []
+
+
+@pytest.mark.parametrize("target", ["/etc", "../../..", "../../../outside"])
+def test_unpack_refuses_escaping_symlink_targets(tmp_path, target):
+    archive = _packed(tmp_path)
+    _edit_index(archive, lambda members: members.append(_symlink("src/x/link", target)))
+    dest = tmp_path / "dest"
+    with pytest.raises(PackError, match="src/x/link"):
+        unpack(archive, dest, jobs=1)
+    assert (dest / "src" / "x" / "pwn").read_bytes() == b"payload"
+    assert not os.path.lexists(dest / "src" / "x" / "link")
+
+
+def test_unpack_refuses_symlink_chain_leaving_destination(tmp_path):
+    archive = _packed(tmp_path)
+    # both targets stay inside lexically, but "up" resolves to dest itself, so "up/../.." lands outside
+    _edit_index(archive, lambda members: members.extend([_symlink("src/x/up", "../.."), _symlink("src/x/out", "up/../..")]))
+    dest = tmp_path / "dest"
+    with pytest.raises(PackError, match="src/x/out"):
+        unpack(archive, dest, jobs=1)
+    assert os.path.realpath(dest / "src" / "x" / "up") == str(dest.resolve())
+    assert not os.path.lexists(dest / "src" / "x" / "out")
+
+
+def test_unpack_internal_and_allowed_external_symlinks(tmp_path):
+    archive = _packed(tmp_path)
+    _edit_index(archive, lambda members: members.extend([_symlink("src/x/same", "pwn"), _symlink("src/x/etc", "/etc")]))
+    dest = tmp_path / "dest"
+    summary = unpack(archive, dest, jobs=1, allow_external_symlinks=True)
+    assert summary["failed"] == {}
+    assert (dest / "src" / "x" / "same").read_bytes() == b"payload"
+    assert os.readlink(dest / "src" / "x" / "etc") == "/etc"
@@ -0,0 +1,52 @@
+import json
+
+from benchmarks import compare, core
+from benchmarks.common import compare_results
+from benchmarks.synthetic import TreeSpec, generate_tree, session_table
+from mdivicomtools.inventory import scan_dataset
+
+
+def _files(root):
+    return {str(p.relative_to(root)): p.read_bytes() for p in sorted(root.rglob("*")) if p.is_file()}
+
+
+def test_generate_tree_is_deterministic_and_scannable(tmp_path):
+    spec = TreeSpec(sessions=3, stream_types=("video", "audio"), streams_per_type=2, files_per_stream=4, depth=2, file_size=32, seed=7)
+    counts = generate_tree(tmp_path / "a", spec)
+    assert counts == {"data_files": 48, "sidecars": 15, "stream_dirs": 12, "sessions": 3}
+    generate_tree(tmp_path / "b", spec)
+    assert _files(tmp_path / "a") == _files(tmp_path / "b")
+    assert len(list((tmp_path / "a").rglob("chunk-*.bin"))) == spec.data_files == 48
+    assert next((tmp_path / "a").rglob("chunk-*.bin")).parent.name == "d01"
+
+    inventory = scan_dataset(tmp_path / "a", use_cache=False)
+    assert len(inventory) == 3
+    assert sorted(s.stream_id for s in inventory.sessions[0].streams) == ["str-audio-00", "str-audio-01", "str-video-00", "str-video-01"]
+    assert [row["recording_id"] for row in session_table(spec)] == [s.label for s in inventory]
+
+
+def test_for_file_count_rounds_sessions_up():
+    spec = TreeSpec.for_file_count(1001, files_per_stream=10)
+    assert spec.files_per_session == 60 and spec.sessions == 17 and spec.data_files >= 1001
+
+
+def test_compare_results_flags_regressions():
+    baseline = {"results": [{"name": "a", "size": 1, "seconds": 1.0}, {"name": "b", "size": 1, "seconds": 1.0}]}
+    current = {"results": [{"name": "a", "size": 1, "seconds": 1.1}, {"name": "b", "size": 1, "seconds": 1.5}, {"name": "c", "size": 1, "seconds": 1.0}]}
+    rows = compare_results(baseline, current, threshold=1.2)
+    assert [(r["name"], r["regression"]) for r in rows] == [("a", False), ("b", True), ("c", False)]
+    assert rows[2]["ratio"] is None
+
+
+def test_core_suite_smoke(tmp_path, capsys):
+    out = tmp_path / "results" / "core.json"
+    workdir = tmp_path / "scratch"
+    workdir.mkdir()
+    argv = ["--sizes", "60", "--repeats", "1", "--file-size", "8", "--workdir", str(workdir), "--out", str(out)]
+    assert core.main(argv) == 0
+    results = json.loads(out.read_text(encoding="utf-8"))
+    assert results["suite"] == "core" and results["results"]
+    assert all(r["size"] >= 60 and r["seconds"] >= 0 for r in results["results"])
+    assert list(workdir.iterdir()) == []  # generated trees are removed without --keep
+    assert compare.main([str(out), str(out), "--fail-on-regression"]) == 0
+    assert "benchmark" in capsys.readouterr().out
@@ -0,0 +1,42 @@
+import json
+import sys
+
+from benchmarks import runner
+from benchmarks.common import make_workdir
+
+
+def test_make_workdir_creates_nested_workdir(tmp_path):
+    nested = tmp_path / "a" / "b"
+    scratch = make_workdir("bench-", nested)
+    assert scratch.is_dir() and scratch.parent == nested and scratch.name.startswith("bench-")
+    assert make_workdir("bench-", None, tmp_path).parent == tmp_path
+
+
+def test_install_stub_plugins_are_discoverable(tmp_path, monkeypatch):
+    site = tmp_path / "site"
+    ids = runner.install_stub_plugins(site, 3)
+    assert ids == ["bench-00000", "bench-00001", "bench-00002"]
+    entry_points = (site / "mdibenchstub_00002-0.1.0.dist-info" / "entry_points.txt").read_text(encoding="utf-8")
+    assert "bench-00002 = mdibenchstub_00002:get_plugin" in entry_points
+
+    monkeypatch.syspath_prepend(str(site))
+    from mdivicomtools.plugin_registry import list_plugins
+
+    plugins = {p["id"]: p for p in list_plugins()}
+    assert all(plugins[i]["kind"] == "python" for i in ids)
+    for module in list(sys.modules):
+        if module.startswith(runner.STUB_PREFIX):
+            monkeypatch.delitem(sys.modules, module)
+
+
+def test_runner_main_smoke(tmp_path):
+    out = tmp_path / "runner.json"
+    workdir = tmp_path / "scratch" / "nested"
+    argv = ["--plugins", "1", "--repeats", "1", "--batch-sessions", "1", "--batch-subprocess", "0", "--batch-pool", "0", "--batch-plugins", "1"]
+    assert runner.main(argv + ["--workdir", str(workdir), "--out", str(out)]) == 0
+    payload = json.loads(out.read_text(encoding="utf-8"))
+    names = {r["name"] for r in payload["results"]}
+    assert {"python_startup", "cli_plugins_list", "cli_run", "stage_discover_plugins", "batch_in_process"} <= names
+    assert payload["params"]["plugins"] == [1]
+    # the per-run temp dir is removed, the requested workdir itself stays
+    assert workdir.is_dir() and list(workdir.iterdir()) == []
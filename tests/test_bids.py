@@ -0,0 +1,114 @@
+import json
+import os
+
+import pytest
+import yaml
+
+from mdivicomtools.bids import STATE_PATH, export_bids_view, plan_bids_view
+from mdivicomtools.inventory import scan_dataset
+
+
+def _write_yaml(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(yaml.safe_dump(data), encoding="utf-8")
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    root = tmp_path / "ds"
+    _write_yaml(root / "dataset_manifest.yaml", {"name": "demo", "task": "play"})
+    for ses, subject in (("ses-01", "sub-A1"), ("ses-02", "A1"), ("ses-03", None)):
+        session = root / "sessions" / ses
+        _write_yaml(session / f"{ses}_session.yaml", {"subject": subject} if subject else {})
+        video = session / "raw" / "video" / "str-video-01"
+        _write_yaml(video / "str-video-01_stream.yaml", {"fps": 30})
+        (video / "cam.mp4").write_bytes(ses.encode())
+        (video / ".hidden.mp4").write_bytes(b"h")
+        (video / "upload.mp4.part").write_bytes(b"p")
+    audio = root / "sessions" / "ses-01" / "raw" / "audio" / "str-mic"
+    _write_yaml(audio / "str-mic_stream.yaml", {"bids": {"acq": "room", "task": "talk"}, "rate": 48000})
+    (audio / "a.wav").write_bytes(b"1")
+    (audio / "b.wav").write_bytes(b"22")
+    return root
+
+
+def _tree(view):
+    return sorted(str(p.relative_to(view)) for p in view.rglob("*") if not p.is_dir() and ".mdivicom" not in p.parts)
+
+
+def test_plan_maps_sessions_and_streams_to_bids_paths(dataset):
+    entries, issues = plan_bids_view(scan_dataset(dataset, use_cache=False))
+    by_path = {e.path: e for e in entries}
+    assert issues["skipped_sessions"] == {"ses-03": "no subject in session sidecar"}
+    assert sorted(p for p, e in by_path.items() if e.is_link) == [
+        "sub-A1/ses-01/beh/sub-A1_ses-01_task-play_acq-video01_video.mp4",
+        "sub-A1/ses-01/beh/sub-A1_ses-01_task-talk_acq-room_run-1_audio.wav",
+        "sub-A1/ses-01/beh/sub-A1_ses-01_task-talk_acq-room_run-2_audio.wav",
+        "sub-A1/ses-02/beh/sub-A1_ses-02_task-play_acq-video01_video.mp4",
+    ]
+    sidecar = json.loads(by_path["sub-A1/ses-01/beh/sub-A1_ses-01_task-talk_acq-room_audio.json"].content)
+    assert sidecar["TaskName"] == "talk" and sidecar["OpenSIDS"]["stream"] == {"rate": 48000}
+    assert by_path["participants.tsv"].content == b"participant_id\nsub-A1\n"
+    assert json.loads(by_path["dataset_description.json"].content)["Name"] == "demo"
+
+
+def test_export_links_payloads_and_reexport_is_incremental(dataset, tmp_path):
+    view = tmp_path / "view"
+    first = export_bids_view(dataset, view, use_cache=False)
+    assert first["errors"] == {} and (first["linked"], first["written"], first["unchanged"]) == (4, 6, 0)
+    link = view / "sub-A1/ses-02/beh/sub-A1_ses-02_task-play_acq-video01_video.mp4"
+    assert link.is_symlink() and not os.path.isabs(os.readlink(link)) and link.read_bytes() == b"ses-02"
+
+    again = export_bids_view(dataset, view, use_cache=False)
+    assert (again["linked"], again["written"], again["unchanged"], again["removed"]) == (0, 0, 10, 0)
+
+    # a new payload file adds runs, a removed session disappears from the view
+    (dataset / "sessions/ses-02/raw/video/str-video-01/cam2.mp4").write_bytes(b"x")
+    for path in sorted((dataset / "sessions/ses-01").rglob("*"), key=lambda p: len(p.parts), reverse=True):
+        path.rmdir() if path.is_dir() else path.unlink()
+    (dataset / "sessions/ses-01").rmdir()
+    third = export_bids_view(dataset, view, use_cache=False)
+    assert third["errors"] == {} and third["linked"] == 2 and third["removed"] == 6
+    assert _tree(view) == [
+        "dataset_description.json",
+        "participants.tsv",
+        "sub-A1/ses-02/beh/sub-A1_ses-02_task-play_acq-video01_run-1_video.mp4",
+        "sub-A1/ses-02/beh/sub-A1_ses-02_task-play_acq-video01_run-2_video.mp4",
+        "sub-A1/ses-02/beh/sub-A1_ses-02_task-play_acq-video01_video.json",
+        "sub-A1/sub-A1_sessions.tsv",
+    ]
+    assert not (view / "sub-A1/ses-01").exists()
+
+
+def test_export_never_touches_unowned_files(dataset, tmp_path):
+    view = tmp_path / "view"
+    (view / "participants.tsv").parent.mkdir(parents=True)
+    (view / "participants.tsv").write_text("mine\n", encoding="utf-8")
+    (view / "README").write_text("keep\n", encoding="utf-8")
+    summary = export_bids_view(dataset, view, use_cache=False)
+    assert summary["errors"] == {"participants.tsv": "exists and is not managed by this view"}
+    assert (view / "participants.tsv").read_text(encoding="utf-8") == "mine\n"
+    state = json.loads((view / STATE_PATH).read_text(encoding="utf-8"))
+    assert "participants.tsv" not in state["paths"] and "README" not in state["paths"]
+    export_bids_view(dataset, view, use_cache=False)
+    assert (view / "README").exists()
+
+
+def test_hardlink_mode_and_dry_run(dataset, tmp_path):
+    view = tmp_path / "view"
+    dry = export_bids_view(dataset, view, link="hardlink", dry_run=True, use_cache=False)
+    assert dry["linked"] == 4 and dry["written"] == 6 and not view.exists()
+    export_bids_view(dataset, view, link="hardlink", use_cache=False)
+    link = view / "sub-A1/ses-01/beh/sub-A1_ses-01_task-play_acq-video01_video.mp4"
+    assert not link.is_symlink() and os.path.samefile(link, dataset / "sessions/ses-01/raw/video/str-video-01/cam.mp4")
+    assert export_bids_view(dataset, view, link="hardlink", use_cache=False)["unchanged"] == 10
+    # switching link mode replaces every link in place
+    assert export_bids_view(dataset, view, link="symlink", use_cache=False)["linked"] == 4
+    assert link.is_symlink()
+
+
+def test_export_rejects_view_inside_dataset_and_unknown_link_mode(dataset):
+    with pytest.raises(ValueError, match="outside the dataset"):
+        export_bids_view(dataset, dataset / "derivatives" / "bids", use_cache=False)
+    with pytest.raises(ValueError, match="Unknown link mode"):
+        export_bids_view(dataset, dataset.parent / "view", link="copy")
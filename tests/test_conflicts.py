@@ -0,0 +1,87 @@
+import os
+import unicodedata
+
+import pytest
+
+from mdivicomtools import vc_rename
+from mdivicomtools.utils.conflicts import CONFLICT_CLASSES, analyze_conflicts
+from mdivicomtools.utils.plan import TransformationPlan
+
+
+def _counts(report):
+    return {k: v for k, v in report.counts.items() if v}
+
+
+@pytest.fixture
+def src(tmp_path):
+    src = tmp_path / "src"
+    (src / "d").mkdir(parents=True)
+    for name in ("a", "b", "c"):
+        (src / name).write_text(name)
+    return src
+
+
+def test_duplicate_and_collisions_within_plan(tmp_path, src):
+    dst = tmp_path / "dst"
+    nfc, nfd = (unicodedata.normalize(form, "café") for form in ("NFC", "NFD"))
+    plan = {src / "a": dst / "x", src / "b": dst / "x", src / "c": dst / "X", src / "d": dst / nfc}
+    plan[tmp_path / "e"] = dst / nfd
+    report = analyze_conflicts(plan)
+    assert _counts(report) == {"duplicate_destination": 1, "case_collision": 1, "unicode_normalization_collision": 1}
+    assert report.entries_checked == 5
+    assert report.samples["duplicate_destination"] == [(str(dst / "x"), str(src / "b"))]
+    assert _counts(analyze_conflicts(plan, case_insensitive_target=False)) == {"duplicate_destination": 1}
+
+
+def test_conflicts_with_existing_tree(tmp_path, src):
+    dst = tmp_path / "dst"
+    (dst / "dir").mkdir(parents=True)
+    (dst / "file").write_text("")
+    (dst / "Upper").write_text("")
+    plan = {
+        src / "a": dst / "file",  # overwritten, but also needed as a directory by the next-but-one entry
+        src / "b": dst / "dir",  # file onto a directory
+        src / "c": dst / "file" / "below",  # below an existing file
+        src / "d": dst / "upper",  # case collision with an existing entry
+    }
+    report = analyze_conflicts(plan)
+    assert _counts(report) == {"exists_at_destination": 1, "file_directory_clash": 3, "case_collision": 1}
+    assert report.directories_listed == 1
+
+    relaxed = analyze_conflicts(plan, allow_existing=True, case_insensitive_target=False)
+    assert _counts(relaxed) == {"file_directory_clash": 3}
+    assert _counts(analyze_conflicts(plan, check_existing=False)) == {"file_directory_clash": 1}
+
+
+def test_directory_merge_and_planned_directory_clash(tmp_path, src):
+    dst = tmp_path / "dst"
+    (dst / "d").mkdir(parents=True)
+    plan = TransformationPlan({src / "d": dst / "d", src / "a": dst / "x", src / "b": dst / "x" / "y"})
+    report = analyze_conflicts(plan)
+    assert _counts(report) == {"exists_at_destination": 1, "file_directory_clash": 1}
+    assert _counts(analyze_conflicts(plan, allow_existing=True)) == {"file_directory_clash": 1}
+
+
+def test_report_summary_and_samples(tmp_path, src):
+    plan = {tmp_path / f"s{i}": tmp_path / "dst" / "same" for i in range(5)}
+    report = analyze_conflicts(plan, max_samples=2)
+    assert report.total == 4 and bool(report)
+    assert len(report.samples["duplicate_destination"]) == 2
+    assert "... and 2 more" in report.summary()
+    assert set(report.to_dict()["counts"]) == set(CONFLICT_CLASSES)
+    assert not analyze_conflicts({})
+
+
+def test_vc_rename_existing_destination_opt_out(tmp_path):
+    base = tmp_path / "base"
+    (base / "sub").mkdir(parents=True)
+    (base / "sub" / "a.txt").write_text("new")
+    existing = base / "transformed" / "sub" / "a.txt"
+    existing.parent.mkdir(parents=True)
+    existing.write_text("old")
+
+    vc_rename(str(base), ["zzz"], ["y"], "", dryrun=False)
+    assert existing.read_text() == "old"
+
+    vc_rename(str(base), ["zzz"], ["y"], "", dryrun=False, allow_existing=True)
+    assert existing.read_text() == "new"
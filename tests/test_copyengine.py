@@ -0,0 +1,42 @@
+import os
+import shutil
+
+import pytest
+
+from mdivicomtools.utils.copyengine import copy_file, copy_file2
+from mdivicomtools.utils.rename import apply_transformations
+
+
+def test_copy_file_same_file_raises_and_keeps_source(tmp_path):
+    src = tmp_path / "a.bin"
+    src.write_bytes(b"payload")
+    with pytest.raises(shutil.SameFileError):
+        copy_file(src, src)
+    assert src.read_bytes() == b"payload"
+
+
+def test_copy_file_hardlink_is_same_file(tmp_path):
+    src = tmp_path / "a.bin"
+    src.write_bytes(b"payload")
+    link = tmp_path / "b.bin"
+    os.link(src, link)
+    with pytest.raises(shutil.SameFileError):
+        copy_file(src, link)
+    with pytest.raises(shutil.SameFileError):
+        copy_file2(src, tmp_path)
+    assert src.read_bytes() == b"payload"
+
+
+def test_apply_transformations_onto_itself_keeps_source(tmp_path):
+    src = tmp_path / "a.bin"
+    src.write_bytes(b"payload")
+    apply_transformations({src: src}, dryrun=False, jobs=1)
+    assert src.read_bytes() == b"payload"
+
+
+def test_copy_file_copies(tmp_path):
+    src = tmp_path / "a.bin"
+    src.write_bytes(b"x" * 100000)
+    dst = tmp_path / "b.bin"
+    assert copy_file(src, dst) == 100000
+    assert dst.read_bytes() == src.read_bytes()
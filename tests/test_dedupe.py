@@ -0,0 +1,120 @@
+import os
+
+import pytest
+
+from mdivicomtools.utils.dedupe import DigestCache, drop_duplicates_from_plan, find_duplicates, link_duplicates
+from mdivicomtools.utils.plan import TransformationPlan
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "data"
+    (root / "a").mkdir(parents=True)
+    (root / "b" / "deep").mkdir(parents=True)
+    (root / ".hidden").mkdir()
+    small = b"small-file"
+    big = b"H" * 64 + b"middle" + b"T" * 64
+    files = {
+        "a/small.txt": small,
+        "b/small.txt": small,
+        "b/deep/small-copy.txt": small,
+        "a/big.bin": big,
+        "b/big.bin": big,
+        # same size and same edges as big.bin, different middle: only the full digest tells them apart
+        "b/deep/big-other.bin": b"H" * 64 + b"MIDDLE" + b"T" * 64,
+        "a/unique.bin": b"u" * 140,
+        "a/empty": b"",
+        "b/empty": b"",
+        ".hidden/small.txt": small,
+    }
+    for rel, content in files.items():
+        (root / rel).write_bytes(content)
+    return root
+
+
+def _rel(root, paths):
+    return [os.path.relpath(p, root) for p in paths]
+
+
+def test_find_duplicates_stages(tree):
+    report = find_duplicates([tree], edge_size=16, jobs=2)
+    assert [(s.size, _rel(tree, s.paths)) for s in report.sets] == [
+        (134, ["a/big.bin", "b/big.bin"]),
+        (10, ["a/small.txt", "b/small.txt", "b/deep/small-copy.txt"]),
+    ]
+    assert report.duplicate_files == 3 and report.wasted_bytes == 134 + 20
+    stats = report.stats
+    assert stats["files_scanned"] == 9
+    assert stats["size_candidates"] == 6
+    assert stats["partial_hashed"] == 6
+    assert stats["full_hashed"] == 3  # small files are fully covered by the partial digest
+    assert report.to_dict()["sets"][1]["keep"] == str(tree / "a" / "small.txt")
+    assert "3 redundant files" in report.summary()
+
+
+def test_existing_hardlinks_are_not_duplicates(tree):
+    os.link(tree / "a" / "unique.bin", tree / "b" / "unique-link.bin")
+    os.link(tree / "b" / "small.txt", tree / "b" / "deep" / "small-link.txt")
+    report = find_duplicates([tree / "a", tree / "b"], edge_size=16)
+    assert report.stats["already_linked"] == 2
+    small = next(s for s in report.sets if s.size == 10)
+    assert _rel(tree, small.paths) == ["a/small.txt", "b/small.txt", "b/deep/small-copy.txt"]
+    assert _rel(tree, small.names(small.paths[1])) == ["b/small.txt", "b/deep/small-link.txt"]
+    assert all(s.size != 140 for s in report.sets)
+
+
+def test_digest_cache_skips_unchanged_files(tree, tmp_path):
+    cache_path = tmp_path / "digests.json"
+    first = find_duplicates([tree], cache=DigestCache(cache_path, edge_size=16))
+    assert first.stats["cache_hits"] == 0 and cache_path.exists()
+
+    second = find_duplicates([tree], cache=DigestCache(cache_path, edge_size=16))
+    assert second.stats["partial_hashed"] == second.stats["full_hashed"] == 0
+    assert second.stats["cache_hits"] == 9
+    assert [s.paths for s in second.sets] == [s.paths for s in first.sets]
+
+    (tree / "b" / "big.bin").write_bytes(b"H" * 64 + b"middlx" + b"T" * 64)
+    third = find_duplicates([tree], cache=DigestCache(cache_path, edge_size=16))
+    assert (third.stats["partial_hashed"], third.stats["full_hashed"]) == (1, 1)
+    assert [s.size for s in third.sets] == [10]
+
+    # a different edge size makes the cache useless rather than wrong
+    assert len(DigestCache(cache_path, edge_size=32)) == 0
+
+
+def test_link_duplicates_hardlinks_and_reports_changes(tree):
+    report = find_duplicates([tree], edge_size=16)
+    assert link_duplicates(report, dry_run=True) == {"mode": "hardlink", "dry_run": True, "linked": 3, "bytes_reclaimed": 154, "failed": {}}
+    assert os.stat(tree / "a" / "big.bin").st_nlink == 1
+
+    (tree / "b" / "deep" / "small-copy.txt").write_bytes(b"grown since the scan")
+    result = link_duplicates(report)
+    assert result["linked"] == 2 and result["bytes_reclaimed"] == 144
+    assert list(result["failed"]) == [str(tree / "b" / "deep" / "small-copy.txt")]
+    assert os.path.samefile(tree / "a" / "big.bin", tree / "b" / "big.bin")
+    assert os.path.samefile(tree / "a" / "small.txt", tree / "b" / "small.txt")
+    assert (tree / "b" / "deep" / "small-copy.txt").read_bytes() == b"grown since the scan"
+    assert not [p for p in tree.rglob(".*.tmp")]
+    assert not find_duplicates([tree], edge_size=16)
+
+    with pytest.raises(ValueError, match="Unknown link mode"):
+        link_duplicates(report, mode="symlink")
+
+
+def test_drop_duplicates_from_plan(tree, tmp_path):
+    report = find_duplicates([tree], edge_size=16)
+    dst = tmp_path / "dst"
+    mapping = {
+        str(tree / "b" / "small.txt"): str(dst / "1.txt"),
+        str(tree / "b" / "deep" / "small-copy.txt"): str(dst / "2.txt"),
+        str(tree / "a" / "big.bin"): str(dst / "big.bin"),
+        str(tree / "a" / "unique.bin"): str(dst / "unique.bin"),
+    }
+    plan, dropped = drop_duplicates_from_plan(mapping, report)
+    # a/small.txt is not planned, so the first planned member of the set is kept
+    assert dropped == {str(tree / "b" / "deep" / "small-copy.txt"): str(tree / "b" / "small.txt")}
+    assert isinstance(plan, TransformationPlan)
+    assert sorted(map(str, plan.keys())) == sorted(k for k in mapping if k not in dropped)
+
+    plan2, dropped2 = drop_duplicates_from_plan(TransformationPlan(mapping), report)
+    assert dropped2 == dropped and len(plan2) == 3
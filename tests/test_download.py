@@ -0,0 +1,216 @@
+import hashlib
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from mdivicomtools.download import PART_SUFFIX, DownloadManager, DownloadTask
+
+_RANGE = re.compile(r"bytes=(\d+)-$")
+
+
+class Server:
+    """Local HTTP stand-in: `files` at `/<name>`, optional ETag / Range support and dropped responses."""
+
+    def __init__(self, files, *, etag=True, ranges=True, drop=0, shift=0):
+        self.files = files
+        self.etag = etag
+        self.ranges = ranges
+        self.drop = drop  # the first `drop` responses send half their body, then close
+        self.shift = shift  # 206 responses start this many bytes off (a broken server)
+        self.log = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                data = server.files[self.path.lstrip("/")]
+                tag = f'"{hashlib.sha256(data).hexdigest()[:16]}"'
+                server.log.append({"range": self.headers.get("Range"), "if_range": self.headers.get("If-Range")})
+                match = _RANGE.match(self.headers.get("Range") or "")
+                start, status = 0, 200
+                if match and server.ranges and self.headers.get("If-Range") in (None, tag):
+                    start = int(match.group(1))
+                    if start >= len(data):
+                        self.send_response(416)
+                        self.send_header("Content-Range", f"bytes */{len(data)}")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    start = max(0, start - server.shift)
+                    status = 206
+                body = data[start:]
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                if server.etag:
+                    self.send_header("ETag", tag)
+                if status == 206:
+                    self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+                self.end_headers()
+                if server.drop:
+                    server.drop -= 1
+                    self.wfile.write(body[: len(body) // 2])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    return
+                self.wfile.write(body)
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.handle_error = lambda request, address: None  # clients hanging up mid-body
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        self.etag_of = lambda name: f'"{hashlib.sha256(files[name]).hexdigest()[:16]}"'
+        threading.Thread(target=self._httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(files, **kwargs):
+        servers.append(Server(files, **kwargs))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+def _sha256(data):
+    return "sha256:" + hashlib.sha256(data).hexdigest()
+
+
+def _fetch(server, dest, name="f.bin", **kwargs):
+    task_kwargs = {k: kwargs.pop(k) for k in ("checksum", "size") if k in kwargs}
+    with DownloadManager(backoff=0, **kwargs) as manager:
+        return manager.download(DownloadTask(f"{server.url}/{name}", dest, **task_kwargs))
+
+
+def _stale_part(dest, data, validator=None, url=None):
+    (dest.parent / (dest.name + PART_SUFFIX)).write_bytes(data)
+    if validator is not None:
+        (dest.parent / f".{dest.name}.part.json").write_text(json.dumps({"url": url, "validator": validator}), encoding="utf-8")
+
+
+def _leftovers(directory):
+    return sorted(p.name for p in directory.iterdir())
+
+
+def test_download_verifies_checksum_and_cleans_up(tmp_path, serve):
+    data = bytes(range(256)) * 400
+    server = serve({"f.bin": data})
+    result = _fetch(server, tmp_path / "f.bin", checksum=_sha256(data))
+    assert result["status"] == "downloaded"
+    assert (tmp_path / "f.bin").read_bytes() == data
+    assert _leftovers(tmp_path) == ["f.bin"]
+
+
+def test_dropped_connection_is_retried_and_resumed(tmp_path, serve):
+    data = b"abcdefgh" * 20000
+    server = serve({"f.bin": data}, drop=2)
+    result = _fetch(server, tmp_path / "f.bin", checksum=_sha256(data), retries=3)
+    assert result["status"] == "resumed"
+    assert (tmp_path / "f.bin").read_bytes() == data
+    assert [r["range"] is not None for r in server.log] == [False, True, True]
+    assert all(r["if_range"] == server.etag_of("f.bin") for r in server.log[1:])
+
+
+def test_dropped_connection_without_etag_still_resumes_within_the_call(tmp_path, serve):
+    data = b"abcdefgh" * 20000
+    server = serve({"f.bin": data}, drop=1, etag=False)
+    result = _fetch(server, tmp_path / "f.bin", checksum=_sha256(data), retries=1)
+    assert result["status"] == "resumed"
+    assert (tmp_path / "f.bin").read_bytes() == data
+
+
+def test_part_is_resumed_by_a_later_run(tmp_path, serve):
+    data = b"0123456789" * 20000
+    server = serve({"f.bin": data}, drop=1)
+    first = _fetch(server, tmp_path / "f.bin", checksum=_sha256(data), retries=0)
+    assert first["status"] == "failed"
+    assert 0 < (tmp_path / ("f.bin" + PART_SUFFIX)).stat().st_size < len(data)
+    second = _fetch(server, tmp_path / "f.bin", checksum=_sha256(data))
+    assert second["status"] == "resumed"
+    assert server.log[-1]["range"] is not None
+    assert (tmp_path / "f.bin").read_bytes() == data
+    assert _leftovers(tmp_path) == ["f.bin"]
+
+
+def test_416_with_a_longer_stale_part_restarts(tmp_path, serve):
+    data = b"x" * 1000
+    server = serve({"f.bin": data})
+    dest = tmp_path / "f.bin"
+    _stale_part(dest, b"z" * 1500, server.etag_of("f.bin"), f"{server.url}/f.bin")
+    result = _fetch(server, dest)
+    assert result["status"] == "downloaded"
+    assert dest.read_bytes() == data
+
+
+def test_416_with_a_complete_part_is_kept(tmp_path, serve):
+    data = b"x" * 1000
+    server = serve({"f.bin": data})
+    dest = tmp_path / "f.bin"
+    _stale_part(dest, data, server.etag_of("f.bin"), f"{server.url}/f.bin")
+    result = _fetch(server, dest, checksum=_sha256(data))
+    assert result["status"] == "resumed"
+    assert dest.read_bytes() == data
+
+
+@pytest.mark.parametrize("validator", [None, '"from-an-older-version"'])
+def test_shorter_part_of_an_older_version_is_not_appended_to(tmp_path, serve, validator):
+    data = b"x" * 10
+    server = serve({"f.bin": data})
+    dest = tmp_path / "f.bin"
+    _stale_part(dest, b"y" * 5, validator, f"{server.url}/f.bin")
+    result = _fetch(server, dest)
+    assert result["status"] == "downloaded"
+    assert dest.read_bytes() == data
+
+
+@pytest.mark.parametrize("drops", [1, 2])
+def test_server_ignoring_range_gets_a_full_download(tmp_path, serve, drops):
+    data = b"abcdefgh" * 20000
+    server = serve({"f.bin": data}, drop=drops, ranges=False)
+    result = _fetch(server, tmp_path / "f.bin", checksum=_sha256(data), retries=drops)
+    assert result["status"] == "downloaded"
+    assert (tmp_path / "f.bin").read_bytes() == data
+
+
+def test_misplaced_content_range_restarts(tmp_path, serve):
+    data = bytes(range(256)) * 100
+    server = serve({"f.bin": data}, shift=7)
+    dest = tmp_path / "f.bin"
+    _stale_part(dest, data[:1000], server.etag_of("f.bin"), f"{server.url}/f.bin")
+    result = _fetch(server, dest, checksum=_sha256(data))
+    assert result["status"] == "downloaded"
+    assert dest.read_bytes() == data
+
+
+def test_restart_survives_a_dropped_connection(tmp_path, serve):
+    # the restart (If-Range mismatch) resets the hasher, then the connection drops and the retry resumes
+    data = b"abcdefgh" * 20000
+    server = serve({"f.bin": data}, drop=1)
+    dest = tmp_path / "f.bin"
+    _stale_part(dest, b"y" * 5000, '"from-an-older-version"', f"{server.url}/f.bin")
+    result = _fetch(server, dest, checksum=_sha256(data), retries=1)
+    assert result["status"] == "resumed"
+    assert [r["if_range"] for r in server.log] == ['"from-an-older-version"', server.etag_of("f.bin")]
+    assert dest.read_bytes() == data
+
+
+def test_checksum_mismatch_discards_the_part(tmp_path, serve):
+    server = serve({"f.bin": b"payload"})
+    result = _fetch(server, tmp_path / "f.bin", checksum=_sha256(b"other"))
+    assert result["status"] == "failed"
+    assert result["error"].startswith("ChecksumMismatch")
+    assert _leftovers(tmp_path) == []
@@ -0,0 +1,123 @@
+import json
+import logging
+import socket
+
+import pytest
+
+from mdivicomtools.utils import events as events_mod
+from mdivicomtools.utils.events import DEFAULT_MIN_INTERVAL, EVENT_SCHEMA, EventBus, JsonlSink, UnixSocketSink, get_event_bus, setup_events, stop_events
+from mdivicomtools.utils.rename import apply_transformations
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(events_mod.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def received():
+    seen = []
+    setup_events(callback=seen.append, min_interval=0.0, job="test")
+    try:
+        yield seen
+    finally:
+        stop_events()
+        get_event_bus().min_interval = DEFAULT_MIN_INTERVAL
+
+
+def test_emit_without_sinks_is_a_no_op():
+    bus = EventBus()
+    assert not bus.active
+    assert bus.emit("x") is False and bus.emit("x", throttle=True) is False
+    assert bus.throttled == 0
+
+
+def test_throttled_events_are_rate_limited_per_type(clock):
+    seen = []
+    bus = EventBus([seen.append], min_interval=1.0, context={"job": "j"})
+    assert bus.emit("copy.progress", throttle=True, n=1)
+    assert not bus.emit("copy.progress", throttle=True, n=2)
+    assert bus.emit("probe.progress", throttle=True, n=3)
+    assert bus.emit("copy.failed", n=4)  # lifecycle events are never throttled
+    clock[0] += 0.5
+    assert not bus.emit("copy.progress", throttle=True, n=5)
+    clock[0] += 0.5
+    assert bus.emit("copy.progress", throttle=True, n=6)
+    assert [e["n"] for e in seen] == [1, 3, 4, 6]
+    assert bus.throttled == 2
+    assert [e["seq"] for e in seen] == [1, 2, 3, 4]
+    assert all(e["job"] == "j" and "ts" in e and "pid" in e for e in seen)
+
+
+def test_failing_sink_is_counted_and_logged_once(caplog):
+    seen = []
+
+    def broken(event):
+        raise OSError("dashboard gone")
+
+    bus = EventBus([broken, seen.append])
+    with caplog.at_level(logging.WARNING, logger="mdivicomtools.utils.events"):
+        for _ in range(3):
+            assert bus.emit("x")
+    assert len(seen) == 3 and bus.sink_errors == 3
+    assert len(caplog.records) == 1
+
+
+def test_stage_reports_duration_and_failure():
+    seen = []
+    bus = EventBus([seen.append])
+    with bus.stage("ok", run_id="r"):
+        pass
+    with pytest.raises(KeyError):
+        with bus.stage("broken"):
+            raise KeyError("x")
+    assert [(e["stage"], e["ok"]) for e in seen] == [("ok", True), ("broken", False)]
+    assert seen[0]["run_id"] == "r" and seen[0]["seconds"] >= 0
+
+
+def test_jsonl_and_socket_sinks(tmp_path):
+    path = tmp_path / "events.jsonl"
+    sock_path = str(tmp_path / "collector.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    listener.bind(sock_path)
+    jsonl, udp, orphan = JsonlSink(str(path)), UnixSocketSink(sock_path), UnixSocketSink(str(tmp_path / "nobody.sock"))
+    bus = EventBus([jsonl, udp, orphan])
+    try:
+        bus.emit("a", value=1)
+        bus.emit("b", value="ü")
+        assert [json.loads(line)["event"] for line in path.read_text(encoding="utf-8").splitlines()] == ["a", "b"]
+        assert json.loads(listener.recv(65536))["value"] == 1
+        assert json.loads(listener.recv(65536).decode("utf-8"))["value"] == "ü"
+        assert orphan.dropped == 2 and udp.dropped == 0
+    finally:
+        bus.close()
+        listener.close()
+    assert not bus.active
+
+
+def test_setup_and_stop_events(received):
+    assert received[0]["event"] == "events.started"
+    assert received[0]["schema"] == EVENT_SCHEMA and received[0]["job"] == "test"
+    stop_events()
+    assert not get_event_bus().active and get_event_bus().context == {}
+
+
+def test_apply_transformations_publishes_progress_and_failures(received, tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    for i in range(3):
+        (src / f"f{i}.bin").write_bytes(b"x" * 10)
+    plan = {str(src / f"f{i}.bin"): str(tmp_path / "dst" / f"f{i}.bin") for i in range(3)}
+    plan[str(src / "missing.bin")] = str(tmp_path / "dst" / "missing.bin")
+    apply_transformations(plan, dryrun=False, verbose=False, jobs=1)
+
+    kinds = [e["event"] for e in received]
+    assert kinds[1] == "plan.started" and kinds[-1] == "plan.finished"
+    progress = [e for e in received if e["event"] == "copy.progress"]
+    assert progress and progress[-1]["entries_done"] == progress[-1]["entries_total"] == 4
+    assert progress[-1]["eta_seconds"] == 0
+    failed = [e for e in received if e["event"] == "copy.failed"]
+    assert len(failed) == 1 and failed[0]["src"].endswith("missing.bin")
+    assert received[-1]["files"] == 3 and received[-1]["bytes"] == 30
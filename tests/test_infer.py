@@ -0,0 +1,26 @@
+from mdivicomtools.infer import SniffCache, infer_resultbundles, sniff_file
+
+
+def _openface(tmp_path):
+    export = tmp_path / "openface"
+    export.mkdir()
+    path = export / "clip.csv"
+    path.write_text("frame, face_id, timestamp, confidence, success, AU01_r\n1, 0, 0.000, 0.98, 1, 0.1\n", encoding="utf-8")
+    return export, path
+
+
+def test_sniff_file_keeps_raw_column_names(tmp_path):
+    _, path = _openface(tmp_path)
+    info = sniff_file(path)
+    assert info["format"] == "csv"
+    assert info["columns"] == ["frame", " face_id", " timestamp", " confidence", " success", " AU01_r"]
+
+
+def test_inferred_entry_has_size_bytes_and_vendor_key_columns(tmp_path):
+    export, path = _openface(tmp_path)
+    bundles, _ = infer_resultbundles(tmp_path, jobs=1, cache=SniffCache())
+    assert [b.export_type.resultbundle_type for b in bundles] == ["openface.features.v2"]
+    (entry,) = bundles[0].sidecar(tmp_path)["files"]
+    assert entry["size_bytes"] == path.stat().st_size
+    assert "size" not in entry
+    assert entry["key_columns"] == {"timestamp": " timestamp"}
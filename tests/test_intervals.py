@@ -0,0 +1,113 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mdivicomtools import intervals
+from mdivicomtools.intervals import IntervalIndex, overlap_join
+
+
+def _random_intervals(rng, n, span=200, max_len=40):
+    # integer bounds so ties, shared endpoints and zero-length intervals are common
+    starts = rng.integers(0, span, n).astype(float)
+    lengths = rng.integers(0, max_len, n).astype(float)
+    lengths[rng.random(n) < 0.2] = 0
+    return starts, starts + lengths
+
+
+def _brute(starts, ends, qs, qe, relation):
+    pairs = []
+    for q, (a, b) in enumerate(zip(qs, qe)):
+        for i, (s, e) in enumerate(zip(starts, ends)):
+            if relation == "overlaps":
+                hit = (s < b and e > a) or (s == e and a <= s < b) or (a == b and s <= a < e) or (s == e == a == b)
+            elif relation == "within":
+                hit = a <= s and e <= b
+            elif relation == "containing":
+                hit = s <= a and e >= b
+            else:
+                hit = s <= a and (e > a or s == e == a)
+            if hit:
+                pairs.append((q, i))
+    return pairs
+
+
+@pytest.mark.parametrize("relation", ["overlaps", "within", "containing", "at"])
+def test_queries_match_brute_force(monkeypatch, relation):
+    monkeypatch.setattr(intervals, "_QUERY_BLOCK", 7)  # several query blocks
+    rng = np.random.default_rng(26)
+    starts, ends = _random_intervals(rng, 150)
+    qs, qe = _random_intervals(rng, 60)
+    index = IntervalIndex(starts, ends)
+    if relation == "at":
+        q, i = index.at(qs)
+    else:
+        q, i = getattr(index, relation)(qs, qe)
+    assert list(zip(q.tolist(), i.tolist())) == _brute(starts, ends, qs, qe, relation)
+
+
+def test_count_overlaps_and_empty_inputs():
+    index = IntervalIndex([0, 5, 10], [10, 6, 10])
+    assert index.count_overlaps([0, 5, 10, 20], [1, 5, 11, 30]).tolist() == [1, 2, 1, 0]
+    q, i = IntervalIndex([], []).overlaps([0], [1])
+    assert len(q) == len(i) == 0
+    assert IntervalIndex([0], [1]).count_overlaps([], []).tolist() == []
+
+
+@pytest.mark.parametrize("starts, ends", [([0, 1], [1]), ([0], [np.nan]), ([2], [1])])
+def test_invalid_intervals(starts, ends):
+    with pytest.raises(ValueError):
+        IntervalIndex(starts, ends)
+
+
+def test_save_load_round_trip(tmp_path):
+    rng = np.random.default_rng(1)
+    starts, ends = _random_intervals(rng, 50)
+    index = IntervalIndex(starts, ends, meta={"source": "x"})
+    loaded = IntervalIndex.load(index.save(tmp_path / "idx.npz"))
+    assert loaded.meta["source"] == "x"
+    assert np.array_equal(loaded.order, index.order)
+    qs, qe = _random_intervals(rng, 20)
+    for got, want in zip(loaded.overlaps(qs, qe), index.overlaps(qs, qe)):
+        assert np.array_equal(got, want)
+
+
+def test_cached_rebuilds_when_table_changes(tmp_path):
+    table = tmp_path / "events.tsv"
+    pd.DataFrame({"onset": [0.0, 2.0], "duration": [1.0, None]}).to_csv(table, sep="\t", index=False)
+    first = IntervalIndex.cached(table)
+    cache = tmp_path / "events.tsv.intervals.npz"
+    assert cache.exists() and first.ends.tolist() == [1.0, 2.0]
+
+    cache_mtime = cache.stat().st_mtime_ns
+    assert IntervalIndex.cached(table).ends.tolist() == [1.0, 2.0]
+    assert cache.stat().st_mtime_ns == cache_mtime  # served from the cache
+
+    pd.DataFrame({"onset": [0.0, 2.0, 4.0], "duration": [1.0, 1.0, 1.0]}).to_csv(table, sep="\t", index=False)
+    st = table.stat()
+    os.utime(table, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert len(IntervalIndex.cached(table)) == 3
+
+    cache.write_bytes(b"garbage")
+    assert len(IntervalIndex.cached(table)) == 3
+
+
+def test_resultbundle_interval_file(tmp_path):
+    pd.DataFrame({"t0": [0.0, 5.0], "t1": [1.0, 6.0]}).to_csv(tmp_path / "fix.csv", index=False)
+    entry = {"path": "fix.csv", "time": {"kind": "interval", "start_key": "start", "end_key": "end"}, "key_columns": {"start": "t0", "end": "t1"}}
+    index = IntervalIndex.from_resultbundle_file(tmp_path, entry)
+    assert index.ends.tolist() == [1.0, 6.0]
+    with pytest.raises(ValueError, match="not interval-typed"):
+        IntervalIndex.from_resultbundle_file(tmp_path, {"path": "fix.csv", "time": {"kind": "point"}})
+
+
+def test_overlap_join_uses_index_labels():
+    left = pd.DataFrame({"onset": [0.0, 10.0], "duration": [5.0, 5.0]}, index=["u1", "u2"])
+    right = pd.DataFrame({"onset": [1.0, 4.0, 12.0, 20.0], "duration": [1.0, 3.0, 1.0, 1.0]}, index=["a", "b", "c", "d"])
+    joined = overlap_join(left, right)
+    assert list(joined.itertuples(index=False, name=None)) == [("u1", "a"), ("u1", "b"), ("u2", "c")]
+    within = overlap_join(left, right, how="within")
+    assert list(within.itertuples(index=False, name=None)) == [("u1", "a"), ("u2", "c")]
+    with pytest.raises(ValueError):
+        overlap_join(left, right, how="near")
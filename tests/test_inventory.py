@@ -0,0 +1,96 @@
+import os
+
+import pytest
+import yaml
+
+from mdivicomtools.inventory import DEFAULT_CACHE_PATH, scan_dataset
+
+
+def _touch_later(path):
+    # mtime resolution differs between filesystems; move it forward explicitly
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def _write_yaml(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(yaml.safe_dump(data), encoding="utf-8")
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    root = tmp_path / "ds"
+    _write_yaml(root / "dataset_manifest.yaml", {"name": "demo"})
+    for ses in ("ses-01", "ses-02"):
+        session = root / "sessions" / ses
+        _write_yaml(session / f"{ses}_session.yaml", {"task": "rest"})
+        _write_yaml(session / "raw" / "video" / "str-01" / "str-01_stream.yaml", {"fps": 30})
+        (session / "raw" / "audio" / "str-02").mkdir(parents=True)
+    (root / "sessions" / "notes").mkdir()
+    return root
+
+
+def _stats(root):
+    inventory = scan_dataset(root)
+    return inventory, (inventory.stats["sessions_cached"], inventory.stats["sessions_scanned"])
+
+
+def test_scan_reads_sessions_streams_and_sidecars(dataset):
+    inventory, stats = _stats(dataset)
+    assert stats == (0, 2)
+    assert [s.label for s in inventory] == ["ses-01", "ses-02"]
+    assert inventory.manifest == {"name": "demo"}
+    ses = inventory.session("01")
+    assert ses.sidecar == {"task": "rest"}
+    assert [(s.stream_type, s.stream_id) for s in ses.streams] == [("audio", "str-02"), ("video", "str-01")]
+    video = ses.streams_of_type("video")[0]
+    assert video.sidecar == {"fps": 30} and video.path == dataset.resolve() / "sessions/ses-01/raw/video/str-01"
+    assert ses.streams_of_type("audio")[0].sidecar_path is None
+    assert (dataset / DEFAULT_CACHE_PATH).exists()
+
+
+def test_cache_hit_and_per_session_invalidation(dataset):
+    _stats(dataset)
+    inventory, stats = _stats(dataset)
+    assert stats == (2, 0)
+    assert inventory.session("01").streams_of_type("video")[0].sidecar == {"fps": 30}
+
+    sidecar = dataset / "sessions/ses-02/raw/video/str-01/str-01_stream.yaml"
+    _write_yaml(sidecar, {"fps": 60})
+    _touch_later(sidecar)
+    inventory, stats = _stats(dataset)
+    assert stats == (1, 1)
+    assert inventory.session("02").streams_of_type("video")[0].sidecar == {"fps": 60}
+
+    (dataset / "sessions/ses-01/raw/audio/str-03").mkdir()
+    _touch_later(dataset / "sessions/ses-01/raw/audio")
+    inventory, stats = _stats(dataset)
+    assert stats == (1, 1)
+    assert [s.stream_id for s in inventory.session("01").streams_of_type("audio")] == ["str-02", "str-03"]
+
+
+def test_new_and_removed_sessions_and_manifest_changes(dataset):
+    _stats(dataset)
+    (dataset / "sessions/ses-03").mkdir()
+    inventory, stats = _stats(dataset)
+    assert stats == (2, 1) and len(inventory) == 3
+    assert inventory.session("03").streams == []
+
+    (dataset / "sessions/ses-03").rmdir()
+    _write_yaml(dataset / "dataset_manifest.yaml", {"name": "renamed"})
+    _touch_later(dataset / "dataset_manifest.yaml")
+    inventory, stats = _stats(dataset)
+    assert stats == (2, 0) and len(inventory) == 2
+    assert inventory.manifest == {"name": "renamed"}
+
+
+def test_without_cache_and_with_corrupt_cache(dataset):
+    inventory = scan_dataset(dataset, use_cache=False)
+    assert inventory.stats["sessions_scanned"] == 2
+    assert not (dataset / DEFAULT_CACHE_PATH).exists()
+
+    cache = dataset / DEFAULT_CACHE_PATH
+    cache.parent.mkdir()
+    cache.write_text("{not json", encoding="utf-8")
+    assert _stats(dataset)[1] == (0, 2)
+    assert _stats(dataset)[1] == (2, 0)
@@ -0,0 +1,81 @@
+import json
+import logging
+import time
+
+import pytest
+
+from mdivicomtools.utils import logging_utils
+
+
+@pytest.fixture
+def slow_jsonl(monkeypatch):
+    format_record = logging_utils.JsonLinesFormatter.format
+
+    def slow_format(self, record):
+        time.sleep(0.002)
+        return format_record(self, record)
+
+    monkeypatch.setattr(logging_utils.JsonLinesFormatter, "format", slow_format)
+    root = logging.getLogger()
+    level = root.level
+    yield
+    logging_utils.stop_queue_logging()
+    root.setLevel(level)
+
+
+def _messages(path):
+    return [json.loads(line)["message"] for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_stop_on_full_queue_joins_listener_and_flushes(tmp_path, slow_jsonl):
+    path = tmp_path / "log.jsonl"
+    handle = logging_utils.setup_queue_logging(preset="queue_jsonl", filename=str(path), queue_size=5)
+    thread = handle.listener._thread
+    log = logging.getLogger("flood")
+    for i in range(300):
+        log.info("record %d", i)
+    assert handle.handler.queue.full()
+    logging_utils.stop_queue_logging()
+
+    assert not thread.is_alive()
+    messages = _messages(path)
+    assert handle.dropped > 0
+    assert messages[-1].startswith(f"mdivicomtools logging: dropped {handle.dropped} record(s)")
+    written = messages[:-1]
+    assert len(written) == 300 - handle.dropped
+    assert written == sorted(written, key=lambda m: int(m.split()[1]))
+
+
+def test_stop_discards_pending_records_when_listener_is_stuck(tmp_path, slow_jsonl, monkeypatch):
+    format_record = logging_utils.JsonLinesFormatter.format
+
+    def stuck_format(self, record):
+        time.sleep(0.2)  # far longer than the sentinel timeout below
+        return format_record(self, record)
+
+    monkeypatch.setattr(logging_utils.JsonLinesFormatter, "format", stuck_format)
+    path = tmp_path / "log.jsonl"
+    handle = logging_utils.setup_queue_logging(preset="queue_jsonl", filename=str(path), queue_size=5)
+    handle.listener.sentinel_timeout = 0.01
+    log = logging.getLogger("flood")
+    log.info("record 0")
+    time.sleep(0.05)  # the listener is now busy with it
+    for i in range(1, 8):
+        log.info("record %d", i)
+    assert handle.handler.queue.full()
+    logging_utils.stop_queue_logging()
+
+    assert not handle.listener._thread
+    assert handle.listener.discarded > 0
+    messages = _messages(path)
+    assert len(messages) - 1 == 8 - handle.dropped
+
+
+def test_block_policy_keeps_every_record(tmp_path, slow_jsonl):
+    path = tmp_path / "log.jsonl"
+    logging_utils.setup_queue_logging(preset="queue_jsonl", filename=str(path), queue_size=5, policy="block")
+    log = logging.getLogger("flood")
+    for i in range(50):
+        log.info("record %d", i)
+    logging_utils.stop_queue_logging()
+    assert _messages(path) == [f"record {i}" for i in range(50)]
@@ -0,0 +1,146 @@
+import struct
+from datetime import datetime, timezone
+
+import pytest
+import yaml
+
+from mdivicomtools.mediaprobe import MediaProbeError, probe_dataset, probe_file
+
+CREATED = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+MP4_SECONDS = int((CREATED - datetime(1904, 1, 1, tzinfo=timezone.utc)).total_seconds())
+
+
+def box(box_type, *payload):
+    body = b"".join(payload)
+    return struct.pack(">I4s", 8 + len(body), box_type) + body
+
+
+def times(timescale, duration, creation=0):
+    return b"\0" * 4 + struct.pack(">IIII", creation, creation, timescale, duration) + b"\0" * 80
+
+
+def trak(handler, timescale, stts, entry):
+    stsd = box(b"stsd", b"\0" * 4, struct.pack(">I", 1), entry)
+    stts_box = box(b"stts", b"\0" * 4, struct.pack(">I", len(stts)), b"".join(struct.pack(">II", *e) for e in stts))
+    return box(
+        b"trak",
+        box(b"tkhd", b"\0" * 84),
+        box(
+            b"mdia",
+            box(b"mdhd", times(timescale, 0)),
+            box(b"hdlr", b"\0" * 8, handler, b"\0" * 12),
+            box(b"minf", box(b"stbl", stsd, stts_box)),
+        ),
+    )
+
+
+def video_entry(width=1920, height=1080):
+    return struct.pack(">I4s", 86, b"avc1") + b"\0" * 24 + struct.pack(">HH", width, height) + b"\0" * 50
+
+
+def audio_entry(channels=2, bits=16, rate=48000):
+    return struct.pack(">I4s", 36, b"mp4a") + b"\0" * 16 + struct.pack(">HH", channels, bits) + b"\0" * 4 + struct.pack(">I", rate << 16)
+
+
+def mp4(mvhd=None, qt=False, mdat_size=1000):
+    mvhd = times(1000, 10010, MP4_SECONDS) if mvhd is None else mvhd
+    moov = box(
+        b"moov",
+        box(b"mvhd", mvhd),
+        trak(b"vide", 30000, [(300, 1001)], video_entry()),
+        trak(b"soun", 48000, [(469, 1024)], audio_entry()),
+    )
+    ftyp = box(b"ftyp", b"qt  " if qt else b"isom", b"\0" * 4)
+    # moov after mdat, as most cameras write it
+    return ftyp + box(b"mdat", b"\0" * mdat_size) + moov
+
+
+def wav(frames=4800, bext=True, rf64=False):
+    fmt = box_le(b"fmt ", struct.pack("<HHIIHH", 1, 2, 48000, 48000 * 4, 4, 16))
+    chunks = [fmt]
+    if bext:
+        chunks.append(box_le(b"bext", b"\0" * 320 + b"2024-01-02" + b"03:04:05" + b"\0" * 8))
+    data = b"\1\0" * 2 * frames
+    if rf64:
+        ds64 = box_le(b"ds64", struct.pack("<QQQI", 0, len(data), frames, 0))
+        body = b"WAVE" + ds64 + b"".join(chunks) + b"data" + struct.pack("<I", 0xFFFFFFFF) + data
+        return b"RF64" + struct.pack("<I", 0xFFFFFFFF) + body
+    body = b"WAVE" + b"".join(chunks) + box_le(b"data", data)
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def box_le(chunk_id, payload):
+    return chunk_id + struct.pack("<I", len(payload)) + payload + (b"\0" if len(payload) & 1 else b"")
+
+
+def test_probe_mp4(tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(mp4())
+    info = probe_file(path)
+    assert info.container == "mp4"
+    assert info.duration == pytest.approx(10.01)
+    assert info.start_time == "2024-01-02T03:04:05Z"
+    assert (info.video.codec, info.video.width, info.video.height, info.video.frame_count) == ("avc1", 1920, 1080, 300)
+    assert info.video.fps == pytest.approx(29.97, abs=1e-3)
+    assert (info.audio.codec, info.audio.sample_rate, info.audio.channels, info.audio.frame_count) == ("mp4a", 48000, 2, 469 * 1024)
+
+
+def test_probe_mov_container(tmp_path):
+    path = tmp_path / "clip.mov"
+    path.write_bytes(mp4(qt=True))
+    assert probe_file(path).container == "mov"
+
+
+def test_probe_wav_with_bext(tmp_path):
+    path = tmp_path / "a.wav"
+    path.write_bytes(wav())
+    info = probe_file(path)
+    assert info.container == "wav"
+    assert info.start_time == "2024-01-02T03:04:05"
+    assert (info.audio.codec, info.audio.sample_rate, info.audio.channels, info.audio.bits_per_sample, info.audio.frame_count) == ("pcm", 48000, 2, 16, 4800)
+    assert info.duration == pytest.approx(0.1)
+
+
+def test_probe_rf64(tmp_path):
+    path = tmp_path / "a.rf64"
+    path.write_bytes(wav(frames=2400, bext=False, rf64=True))
+    info = probe_file(path)
+    assert info.container == "rf64"
+    assert info.audio.frame_count == 2400
+    assert info.start_time is None
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        mp4(mvhd=b""),
+        mp4(mvhd=b"\1" + b"\0" * 20),
+        mp4().replace(box(b"mdhd", times(30000, 0)), box(b"mdhd", b"")),
+        b"RIFF" + struct.pack("<I", 20) + b"WAVE" + box_le(b"fmt ", b"\1\0"),
+        b"\0\0\0\x10ftypisom" + b"\0" * 4,
+        b"not a media file at all",
+    ],
+    ids=["empty-mvhd", "short-mvhd-v1", "empty-mdhd", "short-fmt", "no-moov", "unknown"],
+)
+def test_malformed_headers_raise_probe_error(tmp_path, data):
+    path = tmp_path / "bad.mp4"
+    path.write_bytes(data)
+    with pytest.raises(MediaProbeError):
+        probe_file(path)
+
+
+def test_probe_dataset_records_bad_files_and_caches_good_ones(tmp_path):
+    stream = tmp_path / "sessions" / "ses-01" / "raw" / "video" / "str-01"
+    stream.mkdir(parents=True)
+    (stream / "good.mp4").write_bytes(mp4())
+    (stream / "bad.mp4").write_bytes(mp4(mvhd=b""))
+
+    (result,), stats = probe_dataset(tmp_path, jobs=2)
+    assert (stats["files"], stats["probed"], stats["errors"], stats["sidecars_written"]) == (2, 1, 1, 1)
+    assert [f.path for f in result.files] == [str(stream / "good.mp4")]
+    assert result.errors["bad.mp4"].startswith("MediaProbeError")
+    sidecar = yaml.safe_load((stream / "str-01_stream.yaml").read_text(encoding="utf-8"))
+    assert list(sidecar["media"]["files"]) == ["good.mp4"]
+
+    _, stats = probe_dataset(tmp_path, jobs=2)
+    assert (stats["cached"], stats["probed"], stats["errors"], stats["sidecars_written"]) == (1, 0, 1, 0)
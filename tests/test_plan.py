@@ -0,0 +1,76 @@
+from pathlib import Path
+
+import pytest
+
+from mdivicomtools.utils.plan import TransformationPlan, as_plan, iter_plan_rows
+
+
+def _mapping(n=50):
+    return {
+        Path("/data") / f"sub-{i % 5:02d}" / f"ses-{i % 3}" / f"file {i}_ä.txt": Path("/out") / f"s{i % 5}" / f"f{i}.txt"
+        for i in range(n)
+    }
+
+
+def test_behaves_like_the_dict_it_was_built_from():
+    mapping = _mapping()
+    plan = TransformationPlan(mapping, meta={"planner": "test"})
+    assert len(plan) == len(mapping)
+    assert dict(plan) == mapping
+    assert list(plan) == list(mapping)
+    assert list(plan.values()) == list(mapping.values())
+    src = next(iter(mapping))
+    assert plan[src] == mapping[src] and plan[str(src)] == mapping[src]
+    assert src in plan and Path("/nope") not in plan and 3 not in plan
+    with pytest.raises(KeyError):
+        plan[Path("/nope")]
+    assert sorted(plan.destination_directories()) == sorted({str(d.parent) for d in mapping.values()})
+    assert sorted(plan.source_directories()) == sorted({str(s.parent) for s in mapping})
+    assert plan.to_dict() == mapping
+
+
+def test_setitem_replaces_and_append_adds():
+    plan = TransformationPlan()
+    plan["/a/x"] = "/b/x"
+    plan["/a/y"] = "/b/y"
+    plan["/a/x"] = "/c/x"
+    assert list(plan.iter_rows()) == [("/a/x", "/c/x"), ("/a/y", "/b/y")]
+    plan.append("/a/z", "/b/z")
+    assert plan["/a/z"] == Path("/b/z") and len(plan) == 3
+
+
+@pytest.mark.parametrize("mmap_mode", [True, False])
+def test_save_load_round_trip(tmp_path, mmap_mode):
+    mapping = _mapping()
+    plan = TransformationPlan(mapping, meta={"planner": "test", "n": 1})
+    loaded = TransformationPlan.load(plan.save(tmp_path / "plans" / "p.plan"), mmap_mode=mmap_mode)
+    assert loaded.meta == {"planner": "test", "n": 1}
+    assert list(loaded.iter_rows()) == list(plan.iter_rows())
+    src = next(iter(mapping))
+    assert loaded[src] == mapping[src]
+
+    # a loaded plan can be modified (it is materialized first) and saved again
+    loaded["/new/src"] = "/new/dst"
+    loaded[src] = "/moved"
+    again = TransformationPlan.load(loaded.save(tmp_path / "p2.plan"))
+    assert again[src] == Path("/moved") and again["/new/src"] == Path("/new/dst")
+    assert len(again) == len(mapping) + 1
+
+
+def test_empty_plan_round_trip(tmp_path):
+    loaded = TransformationPlan.load(TransformationPlan().save(tmp_path / "empty.plan"))
+    assert len(loaded) == 0 and list(loaded.iter_rows()) == []
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "x.plan"
+    path.write_bytes(b"not a plan at all")
+    with pytest.raises(ValueError):
+        TransformationPlan.load(path)
+
+
+def test_plan_like_helpers():
+    mapping = {Path("/a/x"): Path("/b/x")}
+    plan = as_plan(mapping)
+    assert isinstance(plan, TransformationPlan) and as_plan(plan) is plan
+    assert list(iter_plan_rows(mapping)) == list(iter_plan_rows(plan)) == [("/a/x", "/b/x")]
@@ -0,0 +1,97 @@
+import json
+import pstats
+import time
+
+import pytest
+
+from mdivicomtools import cli
+from mdivicomtools.profiling import RunProfiler
+
+
+def _busy(seconds=0.05):
+    deadline = time.perf_counter() + seconds
+    blocks = []
+    while time.perf_counter() < deadline:
+        blocks.append(bytearray(1024))
+    return blocks
+
+
+def _plugin(run):
+    return {"id": "profiled", "kind": "python", "version": "0.1.0", "run": run}
+
+
+def _run(monkeypatch, tmp_path, run, *extra):
+    monkeypatch.setattr(cli, "get_plugin", lambda ref, resolve_execution=False: _plugin(run))
+    out = tmp_path / "out"
+    argv = ["run", "profiled", "--dataset", str(tmp_path), "--out", str(out), *extra]
+    return out, argv
+
+
+def _record(out):
+    (path,) = (out / "_runs").glob("*.json")
+    return path, json.loads(path.read_text(encoding="utf-8"))
+
+
+def test_run_profiler_rejects_unknown_kind(tmp_path):
+    with pytest.raises(ValueError, match="Unknown profiler"):
+        RunProfiler("perf", tmp_path)
+
+
+@pytest.mark.parametrize(
+    "kind, artifacts",
+    [
+        ("cprofile", {"pstats", "summary"}),
+        ("tracemalloc", {"allocations", "allocations_json"}),
+        ("sample", {"collapsed_stacks"}),
+    ],
+)
+def test_run_profile_links_artifacts_from_run_record(monkeypatch, tmp_path, kind, artifacts):
+    out, argv = _run(monkeypatch, tmp_path, lambda **kwargs: _busy(), "--profile", kind, "--profile-interval", "0.001")
+    assert cli.main(argv) == 0
+    path, record = _record(out)
+    assert record["status"] == "succeeded"
+    profile = record["profile"]
+    assert profile["kind"] == kind and set(profile["artifacts"]) == artifacts
+    for rel in profile["artifacts"].values():
+        assert rel.startswith(record["run_id"] + "/")
+        assert (path.parent / rel).stat().st_size > 0
+    assert profile["stats"]["wall_seconds"] >= 0.05
+
+
+def test_run_profile_cprofile_and_sample_see_the_plugin(monkeypatch, tmp_path):
+    out, argv = _run(monkeypatch, tmp_path, lambda **kwargs: _busy(), "--profile", "cprofile")
+    cli.main(argv)
+    path, record = _record(out)
+    stats = pstats.Stats(str(path.parent / record["profile"]["artifacts"]["pstats"]))
+    assert any(func[2] == "_busy" for func in stats.stats)
+
+    out, argv = _run(monkeypatch, tmp_path / "s", lambda **kwargs: _busy(0.2), "--profile", "sample", "--profile-interval", "0.005")
+    cli.main(argv)
+    path, record = _record(out)
+    assert record["profile"]["stats"]["samples"] > 0
+    collapsed = (path.parent / record["profile"]["artifacts"]["collapsed_stacks"]).read_text(encoding="utf-8")
+    assert "_busy (" in collapsed
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed.splitlines())
+
+
+def test_run_profile_written_for_failed_run(monkeypatch, tmp_path):
+    def run(**kwargs):
+        _busy(0.01)
+        raise RuntimeError("boom")
+
+    out, argv = _run(monkeypatch, tmp_path, run, "--profile", "tracemalloc")
+    with pytest.raises(SystemExit, match="boom"):
+        cli.main(argv)
+    path, record = _record(out)
+    assert record["status"] == "failed" and "RuntimeError: boom" in record["error"]
+    report = json.loads((path.parent / record["profile"]["artifacts"]["allocations_json"]).read_text(encoding="utf-8"))
+    assert report["peak_bytes"] > 0 and report["top"]
+    assert record["profile"]["stats"]["frames"] == 1
+
+
+def test_run_without_profile_has_no_profile_section(monkeypatch, tmp_path):
+    out, argv = _run(monkeypatch, tmp_path, lambda **kwargs: None)
+    assert cli.main(argv) == 0
+    path, record = _record(out)
+    assert "profile" not in record
+    assert not (path.parent / record["run_id"]).exists()
@@ -0,0 +1,45 @@
+from pathlib import Path
+
+import pandas as pd
+
+from mdivicomtools.utils.rename import sanitize_filename, sanitize_filenames
+
+
+def test_sanitize_filenames_mixed_numeric_and_bool_values():
+    values = [1, 1.0, True, "1", 0, False, 0.0, 1, True]
+    sanitized, _ = sanitize_filenames(values)
+    assert sanitized == [sanitize_filename(str(v)) for v in values]
+    assert sanitized[:3] == ["1", "1.0", "True"]
+
+
+def test_sanitize_filenames_series_keeps_index_and_name():
+    series = pd.Series([True, 1, 1.0, "a b"], index=[10, 11, 12, 13], name="label", dtype=object)
+    sanitized, _ = sanitize_filenames(series)
+    assert list(sanitized.index) == [10, 11, 12, 13]
+    assert sanitized.name == "label"
+    assert sanitized.tolist() == [sanitize_filename(str(v)) for v in series]
+
+
+def test_sanitize_filenames_paths_and_collisions():
+    sanitized, collisions = sanitize_filenames([Path("d") / "a b", "a b", "a_b"])
+    assert sanitized == [Path("d") / "a_b", "a_b", "a_b"]
+    assert collisions == {"a_b": ["a b", "a_b"]}
+
+
+def test_sanitize_filenames_matches_scalar_over_mixed_corpus():
+    corpus = [
+        "task rest", "task/rest", 'a:b*c?d"e<f>g|h`i%j&k=l', "Größe über Maß", "ÄÖÜ", "con", "CON", "Lpt9", "nul.",
+        "CON ", "trailing. . ", "...", "", " ", "ses-01", "ses-01", "naïve café", "日本語 ファイル", "tab\there",
+        1, 1.0, True, False, 0, 2.5, float("nan"), -3, "1", "True",
+    ] * 3
+    sanitized, collisions = sanitize_filenames(corpus)
+    assert sanitized == [sanitize_filename(str(v)) for v in corpus]
+
+    expected = {}
+    for value in corpus:
+        expected.setdefault(sanitize_filename(str(value)), set()).add(str(value))
+    assert collisions == {k: sorted(v) for k, v in expected.items() if len(v) > 1}
+    assert collisions[""] == ["", "..."]
+
+    series = pd.Series(corpus, dtype=object)
+    assert sanitize_filenames(series)[0].tolist() == sanitized
@@ -0,0 +1,94 @@
+import shutil
+
+import pandas as pd
+import pytest
+
+from mdivicomtools.utils.plan import TransformationPlan
+from mdivicomtools.utils.rename import (
+    build_transformation_map_from_df,
+    get_file_list,
+    plan_complex_file_reorder,
+    plan_transformations,
+    replan_complex_file_reorder,
+    replan_transformation_map_from_df,
+    replan_transformations,
+)
+from mdivicomtools.utils.replan import PlanChanges
+
+DF = pd.DataFrame({"recording_id": ["sub-01", "sub-02", "sub-03"], "task_id": ["rest", "nback", "rest"], "run_id": [1, 2, 3]})
+
+
+def _write(path, text="x"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    base = tmp_path / "data"
+    for rel in ("sub-01/ses-01/a.txt", "sub-01/ses-01/b.txt", "sub-01/ses-02/c.txt", "sub-02/ses-01/d.txt"):
+        _write(base / rel)
+    return base
+
+
+def _change(base):
+    """Add a session directory, remove another and modify one file; returns relative change paths."""
+    _write(base / "sub-03" / "ses-01" / "e.txt")
+    _write(base / "sub-03" / "ses-01" / "f.txt")
+    shutil.rmtree(base / "sub-01" / "ses-02")
+    _write(base / "sub-01" / "ses-01" / "a.txt", "changed")
+    return {"added": ["sub-03/ses-01"], "removed": ["sub-01/ses-02"], "modified": ["sub-01/ses-01/a.txt"]}
+
+
+def _saved(plan, tree):
+    path = tree.parent / "plan"
+    plan.save(path)
+    return path
+
+
+def _check_delta(previous, plan, delta):
+    assert delta.stats["added"] == 2 and delta.stats["removed"] == 1 and delta.stats["modified"] == 1
+    assert set(delta.copy) == {p for p in plan if "sub-03" in str(p) or p.name == "a.txt"}
+    assert delta.delete == [d for s, d in previous.items() if "ses-02" in str(s)]
+
+
+def test_replan_transformations_equals_full_replan(tree):
+    rules = dict(find_strings=["ses"], replace_strings=["session"], prefix="", securecopy_folder="out")
+    previous = plan_transformations(str(tree), get_file_list(str(tree)), **rules)
+    assert type(previous) is TransformationPlan
+
+    rel = _change(tree)
+    changes = PlanChanges(*([tree / p for p in rel[k]] for k in ("added", "removed", "modified")))
+    plan, delta = replan_transformations(str(tree), previous, changes, **rules)
+    assert dict(plan) == dict(plan_transformations(str(tree), get_file_list(str(tree)), **rules))
+    _check_delta(previous, plan, delta)
+
+
+def test_replan_from_df_equals_full_replan(tree):
+    previous = build_transformation_map_from_df(DF, str(tree))
+    assert type(previous) is TransformationPlan
+    assert previous[tree / "sub-02" / "ses-01" / "d.txt"] == tree / "securecopy" / "task-nback_run-2" / "ses-01" / "d.txt"
+
+    changes = PlanChanges.from_dict(_change(tree))
+    plan, delta = replan_transformation_map_from_df(DF, str(tree), TransformationPlan.load(_saved(previous, tree)), changes)
+    assert dict(plan) == dict(build_transformation_map_from_df(DF, str(tree)))
+    _check_delta(previous, plan, delta)
+
+
+def test_replan_complex_file_reorder_equals_full_replan(tree):
+    structure = dict(source_structure=[r"sub-\d+", r"ses-\d+"], target_index=[2, 1])
+    previous = plan_complex_file_reorder(str(tree), **structure)
+    assert type(previous) is TransformationPlan
+    assert previous[tree.resolve() / "sub-01" / "ses-02" / "c.txt"] == tree.resolve() / "securecopy" / "ses-02" / "sub-01" / "c.txt"
+
+    changes = PlanChanges.from_dict(_change(tree))
+    plan, delta = replan_complex_file_reorder(str(tree), previous, changes, **structure)
+    assert dict(plan) == dict(plan_complex_file_reorder(str(tree), **structure))
+    _check_delta(previous, plan, delta)
+
+
+def test_replan_without_changes_keeps_plan(tree):
+    previous = build_transformation_map_from_df(DF, str(tree))
+    plan, delta = replan_transformation_map_from_df(DF, str(tree), previous, PlanChanges())
+    assert dict(plan) == dict(previous)
+    assert not delta and delta.stats["kept"] == len(previous)
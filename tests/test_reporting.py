@@ -0,0 +1,91 @@
+import json
+import logging
+import os
+
+import pytest
+
+from mdivicomtools.utils.plan import TransformationPlan
+from mdivicomtools.utils.rename import apply_transformations
+from mdivicomtools.utils.reporting import PER_FILE_OUTPUT_LIMIT, PlanReportWriter, PlanSummary, format_bytes, source_base, summarize_plan
+
+
+@pytest.fixture
+def output(caplog):
+    # utils.rename reports through its logger once logging is configured (pytest configures it)
+    caplog.set_level(logging.INFO, logger="mdivicomtools.utils.rename")
+    return caplog
+
+
+def _tree(root, sessions=2, files=3, size=10):
+    mapping = {}
+    for s in range(sessions):
+        for f in range(files):
+            src = root / "sessions" / f"ses-0{s}" / f"f{f}.bin"
+            src.parent.mkdir(parents=True, exist_ok=True)
+            src.write_bytes(b"x" * size)
+            mapping[src] = root / "out" / f"ses-0{s}" / f"f{f}.bin"
+    return mapping
+
+
+def test_summary_groups_by_top_level_directory(tmp_path):
+    mapping = _tree(tmp_path)
+    summary = summarize_plan(mapping, max_samples=2)
+    assert summary.base == str(tmp_path / "sessions")
+    assert (summary.entries, summary.bytes) == (6, 60)
+    assert summary.to_dict()["by_top_level"] == {"ses-00": {"entries": 3, "bytes": 30}, "ses-01": {"entries": 3, "bytes": 30}}
+    assert summary.by_status == {"planned": 6} and len(summary.samples["planned"]) == 2
+    text = summary.summary()
+    assert text.startswith("Plan summary: 6 entries, 60 B") and "ses-00: 3 entries, 30 B" in text
+
+
+def test_summary_truncates_groups():
+    summary = PlanSummary(base="/b")
+    for i in range(5):
+        summary.add(f"/b/d{i}/x", "/o/x", 1)
+    text = summary.summary(max_groups=2)
+    assert "... 3 more top-level directories (3 entries)" in text
+    assert PlanSummary().summary().startswith("Plan summary: 0 entries")
+
+
+def test_source_base_and_format_bytes():
+    assert source_base(TransformationPlan({"/a/b/x": "/o/x", "/a/c/y": "/o/y"})) == "/a"
+    assert source_base({"x": "/o/x"}) is None
+    assert source_base({"/a/x": "/o/x", "b/y": "/o/y"}) is None
+    assert [format_bytes(n) for n in (0, 1023, 1024, 5 * 1024 ** 3)] == ["0 B", "1023 B", "1.0 KiB", "5.0 GiB"]
+
+
+def test_report_writer_formats(tmp_path):
+    with PlanReportWriter(tmp_path / "r.tsv") as writer:
+        writer.write("copy", "copied", "/a\tb", "/o", 3, "line\nbreak")
+    lines = (tmp_path / "r.tsv").read_text(encoding="utf-8").splitlines()
+    assert lines == ["action\tstatus\tsrc\tdst\tsize_bytes\tdetail", "copy\tcopied\t/a b\t/o\t3\tline break"]
+    with PlanReportWriter(tmp_path / "r.jsonl") as writer:
+        writer.write("copy", "error", "/a", "/o", None, "boom")
+    row = json.loads((tmp_path / "r.jsonl").read_text(encoding="utf-8"))
+    assert row == {"action": "copy", "status": "error", "src": "/a", "dst": "/o", "size_bytes": None, "detail": "boom"}
+
+
+def test_dry_run_prints_per_entry_only_for_small_plans(tmp_path, output):
+    mapping = _tree(tmp_path)
+    apply_transformations(mapping, dryrun=True, report_path=str(tmp_path / "plan.tsv"))
+    out = output.text
+    assert out.count("DRY RUN: Would copy") == 6 and "DRY RUN plan: 6 entries" in out
+    assert len((tmp_path / "plan.tsv").read_text(encoding="utf-8").splitlines()) == 7
+    assert not (tmp_path / "out").exists()
+
+    output.clear()
+    apply_transformations(mapping, dryrun=True, verbose=False)
+    assert "Would copy" not in output.text
+    assert PER_FILE_OUTPUT_LIMIT == 200
+
+
+def test_apply_reports_outcome_per_entry(tmp_path, output):
+    mapping = _tree(tmp_path)
+    missing = tmp_path / "sessions" / "ses-00" / "gone.bin"
+    mapping[missing] = tmp_path / "out" / "gone.bin"
+    apply_transformations(mapping, dryrun=False, verbose=False, report_path=str(tmp_path / "result.jsonl"), jobs=2)
+    out = output.text
+    assert "Transformation result: 7 entries" in out and "copied=6" in out and "error=1" in out
+    rows = [json.loads(line) for line in (tmp_path / "result.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert sorted(r["status"] for r in rows) == ["copied"] * 6 + ["error"]
+    assert all(os.path.exists(r["dst"]) for r in rows if r["status"] == "copied")
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from mdivicomtools.cli import _call_plugin
+from mdivicomtools.resultbundle import SIDECAR_NAME, OutputWriter
+
+
+def _writer(root):
+    return OutputWriter(root, resultbundle_type="test.bundle.v1", schema_version="1.0.0", time_reference={"kind": "none"})
+
+
+def test_close_with_open_output_aborts_it(tmp_path):
+    with pytest.raises(ValueError, match="a.bin"):
+        with _writer(tmp_path) as writer:
+            out = writer.open("a.bin", role="data", format="bin")
+            out.write(b"partial")
+    assert out.closed
+    assert writer.closed
+    assert sorted(p.name for p in tmp_path.iterdir() if not p.name.startswith(".resultbundle")) == []
+
+
+def test_committed_entry_has_size_bytes(tmp_path):
+    with _writer(tmp_path) as writer:
+        writer.write_bytes("a.bin", b"12345", role="data", format="bin")
+    bundle = json.loads((tmp_path / SIDECAR_NAME).read_text(encoding="utf-8"))
+    assert [(f["path"], f["size_bytes"]) for f in bundle["files"]] == [("a.bin", 5)]
+
+
+def test_call_plugin_passes_output_writer_factory(tmp_path):
+    def run(dataset_dir, out_dir, config, *, work_dir=None, dry_run=False, output_writer):
+        with output_writer("bundle", resultbundle_type="test.bundle.v1", schema_version="1.0.0", time_reference={"kind": "none"}) as writer:
+            writer.write_text("a.txt", "hello", role="data", format="txt")
+
+    def legacy_run(dataset_dir, out_dir, config, *, work_dir=None, dry_run=False):
+        pass
+
+    plugin = {"id": "demo", "version": "0.1.0", "kind": "python", "run": run}
+    _call_plugin(plugin, dataset_dir=tmp_path, out_dir=tmp_path / "out", work_dir=None, config={}, backend="python", dry_run=False)
+    bundle = json.loads((tmp_path / "out" / "bundle" / SIDECAR_NAME).read_text(encoding="utf-8"))
+    assert bundle["producer"] == {"tool_ref": "demo", "tool_version": "0.1.0"}
+    _call_plugin(dict(plugin, run=legacy_run), dataset_dir=tmp_path, out_dir=tmp_path / "out", work_dir=None, config={}, backend="python", dry_run=False)
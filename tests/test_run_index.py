@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from mdivicomtools.cli import main
+from mdivicomtools.run_index import append_index_entry, index_entry, index_path, query_runs, read_index, rebuild_index
+
+
+def _record(run_id, created_at, plugin="demo", status="succeeded", config="abc123"):
+    return {
+        "run_id": run_id,
+        "created_at": created_at,
+        "status": status,
+        "plugin": {"id": plugin, "publisher": "lab", "version": "1.0"},
+        "config_hash_sha256": config,
+        "dataset_dir": "/data/ds",
+    }
+
+
+@pytest.fixture
+def runs_dir(tmp_path):
+    runs_dir = tmp_path / "out" / "_runs"
+    runs_dir.mkdir(parents=True)
+    records = [
+        _record("r1", "2024-05-01T10:00:00Z"),
+        _record("r2", "2024-05-02T10:00:00Z", status="failed", config="def456"),
+        _record("r3", "2024-05-03T10:00:00+02:00", plugin="other"),
+    ]
+    for record in records:
+        path = runs_dir / f"{record['run_id']}.json"
+        path.write_text(json.dumps(record), encoding="utf-8")
+        append_index_entry(runs_dir, index_entry(record, path))
+    return runs_dir
+
+
+def _ids(entries):
+    return [e["run_id"] for e in entries]
+
+
+def test_query_filters(runs_dir):
+    assert _ids(query_runs(runs_dir)) == ["r1", "r2", "r3"]
+    assert _ids(query_runs(runs_dir, plugin="lab/demo")) == ["r1", "r2"]
+    assert _ids(query_runs(runs_dir, plugin="other/demo")) == []
+    assert _ids(query_runs(runs_dir, status="failed")) == ["r2"]
+    assert _ids(query_runs(runs_dir, config_hash="abc")) == ["r1", "r3"]
+    assert _ids(query_runs(runs_dir, since="2024-05-02", until="2024-05-03T08:00:00Z")) == ["r2"]
+    assert _ids(query_runs(runs_dir, until="2024-05-03T08:00:01Z")) == ["r1", "r2", "r3"]
+    assert _ids(query_runs(runs_dir, last=2)) == ["r2", "r3"]
+    assert _ids(query_runs(runs_dir, last=0)) == []
+
+
+def test_later_index_lines_supersede_and_torn_lines_are_skipped(runs_dir):
+    append_index_entry(runs_dir, {**read_index(runs_dir)["r1"], "status": "failed"})
+    with open(index_path(runs_dir), "a", encoding="utf-8") as fh:
+        fh.write('{"run_id": "r4", "crea')
+    assert _ids(query_runs(runs_dir, status="failed")) == ["r1", "r2"]
+
+
+def test_rebuild_index_compacts_and_backfills(runs_dir):
+    append_index_entry(runs_dir, {**read_index(runs_dir)["r1"], "status": "failed"})
+    (runs_dir / "r5.json").write_text(json.dumps(_record("r5", "2024-05-05T00:00:00Z")), encoding="utf-8")
+    (runs_dir / "broken.json").write_text("{", encoding="utf-8")
+    (runs_dir / "r2.json").unlink()
+
+    counts = rebuild_index(runs_dir)
+    assert counts == {"indexed": 3, "backfilled": 1, "dropped": 1, "unreadable": 1}
+    assert _ids(query_runs(runs_dir)) == ["r1", "r3", "r5"]
+    assert len(index_path(runs_dir).read_text(encoding="utf-8").splitlines()) == 3
+    assert read_index(runs_dir)["r1"]["status"] == "failed"
+
+
+def test_invalid_time_filter(runs_dir):
+    with pytest.raises(ValueError, match="yesterday"):
+        query_runs(runs_dir, since="yesterday")
+    with pytest.raises(SystemExit, match="invalid timestamp 'yesterday'"):
+        main(["runs", "list", "--out", str(runs_dir.parent), "--since", "yesterday"])
+
+
+def test_malformed_created_at_does_not_break_time_filter(runs_dir):
+    append_index_entry(runs_dir, index_entry(_record("r9", "last tuesday"), runs_dir / "r9.json"))
+    assert _ids(query_runs(runs_dir, since="2024-05-02")) == ["r2", "r3"]
+    assert "r9" in _ids(query_runs(runs_dir))
@@ -0,0 +1,95 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mdivicomtools.sync import find_sessions_with_markers, fit_robust_lines, fit_session, fit_session_markers, fit_sessions
+
+
+def _markers(stream_id, t_stream, offset, scale, noise=0.0, seed=0):
+    t_stream = np.asarray(t_stream, dtype=float)
+    rng = np.random.default_rng(seed)
+    t_session = offset + scale * t_stream + rng.normal(0, noise, len(t_stream)) if noise else offset + scale * t_stream
+    return pd.DataFrame({"stream_id": stream_id, "t_stream": t_stream, "t_session": t_session})
+
+
+def test_batched_fit_matches_per_group_least_squares():
+    rng = np.random.default_rng(27)
+    groups = [(np.sort(rng.uniform(0, 1000, n)), o, s) for n, o, s in ((5, 3.0, 1.0001), (12, -20.0, 0.9998), (8, 1e9, 1.00002))]
+    width = max(len(g[0]) for g in groups)
+    x = np.zeros((len(groups), width))
+    y = np.zeros_like(x)
+    mask = np.zeros_like(x, dtype=bool)
+    for row, (gx, offset, scale) in enumerate(groups):
+        x[row, :len(gx)] = gx
+        y[row, :len(gx)] = offset + scale * gx + rng.normal(0, 1e-3, len(gx))
+        mask[row, :len(gx)] = True
+    fit = fit_robust_lines(x, y, mask, k=np.inf)  # no down-weighting: plain least squares
+    for row, (gx, _, _) in enumerate(groups):
+        scale, offset = np.polyfit(gx, y[row, :len(gx)], 1)
+        assert fit["scale"][row] == pytest.approx(scale, rel=1e-9)
+        assert fit["offset"][row] == pytest.approx(offset, rel=1e-9, abs=1e-6)
+    assert np.isnan(fit["residuals"][0, 5:]).all()
+
+
+def test_outliers_are_down_weighted_and_reported():
+    df = _markers("cam1", np.arange(0, 600, 10), offset=12.5, scale=1.00005, noise=0.001, seed=1)
+    df.loc[[7, 30], "t_session"] += 2.0
+    maps, table = fit_session_markers(df, outlier_sigma=6.0)
+    seg = maps["cam1"]["segments"][0]
+    assert seg["offset"] == pytest.approx(12.5, abs=0.01)
+    assert seg["drift_ppm"] == pytest.approx(50, abs=5)
+    assert seg["n_outliers"] == 2
+    assert table.loc[table["outlier"]].index.tolist() == [7, 30]
+
+
+def test_single_anchor_is_a_pure_offset():
+    maps, _ = fit_session_markers(_markers("mic", [100.0], offset=-3.0, scale=1.0))
+    seg = maps["mic"]["segments"][0]
+    assert (seg["offset"], seg["scale"], seg["n_markers"]) == (pytest.approx(-3.0), 1.0, 1)
+    assert fit_session_markers(_markers("mic", [], 0, 1))[0] == {}
+
+
+def test_piecewise_segments_by_column_and_gap():
+    first = _markers("cam1", np.arange(0, 100, 10), offset=0.0, scale=1.0)
+    second = _markers("cam1", np.arange(1000, 1100, 10), offset=50.0, scale=1.0)
+    df = pd.concat([first, second], ignore_index=True)
+    maps, _ = fit_session_markers(df, piecewise=True, max_gap=500)
+    segments = maps["cam1"]["segments"]
+    assert maps["cam1"]["model"] == "piecewise_linear"
+    assert [s["offset"] for s in segments] == [pytest.approx(0.0, abs=1e-6), pytest.approx(50.0, abs=1e-6)]
+
+    df["segment"] = ["a"] * 10 + ["b"] * 10
+    maps, _ = fit_session_markers(df, piecewise=True)
+    assert [s["segment"] for s in maps["cam1"]["segments"]] == ["a", "b"]
+    assert fit_session_markers(df)[0]["cam1"]["model"] == "linear"
+
+
+def _session(root, name, markers):
+    sync_dir = root / "sessions" / name / "derived" / "sync"
+    sync_dir.mkdir(parents=True)
+    markers.to_csv(sync_dir / "sync_markers.tsv", sep="\t", index=False)
+    return root / "sessions" / name
+
+
+def test_fit_session_writes_maps_and_reports(tmp_path):
+    df = pd.concat([_markers("cam1", np.arange(0, 100, 5), 2.0, 1.0), _markers("mic1", np.arange(0, 100, 5), -1.0, 1.0)])
+    session = _session(tmp_path, "ses-01", df)
+    report = fit_session(session)
+    assert sorted(report["streams"]) == ["cam1", "mic1"]
+    doc = json.loads((session / "derived/sync/timebase_maps/cam1_timebase_map.json").read_text(encoding="utf-8"))
+    assert doc["model"] == "linear" and doc["segments"][0]["offset"] == pytest.approx(2.0)
+    residuals = pd.read_csv(session / "derived/sync/reports/timebase_fit_residuals.tsv", sep="\t")
+    assert len(residuals) == 40 and not residuals["outlier"].any()
+
+
+def test_fit_sessions_isolates_failures(tmp_path):
+    _session(tmp_path, "ses-01", _markers("cam1", np.arange(10), 0.0, 1.0))
+    _session(tmp_path, "ses-02", pd.DataFrame({"stream_id": ["cam1"], "t_stream": [0.0]}))
+    sessions = find_sessions_with_markers(tmp_path)
+    assert [p.name for p in sessions] == ["ses-01", "ses-02"]
+    for jobs in (1, 2):
+        results = fit_sessions(sessions, jobs=jobs, dry_run=True)
+        assert [r["status"] for r in results] == ["ok", "error"]
+        assert "t_session" in results[1]["error"]
@@ -0,0 +1,154 @@
+import json
+import os
+import sys
+
+import pytest
+
+from mdivicomtools import cli
+from mdivicomtools.watch import SessionWatcher, _InotifySource, _PollingSource, session_signature
+
+
+def _dataset(tmp_path, sessions=("ses-01", "ses-02")):
+    root = tmp_path / "ds"
+    for name in sessions:
+        (root / "sessions" / name / "video").mkdir(parents=True)
+        (root / "sessions" / name / "video" / "a.mp4").write_bytes(b"x" * 10)
+    return root
+
+
+def _touch(path, ns):
+    os.utime(path, ns=(ns, ns))
+
+
+def _watcher(root, **kwargs):
+    kwargs.setdefault("quiet_seconds", 0.05)
+    kwargs.setdefault("poll_interval", 0.01)
+    return SessionWatcher(root, use_inotify=False, **kwargs)
+
+
+def test_session_signature_ignores_hidden_entries(tmp_path):
+    root = _dataset(tmp_path, ["ses-01"])
+    session = root / "sessions" / "ses-01"
+    (session / ".partial").write_bytes(b"yyy")
+    (session / ".cache").mkdir()
+    (session / ".cache" / "x").write_bytes(b"zz")
+    _touch(session / "video" / "a.mp4", 5_000)
+    assert session_signature(session) == (1, 10, 5_000)
+    (session / "video" / "b.wav").write_bytes(b"abc")
+    assert session_signature(session)[:2] == (2, 13)
+    assert session_signature(tmp_path / "missing") == (0, 0, 0)
+
+
+def test_polling_watcher_processes_stale_sessions_once(tmp_path):
+    root = _dataset(tmp_path)
+    batches = []
+    watcher = _watcher(root)
+    assert watcher.source.kind == "poll"
+    assert watcher.run(lambda sessions: batches.append([s.name for s in sessions]), once=True) == 2
+    assert batches == [["ses-01", "ses-02"]]
+    state = json.loads((root / ".mdivicom" / "watch.json").read_text(encoding="utf-8"))
+    assert sorted(state["sessions"]) == ["ses-01", "ses-02"]
+
+    # a restart only hands over sessions that changed meanwhile
+    (root / "sessions" / "ses-02" / "video" / "b.mp4").write_bytes(b"y")
+    assert _watcher(root).run(lambda sessions: batches.append([s.name for s in sessions]), once=True) == 1
+    assert batches[-1] == ["ses-02"]
+    assert _watcher(root).run(lambda sessions: batches.append(sessions), once=True) == 0
+
+
+def test_failed_sessions_are_retried(tmp_path):
+    root = _dataset(tmp_path)
+    assert _watcher(root).run(lambda sessions: {"ses-01"}, once=True) == 2
+    seen = []
+    assert _watcher(root).run(lambda sessions: seen.extend(s.name for s in sessions), once=True) == 1
+    assert seen == ["ses-01"]
+
+
+def test_sessions_wait_for_quiet_period(tmp_path):
+    root = _dataset(tmp_path)
+    watcher = _watcher(root, quiet_seconds=10.0)
+    watcher._mark({"ses-01"}, 100.0)
+    assert watcher._take_ready(105.0) == []
+    watcher._mark({"ses-01"}, 108.0)  # another change restarts the quiet period
+    assert watcher._take_ready(115.0) == []
+    ready = watcher._take_ready(118.0)
+    assert [name for name, _ in ready] == ["ses-01"] and watcher.pending == {}
+
+    watcher.processed["ses-01"] = ready[0][1]
+    watcher._mark({"ses-01"}, 120.0)
+    assert watcher._take_ready(131.0) == []  # quiet again, but nothing changed since processing
+
+
+def test_polling_source_sees_new_files_and_in_place_rewrites(tmp_path):
+    root = _dataset(tmp_path)
+    sessions_dir = str(root / "sessions")
+    source = _PollingSource(sessions_dir, interval=0.0, rescan_interval=3600)
+    assert source.wait(0) == set()
+
+    (root / "sessions" / "ses-01" / "video" / "b.mp4").write_bytes(b"new")
+    assert source.wait(0) == {"ses-01"}
+
+    # rewritten in place: directory mtimes stay, only a settling session or a rescan notices
+    target = root / "sessions" / "ses-02" / "video" / "a.mp4"
+    source._signatures["ses-02"] = session_signature(target.parent.parent)
+    _touch(target, 10_000)
+    assert source.wait(0) == set()
+    source.settling.add("ses-02")
+    _touch(target, 20_000)
+    assert source.wait(0) == {"ses-02"}
+
+    source.settling.clear()
+    source._next_rescan = 0.0
+    _touch(target, 30_000)
+    assert source.wait(0) == {"ses-02"}
+
+
+def test_polling_source_picks_up_new_sessions(tmp_path):
+    root = _dataset(tmp_path, ["ses-01"])
+    source = _PollingSource(str(root / "sessions"), interval=0.0)
+    (root / "sessions" / "ses-02").mkdir()
+    (root / "sessions" / "not-a-session").mkdir()
+    assert source.wait(0) == {"ses-02"}
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")
+def test_inotify_source_watches_new_directories(tmp_path):
+    root = _dataset(tmp_path)
+    source = _InotifySource(str(root / "sessions"))
+    try:
+        assert source.wait(0) == set()
+        (root / "sessions" / "ses-02" / "audio").mkdir()
+        assert source.wait(1.0) == {"ses-02"}
+        (root / "sessions" / "ses-02" / "audio" / "a.wav").write_bytes(b"x")
+        (root / "sessions" / "ses-01" / ".hidden").write_bytes(b"x")
+        assert source.wait(1.0) == {"ses-02"}
+    finally:
+        source.close()
+
+
+def test_cli_watch_once_saves_session_plans(tmp_path, capsys):
+    root = _dataset(tmp_path)
+    argv = ["watch", "--dataset", str(root), "--find", "video", "--replace", "vid", "--poll", "--poll-interval", "0.01", "--quiet", "0", "--once"]
+    assert cli.main(argv) == 0
+    out = capsys.readouterr().out
+    assert sorted(line.split("\t")[0] for line in out.splitlines()) == ["ses-01", "ses-02"]
+    assert sorted(p.name for p in (root / ".mdivicom" / "plans").iterdir()) == ["ses-01.plan", "ses-02.plan"]
+
+
+def test_cli_watch_runs_plugin_and_retries_failures(plugin_site, tmp_path, capsys):
+    root = _dataset(tmp_path)
+    out = tmp_path / "runs"
+    argv = ["watch", "--dataset", str(root), "--run", "testplug", "--out", str(out), "--workers", "1", "--poll", "--quiet", "0", "--once"]
+    assert cli.main(argv + ["--config", '{"action": "fail"}']) == 0
+    assert [line.split("\t")[2] for line in capsys.readouterr().out.splitlines()] == ["failed", "failed"]
+    assert cli.main(argv) == 0
+    assert [line.split("\t")[2] for line in capsys.readouterr().out.splitlines()] == ["succeeded", "succeeded"]
+    assert sorted(p.name for p in out.glob("*.pid")) == ["ses-01.pid", "ses-02.pid"]
+    assert cli.main(argv) == 0
+    assert capsys.readouterr().out == ""
+
+
+def test_cli_watch_rejects_outputs_inside_sessions(tmp_path):
+    root = _dataset(tmp_path)
+    with pytest.raises(SystemExit, match="--out must be outside"):
+        cli.main(["watch", "--dataset", str(root), "--run", "testplug", "--out", str(root / "sessions" / "out"), "--once"])
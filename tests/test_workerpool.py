@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from mdivicomtools.workerpool import PluginWorkerPool
+
+
+def _jobs(tmp_path, count, config=None, overrides=None):
+    jobs = []
+    for i in range(count):
+        dataset = tmp_path / "data" / f"ses-{i:02d}"
+        dataset.mkdir(parents=True, exist_ok=True)
+        jobs.append({"dataset_dir": str(dataset), "out_dir": str(tmp_path / "out"), "config": dict(config or {}, **(overrides or {}).get(i, {}))})
+    return jobs
+
+
+def _record(result):
+    with open(result["record_path"], encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def test_pool_recycles_workers_after_max_jobs(plugin_site, tmp_path):
+    pool = PluginWorkerPool("testplug", workers=1, max_jobs_per_worker=2)
+    results = pool.map(_jobs(tmp_path, 5))
+    assert [r["status"] for r in results] == ["succeeded"] * 5
+    assert pool.workers_started == 3 and pool.workers_recycled == 2
+    pids = [r["pid"] for r in results]
+    assert pids[0] == pids[1] != pids[2] == pids[3] != pids[4]
+    for result in results:
+        pid = (tmp_path / "out" / f"{result['dataset_dir'].rsplit('/', 1)[1]}.pid").read_text(encoding="utf-8")
+        assert int(pid) == result["pid"]
+        assert _record(result)["status"] == "succeeded"
+
+
+def test_pool_recycles_workers_over_memory_budget(plugin_site, tmp_path):
+    pool = PluginWorkerPool("testplug", workers=1, max_jobs_per_worker=0, max_worker_rss_mb=1)
+    results = pool.map(_jobs(tmp_path, 3))
+    assert [r["status"] for r in results] == ["succeeded"] * 3
+    assert pool.workers_started == 3 and pool.workers_recycled == 3
+    assert len({r["pid"] for r in results}) == 3
+
+
+def test_failed_job_is_recorded_and_worker_kept(plugin_site, tmp_path):
+    seen = []
+    pool = PluginWorkerPool("testplug", workers=1, max_jobs_per_worker=0)
+    results = pool.map(_jobs(tmp_path, 3, overrides={1: {"action": "fail"}}), on_result=lambda r: seen.append(r["index"]))
+    assert [r["status"] for r in results] == ["succeeded", "failed", "succeeded"]
+    assert results[1]["error"] == "ValueError: cannot process ses-01"
+    record = _record(results[1])
+    assert record["status"] == "failed" and record["error"] == results[1]["error"] and record["run_id"] == results[1]["run_id"]
+    assert sorted(seen) == [0, 1, 2]
+    assert pool.workers_started == 1
+
+
+def test_worker_exit_mid_job_fails_only_that_job(plugin_site, tmp_path):
+    pool = PluginWorkerPool("testplug", workers=1, max_jobs_per_worker=0)
+    results = pool.map(_jobs(tmp_path, 3, overrides={1: {"action": "exit"}}))
+    assert [r["status"] for r in results] == ["succeeded", "failed", "succeeded"]
+    assert results[1]["error"].startswith("WorkerExited:") and "code 3" in results[1]["error"]
+    record = _record(results[1])
+    assert record["status"] == "failed" and record["error"] == results[1]["error"]
+    assert pool.workers_started == 2 and results[0]["pid"] != results[2]["pid"]
+
+
+def test_pool_reports_plugin_load_failure(plugin_site, tmp_path):
+    with pytest.raises(RuntimeError, match="could not load plugin"):
+        PluginWorkerPool("no-such-plugin", workers=1).map(_jobs(tmp_path, 1))
+
+
+def test_pool_rejects_non_python_backend():
+    with pytest.raises(ValueError, match="python-lane"):
+        PluginWorkerPool("testplug", backend="docker")
+
+
+def test_cli_batch_reads_jobs_file_and_reports_failures(plugin_site, tmp_path, capsys):
+    from mdivicomtools import cli
+
+    jobs = _jobs(tmp_path, 2)
+    jobs_file = tmp_path / "jobs.jsonl"
+    jobs_file.write_text(json.dumps({"dataset": jobs[1]["dataset_dir"], "config": {"action": "fail"}}) + "\n", encoding="utf-8")
+    argv = ["batch", "testplug", "--dataset", jobs[0]["dataset_dir"], "--jobs-file", str(jobs_file), "--out", str(tmp_path / "out"), "--workers", "1", "--json"]
+    assert cli.main(argv) == 1
+    payload = json.loads(capsys.readouterr().out)
+    assert [r["status"] for r in payload["results"]] == ["succeeded", "failed"]
+    assert payload["workers_started"] == 1
@@ -0,0 +1,59 @@
+import os
+
+from mdivicomtools.utils.workitems import CopyProgress, copy_plan, expand_entry
+
+
+def _tree(root):
+    files = {"a.txt": b"a" * 10, "c.txt": b"c" * 3000, "sub/d.txt": b"d", "sub/deeper/e.bin": os.urandom(200000)}
+    for rel, data in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    return files
+
+
+def test_parallel_directory_copy(tmp_path):
+    src = tmp_path / "src"
+    files = _tree(src)
+    dst = tmp_path / "dst"
+    progress = CopyProgress(1)
+    (result,) = list(copy_plan({src: dst}, jobs=4, progress=progress))
+    assert result.status == "copied"
+    assert result.files == len(files)
+    assert result.bytes == sum(len(d) for d in files.values())
+    for rel, data in files.items():
+        assert (dst / rel).read_bytes() == data
+    assert (progress.files_done, progress.entries_done, progress.files_failed) == (len(files), 1, 0)
+
+
+def test_unreadable_item_does_not_stop_the_directory(tmp_path):
+    src = tmp_path / "src"
+    (src / "sub").mkdir(parents=True)
+    (src / "a.txt").write_text("a")
+    os.symlink(tmp_path / "missing", src / "b_link")
+    (src / "c.txt").write_text("c")
+    (src / "sub" / "d.txt").write_text("d")
+    dst = tmp_path / "dst"
+
+    for jobs in (1, 4):
+        target = dst / str(jobs)
+        (result,) = list(copy_plan({src: target}, jobs=jobs))
+        assert result.status == "validation_failed"
+        assert result.error is None
+        assert result.files == 3
+        assert [path for path, _ in result.failures] == [str(target / "b_link")]
+        assert "FileNotFoundError" in result.failures[0][1]
+        assert sorted(str(p.relative_to(target)) for p in target.rglob("*") if p.is_file()) == ["a.txt", "c.txt", os.path.join("sub", "d.txt")]
+
+
+def test_missing_source_entry_is_an_entry_error(tmp_path):
+    results = list(copy_plan({tmp_path / "missing": tmp_path / "dst", tmp_path / "missing_dir" / "x": tmp_path / "dst2"}, jobs=1))
+    assert [r.status for r in results] == ["error", "error"]
+
+
+def test_expand_entry_recreates_symlinks_when_asked(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    os.symlink("nowhere", src / "link")
+    kinds = {os.path.basename(i.src): i.kind for i in expand_entry(0, str(src), str(tmp_path / "dst"), handle_symlinks=True)}
+    assert kinds == {"src": "dir", "link": "symlink"}